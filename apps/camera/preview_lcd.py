@@ -15,6 +15,8 @@ NOWE:
 - Automatyczny wybór formatu wyjściowego (JPG→PNG→BMP) i zapamiętanie go (wspólny dla obu zapisów)
 - Atomowy zapis przez .tmp + os.replace
 - W heartbeat i logach podajemy faktyczną ścieżkę do last_frame z wybranym rozszerzeniem
+- Każda klatka (po PREVIEW_ROT) trafia do pierścienia w pamięci współdzielonej "raw"
+  (common.frame_ring) + powiadomienie camera.frame — konsumenci nie czekają na JPEG
 
 ENV:
   DETECTOR=none|haar|tflite|ssd
@@ -31,6 +33,7 @@ ENV:
   BUS_PUB_PORT=5555
   LAST_FRAME_EXT=.jpg|.png|.bmp   # opcjonalnie wymuś rozszerzenie dla zapisów
   SNAP_DIR / SNAP_BASE             # katalog na snapshots (RAW/PROC); domyślnie ~/robot/snapshots
+  FRAME_RING=1                     # pierścień klatek + camera.frame (0 = tylko pliki)
 """
 
 from __future__ import annotations
@@ -105,6 +108,31 @@ def publish(topic: str, payload: dict, add_ts: bool=False):
     except Exception:
         pass
 
+# ── Pierścień klatek (pamięć współdzielona) + powiadomienie camera.frame
+try:
+    from common.frame_ring import FrameRingWriter, FRAME_RING_ENABLE
+except Exception:
+    FrameRingWriter, FRAME_RING_ENABLE = None, False
+RING = None
+
+def ring_publish(frame_bgr):
+    """Surowa klatka (po obrocie, jak raw.jpg) do pierścienia "raw" i camera.frame na bus."""
+    global RING, FRAME_RING_ENABLE
+    if not FRAME_RING_ENABLE:
+        return
+    try:
+        img = np.ascontiguousarray(rotate_bgr(frame_bgr, ROT))
+        if RING is None or img.nbytes > RING.slot_bytes:
+            RING = FrameRingWriter("raw", slot_bytes=img.nbytes)
+            print(f"[preview] frame ring: {RING.path} slots={RING.slots} slot={img.nbytes}B", flush=True)
+        h, w = img.shape[:2]
+        c = img.shape[2] if img.ndim == 3 else 1
+        RING.write(img, w, h, c, "bgr24" if c == 3 else "gray8")
+        publish("camera.frame", RING.notice())
+    except Exception as e:
+        print(f"[preview] frame ring disabled: {e}", flush=True)
+        FRAME_RING_ENABLE = False
+
 # ── Heartbeat helper (podamy realną ścieżkę last_frame)
 _last_frame_used_path: Optional[str] = None
 def hb_publish(fps: float, lcd_active: bool):
@@ -429,6 +457,8 @@ def main():
                 time.sleep(0.02)
                 continue
 
+            ring_publish(frame)
+
             # Detekcja (opcjonalnie)
             detections: List[Tuple[str,float,Tuple[int,int,int,int]]] = []
 
@@ -11,6 +11,9 @@ DT = 1.0 / RATE_HZ
 SPEED_FWD = float(os.getenv("DEMO_SPEED_FWD", "0.25"))
 SPEED_ROT = float(os.getenv("DEMO_SPEED_ROT", "0.25"))
 SEG_SEC = float(os.getenv("DEMO_SEG_SEC", "2.0"))
+# DEMO_UPLOAD=1: cała ścieżka jedną wiadomością cmd.trajectory — wykonuje motion_bridge
+# własnym zegarem (bez jittera sieci); 0 = strumień drive do apps/motion/main.py jak dotąd
+UPLOAD = os.getenv("DEMO_UPLOAD", "0") == "1"
 
 def _mk_pub(addr: str):
     import zmq
@@ -29,6 +32,13 @@ def _drive_for(sock, lx: float, az: float, dur: float):
         _send(sock, {"type": "drive", "lx": lx, "az": az})
         time.sleep(DT)
 
+def _upload(sock):
+    # [t, vx, yaw]; w cmd.* yaw>0 = w prawo
+    segs = [[SEG_SEC, SPEED_FWD, 0.0], [SEG_SEC, 0.0, SPEED_ROT], [SEG_SEC, -SPEED_FWD, 0.0]]
+    msg = {"segments": segs, "rid": f"demo-{int(time.time())}", "ts": time.time()}
+    sock.send_multipart([b"cmd.trajectory", json.dumps(msg).encode("utf-8")])
+    print(f"[DEMO] uploaded {len(segs)} segments ({len(segs) * SEG_SEC:.1f} s) → cmd.trajectory")
+
 def main():
     print(f"[DEMO] Connecting PUB to {PUB_ADDR} topic='{TOPIC}'")
     sock = _mk_pub(PUB_ADDR)
@@ -36,6 +46,11 @@ def main():
     # “przebudzenie” subskrybentów
     time.sleep(0.2)
 
+    if UPLOAD:
+        _upload(sock)
+        time.sleep(0.1)
+        return
+
     try:
         print("[DEMO] forward")
         _drive_for(sock, SPEED_FWD, 0.0, SEG_SEC)
@@ -11,11 +11,10 @@ PROJ_ROOT = "/home/pi/robot"
 if PROJ_ROOT not in sys.path:
     sys.path.insert(0, PROJ_ROOT)
 
-from common.bus import BusPub, BusSub
+from common.bus import BusPub
+from common.reactor import BusReactor
 
 PUB = BusPub()
-SUB_BTN = BusSub("ui.button")
-SUB_MS  = BusSub("motion.state")
 
 HOME_ITEMS = ["Dema", "Autonomia", "Teleop", "Ustawienia", "Logi"]
 LOW_BATTERY_LIMIT = 0.15
@@ -82,36 +81,34 @@ def on_right():
 
 def log(msg): print(time.strftime("[%H:%M:%S]"), msg, flush=True)
 
+def on_button(topic, p):
+    p = p if isinstance(p, dict) else {}
+    btn = (p.get("id") or "").upper()
+    ev  = (p.get("event") or "").lower()
+    if ev == "down":
+        if   btn == "LEFT":  on_left()
+        elif btn == "RIGHT": on_right()
+        elif btn == "OK":    on_ok()
+        elif btn == "BACK":  on_back()
+
+def on_motion_state(topic, p):
+    b = p.get("battery") if isinstance(p, dict) else None
+    try:
+        state["battery"] = float(b) if b is not None else None
+    except Exception:
+        pass
+
 def main():
     log("Menu: start (buttons + motion.state)")
-    last_pub = 0
+    reactor = BusReactor(name="menu")
+    reactor.on("ui.button", on_button)
+    reactor.on("motion.state", on_motion_state)
+    # periodic menu state (dla debug/logów)
+    reactor.call_every(1.0, pub_menu_state, now=True)
     try:
-        while True:
-            # buttons
-            t, p = SUB_BTN.recv(timeout_ms=50)
-            if t:
-                btn = (p.get("id") or "").upper()
-                ev  = (p.get("event") or "").lower()
-                if ev == "down":
-                    if   btn == "LEFT":  on_left()
-                    elif btn == "RIGHT": on_right()
-                    elif btn == "OK":    on_ok()
-                    elif btn == "BACK":  on_back()
-            # battery
-            t2, p2 = SUB_MS.recv(timeout_ms=0)
-            if t2:
-                b = p2.get("battery")
-                try:
-                    state["battery"] = float(b) if b is not None else None
-                except Exception:
-                    pass
-            # periodic menu state (dla debug/logów)
-            if time.time() - last_pub > 1.0:
-                last_pub = time.time()
-                pub_menu_state()
-    except KeyboardInterrupt:
-        pass
+        reactor.run()
     finally:
+        reactor.close()
         log("Menu: bye")
 
 if __name__ == "__main__":
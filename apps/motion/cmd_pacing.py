@@ -0,0 +1,90 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+apps/motion/cmd_pacing.py — scalanie komend ruchu w paczce + tempo (token bucket).
+
+Przytrzymany klawisz w dashboardzie daje serię cmd.move co kilkanaście ms. Dotąd most
+wykonywał każdą po kolei, a te w odstępie < MIN_CMD_GAP odrzucał (skip min_gap) —
+często właśnie najnowszą, więc robot jechał w nieaktualnym kierunku.
+
+coalesce(batch, kind) — w obrębie jednej paczki odczytanej z gniazda:
+  * kolejne ruchy zwijają się do najnowszego (starsze → merged),
+  * stop nigdy nie jest scalany ani przestawiany; ruchy przed nim są zbędne (merged),
+  * pozostałe wiadomości przechodzą w kolejności (ruch przed nimi jest wykonywany).
+
+TokenBucket — tempo wykonania ruchów: brak żetonu nie oznacza odrzucenia, tylko
+odłożenie ostatniej intencji do chwili wait_s() (nowsza intencja zastępuje odłożoną).
+
+    bucket = TokenBucket(rate_hz=10, burst=1)
+    if not bucket.take():
+        defer(cmd, bucket.wait_s())
+"""
+from __future__ import annotations
+
+import time
+from typing import Callable, List, Optional, Sequence, Tuple, TypeVar
+
+T = TypeVar("T")
+
+MOVE = "move"
+STOP = "stop"
+
+
+def coalesce(batch: Sequence[T], kind: Callable[[T], Optional[str]]) -> Tuple[List[T], List[Tuple[T, T]]]:
+    """
+    Zwija paczkę komend: zwraca (do_wykonania, [(scalona, zastąpiona_przez), ...]).
+    kind(x) → MOVE | STOP | None (None = przechodzi bez zmian, w kolejności).
+    """
+    out: List[T] = []
+    merged: List[Tuple[T, T]] = []
+    pending: Optional[T] = None
+    for it in batch:
+        k = kind(it)
+        if k == MOVE:
+            if pending is not None:
+                merged.append((pending, it))
+            pending = it
+            continue
+        if pending is not None:
+            if k == STOP:
+                merged.append((pending, it))
+            else:
+                out.append(pending)
+            pending = None
+        out.append(it)
+    if pending is not None:
+        out.append(pending)
+    return out, merged
+
+
+class TokenBucket:
+    """Klasyczny token bucket: rate_hz żetonów/s, pojemność burst (rate_hz<=0 → bez limitu)."""
+
+    __slots__ = ("rate", "burst", "tokens", "ts")
+
+    def __init__(self, rate_hz: float, burst: float = 1.0, now: Optional[float] = None):
+        self.rate = float(rate_hz)
+        self.burst = max(1.0, float(burst))
+        self.tokens = self.burst
+        self.ts = time.monotonic() if now is None else now
+
+    def _refill(self, now: float) -> None:
+        if now > self.ts:
+            self.tokens = min(self.burst, self.tokens + (now - self.ts) * self.rate)
+        self.ts = now
+
+    def take(self, now: Optional[float] = None) -> bool:
+        if self.rate <= 0.0:
+            return True
+        self._refill(time.monotonic() if now is None else now)
+        if self.tokens >= 1.0:
+            self.tokens -= 1.0
+            return True
+        return False
+
+    def wait_s(self, now: Optional[float] = None) -> float:
+        """Czas do najbliższego żetonu (0 = dostępny)."""
+        if self.rate <= 0.0:
+            return 0.0
+        self._refill(time.monotonic() if now is None else now)
+        return max(0.0, (1.0 - self.tokens) / self.rate)
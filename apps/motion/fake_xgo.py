@@ -0,0 +1,72 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+apps/motion/fake_xgo.py — atrapa sterownika XGO (bez UART) do DRY_RUN i benchmarków.
+
+Udaje API xgolib.XGO używane przez motion_bridge: ruch (forward/back/left/right/
+turnleft/turnright/stop, prędkość ciągła move_x/move_y/turn) i odczyty (bateria, roll/pitch/yaw, firmware).
+Każde wywołanie ruchu jest zapisywane w `calls` (ts, metoda, argumenty).
+
+ENV:
+  XGO_FAKE_LATENCY_MS=0   # sztuczny czas pojedynczego wywołania (zapis do UART ~1–3 ms)
+  XGO_FAKE_READ_MS=0      # sztuczny czas odczytu (round-trip ramka → odpowiedź)
+"""
+import os, time, threading, collections
+from typing import Any, Deque, Tuple
+
+FAKE_LATENCY_MS = float(os.getenv("XGO_FAKE_LATENCY_MS", "0"))
+FAKE_READ_MS    = float(os.getenv("XGO_FAKE_READ_MS", "0"))
+
+
+class FakeXGO:
+    def __init__(self, port: str = "/dev/null", latency_ms: float = FAKE_LATENCY_MS, maxlen: int = 1000,
+                 read_ms: float = FAKE_READ_MS, **_: Any):
+        self.port = port
+        self.latency_s = max(0.0, float(latency_ms)) / 1000.0
+        self.read_s = max(0.0, float(read_ms)) / 1000.0
+        self.calls: Deque[Tuple[float, str, tuple]] = collections.deque(maxlen=maxlen)
+        self._lock = threading.Lock()
+        self._yaw = 0.0
+        self._turn = 0.0
+
+    def _call(self, name: str, *args) -> None:
+        if self.latency_s:
+            time.sleep(self.latency_s)
+        with self._lock:
+            self.calls.append((time.time(), name, args))
+            if name in ("turnleft", "turnright"):
+                self._turn = float(args[0]) if args else 0.0
+                self._yaw += self._turn * (0.1 if name == "turnleft" else -0.1)
+            elif name == "turn":  # ze znakiem: dodatnie = w lewo
+                self._turn = abs(float(args[0]))
+                self._yaw += float(args[0]) * 0.1
+            elif name == "stop":
+                self._turn = 0.0
+
+    # ── ruch ────────────────────────────────────────────────────────────────
+    def forward(self, step): self._call("forward", step)
+    def back(self, step): self._call("back", step)
+    def left(self, step): self._call("left", step)
+    def right(self, step): self._call("right", step)
+    def turnleft(self, step): self._call("turnleft", step)
+    def turnright(self, step): self._call("turnright", step)
+    def stop(self): self._call("stop")
+    def move_x(self, speed): self._call("move_x", speed)
+    def move_y(self, speed): self._call("move_y", speed)
+    def turn(self, speed): self._call("turn", speed)
+
+    # ── odczyty ─────────────────────────────────────────────────────────────
+    def _read(self, value: Any) -> Any:
+        if self.read_s:
+            time.sleep(self.read_s)
+        return value
+
+    def read_battery(self): return self._read(87)
+    def read_firmware(self): return self._read("FAKE-1.0")
+    def read_roll(self): return self._read(0.0)
+    def read_pitch(self): return self._read(0.0)
+
+    def read_yaw(self):
+        with self._lock:
+            yaw = self._yaw
+        return self._read(yaw)
@@ -1,28 +1,36 @@
 # apps/motion/main.py
 """
 Pętla ruchu Rider-Pi:
-- SUB ZeroMQ (topic 'motion') z brokera (XPUB) na tcp://127.0.0.1:5556
+- SUB ZeroMQ (topic 'motion') z brokera (XPUB); adres z common.bus.bus_endpoint (tcp|ipc)
 - sterowanie: {"type":"drive","lx":float,"az":float} / {"type":"stop"}
 - bezpieczeństwo: MOTION_ENABLE / plik-flag, E-Stop, clamp prędkości
+  (flagi z pamięci — apps.safety.flag_watch; pojawienie się estop.on zatrzymuje od razu, poza tickiem)
 - watchdog: auto STOP po braku komend
+- pętla o stałym okresie od terminów (common.ticker) — bez dryfu; w każdym ticku cała kolejka
+  z busa (najnowszy drive + każdy stop, apps.motion.cmd_pacing.coalesce); jitter w motion.state.loop
 - rampa prędkości (miękki start/stop) — sterowanie impulsowe (mix yaw+drive)
-- telemetria PUB 'motion.state' na broker (tcp://127.0.0.1:5555)
+- telemetria PUB 'motion.state' na broker (XSUB)
 """
 
 import os
 import time
 import json
 import logging
-from typing import Optional
+import threading
+from typing import Any, Callable, Dict, List, Optional
 
-from apps.safety.estop import estop_triggered, motion_enabled, safe_speed
+from apps.safety.estop import estop_triggered, motion_enabled, on_estop, safe_speed
+from apps.motion.cmd_pacing import MOVE, STOP, coalesce
+from common.bus import bus_endpoint
+from common.ticker import FixedRateTicker
 from common.pidlock import single_instance
 _PID_FD = single_instance()
 
 # ── ENV ───────────────────────────────────────────────────────────────────────
 WATCHDOG_MS   = int(os.getenv("MOTION_WATCHDOG_MS", "500"))              # ms
 LOOP_DT       = float(os.getenv("MOTION_LOOP_DT", "0.02"))               # 50 Hz
-BUS_ADDR      = os.getenv("BUS_SUB_ADDR", "tcp://127.0.0.1:5556")        # SUB
+DRAIN_MAX     = int(os.getenv("MOTION_DRAIN_MAX", "200"))                # wiadomości z busa na tick (limit)
+BUS_ADDR      = bus_endpoint("sub")                                      # SUB (BUS_SUB_ADDR / BUS_TRANSPORT)
 BUS_TOPIC     = os.getenv("MOTION_TOPIC", "motion")
 SPEED_LIMIT   = float(os.getenv("MOTION_SPEED_LIMIT", "0.6"))
 LOG_LEVEL     = os.getenv("MOTION_LOG_LEVEL", "INFO").upper()
@@ -37,7 +45,7 @@ IMPULSE_DRIVE = float(os.getenv("MOTION_DRIVE_IMPULSE_SEC", os.getenv("MOTION_IM
 IMPULSE_YAW   = float(os.getenv("MOTION_YAW_IMPULSE_SEC",   "0.18"))
 
 # telemetria
-STATE_PUB_ADDR   = os.getenv("BUS_PUB_ADDR", "tcp://127.0.0.1:5555")
+STATE_PUB_ADDR   = bus_endpoint("pub")
 STATE_TOPIC      = os.getenv("MOTION_STATE_TOPIC", "motion.state")
 STATE_HZ         = float(os.getenv("MOTION_TELEM_HZ", "5.0"))
 
@@ -103,15 +111,16 @@ class MotionTelemetry:
         self._pub = None
         try:
             import zmq
+            from common.bus import connect_and_wait
             self._ctx = zmq.Context.instance()
             self._pub = self._ctx.socket(zmq.PUB)
-            self._pub.connect(self.addr)
+            connect_and_wait(self._pub, self.addr)
             self._ok = True
-            time.sleep(0.1)
             LOG.info(f"Telemetry PUB → {self.addr} topic='{topic}' @ {rate_hz} Hz")
         except Exception as e:
             LOG.warning(f"Telemetry disabled ({e})")
-    def maybe_publish(self, state: dict):
+    def maybe_publish(self, make_state: Callable[[], Dict[str, Any]]):
+        """make_state() wołane tylko gdy pora publikacji (stan z jitterem nie jest darmowy)."""
         if not self._ok:
             return
         now = time.time()
@@ -119,6 +128,7 @@ class MotionTelemetry:
             return
         self.last_pub = now
         try:
+            state = make_state()
             payload = json.dumps(state, ensure_ascii=False).encode("utf-8")
             self._pub.send_multipart([self.topic, payload])
         except Exception as e:
@@ -132,13 +142,19 @@ class MotionController:
         self.stopped = True
         self.t_lx = 0.0; self.t_az = 0.0
         self.o_lx = 0.0; self.o_az = 0.0
+        self._io = threading.Lock()  # robot.* z pętli i z wątku watchera flag (E-Stop)
     def _stop_immediate(self):
         self.t_lx = self.t_az = 0.0
         self.o_lx = self.o_az = 0.0
-        try: self.robot.stop()
+        try:
+            with self._io: self.robot.stop()
         finally:
             self.stopped = True
             LOG.info("MOTION: STOP")
+    def estop_now(self):
+        """Callback flagi estop.on — stop od razu, bez czekania na tick."""
+        LOG.warning("E-STOP flag → STOP")
+        self._stop_immediate()
     def stop(self):
         self.t_lx = self.t_az = 0.0
     def drive(self, lx: float, az: float):
@@ -169,7 +185,7 @@ class MotionController:
         self.o_lx, self.o_az = new_lx, new_az
         if changed:
             if abs(self.o_lx) > EPS or abs(self.o_az) > EPS:
-                self.robot.move(lx=self.o_lx, az=self.o_az)
+                with self._io: self.robot.move(lx=self.o_lx, az=self.o_az)
                 self.stopped = False
             else:
                 if not self.stopped:
@@ -197,6 +213,13 @@ class MotionBus:
         except Exception as e:
             LOG.warning(f"MotionBus niedostępny ({e}). Uruchamiam bez busa.")
             self._ok = False
+    def _parse(self, raw: List[bytes]) -> Optional[dict]:
+        payload_bytes = raw[1] if len(raw) >= 2 else raw[-1]
+        payload = payload_bytes.decode("utf-8", errors="replace").strip()
+        try: return json.loads(payload)
+        except json.JSONDecodeError:
+            LOG.warning(f"Nieparsowalny payload: {payload[:200]}")
+        return None
     def recv_nowait(self) -> Optional[dict]:
         if not self._ok:
             return None
@@ -204,15 +227,28 @@ class MotionBus:
             import zmq
             socks = dict(self._poller.poll(timeout=0))
             if self._sub in socks and socks[self._sub] == zmq.POLLIN:
-                raw = self._sub.recv_multipart()
-                payload_bytes = raw[1] if len(raw) >= 2 else raw[-1]
-                payload = payload_bytes.decode("utf-8", errors="replace").strip()
-                try: return json.loads(payload)
-                except json.JSONDecodeError:
-                    LOG.warning(f"Nieparsowalny payload: {payload[:200]}")
+                return self._parse(self._sub.recv_multipart())
         except Exception as e:
             LOG.warning(f"Błąd odbioru z busa: {e}")
         return None
+    def drain(self, max_n: int = DRAIN_MAX) -> List[dict]:
+        """Wszystko, co czeka w gnieździe (do max_n), bez blokowania."""
+        out: List[dict] = []
+        if not self._ok:
+            return out
+        import zmq
+        try:
+            for _ in range(max_n):
+                try:
+                    raw = self._sub.recv_multipart(flags=zmq.NOBLOCK)
+                except zmq.Again:
+                    break
+                cmd = self._parse(raw)
+                if isinstance(cmd, dict):
+                    out.append(cmd)
+        except Exception as e:
+            LOG.warning(f"Błąd odbioru z busa: {e}")
+        return out
 
 # ── Obsługa komend ───────────────────────────────────────────────────────────
 def _handle_cmd(ctrl: MotionController, cmd: dict):
@@ -227,6 +263,10 @@ def _handle_cmd(ctrl: MotionController, cmd: dict):
     else:
         LOG.debug(f"Nieznana komenda: {cmd}")
 
+def _cmd_kind(cmd: dict) -> Optional[str]:
+    ctype = str(cmd.get("type", "")).lower()
+    return MOVE if ctype == "drive" else STOP if ctype == "stop" else None
+
 # ── Main loop ────────────────────────────────────────────────────────────────
 def main():
     logging.basicConfig(
@@ -235,35 +275,48 @@ def main():
     )
     robot = _make_adapter()
     ctrl = MotionController(robot)
+    on_estop(ctrl.estop_now)
     bus = MotionBus(BUS_ADDR, BUS_TOPIC)
     telem = MotionTelemetry(STATE_PUB_ADDR, STATE_TOPIC, STATE_HZ)
+    ticker = FixedRateTicker(LOOP_DT)
+    drained = {"last": 0, "max": 0, "merged": 0}  # max: od poprzedniej publikacji motion.state
     LOG.info("Motion loop start")
+
+    def make_state() -> Dict[str, Any]:
+        loop = ticker.stats()
+        loop["drained"] = dict(drained)
+        drained["max"] = 0
+        return {
+            "ts": time.time(),
+            "enabled": bool(motion_enabled()),
+            "estop": bool(estop_triggered()),
+            "stopped": bool(ctrl.stopped),
+            "target": {"lx": ctrl.t_lx, "az": ctrl.t_az},
+            "output": {"lx": ctrl.o_lx, "az": ctrl.o_az},
+            "last_cmd_age_ms": int((time.time() - ctrl.last_cmd_ts) * 1000.0),
+            "watchdog_ms": WATCHDOG_MS,
+            "ramp": {"lx": RAMP_LX, "az": RAMP_AZ},
+            "limit": SPEED_LIMIT,
+            "impulses": {"drive": IMPULSE_DRIVE, "yaw": IMPULSE_YAW},
+            "loop": loop,
+        }
+
     try:
-        last = time.time()
         while True:
-            cmd = bus.recv_nowait()
-            if cmd is not None:
-                _handle_cmd(ctrl, cmd)
-            now = time.time()
-            dt = now - last; last = now
+            dt = ticker.wait()
             if dt <= 0 or dt > 1.0:
                 dt = LOOP_DT
+            # cała kolejka naraz: najnowszy drive + każdy stop (w kolejności), reszta scalona
+            cmds = bus.drain()
+            if cmds:
+                todo, merged = coalesce(cmds, _cmd_kind)
+                drained["last"] = len(cmds)
+                drained["max"] = max(drained["max"], len(cmds))
+                drained["merged"] += len(merged)
+                for cmd in todo:
+                    _handle_cmd(ctrl, cmd)
             ctrl.tick(dt)
-            state = {
-                "ts": time.time(),
-                "enabled": bool(motion_enabled()),
-                "estop": bool(estop_triggered()),
-                "stopped": bool(ctrl.stopped),
-                "target": {"lx": ctrl.t_lx, "az": ctrl.t_az},
-                "output": {"lx": ctrl.o_lx, "az": ctrl.o_az},
-                "last_cmd_age_ms": int((time.time() - ctrl.last_cmd_ts) * 1000.0),
-                "watchdog_ms": WATCHDOG_MS,
-                "ramp": {"lx": RAMP_LX, "az": RAMP_AZ},
-                "limit": SPEED_LIMIT,
-                "impulses": {"drive": IMPULSE_DRIVE, "yaw": IMPULSE_YAW},
-            }
-            telem.maybe_publish(state)
-            time.sleep(LOOP_DT)
+            telem.maybe_publish(make_state)
     except KeyboardInterrupt:
         LOG.info("KeyboardInterrupt – zatrzymuję ruch.")
     except Exception as e:
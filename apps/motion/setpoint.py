@@ -0,0 +1,166 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+apps/motion/setpoint.py — tryb ciągłej prędkości zadanej (cmd.velocity) dla motion_bridge.
+
+Tryb impulsowy (cmd.move) na każdą komendę robi stop (PREEMPT) + nowy ruch + deadman,
+więc przytrzymany kierunek to piła stop/start i podwójny ruch na UART. Tu klient
+strumieniuje {vx, vy, yaw} (do ~20 Hz), a most:
+  * rampuje bieżącą prędkość do zadanej z ograniczonym przyspieszeniem (accel/s),
+  * wysyła do XGO tylko osie, których wartość po kwantyzacji (quant) się zmieniła,
+  * zatrzymuje robota, gdy strumień ucichnie (keepalive — deadman po stronie mostu).
+
+    ramp = SetpointRamp(accel=4.0, quant=0.05)
+    ramp.set_target(vx=0.5)
+    while ramp.step(dt):                # True = jeszcze nie osiągnięto celu
+        for axis, q in ramp.changes().items():
+            write(axis, q)
+
+SetpointStream to samo na reaktorze mostu (timer rampy + keepalive):
+
+    sp = SetpointStream(reactor, hw_write, hw_stop, limits=(vx_max, vy_max, yaw_max))
+    sp.set(vx, vy, yaw, keepalive_s=0.3)   # każda wiadomość cmd.velocity
+
+Wartości znormalizowane do [-1, 1]; konwencje osi jak w cmd.move (yaw<0 => left).
+"""
+from __future__ import annotations
+
+import time
+from typing import Any, Callable, Dict, Optional, Sequence
+
+from common.reactor import RearmableTimer
+
+AXES = ("vx", "vy", "yaw")
+
+# oś → (akcja XGO w motion_bridge._HW_ACTIONS, znak); move_y/turn: dodatnie = w lewo,
+# a w cmd.* vy>0 = prawo, yaw<0 = lewo
+HW_AXES = {"vx": ("vel_x", 1.0), "vy": ("vel_y", -1.0), "yaw": ("vel_yaw", -1.0)}
+
+
+def quantize(v: float, q: float) -> float:
+    if q <= 0.0:
+        return v
+    return round(round(v / q) * q, 6)
+
+
+def _clamp(v: float) -> float:
+    return -1.0 if v < -1.0 else 1.0 if v > 1.0 else v
+
+
+class SetpointRamp:
+    """Cel + bieżąca prędkość per oś; changes() zwraca tylko osie do wysłania."""
+
+    __slots__ = ("accel", "quant", "target", "current", "sent")
+
+    def __init__(self, accel: float = 4.0, quant: float = 0.05):
+        self.accel = float(accel)   # jednostki/s; <=0 = skok od razu do celu
+        self.quant = float(quant)
+        self.target: Dict[str, float] = dict.fromkeys(AXES, 0.0)
+        self.current: Dict[str, float] = dict.fromkeys(AXES, 0.0)
+        self.sent: Dict[str, float] = dict.fromkeys(AXES, 0.0)
+
+    def set_target(self, vx: float = 0.0, vy: float = 0.0, yaw: float = 0.0) -> None:
+        self.target = {"vx": _clamp(vx), "vy": _clamp(vy), "yaw": _clamp(yaw)}
+
+    def step(self, dt: float) -> bool:
+        """Przesuwa bieżącą prędkość o accel*dt w stronę celu; True = wciąż rampuje."""
+        lim = self.accel * max(0.0, dt) if self.accel > 0.0 else float("inf")
+        ramping = False
+        for a in AXES:
+            d = self.target[a] - self.current[a]
+            if abs(d) <= lim:
+                self.current[a] = self.target[a]
+            else:
+                self.current[a] += lim if d > 0 else -lim
+                ramping = True
+        return ramping
+
+    def changes(self) -> Dict[str, float]:
+        """Osie, których skwantowana bieżąca wartość różni się od wysłanej (i oznacza je jako wysłane)."""
+        out: Dict[str, float] = {}
+        for a in AXES:
+            q = quantize(self.current[a], self.quant)
+            if q != self.sent[a]:
+                out[a] = self.sent[a] = q
+        return out
+
+    @property
+    def idle(self) -> bool:
+        """Cel zerowy i zero wysłane — robot stoi."""
+        return not any(self.target.values()) and not any(self.sent.values())
+
+    def reset(self) -> None:
+        """Po stopie sprzętowym (deadman, cmd.stop, preempcja): wszystko na zero."""
+        for d in (self.target, self.current, self.sent):
+            for a in AXES:
+                d[a] = 0.0
+
+
+class SetpointStream:
+    """
+    SetpointRamp na reaktorze: krok rampy co 1/ramp_hz, dopóki cel nie jest osiągnięty,
+    oraz keepalive — brak nowego set() przez keepalive_s zatrzymuje robota.
+
+    hw_write(axis, value) — value = skwantowana oś × limit osi, ze znakiem z HW_AXES,
+    hw_stop()             — wszystkie osie na zero (też gdy po kwantyzacji wszystko = 0:
+                            jeden stop zamiast trzech zapisów),
+    on_expire(idle, late_s) — keepalive wygasł (po stopie); idle = robot już stał.
+    """
+
+    def __init__(self, reactor: Any, hw_write: Callable[[str, float], None], hw_stop: Callable[[], None],
+                 limits: Sequence[float] = (1.0, 1.0, 1.0), accel: float = 4.0, quant: float = 0.05,
+                 ramp_hz: float = 50.0, on_expire: Optional[Callable[[bool, float], None]] = None):
+        self.ramp = SetpointRamp(accel, quant)
+        self.period = 1.0 / max(1.0, float(ramp_hz))
+        self.scale = {a: HW_AXES[a][1] * float(lim) for a, lim in zip(AXES, limits)}
+        self._hw_write = hw_write
+        self._hw_stop = hw_stop
+        self._on_expire = on_expire
+        self._last = 0.0
+        self._ramp_timer = RearmableTimer(reactor, self._tick)
+        self.keepalive = RearmableTimer(reactor, self._expire)
+
+    @property
+    def active(self) -> bool:
+        """Strumień trwa (keepalive uzbrojony)."""
+        return self.keepalive.active
+
+    def set(self, vx: float, vy: float, yaw: float, keepalive_s: float) -> None:
+        """Nowy cel rampy + keepalive; stojąca rampa rusza od razu (pierwszy krok = jeden okres)."""
+        self.ramp.set_target(vx, vy, yaw)
+        self.keepalive.arm(keepalive_s)
+        if not self._ramp_timer.active:
+            self._last = time.monotonic() - self.period
+            self._tick()
+
+    def halt(self) -> None:
+        """Zeruje stan strumienia; stop sprzętowy robi wołający."""
+        self.ramp.reset()
+        self._ramp_timer.cancel()
+        self.keepalive.cancel()
+
+    def _tick(self) -> None:
+        now = time.monotonic()
+        ramping = self.ramp.step(now - self._last)
+        self._last = now
+        self._write()
+        if ramping:
+            self._ramp_timer.arm(self.period)
+
+    def _write(self) -> None:
+        ch = self.ramp.changes()
+        if not ch:
+            return
+        if not any(self.ramp.sent.values()):
+            self._hw_stop()
+            return
+        for axis, q in ch.items():
+            self._hw_write(axis, round(q * self.scale[axis], 3))
+
+    def _expire(self) -> None:
+        idle = self.ramp.idle
+        if not idle:
+            self.halt()
+            self._hw_stop()
+        if self._on_expire is not None:
+            self._on_expire(idle, self.keepalive.late_s)
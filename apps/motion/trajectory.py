@@ -0,0 +1,126 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+apps/motion/trajectory.py — plan trajektorii (cmd.trajectory) wykonywany lokalnie przez most.
+
+Dotąd dema (apps/demos/trajectory.py) publikowały drive co 1/DEMO_RATE_HZ z klienta,
+więc wierność ścieżki zależała od jittera sieci/BUS. Teraz cała ścieżka idzie jedną
+wiadomością, a most przełącza segmenty według własnego zegara:
+
+  * terminy liczone od startu (t0 + suma czasów poprzednich segmentów), nie „sleep po
+    sleepie” — spóźnienie jednego przełączenia nie przesuwa kolejnych (brak dryfu),
+  * przy dużym spóźnieniu (np. zablokowany wątek) index_at() przeskakuje od razu na
+    segment właściwy dla bieżącego czasu.
+
+    plan = TrajectoryPlan([(2.0, 0.25, 0.0, 0.0), (1.5, 0.0, 0.0, 0.3)])
+    k = plan.index_at(now - t0)         # len(plan) = koniec
+    next_at = t0 + plan.end_of(k)
+
+TrajectoryRunner wykonuje plan na reaktorze mostu (jeden RearmableTimer na koniec segmentu):
+
+    runner = TrajectoryRunner(reactor, setpoint.set, publish)
+    runner.start(plan, rid)             # publish({"state": "started", ...}), pierwszy segment od razu
+    runner.abort("stop")                # cmd.stop / preempcja / timeout
+"""
+from __future__ import annotations
+
+import bisect
+import time
+from typing import Any, Callable, Dict, List, Optional, Sequence, Tuple
+
+from common.reactor import RearmableTimer
+
+Segment = Tuple[float, float, float, float]  # (dur, vx, vy, yaw) — jak common.schemas.as_segments
+
+
+class TrajectoryPlan:
+    __slots__ = ("segments", "starts", "total")
+
+    def __init__(self, segments: Sequence[Segment]):
+        self.segments: List[Segment] = list(segments)
+        self.starts: List[float] = []
+        acc = 0.0
+        for dur, *_ in self.segments:
+            self.starts.append(acc)
+            acc += dur
+        self.total = acc
+
+    def __len__(self) -> int:
+        return len(self.segments)
+
+    def index_at(self, elapsed: float) -> int:
+        """Segment obowiązujący po elapsed sekundach od startu; len(self) = trajektoria skończona."""
+        if elapsed >= self.total:
+            return len(self.segments)
+        return max(0, bisect.bisect_right(self.starts, elapsed) - 1)
+
+    def end_of(self, k: int) -> float:
+        """Koniec segmentu k (sekundy od startu)."""
+        return self.starts[k] + self.segments[k][0] if k < len(self.segments) else self.total
+
+
+class TrajectoryRunner:
+    """
+    Segmenty planu podawane na rampę trybu cmd.velocity według zegara mostu.
+
+    set_velocity(vx, vy, yaw, keepalive_s) — np. SetpointStream.set; keepalive sięga końca
+        segmentu + margin_s (strażnik, gdyby zegar trajektorii stanął),
+    publish(msg) — stan dla motion.trajectory: {rid, state, idx, n, elapsed_s, ts, ...};
+        state: started (total_s) | segment (late_ms[, skipped]) | done (late_ms) | <powód> (by).
+    Na końcu cel zero — rampa wyhamowuje, a keepalive domyka strumień.
+    """
+
+    def __init__(self, reactor: Any, set_velocity: Callable[[float, float, float, float], None],
+                 publish: Callable[[Dict[str, Any]], None], margin_s: float = 0.3):
+        self._set_velocity = set_velocity
+        self._publish = publish
+        self.margin_s = float(margin_s)
+        self.plan: Optional[TrajectoryPlan] = None
+        self.rid: Any = None
+        self.t0 = 0.0
+        self.idx = -1
+        self._timer = RearmableTimer(reactor, self._step)
+
+    @property
+    def active(self) -> bool:
+        return self.plan is not None
+
+    def start(self, plan: TrajectoryPlan, rid: Any = None) -> None:
+        """Nowa trajektoria (bieżąca przerwana jako preempted)."""
+        self.abort("preempted", by=rid)
+        self.plan, self.rid, self.t0, self.idx = plan, rid, time.monotonic(), -1
+        self._pub("started", total_s=round(plan.total, 3))
+        self._step()
+
+    def abort(self, reason: str, by: Any = None) -> bool:
+        """Przerwanie bieżącej trajektorii (stan rampy i sprzęt zostawia wołającemu); True = była aktywna."""
+        if self.plan is None:
+            return False
+        self._timer.cancel()
+        self._pub(reason, by=by)
+        self.plan = None
+        return True
+
+    def _pub(self, state: str, **extra: Any) -> None:
+        self._publish({"rid": self.rid, "state": state, "idx": self.idx, "n": len(self.plan),
+                       "elapsed_s": round(time.monotonic() - self.t0, 3), "ts": time.time(), **extra})
+
+    def _step(self) -> None:
+        plan = self.plan
+        if plan is None:
+            return
+        el = time.monotonic() - self.t0
+        k = plan.index_at(el)
+        if k >= len(plan):
+            self._pub("done", late_ms=round((el - plan.total) * 1000.0, 3))
+            self.plan = None
+            self._set_velocity(0.0, 0.0, 0.0, self.margin_s)
+            return
+        if k != self.idx:
+            skipped = k - self.idx - 1
+            self.idx = k
+            _, vx, vy, yaw = plan.segments[k]
+            self._set_velocity(vx, vy, yaw, plan.end_of(k) - el + self.margin_s)
+            self._pub("segment", late_ms=round((el - plan.starts[k]) * 1000.0, 3),
+                      **({"skipped": skipped} if skipped > 0 else {}))
+        self._timer.arm(self.t0 + plan.end_of(k) - time.monotonic())
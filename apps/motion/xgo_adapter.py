@@ -9,6 +9,7 @@ Cel:
 
 Wspierane środowisko:
 - Pakiet 'xgolib' (wchodzi m.in. z xgodoglib); łagodne fallbacki metod.
+- XGO_UART=1: zamiast otwierać port — klient demona services/xgo_uart.py (apps.motion.xgo_uart_client).
 
 Publiczne metody (best-effort, brak side-effectów gdy brak HW/ENABLE):
 - ok() -> bool
@@ -62,6 +63,14 @@ class XgoAdapter:
         self._port = port
         self._version = version
 
+        if os.getenv("XGO_UART", "0") == "1":
+            from apps.motion.xgo_uart_client import XgoUartClient
+            try:
+                self._dog = XgoUartClient()  # port współdzielony przez demona — bez autodetekcji FW
+            except ConnectionError:
+                self._dog = None  # demon nie działa — tryb stub jak bez biblioteki
+            return
+
         if not _HAS_XGO:
             return  # brak biblioteki — tryb stub
 
@@ -0,0 +1,79 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+apps/motion/xgo_proto.py — ramki UART kontrolera XGO (protokół xgolib), bez zależności.
+
+  0x55 0x00 LEN TYPE ADDR <payload: LEN-8 B> CHK 0x00 0xAA,  CHK = 255 - (LEN+TYPE+ADDR+Σpayload) % 256
+  TYPE 0x02 (READ)  : payload = [read_len] → odpowiedź z read_len bajtami rejestru ADDR
+  TYPE 0x01 (WRITE) : payload = wartości od rejestru ADDR (bez odpowiedzi)
+
+Wspólne dla demona portu (services/xgo_uart.py), jego klienta (apps.motion.xgo_uart_client)
+i emulatora (tools/xgo_emulator.py).
+"""
+from typing import List, Tuple
+
+TYPE_WRITE = 0x01
+TYPE_READ  = 0x02
+
+REG_BATTERY    = 0x01
+REG_FIRMWARE   = 0x07
+REG_VX         = 0x30
+REG_VY         = 0x31
+REG_VYAW       = 0x32
+REG_ROLL       = 0x62
+REG_PITCH      = 0x63
+REG_YAW        = 0x64
+REG_IMU_FLOATS = 0x65
+REG_ROLL_I16   = 0x66
+REG_PITCH_I16  = 0x67
+REG_YAW_I16    = 0x68
+
+
+def checksum(length: int, type_: int, addr: int, payload: bytes) -> int:
+    return (255 - (length + type_ + addr + sum(payload)) % 256) & 0xFF
+
+
+def encode_frame(type_: int, addr: int, payload: bytes) -> bytes:
+    length = len(payload) + 8
+    return bytes([0x55, 0x00, length, type_, addr]) + bytes(payload) + \
+        bytes([checksum(length, type_, addr, payload), 0x00, 0xAA])
+
+
+def read_frame(addr: int, read_len: int) -> bytes:
+    """Ramka READ jak w XGOClientRO._read_cmd / xgolib."""
+    return encode_frame(TYPE_READ, addr, bytes([read_len]))
+
+
+class FrameParser:
+    """Parser strumienia bajtów → [(type, addr, payload, chk_ok)]; śmieci między ramkami pomija."""
+
+    def __init__(self):
+        self._buf = bytearray()
+
+    def feed(self, data: bytes) -> List[Tuple[int, int, bytes, bool]]:
+        self._buf += data
+        out = []
+        b = self._buf
+        while True:
+            i = b.find(b"\x55\x00")
+            if i < 0:
+                del b[:max(0, len(b) - 1)]
+                return out
+            if i:
+                del b[:i]
+            if len(b) < 3:
+                return out
+            length = b[2]
+            if length < 8:
+                del b[:1]
+                continue
+            if len(b) < length:  # cała ramka ma LEN bajtów
+                return out
+            type_, addr = b[3], b[4]
+            payload = bytes(b[5:length - 3])
+            chk, z, tail = b[length - 3], b[length - 2], b[length - 1]
+            if z != 0x00 or tail != 0xAA:
+                del b[:1]
+                continue
+            out.append((type_, addr, payload, chk == checksum(length, type_, addr, payload)))
+            del b[:length]
@@ -0,0 +1,246 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+apps/motion/xgo_telemetry.py — próbkowanie telemetrii XGO w tle (poza pętlą komend).
+
+Każdy odczyt z XGO to osobny round-trip po UART (ramka → odpowiedź), a dotychczas
+motion_bridge robił je w pętli komend: bateria, firmware, roll/pitch/yaw — kilka
+sond nazw metod na pole, więc komenda ruchu czekała za wolnymi odczytami.
+
+Tu odczyty robi osobny wątek, każda grupa pól we własnym rytmie (IMU często, bateria
+rzadko, firmware raz). Wynik trafia do niemutowalnego słownika podmienianego jednym
+przypisaniem — czytelnik bierze snapshot() bez blokady i bez I/O.
+
+    s = XgoTelemetrySampler(open_dev=ensure_xgo_open, io_lock=hw_lock)
+    s.start()
+    snap = s.snapshot()     # {"battery", "fw", "roll", "pitch", "yaw_raw", "yaw_src", "att_ts", ...}
+    s.stop()
+
+Nazwy metod (xgolib/wersje firmware różnią się nazwami) są sondowane raz; działający
+getter jest zapamiętany i później wołany bezpośrednio (CachedGetter).
+
+io_lock (opcjonalny) jest brany na czas pojedynczego odczytu — komenda ruchu, która
+dzieli port z samplerem, czeka najwyżej jeden round-trip, nie cały przebieg telemetrii.
+
+ENV:
+  TELEM_IMU_HZ=10        # roll/pitch/yaw
+  TELEM_BATTERY_S=30     # bateria
+  TELEM_FW_S=0           # firmware (0 = tylko do pierwszego udanego odczytu)
+"""
+from __future__ import annotations
+
+import os
+import threading
+import time
+from typing import Any, Callable, Dict, Optional, Sequence, Tuple
+
+TELEM_IMU_HZ     = max(0.2, min(100.0, float(os.getenv("TELEM_IMU_HZ", "10"))))
+TELEM_BATTERY_S  = max(0.5, float(os.getenv("TELEM_BATTERY_S", "30")))
+TELEM_FW_S       = max(0.0, float(os.getenv("TELEM_FW_S", "0")))
+
+GETTER_MAX_ERRORS = 3
+GETTER_REPROBE_S  = 30.0
+
+# kolejność jak w dotychczasowym motion_bridge (najpierw nazwy Ridera / natywny heading)
+BATTERY_NAMES  = ("rider_read_battery", "read_battery")
+FW_NAMES       = ("rider_read_firmware", "read_firmware", "version")
+HEADING_NAMES  = ("read_heading", "rider_read_heading", "heading", "read_yaw_deg360")
+ROLL_NAMES     = ("read_roll", "rider_read_roll")
+PITCH_NAMES    = ("read_pitch", "rider_read_pitch")
+YAW_NAMES      = ("read_yaw", "rider_read_yaw")
+IMU_NAMES      = ("read_imu", "read_imu_int16", "rider_read_imu_int16")
+
+
+def _to_float(v: Any) -> float:
+    return float(v)
+
+
+class CachedGetter:
+    """
+    Getter jednej wartości z listy kandydatów na nazwę metody.
+
+    Pierwszy udany odczyt ustala metodę (name); dalej wołana jest tylko ona.
+    Brak jakiejkolwiek metody → missing na stałe (dla tego urządzenia); sondy bez
+    sukcesu GETTER_MAX_ERRORS razy z rzędu → przerwa GETTER_REPROBE_S. Wyjątek
+    z ustalonej metody → None; po GETTER_MAX_ERRORS z rzędu wracamy do sondowania.
+    """
+
+    __slots__ = ("names", "post", "name", "errors", "retry_at", "_fn")
+
+    def __init__(self, names: Sequence[str], post: Optional[Callable[[Any], Any]] = None):
+        self.names = tuple(names)
+        self.post = post
+        self.reset()
+
+    def reset(self) -> None:
+        self.name: Optional[str] = None
+        self.errors = 0
+        self.retry_at = 0.0
+        self._fn: Optional[Callable[[], Any]] = None
+
+    @property
+    def missing(self) -> bool:
+        return self.retry_at == float("inf")
+
+    def _call(self, fn: Callable[[], Any], lock: Optional[Any]) -> Any:
+        if lock is None:
+            v = fn()
+        else:
+            with lock:
+                v = fn()
+        return self.post(v) if self.post else v
+
+    def read(self, dev: Any, lock: Optional[Any] = None) -> Any:
+        if self._fn is not None:
+            try:
+                v = self._call(self._fn, lock)
+                self.errors = 0
+                return v
+            except Exception:
+                self.errors += 1
+                if self.errors >= GETTER_MAX_ERRORS:
+                    self.reset()
+                return None
+        if self.retry_at and time.monotonic() < self.retry_at:
+            return None
+        found = False
+        for n in self.names:
+            fn = getattr(dev, n, None)
+            if not callable(fn):
+                continue
+            found = True
+            try:
+                v = self._call(fn, lock)
+            except Exception:
+                continue
+            self.name, self._fn, self.errors, self.retry_at = n, fn, 0, 0.0
+            return v
+        if not found:
+            self.retry_at = float("inf")
+        else:
+            self.errors += 1
+            if self.errors >= GETTER_MAX_ERRORS:
+                self.errors = 0
+                self.retry_at = time.monotonic() + GETTER_REPROBE_S
+        return None
+
+
+class XgoTelemetrySampler:
+    """Wątek odczytów XGO + snapshot bez blokad (patrz docstring modułu)."""
+
+    def __init__(self, open_dev: Callable[[], Optional[Any]], io_lock: Optional[Any] = None,
+                 imu_hz: float = TELEM_IMU_HZ, battery_s: float = TELEM_BATTERY_S,
+                 fw_s: float = TELEM_FW_S):
+        self.open_dev = open_dev
+        self.io_lock = io_lock
+        self.periods = {"imu": 1.0 / max(0.2, float(imu_hz)),
+                        "battery": max(0.5, float(battery_s)),
+                        "fw": max(0.0, float(fw_s))}
+        self.battery = CachedGetter(BATTERY_NAMES)
+        self.fw = CachedGetter(FW_NAMES)
+        self.heading = CachedGetter(HEADING_NAMES, _to_float)
+        self.roll = CachedGetter(ROLL_NAMES, _to_float)
+        self.pitch = CachedGetter(PITCH_NAMES, _to_float)
+        self.yaw = CachedGetter(YAW_NAMES, _to_float)
+        self.imu = CachedGetter(IMU_NAMES)
+        self._getters = (self.battery, self.fw, self.heading, self.roll, self.pitch, self.yaw, self.imu)
+        self._dev_id: Optional[int] = None
+        self._due = {k: 0.0 for k in self.periods}
+        self._snap: Dict[str, Any] = {"present": False, "battery": None, "fw": None,
+                                      "roll": None, "pitch": None, "yaw_raw": None,
+                                      "yaw_src": "gyro_stabilized", "att_ts": None,
+                                      "battery_ts": None, "reads": 0, "read_ms_max": 0.0}
+        self._stop = threading.Event()
+        self._th: Optional[threading.Thread] = None
+
+    # ── API ──────────────────────────────────────────────────────────────────
+    def snapshot(self) -> Dict[str, Any]:
+        """Ostatni komplet wartości; słownik nie jest już modyfikowany (nie kopiować)."""
+        return self._snap
+
+    def start(self) -> "XgoTelemetrySampler":
+        if self._th is None:
+            self._th = threading.Thread(target=self._run, name="xgo-telemetry", daemon=True)
+            self._th.start()
+        return self
+
+    def stop(self, timeout: float = 1.0) -> None:
+        self._stop.set()
+        if self._th is not None:
+            self._th.join(timeout)
+            self._th = None
+
+    def resolved(self) -> Dict[str, Optional[str]]:
+        """Ustalone nazwy metod (diagnostyka)."""
+        return {"battery": self.battery.name, "fw": self.fw.name, "heading": self.heading.name,
+                "roll": self.roll.name, "pitch": self.pitch.name, "yaw": self.yaw.name,
+                "imu": self.imu.name}
+
+    # ── odczyty ──────────────────────────────────────────────────────────────
+    def _read_attitude(self, dev: Any) -> Tuple[Optional[float], Optional[float], Optional[float], str]:
+        lk = self.io_lock
+        h = self.heading.read(dev, lk)
+        if h is not None:
+            return self.roll.read(dev, lk), self.pitch.read(dev, lk), h, "heading_native"
+        r, p, y = self.roll.read(dev, lk), self.pitch.read(dev, lk), self.yaw.read(dev, lk)
+        if r is not None and p is not None and y is not None:
+            return r, p, y, "gyro_stabilized"
+        v = self.imu.read(dev, lk)
+        if isinstance(v, (list, tuple)) and len(v) >= 3:
+            try:
+                return float(v[0]), float(v[1]), float(v[2]), "gyro_stabilized"
+            except (TypeError, ValueError):
+                pass
+        return None, None, None, "gyro_stabilized"
+
+    def sample_once(self, now: Optional[float] = None) -> Dict[str, Any]:
+        """Jeden obrót: odczytaj grupy, którym minął termin, i podmień snapshot."""
+        mono = time.monotonic() if now is None else now
+        dev = self.open_dev()
+        if dev is None:  # brak XGO: kolejna próba za sekundę
+            self._due = {k: mono + 1.0 for k in self.periods}
+            if self._snap["present"]:
+                self._snap = dict(self._snap, present=False)
+            return self._snap
+        if id(dev) != self._dev_id:  # nowe połączenie → metody sondujemy od nowa
+            self._dev_id = id(dev)
+            for g in self._getters:
+                g.reset()
+            self._due = {k: 0.0 for k in self.periods}
+
+        upd: Dict[str, Any] = {"present": True}
+        t0 = time.monotonic()
+        if mono >= self._due["imu"]:
+            roll, pitch, yaw_raw, src = self._read_attitude(dev)
+            upd.update(roll=roll, pitch=pitch, yaw_raw=yaw_raw, yaw_src=src, att_ts=time.time())
+            self._due["imu"] = mono + self.periods["imu"]
+        if mono >= self._due["battery"]:
+            b = self.battery.read(dev, self.io_lock)
+            if b is not None:
+                try:
+                    upd.update(battery=float(b), battery_ts=time.time())
+                except (TypeError, ValueError):
+                    pass
+            self._due["battery"] = mono + self.periods["battery"]
+        if mono >= self._due["fw"]:
+            fw = self.fw.read(dev, self.io_lock)
+            if fw is not None:
+                upd["fw"] = fw
+            if fw is not None and self.periods["fw"] <= 0.0:
+                self._due["fw"] = float("inf")
+            else:
+                self._due["fw"] = mono + (self.periods["fw"] or self.periods["battery"])
+        read_ms = (time.monotonic() - t0) * 1000.0
+        upd["reads"] = self._snap["reads"] + 1
+        upd["read_ms_max"] = max(self._snap["read_ms_max"], round(read_ms, 3))
+        self._snap = dict(self._snap, **upd)  # jedno przypisanie = publikacja
+        return self._snap
+
+    def _run(self) -> None:
+        while not self._stop.is_set():
+            try:
+                self.sample_once()
+            except Exception as e:
+                print("[xgo-telemetry] sample error:", e, flush=True)
+            wait = min(self._due.values()) - time.monotonic()
+            self._stop.wait(max(0.005, min(wait, 1.0)))
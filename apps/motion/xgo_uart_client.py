@@ -0,0 +1,193 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+apps/motion/xgo_uart_client.py — klient demona services/xgo_uart.py (jedyny właściciel UART XGO).
+
+Zamiast otwierać /dev/ttyAMA0 (ramki kilku procesów się przeplatały, a reset_input_buffer()
+jednego kasował odpowiedzi drugiego) proces wysyła żądania przez IPC (ZMQ DEALER → ROUTER):
+
+    {"op": "read",  "addr": 0x64, "n": 4, "ttl_ms": 50}   → {"ok", "data": hex, "cached"}
+    {"op": "write", "addr": 0x30, "data": [128], "prio": "motion"} → {"ok"}
+    {"op": "stop"}                                        → {"ok"}   (priorytet stop)
+    {"op": "stats"}                                       → {"ok", "stats": {...}}
+
+XgoUartClient udaje podzbiór xgolib.XGO / XGOClientRO, więc wchodzi w miejsce sterownika
+(motion_bridge, XgoAdapter, xgo_ro_loop w API) po ustawieniu XGO_UART=1:
+  ruch   — move_x/move_y/turn (+ rider_move_x/rider_turn), forward/back/left/right,
+           turnleft/turnright, stop
+  odczyt — read_battery, read_firmware, read_roll/pitch/yaw, read_imu_int16
+
+Gniazdo per wątek (ZMQ nie jest thread-safe) — stop z wątku komend nie czeka w kolejce
+za odczytem telemetrii z innego wątku; kolejność rozstrzyga priorytet w demonie.
+Konstruktor pinguje demona (stats) i rzuca ConnectionError, gdy ten nie odpowiada —
+jak nieudane otwarcie portu, więc działa zwykła ścieżka ponawiania u wołającego.
+
+ENV:
+  XGO_UART=0                       # 1 = sterowniki używają demona zamiast portu
+  XGO_UART_ADDR=ipc:///tmp/rider-xgo-uart
+  XGO_UART_TIMEOUT_MS=1000, XGO_UART_STOP_TIMEOUT_MS=100, XGO_UART_PING_MS=200
+  XGO_VX_LIMIT=25, XGO_VY_LIMIT=18, XGO_VYAW_LIMIT=100   # pełna skala u8 jak conver2u8 w xgolib
+"""
+from __future__ import annotations
+
+import json
+import os
+import struct
+import threading
+import time
+from typing import Any, Dict, List, Optional
+
+import zmq  # type: ignore
+
+from apps.motion.xgo_proto import (REG_BATTERY, REG_FIRMWARE, REG_PITCH, REG_PITCH_I16, REG_ROLL,
+                                   REG_ROLL_I16, REG_VX, REG_VY, REG_VYAW, REG_YAW, REG_YAW_I16)
+
+XGO_UART            = os.getenv("XGO_UART", "0") == "1"
+XGO_UART_ADDR       = os.getenv("XGO_UART_ADDR", "ipc:///tmp/rider-xgo-uart")
+XGO_UART_TIMEOUT_MS = int(os.getenv("XGO_UART_TIMEOUT_MS", "1000"))
+STOP_TIMEOUT_MS     = int(os.getenv("XGO_UART_STOP_TIMEOUT_MS", "100"))
+PING_MS             = int(os.getenv("XGO_UART_PING_MS", "200"))
+VX_LIMIT   = float(os.getenv("XGO_VX_LIMIT", "25"))
+VY_LIMIT   = float(os.getenv("XGO_VY_LIMIT", "18"))
+VYAW_LIMIT = float(os.getenv("XGO_VYAW_LIMIT", "100"))
+
+
+PRIO = {"stop": 0, "motion": 1, "telemetry": 2}
+
+
+def to_u8(v: float, limit: float) -> int:
+    """Jak xgolib conver2u8: -limit..limit → 0..255 (128 = zero)."""
+    if limit <= 0:
+        return 128
+    return max(0, min(255, int(128 + 128 * float(v) / limit)))
+
+
+class XgoUartClient:
+    def __init__(self, addr: str = XGO_UART_ADDR, timeout_ms: int = XGO_UART_TIMEOUT_MS, **_: Any):
+        self.addr = addr
+        self.timeout_ms = int(timeout_ms)
+        self._ctx = zmq.Context.instance()
+        self._tls = threading.local()
+        self._socks: List[Any] = []
+        self._lock = threading.Lock()
+        self.timeouts = 0
+        if addr.startswith("ipc://") and not os.path.exists(addr[len("ipc://"):]):
+            raise ConnectionError(f"xgo_uart: daemon not running ({addr})")
+        if self.call({"op": "stats"}, PING_MS) is None:
+            self.close()
+            raise ConnectionError(f"xgo_uart: no reply from {addr}")
+
+    # ── IPC ──────────────────────────────────────────────────────────────────
+    def _sock(self):
+        s = getattr(self._tls, "sock", None)
+        if s is None:
+            s = self._ctx.socket(zmq.DEALER)
+            s.setsockopt(zmq.LINGER, 0)
+            s.connect(self.addr)
+            self._tls.sock = s
+            self._tls.seq = 0
+            with self._lock:
+                self._socks.append(s)
+        return s
+
+    def _drop_sock(self) -> None:
+        s = getattr(self._tls, "sock", None)
+        if s is not None:
+            self._tls.sock = None
+            with self._lock:
+                if s in self._socks:
+                    self._socks.remove(s)
+            s.close(0)
+
+    def call(self, req: Dict[str, Any], timeout_ms: Optional[int] = None) -> Optional[Dict[str, Any]]:
+        """Jedno żądanie → odpowiedź demona; None = timeout (gniazdo odtwarzane — bez starych odpowiedzi)."""
+        s = self._sock()
+        self._tls.seq += 1
+        req = dict(req, id=self._tls.seq)
+        s.send(json.dumps(req).encode("utf-8"))
+        deadline = time.monotonic() + (self.timeout_ms if timeout_ms is None else timeout_ms) / 1000.0
+        while True:
+            left = deadline - time.monotonic()
+            if left <= 0 or not s.poll(int(left * 1000) + 1):
+                self.timeouts += 1
+                self._drop_sock()
+                return None
+            rep = json.loads(s.recv())
+            if rep.get("id") == req["id"]:
+                return rep
+
+    def read(self, addr: int, n: int, ttl_ms: Optional[float] = None, prio: str = "telemetry") -> Optional[bytes]:
+        req: Dict[str, Any] = {"op": "read", "addr": int(addr), "n": int(n), "prio": prio}
+        if ttl_ms is not None:
+            req["ttl_ms"] = ttl_ms
+        rep = self.call(req)
+        if not rep or not rep.get("ok"):
+            return None
+        return bytes.fromhex(rep["data"])
+
+    def write(self, addr: int, data, prio: str = "motion") -> bool:
+        rep = self.call({"op": "write", "addr": int(addr), "data": [int(x) & 0xFF for x in data], "prio": prio})
+        return bool(rep and rep.get("ok"))
+
+    def stats(self) -> Optional[Dict[str, Any]]:
+        rep = self.call({"op": "stats"})
+        return rep.get("stats") if rep else None
+
+    def close(self) -> None:
+        with self._lock:
+            socks, self._socks = self._socks, []
+        for s in socks:
+            try:
+                s.close(0)
+            except Exception:
+                pass
+
+    def __enter__(self): return self
+    def __exit__(self, *exc): self.close()
+
+    # ── ruch (jak xgolib) ────────────────────────────────────────────────────
+    def stop(self) -> bool:
+        # krótki timeout: stop woła też deadman w wątku reaktora mostu — nie może go blokować
+        rep = self.call({"op": "stop"}, STOP_TIMEOUT_MS)
+        return bool(rep and rep.get("ok"))
+
+    def _vel(self, reg: int, v: float, limit: float, runtime: float = 0) -> None:
+        self.write(reg, [to_u8(v, limit)])
+        if runtime and runtime > 0:  # jak xgolib: ruch przez runtime s, potem zero na tej osi
+            time.sleep(runtime)
+            self.write(reg, [128])
+
+    def move_x(self, speed, runtime=0): self._vel(REG_VX, speed, VX_LIMIT, runtime)
+    def move_y(self, speed, runtime=0): self._vel(REG_VY, speed, VY_LIMIT, runtime)
+    def turn(self, speed, runtime=0): self._vel(REG_VYAW, speed, VYAW_LIMIT, runtime)
+    rider_move_x = move_x
+    rider_turn = turn
+
+    def forward(self, step): self.move_x(abs(step))
+    def back(self, step): self.move_x(-abs(step))
+    def left(self, step): self.move_y(abs(step))
+    def right(self, step): self.move_y(-abs(step))
+    def turnleft(self, step): self.turn(abs(step))
+    def turnright(self, step): self.turn(-abs(step))
+
+    # ── odczyty (kodowanie jak tools/xgo_client_ro.py) ───────────────────────
+    def read_battery(self) -> Optional[int]:
+        pl = self.read(REG_BATTERY, 1)
+        return int(pl[0]) if pl else None
+
+    def read_firmware(self) -> Optional[str]:
+        pl = self.read(REG_FIRMWARE, 10)
+        return pl.decode("ascii", "ignore").strip("\0") if pl else None
+
+    def _float(self, reg: int) -> Optional[float]:
+        pl = self.read(reg, 4)
+        return round(struct.unpack("<f", pl[:4])[0], 2) if pl and len(pl) >= 4 else None
+
+    def read_roll(self): return self._float(REG_ROLL)
+    def read_pitch(self): return self._float(REG_PITCH)
+    def read_yaw(self): return self._float(REG_YAW)
+
+    def read_imu_int16(self, direction: str) -> Optional[int]:
+        reg = {"roll": REG_ROLL_I16, "pitch": REG_PITCH_I16, "yaw": REG_YAW_I16}.get(direction)
+        pl = self.read(reg, 2) if reg is not None else None
+        return struct.unpack(">h", pl[:2])[0] if pl and len(pl) >= 2 else None
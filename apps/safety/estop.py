@@ -1,6 +1,9 @@
 #!/usr/bin/env python3
 import os
 from pathlib import Path
+from typing import Callable, Optional
+
+from apps.safety.flag_watch import FlagWatcher
 
 BASE = Path("/home/pi/robot")
 FLAGS = BASE / "data" / "flags"
@@ -9,6 +12,25 @@ FLAGS.mkdir(parents=True, exist_ok=True)
 MOTION_ENABLE_FLAG = FLAGS / "motion.enable"
 ESTOP_FLAG = FLAGS / "estop.on"
 
+# Stan flag z pamięci (apps.safety.flag_watch): inotify na FLAGS, fallback — polling.
+# ESTOP_FLAG_WATCH=1 (0 = bez wątku: stat() nie częściej niż co ESTOP_FLAG_POLL_S)
+FLAG_WATCH  = os.getenv("ESTOP_FLAG_WATCH", "1") == "1"
+FLAG_POLL_S = float(os.getenv("ESTOP_FLAG_POLL_S", "0.1"))
+_flags: Optional[FlagWatcher] = None
+
+def flags() -> FlagWatcher:
+    """Wspólny FlagWatcher procesu (wątek startuje przy pierwszym użyciu)."""
+    global _flags
+    if _flags is None:
+        _flags = FlagWatcher(FLAGS, (MOTION_ENABLE_FLAG.name, ESTOP_FLAG.name), poll_s=FLAG_POLL_S)
+        if FLAG_WATCH:
+            _flags.start()
+    return _flags
+
+def on_estop(cb: Callable[[], None]) -> None:
+    """cb() natychmiast po pojawieniu się flagi estop.on (z wątku watchera — ma być krótkie)."""
+    flags().on_change(lambda name, on: cb() if on and name == ESTOP_FLAG.name else None)
+
 # GPIO (opcjonalnie): ustaw ESTOP_GPIO=17 (BCM). Aktywne niskim stanem.
 GPIO_PIN = int(os.getenv("ESTOP_GPIO", "-1"))
 _ACTIVE_LOW = True
@@ -30,7 +52,7 @@ def estop_triggered() -> bool:
       2) fizyczny przycisk na GPIO (jeśli skonfigurowany), LUB
       3) ESTOP=1 w środowisku (tylko do testów poza systemd).
     """
-    if ESTOP_FLAG.exists():
+    if flags().get(ESTOP_FLAG.name):
         return True
     if _gpio_ok:
         val = GPIO.input(GPIO_PIN)
@@ -45,7 +67,7 @@ def motion_enabled() -> bool:
     """
     if os.getenv("MOTION_ENABLE", "0") == "1":
         return True
-    return MOTION_ENABLE_FLAG.exists()
+    return flags().get(MOTION_ENABLE_FLAG.name)
 
 def safe_speed(v: float, limit: float = 0.6) -> float:
     """Clamp prędkości."""
@@ -0,0 +1,186 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+apps/safety/flag_watch.py — stan plików-flag (motion.enable, estop.on) trzymany w pamięci.
+
+Pętla ruchu pytała o flagi przez Path.exists() kilka razy na tick (50 Hz) — setki
+stat() na sekundę, a E-Stop i tak był widoczny dopiero w kolejnym ticku. FlagWatcher
+śledzi katalog flag w wątku tła i odpowiada z pamięci:
+
+  * inotify (Linux, przez ctypes — bez dodatkowych pakietów): zmiana widoczna od razu,
+    co resync_s pełne przeskanowanie na wszelki wypadek,
+  * fallback (brak inotify / katalog zniknął): przeskanowanie co poll_s,
+  * on_change(cb): cb(nazwa, istnieje) wołane z wątku watchera natychmiast po zmianie.
+
+    w = FlagWatcher("/home/pi/robot/data/flags", ("motion.enable", "estop.on"))
+    w.on_change(lambda name, on: name == "estop.on" and on and robot.stop())
+    w.start()
+    w.get("estop.on")  # bez stat()
+
+get() przed start() (albo po stop()) robi stat() nie częściej niż co poll_s.
+"""
+from __future__ import annotations
+
+import ctypes
+import ctypes.util
+import os
+import select
+import struct
+import threading
+import time
+from pathlib import Path
+from typing import Callable, Dict, List, Optional, Sequence
+
+IN_MOVED_FROM = 0x00000040
+IN_MOVED_TO = 0x00000080
+IN_CREATE = 0x00000100
+IN_DELETE = 0x00000200
+IN_DELETE_SELF = 0x00000400
+IN_MOVE_SELF = 0x00000800
+IN_Q_OVERFLOW = 0x00004000
+IN_IGNORED = 0x00008000
+_MASK = IN_MOVED_FROM | IN_MOVED_TO | IN_CREATE | IN_DELETE | IN_DELETE_SELF | IN_MOVE_SELF
+_EV = struct.Struct("iIII")  # wd, mask, cookie, len (+ nazwa, dopełniona zerami)
+
+_libc = None
+
+
+def _inotify_open(path: str) -> Optional[int]:
+    """fd inotify z obserwacją katalogu albo None (brak libc/inotify, brak katalogu)."""
+    global _libc
+    try:
+        if _libc is None:
+            _libc = ctypes.CDLL(ctypes.util.find_library("c") or "libc.so.6", use_errno=True)
+        fd = _libc.inotify_init1(os.O_NONBLOCK | os.O_CLOEXEC)
+    except (OSError, AttributeError):
+        return None
+    if fd < 0:
+        return None
+    if _libc.inotify_add_watch(fd, os.fsencode(path), _MASK) < 0:
+        os.close(fd)
+        return None
+    return fd
+
+
+class FlagWatcher:
+    def __init__(self, directory, names: Sequence[str], poll_s: float = 0.2,
+                 resync_s: float = 5.0, use_inotify: bool = True):
+        self.dir = Path(directory)
+        self.names = tuple(names)
+        self.poll_s = max(0.01, float(poll_s))
+        self.resync_s = max(self.poll_s, float(resync_s))
+        self.use_inotify = use_inotify
+        self.mode: Optional[str] = None   # "inotify" | "poll" | None (wątek nie działa)
+        self._state: Dict[str, bool] = {}
+        self._checked = 0.0
+        self._cbs: List[Callable[[str, bool], None]] = []
+        self._lock = threading.Lock()
+        self._stop = threading.Event()
+        self._th: Optional[threading.Thread] = None
+        self._fd: Optional[int] = None
+
+    # ── odczyt ───────────────────────────────────────────────────────────────
+    def get(self, name: str) -> bool:
+        if self.mode is None:
+            now = time.monotonic()
+            if now - self._checked >= self.poll_s:
+                self._checked = now
+                self.rescan()
+        return self._state.get(name, False)
+
+    def on_change(self, cb: Callable[[str, bool], None]) -> None:
+        self._cbs.append(cb)
+
+    def rescan(self) -> None:
+        for n in self.names:
+            self._set(n, (self.dir / n).exists())
+
+    def _set(self, name: str, on: bool) -> None:
+        with self._lock:
+            if self._state.get(name) == on:
+                return
+            first = name not in self._state
+            self._state[name] = on
+        if first:
+            return  # stan początkowy to nie zmiana
+        for cb in self._cbs:
+            try:
+                cb(name, on)
+            except Exception:
+                pass
+
+    # ── wątek ────────────────────────────────────────────────────────────────
+    def start(self) -> "FlagWatcher":
+        if self._th is not None:
+            return self
+        self.rescan()
+        self._checked = time.monotonic()
+        self._fd = _inotify_open(str(self.dir)) if self.use_inotify else None
+        self.mode = "inotify" if self._fd is not None else "poll"
+        self._stop.clear()
+        self._th = threading.Thread(target=self._run, name="flag-watch", daemon=True)
+        self._th.start()
+        return self
+
+    def stop(self) -> None:
+        self._stop.set()
+        if self._th is not None:
+            self._th.join(timeout=2.0)
+            self._th = None
+        self._close_fd()
+        self.mode = None
+
+    def _close_fd(self) -> None:
+        if self._fd is not None:
+            try:
+                os.close(self._fd)
+            except OSError:
+                pass
+            self._fd = None
+
+    def _run(self) -> None:
+        last_scan = time.monotonic()
+        while not self._stop.is_set():
+            if self._fd is None:
+                self._stop.wait(self.poll_s)
+                self.rescan()
+                if self.use_inotify and time.monotonic() - last_scan >= self.resync_s:
+                    last_scan = time.monotonic()   # katalog mógł wrócić — ponowna próba inotify
+                    self._fd = _inotify_open(str(self.dir))
+                    if self._fd is not None:
+                        self.mode = "inotify"
+                        self.rescan()
+                continue
+            # krótki timeout select — stop() nie czeka dłużej niż poll_s
+            r, _, _ = select.select([self._fd], [], [], self.poll_s)
+            if r and not self._read_events():
+                self._close_fd()        # katalog zniknął / przeniesiony → polling
+                self.mode = "poll"
+            if time.monotonic() - last_scan >= self.resync_s:
+                last_scan = time.monotonic()
+                self.rescan()
+
+    def _read_events(self) -> bool:
+        """Obsługuje zdarzenia z fd; False = obserwacja katalogu utracona."""
+        try:
+            buf = os.read(self._fd, 4096)
+        except BlockingIOError:
+            return True
+        except OSError:
+            return False
+        i, touched, alive = 0, set(), True
+        while i + _EV.size <= len(buf):
+            _, mask, _, ln = _EV.unpack_from(buf, i)
+            name = buf[i + _EV.size:i + _EV.size + ln].rstrip(b"\0").decode("utf-8", "replace")
+            i += _EV.size + ln
+            if mask & IN_Q_OVERFLOW:
+                touched.update(self.names)
+            elif mask & (IN_DELETE_SELF | IN_MOVE_SELF | IN_IGNORED):
+                alive = False
+            elif name in self.names:
+                touched.add(name)
+        # stan z stat(), nie z typu zdarzenia — kolejność create/delete w paczce bez znaczenia
+        for n in self.names:
+            if n in touched:
+                self._set(n, (self.dir / n).exists())
+        return alive
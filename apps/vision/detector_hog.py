@@ -13,6 +13,14 @@ HB  = CameraHB(mode="hog")
 SNAP_DIR = os.getenv("SNAP_BASE", "/home/pi/robot/snapshots")
 PROC_FN  = os.path.join(SNAP_DIR, "proc.jpg")
 
+# Klatka z nakładką → pierścień "proc" (common.frame_ring) + camera.frame co klatkę;
+# proc.jpg dla dashboardu już tylko co PROC_JPEG_EVERY s (bez pierścienia: co klatkę, jak dawniej)
+try:
+    from common.frame_ring import FrameRingWriter, FRAME_RING_ENABLE
+except Exception:
+    FrameRingWriter, FRAME_RING_ENABLE = None, False
+PROC_JPEG_EVERY = float(os.getenv("PROC_JPEG_EVERY", "1.0")) if FRAME_RING_ENABLE else 0.0
+
 W, H = 320, 240
 MAX_FPS = float(os.getenv("HOG_MAX_FPS", "4.0"))  # ~4 fps dla CPU/baterii
 
@@ -46,6 +54,8 @@ def main():
     hog.setSVMDetector(cv2.HOGDescriptor_getDefaultPeopleDetector())
 
     last = time.time(); ema = None
+    ring = None
+    last_jpeg = 0.0
     # hej! od razu pierwsze HB
     HB.tick(None, 0.0, presenting=False)
 
@@ -76,9 +86,19 @@ def main():
                 "mode": "hog"
             }, add_ts=True)
 
-        # zapisz PROC do podglądu na dashboardzie
-        try: save_jpeg_bgr(PROC_FN, out)
-        except Exception as e: print("[hog] save error:", e, flush=True)
+        # PROC: pierścień + powiadomienie, JPEG rzadziej
+        if FRAME_RING_ENABLE:
+            try:
+                if ring is None or out.nbytes > ring.slot_bytes:
+                    ring = FrameRingWriter("proc", slot_bytes=out.nbytes)
+                ring.write(out, out.shape[1], out.shape[0], 3, "bgr24")
+                PUB.publish("camera.frame", ring.notice())
+            except Exception as e:
+                print("[hog] frame ring error:", e, flush=True)
+        if time.time() - last_jpeg >= PROC_JPEG_EVERY:
+            try: save_jpeg_bgr(PROC_FN, out)
+            except Exception as e: print("[hog] save error:", e, flush=True)
+            last_jpeg = time.time()
 
         # heartbeat (fps)
         now = time.time()
@@ -7,26 +7,33 @@ IN : vision.face, vision.person, vision.detections
 OUT: vision.state, vision.dispatcher.heartbeat
 """
 
-import os, time, json, threading
+import os, sys, time, threading
 from dataclasses import dataclass
-from typing import Optional, Dict, Any, List, Tuple
+from typing import Optional, Dict, Any, List
 
 import zmq
 
-BUS_PUB_PORT = int(os.getenv("BUS_PUB_PORT", "5555"))
-BUS_SUB_PORT = int(os.getenv("BUS_SUB_PORT", "5556"))
-ZMQ_ADDR_PUB = f"tcp://127.0.0.1:{BUS_PUB_PORT}"
-ZMQ_ADDR_SUB = f"tcp://127.0.0.1:{BUS_SUB_PORT}"
+PROJ_ROOT = "/home/pi/robot"
+if PROJ_ROOT not in sys.path:
+    sys.path.insert(0, PROJ_ROOT)
+
+from common.bus import bus_endpoint, decode_payload, encode_frames, get_codec
+from common.reactor import BusReactor
+from common.schemas import VisionDetections, VisionState
+
+ZMQ_ADDR_PUB = bus_endpoint("pub")
+ZMQ_ADDR_SUB = bus_endpoint("sub")
 
 # Histereza / debouncing (ENV)
 P_ON_N    = int(os.getenv("VISION_ON_CONSECUTIVE", "3"))     # ile kolejnych pozytywów, by włączyć present=True
 P_OFF_TT  = float(os.getenv("VISION_OFF_TTL_SEC", "2.0"))    # po ilu sekundach ciszy zgasić present
 MIN_SCORE = float(os.getenv("VISION_MIN_SCORE", "0.50"))     # minimalny próg score
 LOG_EVERY = int(os.getenv("LOG_EVERY", "10"))
+HEARTBEAT_SEC = float(os.getenv("VISION_HEARTBEAT_SEC", "5.0"))
 
 PUB: Optional[zmq.Socket] = None
-SUB: Optional[zmq.Socket] = None
 STATE_LOCK = threading.Lock()
+CODEC = get_codec()
 
 def zmq_pub() -> zmq.Socket:
     ctx = zmq.Context.instance()
@@ -34,51 +41,19 @@ def zmq_pub() -> zmq.Socket:
     s.connect(ZMQ_ADDR_PUB)
     return s
 
-def zmq_sub(topics: List[str]) -> zmq.Socket:
-    ctx = zmq.Context.instance()
-    s = ctx.socket(zmq.SUB)
-    s.connect(ZMQ_ADDR_SUB)
-    # krótki timeout dla responsywności
-    try:
-        s.setsockopt(zmq.RCVTIMEO, 1000)
-    except Exception:
-        pass
-    for t in topics:
-        s.setsockopt_string(zmq.SUBSCRIBE, t)
-    return s
-
-def _json_loads(text: str) -> Dict[str, Any]:
+def _decode(body: bytes) -> Dict[str, Any]:
     try:
-        return json.loads(text)
+        data = decode_payload(body)
     except Exception:
-        return {"raw": text}
-
-def sub_recv() -> Tuple[str, Dict[str, Any]]:
-    """
-    Odbiór z SUB — wspiera single-frame ("topic payload") i multipart.
-    Zwraca: (topic, data:dict)
-    """
-    assert SUB is not None
-    parts = SUB.recv_multipart()  # list[bytes]
-    if not parts:
-        return "", {}
-    if len(parts) == 1:
-        s = parts[0].decode("utf-8", "replace")
-        if " " in s:
-            topic, payload = s.split(" ", 1)
-            return topic, _json_loads(payload)
-        return s, {}
-    topic = parts[0].decode("utf-8", "replace")
-    try:
-        payload = "".join(p.decode("utf-8", "replace") for p in parts[1:])
-        return topic, _json_loads(payload)
-    except Exception:
-        return topic, {"raw": "<binary>"}
+        return {"raw": body.decode("utf-8", "replace")}
+    if data is None:
+        return {}
+    return data if isinstance(data, dict) else {"raw": data}
 
 def pub(topic: str, payload: Dict[str, Any]) -> None:
     try:
         assert PUB is not None
-        PUB.send_string(f"{topic} {json.dumps(payload, ensure_ascii=False)}")
+        PUB.send_multipart(encode_frames(topic, payload, CODEC))
     except Exception as e:
         print(f"[dispatcher] pub err: {e}", flush=True)
 
@@ -101,18 +76,11 @@ def _as_float(v, default=0.0) -> float:
         return float(default)
 
 def _best_detection(items: List[Dict[str, Any]]) -> Optional[Dict[str, Any]]:
-    """Wybierz najlepszą detekcję z listy (preferuj person/face, najwyższy score)."""
+    """Wybierz najlepszą detekcję (items znormalizowane przez VisionDetections: label/score/bbox)."""
     if not items:
         return None
-    # normalizuj klucz score
-    scored = []
-    for d in items:
-        sc = _as_float(d.get("score", d.get("confidence", 0.0)), 0.0)
-        lbl = (d.get("label") or d.get("class") or "").lower()
-        scored.append((sc, lbl, d))
-    # preferencja: person/face
-    scored.sort(key=lambda t: (("person" in t[1]) or ("face" in t[1]), t[0]), reverse=True)
-    return scored[0][2]
+    # preferencja: person/face, potem najwyższy score
+    return max(items, key=lambda d: (("person" in d["label"]) or ("face" in d["label"]), d["score"]))
 
 def normalize_event(topic: str, data: Dict[str, Any]) -> Optional[Dict[str, Any]]:
     """
@@ -121,15 +89,15 @@ def normalize_event(topic: str, data: Dict[str, Any]) -> Optional[Dict[str, Any]
     Obsługuje też vision.detections z listą obiektów.
     """
     if topic == "vision.detections":
-        items = data.get("items") or data.get("detections") or data.get("objects") or []
-        best = _best_detection(items)
+        msg = VisionDetections.parse(data)
+        best = _best_detection(msg.items)
         if not best:
-            return {"kind": "det", "present": False, "score": 0.0, "bbox": None, "mode": data.get("mode") or "det"}
-        lbl = (str(best.get("label") or best.get("class") or "")).lower()
+            return {"kind": "det", "present": False, "score": 0.0, "bbox": None, "mode": msg.mode or "det"}
+        lbl = best["label"]
         kind = "person" if "person" in lbl else ("face" if "face" in lbl else "det")
-        score = _as_float(best.get("score", best.get("confidence", 0.0)), 0.0)
+        score = best["score"]
         return {"kind": kind, "present": score >= MIN_SCORE, "score": score,
-                "bbox": best.get("bbox"), "mode": data.get("mode") or "ssd"}
+                "bbox": best["bbox"], "mode": msg.mode or "ssd"}
 
     kind = "face" if "face" in topic else ("person" if "person" in topic else "det")
     score = _as_float(data.get("score", data.get("confidence", 1.0)), 1.0)
@@ -140,12 +108,12 @@ def normalize_event(topic: str, data: Dict[str, Any]) -> Optional[Dict[str, Any]
 
 def announce_state() -> None:
     with STATE_LOCK:
-        payload = {
-            "present": STATE.present,
-            "confidence": round(STATE.confidence, 3),
-            "mode": _LAST_MODE,
-            "ts": time.time(),
-        }
+        payload = VisionState(
+            present=STATE.present,
+            confidence=round(STATE.confidence, 3),
+            mode=_LAST_MODE,
+            ts=time.time(),
+        ).to_dict()
     pub("vision.state", payload)
     print(f"[dispatcher] announce vision.state -> {payload}", flush=True)
 
@@ -186,62 +154,51 @@ def update_presence(evt: Dict[str, Any]) -> None:
     if should_announce_on or should_announce_off:
         announce_state()
 
-def rx_loop() -> None:
-    print("[dispatcher] rx_loop started", flush=True)
-    while True:
-        try:
-            topic, data = sub_recv()
-            if not topic.startswith("vision."):
-                continue
-            evt = normalize_event(topic, data)
-            if evt:
-                update_presence(evt)
-        except KeyboardInterrupt:
-            break
-        except zmq.Again:
-            # timeout — pozwala na responsywne zamknięcie
-            pass
-        except Exception as e:
-            print(f"[dispatcher] err: {e}", flush=True)
-            time.sleep(0.02)
-
-def heartbeat_loop() -> None:
-    while True:
-        try:
-            with STATE_LOCK:
-                present = STATE.present
-            pub("vision.dispatcher.heartbeat", {"ts": time.time(), "present": present})
-            time.sleep(5)
-        except KeyboardInterrupt:
-            break
-        except Exception:
-            time.sleep(5)
-
-def ttl_loop() -> None:
-    """Watchdog ciszy: gasi present po P_OFF_TT sekundach bez pozytywów."""
-    while True:
-        try:
-            now = time.time()
-            announce = False
-            with STATE_LOCK:
-                if STATE.present and (now - STATE.last_pos_ts) >= P_OFF_TT:
-                    STATE.present = False
-                    STATE.consecutive_pos = 0
-                    STATE.confidence = 0.0
-                    announce = True
-            if announce:
-                announce_state()
-            time.sleep(0.2)
-        except KeyboardInterrupt:
-            break
-        except Exception:
-            time.sleep(0.2)
+def on_vision(topic: str, data: Dict[str, Any]) -> None:
+    evt = normalize_event(topic, data if isinstance(data, dict) else {})
+    if evt:
+        update_presence(evt)
+
+def heartbeat() -> None:
+    with STATE_LOCK:
+        present = STATE.present
+    pub("vision.dispatcher.heartbeat", {"ts": time.time(), "present": present})
+
+def ttl_check() -> Optional[float]:
+    """
+    Watchdog ciszy: gasi present po P_OFF_TT sekundach bez pozytywów.
+    Zwraca ile sekund zostało do wygaśnięcia (None gdy present=False).
+    """
+    now = time.time()
+    announce = False
+    with STATE_LOCK:
+        if STATE.present and (now - STATE.last_pos_ts) >= P_OFF_TT:
+            STATE.present = False
+            STATE.consecutive_pos = 0
+            STATE.confidence = 0.0
+            announce = True
+        left = (STATE.last_pos_ts + P_OFF_TT - now) if STATE.present else None
+    if announce:
+        announce_state()
+    return left
+
+def run(reactor: BusReactor) -> None:
+    """Wszystko na jednym wątku: rx + heartbeat + TTL jako timery reaktora."""
+    for t in ("vision.face", "vision.person", "vision.detections"):
+        reactor.on(t, on_vision)
+    reactor.call_every(HEARTBEAT_SEC, heartbeat, now=True)
+
+    def _ttl_tick():
+        # timer ustawiany dokładnie na moment wygaśnięcia (bez 200 ms pollingu)
+        left = ttl_check()
+        reactor.call_later(left if left is not None else P_OFF_TT, _ttl_tick)
+    reactor.call_later(P_OFF_TT, _ttl_tick)
+
+    announce_state()  # początkowy stan
+    print("[dispatcher] reactor started", flush=True)
+    reactor.run()
 
 if __name__ == "__main__":
     print("[dispatcher] starting (topics: vision.face/person/detections)", flush=True)
     PUB = zmq_pub()
-    SUB = zmq_sub(["vision.face", "vision.person", "vision.detections"])
-    threading.Thread(target=heartbeat_loop, daemon=True).start()
-    threading.Thread(target=ttl_loop, daemon=True).start()
-    announce_state()  # początkowy stan
-    rx_loop()
+    run(BusReactor(endpoint=ZMQ_ADDR_SUB, decoder=_decode, name="dispatcher"))
@@ -11,6 +11,11 @@ PUBLISH = os.environ.get("PUBLISH", "1") == "1"
 BUS_PUB = os.environ.get("BUS_PUB", "tcp://127.0.0.1:5555")
 TOPIC   = os.environ.get("TOPIC", "vision.obstacle")
 OUT_JSON = os.path.join(os.path.dirname(SNAP_DIR), "data", "obstacle.json")
+# Źródło klatek: ring = pierścień w pamięci współdzielonej (powiadomienia camera.frame),
+# file = stare odpytywanie mtime proc.jpg/raw.jpg
+SOURCE   = os.environ.get("OBST_SOURCE", "ring" if os.environ.get("FRAME_RING", "1") == "1" else "file")
+RING     = os.environ.get("OBST_RING", "raw")
+MAX_HZ   = float(os.environ.get("OBST_MAX_HZ", "5"))
 
 # ZMQ (opcjonalnie)
 pub = None
@@ -44,6 +49,11 @@ def ensure_edges():
     edges = cv2.Canny(blur, 60, 120)
     return edges
 
+def edges_from_bgr(bgr):
+    gray = cv2.cvtColor(bgr, cv2.COLOR_BGR2GRAY) if bgr.ndim == 3 else bgr.copy()
+    blur = cv2.GaussianBlur(gray, (3,3), 0)
+    return cv2.Canny(blur, 60, 120)
+
 def roi_slice(img):
     h, w = img.shape[:2]
     y0 = int(max(0, min(1, ROI_Y0)) * h)
@@ -67,10 +77,32 @@ def publish(topic, obj):
         except Exception as e:
             print(f"[obst] warn: zmq send failed: {e}", flush=True)
 
-last_mtime = 0.0
-print(f"[obst] start | SNAP_DIR={SNAP_DIR} | PROC={PROC_PATH} | ROI_Y0={ROI_Y0} ROI_H={ROI_H} | THR pct={EDGE_AREA_PCT} pix={EDGE_PIX_MIN}", flush=True)
+def process(edges, src):
+    roi, (w, h, y0, y1) = roi_slice(edges)
+    present, pct, nz, total, conf = decide(roi)
+
+    payload = {
+        "type":"obstacle",
+        "present": bool(present),
+        "confidence": round(conf, 3),
+        "edge_pct": round(pct, 4),
+        "edge_nz": nz,
+        "roi": {"y0": y0, "y1": y1, "w": w, "h": h},
+        "ts": time.time()
+    }
+
+    # JSON obok — łatwy podgląd / integracja
+    try:
+        with open(OUT_JSON, "w") as f:
+            json.dump(payload, f)
+    except Exception as e:
+        print(f"[obst] warn: write json failed: {e}", flush=True)
 
-try:
+    publish(TOPIC, payload)
+    print(f"[obst] {src} present={present} pct={pct:.3f} nz={nz} roi=({y0}:{y1}/{h})", flush=True)
+
+def run_files():
+    last_mtime = 0.0
     while True:
         try:
             st = os.stat(PROC_PATH)
@@ -87,30 +119,38 @@ try:
             print("[obst] warn: no frame yet", flush=True)
             time.sleep(0.3)
             continue
+        process(edges, "snap")
+
+def run_ring():
+    """camera.frame → klatka z pierścienia (bez JPEG); backlog powiadomień przeskakujemy do najnowszej."""
+    sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.dirname(os.path.abspath(__file__)))))
+    from common.bus import BusSub
+    from common.frame_ring import FrameRingReader
+    from common.schemas import CameraFrame
+    sub = BusSub("camera.frame")
+    reader = FrameRingReader(RING)
+    min_dt = 1.0 / MAX_HZ if MAX_HZ > 0 else 0.0
+    last = 0.0
+    for _topic, data in sub:
+        note = CameraFrame.parse(data)
+        if note.ring != RING or (time.time() - last) < min_dt:
+            continue
+        f = reader.get(max(note.seq, reader.head()))
+        if f is None:
+            continue
+        edges = edges_from_bgr(f.array())  # Canny liczy na własnej kopii
+        if not f.valid():
+            continue  # slot nadpisany w trakcie — wynik z poszarpanej klatki
+        last = time.time()
+        process(edges, f"ring#{f.seq}")
 
-        roi, (w, h, y0, y1) = roi_slice(edges)
-        present, pct, nz, total, conf = decide(roi)
-
-        payload = {
-            "type":"obstacle",
-            "present": bool(present),
-            "confidence": round(conf, 3),
-            "edge_pct": round(pct, 4),
-            "edge_nz": nz,
-            "roi": {"y0": y0, "y1": y1, "w": w, "h": h},
-            "ts": time.time()
-        }
-
-        # JSON obok — łatwy podgląd / integracja
-        try:
-            with open(OUT_JSON, "w") as f:
-                json.dump(payload, f)
-        except Exception as e:
-            print(f"[obst] warn: write json failed: {e}", flush=True)
-
-        publish(TOPIC, payload)
-        print(f"[obst] snap present={present} pct={pct:.3f} nz={nz} roi=({y0}:{y1}/{h})", flush=True)
+print(f"[obst] start | SOURCE={SOURCE} RING={RING} | SNAP_DIR={SNAP_DIR} | PROC={PROC_PATH} | ROI_Y0={ROI_Y0} ROI_H={ROI_H} | THR pct={EDGE_AREA_PCT} pix={EDGE_PIX_MIN}", flush=True)
 
+try:
+    if SOURCE == "ring":
+        run_ring()
+    else:
+        run_files()
 except KeyboardInterrupt:
     pass
 finally:
@@ -1,34 +1,255 @@
 #!/usr/bin/env python3
 # -*- coding: utf-8 -*-
+import asyncio
 import json
 import os
+import threading
 import time
-from typing import Dict, Iterable, Iterator, Optional, Tuple, Union
+import uuid
+from typing import Any, Awaitable, Callable, Dict, Iterable, Iterator, List, Optional, Sequence, Tuple, Union
 
 import zmq
+import zmq.asyncio
+import zmq.utils.monitor
 
-# Broker endpoints (możesz nadpisać ENV-em; zostawiamy wartości domyślne)
-XPUB_ENDPOINT = os.getenv("BUS_XPUB", "tcp://127.0.0.1:5556")  # SUB łączy się TU
-XSUB_ENDPOINT = os.getenv("BUS_XSUB", "tcp://127.0.0.1:5555")  # PUB łączy się TU
+# opcjonalny kodek binarny (C-extension; bez niego zostaje JSON)
+try:
+    import msgpack as _msgpack  # type: ignore
+except Exception:
+    _msgpack = None
+
+# ── Endpointy brokera ────────────────────────────────────────────────────────
+# Transport klientów: tcp (domyślnie) | ipc (Unix socket — mniej CPU/latencji na jednym Pi).
+# Broker binduje TCP zawsze (klienci zdalni) + IPC, więc transport wybiera każdy klient sam.
+BUS_TRANSPORT = os.getenv("BUS_TRANSPORT", "tcp").strip().lower()
+BUS_HOST      = os.getenv("BUS_HOST", "127.0.0.1")
+BUS_PUB_PORT  = int(os.getenv("BUS_PUB_PORT", "5555"))  # XSUB brokera (PUB-y łączą się tu)
+BUS_SUB_PORT  = int(os.getenv("BUS_SUB_PORT", "5556"))  # XPUB brokera (SUB-y łączą się tu)
+BUS_IPC_DIR   = os.getenv("BUS_IPC_DIR", "/tmp/rider-bus")
+
+# jawne adresy z ENV (wsteczna zgodność) mają pierwszeństwo przed BUS_TRANSPORT
+_ENDPOINT_ENV = {"pub": ("BUS_XSUB", "BUS_PUB_ADDR"), "sub": ("BUS_XPUB", "BUS_SUB_ADDR")}
+_IPC_NAMES = {"pub": "xsub.sock", "sub": "xpub.sock"}
+_PORTS = {"pub": BUS_PUB_PORT, "sub": BUS_SUB_PORT}
+
+
+def bus_endpoint(role: str, transport: Optional[str] = None) -> str:
+    """
+    Adres brokera dla klienta: role="pub" (PUB → XSUB) albo role="sub" (SUB → XPUB).
+    Bez `transport`: jawny adres z ENV (BUS_XSUB/BUS_PUB_ADDR, BUS_XPUB/BUS_SUB_ADDR), potem BUS_TRANSPORT.
+    """
+    if role not in _PORTS:
+        raise ValueError(f"bus role must be 'pub' or 'sub', got {role!r}")
+    if transport is None:
+        for name in _ENDPOINT_ENV[role]:
+            v = os.getenv(name)
+            if v:
+                return v
+        transport = BUS_TRANSPORT
+    if transport == "ipc":
+        return f"ipc://{os.path.join(BUS_IPC_DIR, _IPC_NAMES[role])}"
+    return f"tcp://{BUS_HOST}:{_PORTS[role]}"
+
+
+def broker_endpoints(role: str, ipc: bool = True) -> List[str]:
+    """Adresy do bind() po stronie brokera: TCP na wszystkich interfejsach (+ IPC)."""
+    out = [f"tcp://*:{_PORTS[role]}"]
+    if ipc:
+        out.append(bus_endpoint(role, "ipc"))
+    return out
+
+
+XPUB_ENDPOINT = bus_endpoint("sub")  # SUB łączy się TU
+XSUB_ENDPOINT = bus_endpoint("pub")  # PUB łączy się TU
+
+# Domyślny kodek publikacji: json | msgpack
+BUS_CODEC = os.getenv("BUS_CODEC", "json").strip().lower()
 
 
 def now_ts() -> float:
     return time.time()
 
 
+# ── Kodeki payloadu ──────────────────────────────────────────────────────────
+# Ramka JSON zostaje „goła” (zgodność wstecz: stare SUB-y robią json.loads).
+# Ramka binarna zaczyna się od bajtu 0xC1 (niedozwolony w UTF-8, nieużywany
+# w msgpack) + 1 bajt id kodeka — dekoder rozpoznaje format po nagłówku.
+BIN_MAGIC = 0xC1
+
+
+class Codec:
+    """Para encode/decode payloadu. tag=None → ramka nietagowana (JSON)."""
+
+    name = ""
+    tag: Optional[int] = None
+
+    def encode(self, obj: Any) -> bytes:
+        raise NotImplementedError
+
+    def decode(self, data: bytes) -> Any:
+        raise NotImplementedError
+
+
+class JsonCodec(Codec):
+    name = "json"
+
+    def encode(self, obj: Any) -> bytes:
+        return json.dumps(obj, ensure_ascii=False, separators=(",", ":")).encode("utf-8")
+
+    def decode(self, data: bytes) -> Any:
+        return json.loads(data)
+
+
+class MsgpackCodec(Codec):
+    name = "msgpack"
+    tag = 0x01
+
+    def encode(self, obj: Any) -> bytes:
+        return _msgpack.packb(obj, use_bin_type=True)
+
+    def decode(self, data: bytes) -> Any:
+        return _msgpack.unpackb(data, raw=False)
+
+
+_CODECS: Dict[str, Codec] = {}
+_CODECS_BY_TAG: Dict[int, Codec] = {}
+
+
+def register_codec(codec: Codec) -> None:
+    """Zarejestruj kodek (nazwa + opcjonalny tag ramki binarnej)."""
+    _CODECS[codec.name] = codec
+    if codec.tag is not None:
+        _CODECS_BY_TAG[codec.tag] = codec
+
+
+register_codec(JsonCodec())
+if _msgpack is not None:
+    register_codec(MsgpackCodec())
+
+
+def get_codec(name: Optional[str] = None) -> Codec:
+    """
+    Zwróć kodek po nazwie (domyślnie BUS_CODEC).
+    Nieznany/niedostępny kodek → JSON (np. brak pakietu msgpack).
+    """
+    c = _CODECS.get((name or BUS_CODEC).strip().lower())
+    return c if c is not None else _CODECS["json"]
+
+
+def encode_payload(payload: Any, codec: Optional[Codec] = None) -> bytes:
+    c = codec or get_codec()
+    body = c.encode(payload)
+    if c.tag is None:
+        return body
+    return bytes((BIN_MAGIC, c.tag)) + body
+
+
+def payload_codec(data: bytes) -> Codec:
+    """Kodek, którym zakodowano payload (po nagłówku); nieznany tag → ValueError."""
+    if data and data[0] == BIN_MAGIC:
+        c = _CODECS_BY_TAG.get(data[1]) if len(data) > 1 else None
+        if c is None:
+            raise ValueError("unknown bus codec tag")
+        return c
+    return _CODECS["json"]
+
+
+def decode_payload(data: bytes) -> Any:
+    """
+    Zdekoduj payload dowolnego formatu (autodetekcja po nagłówku).
+    Pusty payload → None; błąd formatu → ValueError.
+    """
+    if not data:
+        return None
+    c = payload_codec(data)
+    return c.decode(data[2:] if c.tag is not None else data)
+
+
+def encode_frames(topic: str, payload: Any, codec: Optional[Codec] = None) -> List[bytes]:
+    """Multipart [topic, payload] gotowy do send_multipart()."""
+    return [topic.encode("utf-8"), encode_payload(payload, codec)]
+
+
+def split_frames(parts: Sequence[bytes]) -> Tuple[str, bytes]:
+    """
+    Rozbij wiadomość z SUB na (topic, surowy payload).
+    Wspiera multipart [topic, payload] i starszy single-frame "topic payload".
+    """
+    if not parts:
+        return "", b""
+    if len(parts) == 1:
+        raw = parts[0]
+        i = raw.find(b" ")
+        if i < 0:
+            return raw.decode("utf-8", "replace"), b""
+        return raw[:i].decode("utf-8", "replace"), raw[i + 1:]
+    body = parts[1] if len(parts) == 2 else b"".join(parts[1:])
+    return parts[0].decode("utf-8", "replace"), body
+
+
+def decode_frames(parts: Sequence[bytes]) -> Tuple[str, Any]:
+    """(topic, payload) z dowolnego formatu ramek; nieczytelny payload → None."""
+    topic, body = split_frames(parts)
+    try:
+        return topic, decode_payload(body)
+    except Exception:
+        return topic, None
+
+
+def handlers_for_topic(handlers: Dict[str, List[Any]], topic: str) -> List[Any]:
+    """Handlery najdłuższego prefiksu pasującego do tematu (wspólne dla AsyncBusSub i BusReactor)."""
+    best = None
+    for prefix in handlers:
+        if topic.startswith(prefix) and (best is None or len(prefix) > len(best)):
+            best = prefix
+    return handlers.get(best, []) if best is not None else []
+
+
+def connect_and_wait(sock: zmq.Socket, endpoint: str, timeout_ms: int = 1000) -> bool:
+    """
+    connect() + czekanie na handshake ZMTP (zamiast stałego sleep „anti slow-joiner”).
+    Zwraca True, gdy połączenie jest zestawione; False po timeout (ZMQ i tak
+    będzie się łączyć w tle, więc można kontynuować).
+    """
+    ev_ok = getattr(zmq, "EVENT_HANDSHAKE_SUCCEEDED", zmq.EVENT_CONNECTED)
+    try:
+        mon = sock.get_monitor_socket(ev_ok)
+    except Exception:
+        sock.connect(endpoint)
+        return False
+    try:
+        sock.connect(endpoint)
+        deadline = time.monotonic() + timeout_ms / 1000.0
+        while True:
+            left_ms = int((deadline - time.monotonic()) * 1000)
+            if left_ms <= 0 or not mon.poll(left_ms):
+                return False
+            ev = zmq.utils.monitor.recv_monitor_message(mon)
+            if ev.get("event") == ev_ok:
+                return True
+    finally:
+        try:
+            sock.disable_monitor()
+        except Exception:
+            pass
+        mon.close(0)
+
+
 class BusPub:
     """
-    Publisher: łączy się do XSUB brokera i publikuje multipart [topic, json].
+    Publisher: łączy się do XSUB brokera i publikuje multipart [topic, payload].
+    Payload kodowany kodekiem `codec` (domyślnie BUS_CODEC: json|msgpack).
     Kompatybilny wstecz z poprzednią wersją (publish(topic, payload)).
     """
 
-    def __init__(self, topic_prefix: str = "", warmup_ms: int = 0):
+    def __init__(self, topic_prefix: str = "", warmup_ms: int = 0, codec: Optional[str] = None):
         self.ctx = zmq.Context.instance()
         self.sock = self.ctx.socket(zmq.PUB)
         # nie trzymamy długo gniazda przy zamknięciu
         self.sock.setsockopt(zmq.LINGER, 0)
         self.sock.connect(XSUB_ENDPOINT)
         self.prefix = topic_prefix.rstrip(".")
+        self.codec = get_codec(codec)
         # opcjonalny warmup: w niektórych topologiach ZMQ PUB-SUB pomaga 1–10 ms
         if warmup_ms > 0:
             time.sleep(warmup_ms / 1000.0)
@@ -43,9 +264,7 @@ class BusPub:
         if add_ts and "ts" not in payload:
             payload = dict(payload)
             payload["ts"] = now_ts()
-        t = self._full_topic(topic).encode("utf-8")
-        msg = json.dumps(payload, ensure_ascii=False).encode("utf-8")
-        self.sock.send_multipart([t, msg])
+        self.sock.send_multipart(encode_frames(self._full_topic(topic), payload, self.codec))
 
     # wsteczna kompatybilność: metoda/argumenty jak wcześniej
     def send(self, topic: str, payload: Dict) -> None:
@@ -94,12 +313,7 @@ class BusSub:
         if timeout_ms is not None:
             if self.sock.poll(timeout=timeout_ms) <= 0:
                 return None, None
-        topic, data = self.sock.recv_multipart()
-        try:
-            payload = json.loads(data.decode("utf-8"))
-        except Exception:
-            payload = None
-        return topic.decode("utf-8"), payload
+        return decode_frames(self.sock.recv_multipart())
 
     def recv_iter(self) -> Iterator[Tuple[str, Dict]]:
         """Nieskończona pętla generatora (użyteczne w wątkach)."""
@@ -125,3 +339,270 @@ class BusSub:
 
     def __exit__(self, exc_type, exc, tb):
         self.close()
+
+
+# ── RPC na magistrali (request/reply, korelacja po rid) ─────────────────────
+# Żądanie: zwykła publikacja na temat usługi z polami "rid" i "reply_to".
+# Odpowiedź: usługa publikuje {"rid", ...} na temat z "reply_to" (rpc_reply()).
+RPC_REPLY_PREFIX = "rpc.reply."
+
+
+def rpc_reply(send: Callable[[str, Dict], None], request: Any, reply: Dict) -> bool:
+    """Odpowiedz na żądanie RPC (jeśli ma reply_to). send(topic, payload) — np. publish usługi."""
+    if not isinstance(request, dict) or not request.get("reply_to"):
+        return False
+    out = {"rid": request.get("rid"), "ts": now_ts()}
+    if request.get("corr") is not None:
+        out["corr"] = request["corr"]  # wewnętrzna korelacja BusRpcClient (rid bywa zdublowany)
+    out.update(reply)
+    send(str(request["reply_to"]), out)
+    return True
+
+
+class BusRpcClient:
+    """
+    Klient RPC: request(topic, payload, timeout) → dict odpowiedzi albo None (timeout).
+
+    Jeden SUB na własny temat odpowiedzi (rpc.reply.<name>) + wątek odbiorczy, który budzi
+    czekających po prywatnym „corr” (rid od wołającego idzie bez zmian i może się powtarzać)
+    — request() jest thread-safe (wiele wątków Flaska naraz).
+    send: opcjonalna funkcja publikacji (topic, payload), np. wspólny publisher procesu;
+    domyślnie własny PUB (z blokadą).
+    """
+
+    def __init__(self, name: Optional[str] = None, send: Optional[Callable[[str, Dict], Any]] = None,
+                 codec: Optional[str] = None, sub_endpoint: Optional[str] = None,
+                 pub_endpoint: Optional[str] = None, ctx: Optional[zmq.Context] = None):
+        self.ctx = ctx or zmq.Context.instance()
+        self.reply_topic = f"{RPC_REPLY_PREFIX}{name or f'{os.getpid()}-{uuid.uuid4().hex[:6]}'}"
+        self.codec = get_codec(codec)
+        self._lock = threading.Lock()
+        self._pending: Dict[str, list] = {}  # corr -> [Event, reply]
+        self._stopped = False
+
+        self.sub = self.ctx.socket(zmq.SUB)
+        self.sub.setsockopt(zmq.LINGER, 0)
+        # subskrypcja przed connect → idzie do brokera razem z handshake (bez stałego sleep)
+        self.sub.setsockopt(zmq.SUBSCRIBE, self.reply_topic.encode("utf-8"))
+        connect_and_wait(self.sub, sub_endpoint or XPUB_ENDPOINT)
+
+        self.pub = None
+        if send is None:
+            self.pub = self.ctx.socket(zmq.PUB)
+            self.pub.setsockopt(zmq.LINGER, 0)
+            connect_and_wait(self.pub, pub_endpoint or XSUB_ENDPOINT)
+            send = self._send_own
+        self._send = send
+        self._thread = threading.Thread(target=self._rx_loop, name="bus-rpc", daemon=True)
+        self._thread.start()
+
+    def _send_own(self, topic: str, payload: Dict) -> None:
+        with self._lock:
+            self.pub.send_multipart(encode_frames(topic, payload, self.codec))
+
+    def _rx_loop(self) -> None:
+        while not self._stopped:
+            try:
+                if not self.sub.poll(200):
+                    continue
+                _, data = decode_frames(self.sub.recv_multipart())
+            except zmq.ZMQError:
+                return
+            if not isinstance(data, dict):
+                continue
+            with self._lock:
+                slot = self._pending.get(str(data.get("corr")))
+            if slot is not None:
+                slot[1] = data
+                slot[0].set()
+
+    def request(self, topic: str, payload: Dict, timeout: float = 0.5) -> Optional[Dict]:
+        """Wyślij żądanie i czekaj na odpowiedź z tym samym corr (None po timeout)."""
+        corr = uuid.uuid4().hex
+        msg = dict(payload)
+        msg["rid"] = str(payload.get("rid") or corr[:12])
+        msg["corr"] = corr
+        msg["reply_to"] = self.reply_topic
+        msg.setdefault("ts", now_ts())
+        slot = [threading.Event(), None]
+        with self._lock:
+            self._pending[corr] = slot
+        try:
+            self._send(topic, msg)
+            slot[0].wait(timeout)
+        finally:
+            with self._lock:
+                self._pending.pop(corr, None)
+        return slot[1]
+
+    def close(self) -> None:
+        self._stopped = True
+        self._thread.join(1.0)
+        for sock in (self.sub, self.pub):
+            try:
+                if sock is not None:
+                    sock.close(0)
+            except Exception:
+                pass
+
+
+# ── Klienci asyncio ──────────────────────────────────────────────────────────
+# Jeden event loop obsługuje wiele tematów + timery, bez wątku na gniazdo.
+# Kontekst zmq.asyncio jest osobny od zmq.Context.instance() (inproc nie łączy się między nimi).
+
+Handler = Callable[[str, Any], Union[None, Awaitable[None]]]
+
+
+class AsyncBusPub:
+    """
+    Publisher asyncio: to samo co BusPub, ale `await pub.publish(topic, payload)`.
+    """
+
+    def __init__(self, topic_prefix: str = "", codec: Optional[str] = None, endpoint: Optional[str] = None):
+        self.ctx = zmq.asyncio.Context.instance()
+        self.sock = self.ctx.socket(zmq.PUB)
+        self.sock.setsockopt(zmq.LINGER, 0)
+        self.sock.connect(endpoint or XSUB_ENDPOINT)
+        self.prefix = topic_prefix.rstrip(".")
+        self.codec = get_codec(codec)
+
+    def _full_topic(self, topic: str) -> str:
+        return f"{self.prefix}.{topic}" if self.prefix else topic
+
+    async def publish(self, topic: str, payload: Dict, add_ts: bool = False) -> None:
+        if add_ts and "ts" not in payload:
+            payload = dict(payload)
+            payload["ts"] = now_ts()
+        await self.sock.send_multipart(encode_frames(self._full_topic(topic), payload, self.codec))
+
+    async def send(self, topic: str, payload: Dict) -> None:
+        await self.publish(topic, payload)
+
+    def close(self) -> None:
+        try:
+            self.sock.close(0)
+        except Exception:
+            pass
+
+    async def __aenter__(self):
+        return self
+
+    async def __aexit__(self, exc_type, exc, tb):
+        self.close()
+
+
+class AsyncBusSub:
+    """
+    Subscriber asyncio.
+
+      async for topic, msg in sub: ...          # iterator (timeouty pomijane)
+      topic, msg = await sub.recv(timeout_ms)   # (None, None) przy timeout
+
+      @sub.on("vision.")                        # handler per prefiks tematu (sync lub async)
+      async def on_vision(topic, msg): ...
+      await sub.run(idle_timeout_ms=1000, on_idle=...)
+
+    Dopasowanie handlerów: najdłuższy pasujący prefiks; on("") łapie resztę.
+    Subskrypcja ZMQ jest dopisywana automatycznie przy rejestracji handlera.
+    """
+
+    def __init__(self, topics: Union[str, Iterable[str]] = (), timeout_ms: Optional[int] = None,
+                 endpoint: Optional[str] = None):
+        self.ctx = zmq.asyncio.Context.instance()
+        self.sock = self.ctx.socket(zmq.SUB)
+        self.sock.setsockopt(zmq.LINGER, 0)
+        self.sock.connect(endpoint or XPUB_ENDPOINT)
+        self.timeout_ms = timeout_ms
+        self._handlers: Dict[str, List[Handler]] = {}
+        self._subscribed = set()
+        self._stopped = False
+
+        if isinstance(topics, str):
+            topics = [topics]
+        for t in topics:
+            self.subscribe(t)
+
+    def subscribe(self, topic: str) -> None:
+        if topic in self._subscribed:
+            return
+        self._subscribed.add(topic)
+        self.sock.setsockopt(zmq.SUBSCRIBE, topic.encode("utf-8"))
+
+    def on(self, prefix: str, handler: Optional[Handler] = None):
+        """Zarejestruj handler(topic, msg) dla prefiksu. Działa też jako dekorator."""
+        def _register(fn: Handler) -> Handler:
+            self._handlers.setdefault(prefix, []).append(fn)
+            self.subscribe(prefix)
+            return fn
+        return _register(handler) if handler is not None else _register
+
+    def handlers_for(self, topic: str) -> List[Handler]:
+        return handlers_for_topic(self._handlers, topic)
+
+    async def recv(self, timeout_ms: Optional[int] = None) -> Tuple[Optional[str], Optional[Dict]]:
+        """
+        Pobranie jednej wiadomości. timeout_ms=None → domyślny z konstruktora (None = bez limitu).
+        Zwraca (topic, payload) albo (None, None) przy timeout.
+        """
+        if timeout_ms is None:
+            timeout_ms = self.timeout_ms
+        if timeout_ms is not None:
+            if await self.sock.poll(timeout=timeout_ms) <= 0:
+                return None, None
+        return decode_frames(await self.sock.recv_multipart())
+
+    def __aiter__(self):
+        return self
+
+    async def __anext__(self) -> Tuple[str, Dict]:
+        while not self._stopped:
+            topic, payload = await self.recv()
+            if topic is not None:
+                return topic, payload
+        raise StopAsyncIteration
+
+    async def dispatch(self, topic: str, payload: Any) -> int:
+        """Wywołaj handlery dla tematu; wyjątek handlera nie zatrzymuje pętli. Zwraca liczbę wywołań."""
+        n = 0
+        for fn in self.handlers_for(topic):
+            try:
+                res = fn(topic, payload)
+                if asyncio.iscoroutine(res):
+                    await res
+                n += 1
+            except Exception as e:
+                print(f"[bus] handler error for {topic}: {e!r}", flush=True)
+        return n
+
+    async def run(self, idle_timeout_ms: Optional[int] = None,
+                  on_idle: Optional[Callable[[], Union[None, Awaitable[None]]]] = None) -> None:
+        """
+        Pętla dyspozytora do stop(). Gdy przez idle_timeout_ms nic nie przyjdzie — on_idle().
+        """
+        self._stopped = False
+        while not self._stopped:
+            topic, payload = await self.recv(idle_timeout_ms)
+            if topic is None:
+                if on_idle is not None:
+                    res = on_idle()
+                    if asyncio.iscoroutine(res):
+                        await res
+                continue
+            await self.dispatch(topic, payload)
+
+    def stop(self) -> None:
+        """Zakończ run()/iterację po bieżącej wiadomości (lub timeout)."""
+        self._stopped = True
+
+    def close(self) -> None:
+        self._stopped = True
+        try:
+            self.sock.close(0)
+        except Exception:
+            pass
+
+    async def __aenter__(self):
+        return self
+
+    async def __aexit__(self, exc_type, exc, tb):
+        self.close()
@@ -13,6 +13,7 @@ import os
 import time
 from typing import Optional
 from common.bus import BusPub, now_ts
+from common.schemas import CameraHeartbeat
 
 class CameraHB:
     def __init__(self, mode: str):
@@ -36,15 +37,12 @@ class CameraHB:
         if now - self._last < 1.0:
             return
         h, w = self._shape(frame)
-        self.pub.publish(
-            "camera.heartbeat",
-            {
-                "ts": now_ts(),  # mamy własny timestamp
-                "w": w, "h": h,
-                "mode": self.mode,
-                "fps": float(fps) if fps is not None else None,
-                "lcd": {"active": True, "presenting": bool(presenting), "rot": self.rot},
-            },
-            add_ts=False,
+        msg = CameraHeartbeat(
+            ts=now_ts(),  # mamy własny timestamp
+            w=w, h=h,
+            mode=self.mode,
+            fps=float(fps) if fps is not None else None,
+            lcd={"active": True, "presenting": bool(presenting), "rot": self.rot},
         )
+        self.pub.publish(msg.TOPIC, msg.to_dict(), add_ts=False)
         self._last = now
@@ -0,0 +1,213 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+common/frame_ring.py — pierścień surowych klatek w pamięci współdzielonej (mmap na /dev/shm).
+
+Zamiast JPEG na dysku (encode → zapis → odczyt → decode na każdym hopie) producent wpisuje
+klatkę raz do slotu pierścienia i publikuje na BUS małe powiadomienie `camera.frame`
+{ring, seq, slot, ts, w, h, c, fmt}; konsumenci mapują plik i czytają klatkę bez kopii.
+
+Układ pliku <FRAME_RING_DIR>/rider-frames-<name>:
+  nagłówek  64 B : MAGIC, slots, slot_bytes, head_seq (ostatnia zatwierdzona klatka)
+  slot[i]        : 64 B metadanych (commit, ts, w, h, c, nbytes, fmt) + slot_bytes danych
+Zapis (jeden producent): commit=0 → dane + meta → commit=seq → head_seq=seq.
+Odczyt: commit przed i po użyciu danych musi być równy seq (inaczej slot nadpisany w trakcie);
+konsument ma `slots` okresów klatki na obróbkę, zanim producent wróci do tego slotu.
+
+    w = FrameRingWriter("raw", slot_bytes=320*240*3)
+    seq = w.write(frame_bgr, 320, 240, 3, "bgr24")
+
+    r = FrameRingReader("raw")
+    f = r.latest()                     # Frame | None
+    arr = f.array()                    # numpy (H,W,C) bez kopii — tylko do czasu nadpisania slotu
+    gray = cv2.cvtColor(arr, ...)      # własna kopia
+    if f.valid(): ...                  # slot nie został nadpisany w trakcie
+
+ENV:
+  FRAME_RING=1                 # producenci: pisz do pierścienia (0 = tylko stare pliki JPEG)
+  FRAME_RING_DIR=/dev/shm      # katalog plików pierścieni (brak /dev/shm → katalog tymczasowy)
+  FRAME_RING_SLOTS=4
+"""
+from __future__ import annotations
+
+import mmap
+import os
+import struct
+import tempfile
+import time
+from typing import Any, Optional
+
+FRAME_RING_ENABLE = (os.getenv("FRAME_RING", "1") == "1")
+FRAME_RING_SLOTS  = max(2, int(os.getenv("FRAME_RING_SLOTS", "4")))
+FRAME_RING_DIR    = os.getenv("FRAME_RING_DIR") or ("/dev/shm" if os.path.isdir("/dev/shm") else tempfile.gettempdir())
+
+MAGIC = b"RFRING1\x00"
+_HDR = struct.Struct("<8sIIQ")          # magic, slots, slot_bytes, head_seq
+_HDR_SIZE = 64
+_HEAD_OFF = struct.calcsize("<8sII")    # offset head_seq w nagłówku
+_META = struct.Struct("<QdIIHI8s")      # commit, ts, w, h, c, nbytes, fmt
+_META_SIZE = 64
+_U64 = struct.Struct("<Q")
+
+
+def ring_path(name: str, base_dir: Optional[str] = None) -> str:
+    return os.path.join(base_dir or FRAME_RING_DIR, f"rider-frames-{name}")
+
+
+class Frame:
+    """Widok klatki w slocie (bez kopii). Ważny dopóki valid() == True."""
+    __slots__ = ("_ring", "seq", "slot", "ts", "w", "h", "c", "fmt", "data")
+
+    def __init__(self, ring: "FrameRingReader", seq: int, slot: int, ts: float,
+                 w: int, h: int, c: int, fmt: str, data: memoryview):
+        self._ring = ring
+        self.seq, self.slot, self.ts = seq, slot, ts
+        self.w, self.h, self.c, self.fmt = w, h, c, fmt
+        self.data = data
+
+    def valid(self) -> bool:
+        return self._ring._commit(self.slot) == self.seq
+
+    def array(self):
+        """numpy (H, W[, C]) uint8 na pamięci slotu (zero-copy)."""
+        import numpy as np  # late import: pierścień działa też bez numpy (bytes)
+        shape = (self.h, self.w, self.c) if self.c > 1 else (self.h, self.w)
+        return np.frombuffer(self.data, dtype=np.uint8).reshape(shape)
+
+    def copy(self) -> Optional[bytes]:
+        """Kopia danych; None gdy slot nadpisano w trakcie."""
+        out = bytes(self.data)
+        return out if self.valid() else None
+
+    def meta(self) -> dict:
+        return {"seq": self.seq, "slot": self.slot, "ts": self.ts,
+                "w": self.w, "h": self.h, "c": self.c, "fmt": self.fmt}
+
+
+class FrameRingWriter:
+    """Producent (jeden na pierścień). Plik tworzony od nowa i podmieniany atomowo (os.replace)."""
+
+    def __init__(self, name: str, slot_bytes: int, slots: int = FRAME_RING_SLOTS,
+                 base_dir: Optional[str] = None):
+        self.name = name
+        self.path = ring_path(name, base_dir)
+        self.slots = max(2, int(slots))
+        self.slot_bytes = int(slot_bytes)
+        self._stride = _META_SIZE + self.slot_bytes
+        size = _HDR_SIZE + self.slots * self._stride
+        os.makedirs(os.path.dirname(self.path), exist_ok=True)
+        tmp = f"{self.path}.{os.getpid()}.tmp"
+        with open(tmp, "wb") as f:
+            f.truncate(size)
+        self._f = open(tmp, "r+b")
+        self.mm = mmap.mmap(self._f.fileno(), size)
+        _HDR.pack_into(self.mm, 0, MAGIC, self.slots, self.slot_bytes, 0)
+        os.replace(tmp, self.path)
+        self.seq = 0
+
+    def write(self, buf: Any, w: int, h: int, c: int = 3, fmt: str = "bgr24",
+              ts: Optional[float] = None) -> int:
+        """Wpisz klatkę (obiekt z buffer protocol, np. ciągła tablica numpy); zwraca seq."""
+        try:
+            mv = memoryview(buf).cast("B")
+        except TypeError:  # nieciągły widok (np. wycinek tablicy) → jedna kopia
+            mv = memoryview(bytes(buf))
+        n = mv.nbytes
+        if n > self.slot_bytes:
+            raise ValueError(f"frame {n} B > slot {self.slot_bytes} B")
+        seq = self.seq + 1
+        slot = seq % self.slots
+        off = _HDR_SIZE + slot * self._stride
+        _U64.pack_into(self.mm, off, 0)  # slot w trakcie zapisu
+        self.mm[off + _META_SIZE:off + _META_SIZE + n] = mv
+        _META.pack_into(self.mm, off, 0, time.time() if ts is None else float(ts),
+                        int(w), int(h), int(c), n, fmt.encode("ascii")[:8])
+        _U64.pack_into(self.mm, off, seq)
+        _U64.pack_into(self.mm, _HEAD_OFF, seq)
+        self.seq = seq
+        return seq
+
+    def notice(self, seq: Optional[int] = None) -> dict:
+        """Payload powiadomienia camera.frame dla klatki seq (domyślnie ostatniej)."""
+        seq = self.seq if seq is None else seq
+        slot = seq % self.slots
+        _, ts, w, h, c, _, fmt = _META.unpack_from(self.mm, _HDR_SIZE + slot * self._stride)
+        return {"ring": self.name, "seq": seq, "slot": slot, "ts": ts, "w": w, "h": h, "c": c,
+                "fmt": fmt.rstrip(b"\x00").decode("ascii")}
+
+    def close(self, unlink: bool = False) -> None:
+        try: self.mm.close()
+        except Exception: pass
+        try: self._f.close()
+        except Exception: pass
+        if unlink:
+            try: os.unlink(self.path)
+            except Exception: pass
+
+
+class FrameRingReader:
+    """Konsument (dowolnie wielu). Sam przełącza się na nowy plik po restarcie producenta."""
+
+    def __init__(self, name: str, base_dir: Optional[str] = None):
+        self.name = name
+        self.path = ring_path(name, base_dir)
+        self.mm: Optional[mmap.mmap] = None
+        self._ino: Optional[int] = None
+        self.slots = 0
+        self._stride = 0
+
+    def _open(self) -> bool:
+        try:
+            st = os.stat(self.path)
+        except FileNotFoundError:
+            self.close()
+            return False
+        if self.mm is not None and st.st_ino == self._ino:
+            return True
+        self.close()
+        if st.st_size < _HDR_SIZE:
+            return False
+        with open(self.path, "rb") as f:
+            mm = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+        magic, slots, slot_bytes, _ = _HDR.unpack_from(mm, 0)
+        if magic != MAGIC or len(mm) < _HDR_SIZE + slots * (_META_SIZE + slot_bytes):
+            mm.close()
+            return False
+        self.mm, self._ino = mm, st.st_ino
+        self.slots, self._stride = slots, _META_SIZE + slot_bytes
+        return True
+
+    def _commit(self, slot: int) -> int:
+        if self.mm is None:
+            return -1
+        return _U64.unpack_from(self.mm, _HDR_SIZE + slot * self._stride)[0]
+
+    def head(self) -> int:
+        """Numer ostatniej zatwierdzonej klatki (0 = brak / pierścień nie istnieje)."""
+        if not self._open():
+            return 0
+        return _U64.unpack_from(self.mm, _HEAD_OFF)[0]
+
+    def get(self, seq: int) -> Optional[Frame]:
+        """Klatka seq, jeśli wciąż jest w pierścieniu."""
+        if seq <= 0 or not self._open():
+            return None
+        slot = seq % self.slots
+        off = _HDR_SIZE + slot * self._stride
+        commit, ts, w, h, c, n, fmt = _META.unpack_from(self.mm, off)
+        if commit != seq:
+            return None
+        data = memoryview(self.mm)[off + _META_SIZE:off + _META_SIZE + n]
+        return Frame(self, seq, slot, ts, w, h, c, fmt.rstrip(b"\x00").decode("ascii"), data)
+
+    def latest(self) -> Optional[Frame]:
+        return self.get(self.head())
+
+    def close(self) -> None:
+        if self.mm is not None:
+            try: self.mm.close()
+            except BufferError:
+                pass  # żywe widoki Frame.data — mapowanie zwolni GC
+            except Exception:
+                pass
+        self.mm, self._ino = None, None
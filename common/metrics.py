@@ -0,0 +1,138 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+common/metrics.py — lekkie metryki w procesie (histogramy opóźnień + liczniki) bez zależności.
+
+Usługa zbiera lokalnie i co jakiś czas publikuje snapshot() na BUS (JSON/msgpack);
+API trzyma ostatni snapshot i renderuje go w /metrics (prometheus_lines).
+
+    m = Metrics()
+    m.observe("cmd_age_ms", 3.2)            # histogram (kubełki ms, skumulowane od startu)
+    m.inc("skip_total", reason="min_gap")   # licznik z jedną etykietą (albo bez)
+    snap = m.snapshot()                      # {"hist": {...}, "counters": [...], "ts": ...}
+    lines = prometheus_lines(snap, "rider_bridge")
+
+Histogram: skumulowane kubełki jak w Prometheusie (count/sum/min/max od startu) oraz
+kwantyle p50/p95/p99 z okna ostatnich WINDOW próbek — do podglądu „na żywo”.
+Nie jest thread-safe (jeden wątek zapisujący, np. pętla reaktora).
+"""
+from __future__ import annotations
+
+import bisect
+import collections
+import time
+from typing import Any, Deque, Dict, List, Optional, Sequence, Tuple
+
+DEFAULT_MS_BUCKETS: Tuple[float, ...] = (0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 25.0, 50.0,
+                                         100.0, 250.0, 500.0, 1000.0)
+WINDOW = 512
+
+
+def _q(xs: Sequence[float], p: float) -> Optional[float]:
+    if not xs:
+        return None
+    return xs[min(len(xs) - 1, int(p * len(xs)))]
+
+
+class Histogram:
+    __slots__ = ("buckets", "counts", "count", "sum", "min", "max", "window")
+
+    def __init__(self, buckets: Sequence[float] = DEFAULT_MS_BUCKETS, window: int = WINDOW):
+        self.buckets = tuple(sorted(buckets))
+        self.counts = [0] * (len(self.buckets) + 1)  # ostatni = +Inf
+        self.count = 0
+        self.sum = 0.0
+        self.min: Optional[float] = None
+        self.max: Optional[float] = None
+        self.window: Deque[float] = collections.deque(maxlen=window)
+
+    def observe(self, v: float) -> None:
+        v = float(v)
+        self.counts[bisect.bisect_left(self.buckets, v)] += 1
+        self.count += 1
+        self.sum += v
+        self.min = v if self.min is None or v < self.min else self.min
+        self.max = v if self.max is None or v > self.max else self.max
+        self.window.append(v)
+
+    def snapshot(self) -> Dict[str, Any]:
+        xs = sorted(self.window)
+        cum, acc = [], 0
+        for c in self.counts:
+            acc += c
+            cum.append(acc)
+        r = lambda x: None if x is None else round(x, 3)
+        return {"le": list(self.buckets), "cum": cum, "count": self.count, "sum": round(self.sum, 3),
+                "min": r(self.min), "max": r(self.max), "window": len(xs),
+                "p50": r(_q(xs, 0.50)), "p95": r(_q(xs, 0.95)), "p99": r(_q(xs, 0.99))}
+
+
+class Metrics:
+    def __init__(self, buckets: Sequence[float] = DEFAULT_MS_BUCKETS):
+        self._buckets = tuple(buckets)
+        self.hists: Dict[str, Histogram] = {}
+        self.counters: "collections.Counter[Tuple[str, Tuple[Tuple[str, str], ...]]]" = collections.Counter()
+
+    def hist(self, name: str, window: int = WINDOW) -> Histogram:
+        """Histogram name (tworzony przy pierwszym użyciu; window liczy się tylko wtedy)."""
+        h = self.hists.get(name)
+        if h is None:
+            h = self.hists[name] = Histogram(self._buckets, window)
+        return h
+
+    def observe(self, name: str, v: float) -> None:
+        self.hist(name).observe(v)
+
+    def inc(self, name: str, n: int = 1, **labels: Any) -> None:
+        self.counters[(name, tuple(sorted((k, str(v)) for k, v in labels.items())))] += n
+
+    def value(self, name: str, **labels: Any) -> int:
+        return self.counters.get((name, tuple(sorted((k, str(v)) for k, v in labels.items()))), 0)
+
+    def by_label(self, name: str, label: str) -> Dict[str, int]:
+        """{wartość etykiety: licznik} dla licznika name (np. skip_total po reason)."""
+        out: Dict[str, int] = {}
+        for (n, lbls), v in self.counters.items():
+            if n == name:
+                for k, lv in lbls:
+                    if k == label:
+                        out[lv] = out.get(lv, 0) + v
+        return out
+
+    def snapshot(self) -> Dict[str, Any]:
+        return {
+            "hist": {k: h.snapshot() for k, h in self.hists.items()},
+            "counters": [{"name": n, "labels": dict(lbls), "value": v}
+                         for (n, lbls), v in sorted(self.counters.items())],
+            "ts": time.time(),
+        }
+
+
+def _labels(d: Dict[str, Any]) -> str:
+    parts = [f'{k}="{v}"' for k, v in sorted(d.items())]
+    return "{" + ",".join(parts) + "}" if parts else ""
+
+
+def prometheus_lines(snap: Optional[Dict[str, Any]], prefix: str) -> List[str]:
+    """Snapshot (także odebrany z BUS) → linie formatu tekstowego Prometheusa."""
+    if not isinstance(snap, dict):
+        return []
+    lines: List[str] = []
+    for name, h in sorted((snap.get("hist") or {}).items()):
+        base = f"{prefix}_{name}"
+        try:
+            for le, c in zip(list(h["le"]) + ["+Inf"], h["cum"]):
+                lines.append(f'{base}_bucket{{le="{le}"}} {c}')
+            lines.append(f"{base}_sum {h['sum']}")
+            lines.append(f"{base}_count {h['count']}")
+            for q in ("p50", "p95", "p99"):
+                if h.get(q) is not None:
+                    lines.append(f'{base}_window{{quantile="0.{q[1:]}"}} {h[q]}')
+        except (KeyError, TypeError):
+            continue
+    for c in snap.get("counters") or []:
+        try:
+            lines.append(f"{prefix}_{c['name']}{_labels(c.get('labels') or {})} {c['value']}")
+        except (KeyError, TypeError):
+            continue
+    return lines
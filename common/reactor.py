@@ -0,0 +1,263 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+common/reactor.py — jednowątkowy reaktor magistrali (zmq.Poller + kopiec timerów).
+
+Zamiast wątku na każdą pętlę (sub, heartbeat, TTL, ...) serwis rejestruje wszystko
+na jednym reaktorze:
+
+    r = BusReactor()
+    r.on("ui.button", on_button)             # handler(topic, payload) per prefiks tematu
+    r.call_every(1.0, pub_menu_state)        # timer okresowy
+    h = r.call_later(2.0, ttl_check)         # timer jednorazowy (h.cancel())
+    dm = RearmableTimer(r, on_expire)        # deadman/watchdog: dm.arm(0.3) przestawiany w O(1)
+    r.add_socket(sock, on_readable)          # dowolne gniazdo ZMQ → callback(sock)
+    r.run()                                  # do stop() / KeyboardInterrupt
+
+Timeout poll() = czas do najbliższego timera, więc timery strzelają z dokładnością
+pojedynczych ms, a bezczynny proces nie budzi się co 50–200 ms.
+
+Reaktor nie jest thread-safe: rejestracja przed run() albo z handlerów/timerów.
+Z innego wątku wolno tylko stop().
+"""
+import heapq
+import itertools
+import math
+import time
+from typing import Any, Callable, Dict, List, Optional
+
+import zmq
+
+from common.bus import bus_endpoint, decode_payload, handlers_for_topic, split_frames
+
+Handler = Callable[[str, Any], None]
+
+
+def _safe_decode(body: bytes) -> Any:
+    try:
+        return decode_payload(body)
+    except Exception:
+        return None
+
+
+class TimerHandle:
+    """Uchwyt timera z kopca reaktora; cancel() jest leniwe (wpis wypada przy zdjęciu)."""
+
+    __slots__ = ("due", "period", "fn", "cancelled")
+
+    def __init__(self, due: float, period: Optional[float], fn: Callable[[], None]):
+        self.due = due
+        self.period = period
+        self.fn = fn
+        self.cancelled = False
+
+    def cancel(self) -> None:
+        self.cancelled = True
+
+
+class RearmableTimer:
+    """
+    Jeden jednorazowy timer (deadman/watchdog) przestawiany bez zaśmiecania kopca.
+
+    arm(delay) tylko przesuwa termin, gdy wpis w kopcu jest wcześniejszy — wpis po
+    obudzeniu sprawdza aktualny termin i w razie potrzeby odkłada się na nowy.
+    Nowy wpis trafia do kopca tylko gdy termin się skraca (rzadkie).
+    late_s: o ile ostatnie wywołanie fn() spóźniło się względem terminu.
+    """
+
+    __slots__ = ("reactor", "fn", "deadline", "late_s", "_h")
+
+    def __init__(self, reactor: "BusReactor", fn: Callable[[], None]):
+        self.reactor = reactor
+        self.fn = fn
+        self.deadline: Optional[float] = None
+        self.late_s = 0.0
+        self._h: Optional[TimerHandle] = None
+
+    @property
+    def active(self) -> bool:
+        return self.deadline is not None
+
+    def arm(self, delay_s: float) -> float:
+        self.deadline = time.monotonic() + max(0.0, float(delay_s))
+        if self._h is None or self._h.due > self.deadline:
+            if self._h is not None:
+                self._h.cancel()
+            self._h = self.reactor.call_at(self.deadline, self._expire)
+        return self.deadline
+
+    def cancel(self) -> None:
+        self.deadline = None  # wpis w kopcu zostaje i po obudzeniu nic nie robi
+
+    def _expire(self) -> None:
+        self._h = None
+        if self.deadline is None:
+            return
+        now = time.monotonic()
+        if now < self.deadline:  # przedłużony w międzyczasie
+            self._h = self.reactor.call_at(self.deadline, self._expire)
+            return
+        self.late_s = now - self.deadline
+        self.deadline = None
+        self.fn()
+
+
+class BusReactor:
+    """
+    Reaktor: jedno gniazdo SUB do brokera (tworzone przy pierwszym on()),
+    dodatkowe gniazda przez add_socket() i timery na kopcu (time.monotonic).
+
+    decoder: bytes → payload (domyślnie common.bus.decode_payload, błąd → None).
+    max_wait_s: górny limit jednego poll() — po tylu sekundach widać stop() z innego wątku.
+    max_msgs: ile wiadomości z SUB obsłużyć na jedno wybudzenie (reszta w kolejnym obrocie),
+      żeby zalew tematu (np. camera.frame) nie zagłodził timerów.
+    """
+
+    def __init__(self, endpoint: Optional[str] = None, decoder: Optional[Callable[[bytes], Any]] = None,
+                 ctx: Optional[zmq.Context] = None, max_wait_s: float = 1.0, name: str = "reactor",
+                 max_msgs: int = 100):
+        self.ctx = ctx or zmq.Context.instance()
+        self.endpoint = endpoint or bus_endpoint("sub")
+        self.decoder = decoder or _safe_decode
+        self.max_wait_s = float(max_wait_s)
+        self.name = name
+        self.max_msgs = max(1, int(max_msgs))
+        self.poller = zmq.Poller()
+        self.sub: Optional[zmq.Socket] = None
+        self._handlers: Dict[str, List[Handler]] = {}
+        self._sockets: Dict[zmq.Socket, Callable[[zmq.Socket], None]] = {}
+        self._timers: List = []
+        self._seq = itertools.count()
+        self._stopped = False
+
+    # ── subskrypcje ──────────────────────────────────────────────────────────
+    def _ensure_sub(self) -> zmq.Socket:
+        if self.sub is None:
+            self.sub = self.ctx.socket(zmq.SUB)
+            self.sub.setsockopt(zmq.LINGER, 0)
+            self.sub.connect(self.endpoint)
+            self.add_socket(self.sub, self._on_sub_readable)
+        return self.sub
+
+    def on(self, prefix: str, handler: Optional[Handler] = None):
+        """Zarejestruj handler(topic, payload) dla prefiksu tematu (też jako dekorator)."""
+        def _register(fn: Handler) -> Handler:
+            sub = self._ensure_sub()
+            if prefix not in self._handlers:
+                sub.setsockopt(zmq.SUBSCRIBE, prefix.encode("utf-8"))
+            self._handlers.setdefault(prefix, []).append(fn)
+            return fn
+        return _register(handler) if handler is not None else _register
+
+    def handlers_for(self, topic: str) -> List[Handler]:
+        """Handlery najdłuższego pasującego prefiksu."""
+        return handlers_for_topic(self._handlers, topic)
+
+    def dispatch(self, topic: str, payload: Any) -> int:
+        n = 0
+        for fn in self.handlers_for(topic):
+            try:
+                fn(topic, payload)
+                n += 1
+            except Exception as e:
+                print(f"[{self.name}] handler error for {topic}: {e!r}", flush=True)
+        return n
+
+    def _on_sub_readable(self, sock: zmq.Socket) -> None:
+        # do max_msgs naraz — jeden poll() na paczkę; reszta po timerach w kolejnym obrocie
+        for _ in range(self.max_msgs):
+            try:
+                parts = sock.recv_multipart(zmq.NOBLOCK)
+            except zmq.Again:
+                return
+            topic, body = split_frames(parts)
+            self.dispatch(topic, self.decoder(body))
+
+    def add_socket(self, sock: zmq.Socket, callback: Callable[[zmq.Socket], None]) -> None:
+        """Dowolne gniazdo: callback(sock) gdy POLLIN."""
+        self._sockets[sock] = callback
+        self.poller.register(sock, zmq.POLLIN)
+
+    def remove_socket(self, sock: zmq.Socket) -> None:
+        if self._sockets.pop(sock, None) is not None:
+            self.poller.unregister(sock)
+
+    # ── timery ───────────────────────────────────────────────────────────────
+    def _push(self, h: TimerHandle) -> TimerHandle:
+        heapq.heappush(self._timers, (h.due, next(self._seq), h))
+        return h
+
+    def call_later(self, delay_s: float, fn: Callable[[], None]) -> TimerHandle:
+        return self._push(TimerHandle(time.monotonic() + max(0.0, float(delay_s)), None, fn))
+
+    def call_at(self, when_monotonic: float, fn: Callable[[], None]) -> TimerHandle:
+        return self._push(TimerHandle(float(when_monotonic), None, fn))
+
+    def call_every(self, period_s: float, fn: Callable[[], None], now: bool = False) -> TimerHandle:
+        period = max(0.001, float(period_s))
+        first = time.monotonic() + (0.0 if now else period)
+        return self._push(TimerHandle(first, period, fn))
+
+    def _run_timers(self) -> None:
+        now = time.monotonic()
+        while self._timers and self._timers[0][0] <= now:
+            _, _, h = heapq.heappop(self._timers)
+            if h.cancelled:
+                continue
+            try:
+                h.fn()
+            except Exception as e:
+                print(f"[{self.name}] timer error: {e!r}", flush=True)
+            if h.period is not None and not h.cancelled:
+                # stała siatka czasu; po zawieszeniu nie nadrabiamy zaległych tyknięć
+                h.due += h.period
+                if h.due <= now:
+                    h.due = now + h.period
+                self._push(h)
+
+    def _next_timeout_ms(self) -> int:
+        wait = self.max_wait_s
+        while self._timers and self._timers[0][2].cancelled:
+            heapq.heappop(self._timers)
+        if self._timers:
+            wait = min(wait, self._timers[0][0] - time.monotonic())
+        return max(0, int(math.ceil(wait * 1000.0)))
+
+    # ── pętla ────────────────────────────────────────────────────────────────
+    def run_once(self, timeout_ms: Optional[int] = None) -> None:
+        """Jedna iteracja: poll do najbliższego timera, obsłuż gniazda, potem timery."""
+        if timeout_ms is None:
+            timeout_ms = self._next_timeout_ms()
+        if self._sockets:
+            events = dict(self.poller.poll(timeout_ms))
+            for sock, cb in list(self._sockets.items()):
+                if sock in events:
+                    try:
+                        cb(sock)
+                    except Exception as e:
+                        print(f"[{self.name}] socket error: {e!r}", flush=True)
+        elif timeout_ms > 0:
+            time.sleep(timeout_ms / 1000.0)
+        self._run_timers()
+
+    def run(self) -> None:
+        self._stopped = False
+        try:
+            while not self._stopped:
+                self.run_once()
+        except KeyboardInterrupt:
+            pass
+
+    def stop(self) -> None:
+        self._stopped = True
+
+    def close(self) -> None:
+        self._stopped = True
+        for sock in list(self._sockets):
+            self.remove_socket(sock)
+        if self.sub is not None:
+            try:
+                self.sub.close(0)
+            except Exception:
+                pass
+            self.sub = None
@@ -0,0 +1,392 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+common/schemas.py — typowane wiadomości gorących tematów BUS.
+
+Każdy temat ma klasę z __slots__ i listą pól (Field); przy rejestracji klasa dostaje
+jedną, wygenerowaną raz funkcję parse(dict) → instancja (aliasy, konwersje, domyślne,
+przycięcie zakresu), więc usługi nie powtarzają `float(data.get("vx", 0.0))` na piechotę.
+
+    from common.schemas import parse, SchemaError
+    msg = parse("cmd.move", data)      # CmdMove | None (temat bez schematu)
+    msg.vx, msg.yaw, msg.duration
+    frames = msg.encode()              # [topic, payload] jak common.bus.encode_frames
+    topic, msg = decode(frames)        # odwrotnie (dla tematów bez schematu: surowy payload)
+
+Tryby:
+  STRICT=True  (komendy)    — wartość nie do skonwertowania → SchemaError (nadawca dostaje skip)
+  STRICT=False (telemetria) — zła wartość → domyślna (jak dotychczasowe defensywne parsowanie)
+Brak pola / None → wartość domyślna; to_dict() pomija pola równe None.
+"""
+from __future__ import annotations
+
+import math
+from typing import Any, Callable, Dict, List, NamedTuple, Optional, Sequence, Tuple, Type
+
+from common.bus import decode_frames, encode_frames, Codec
+
+
+class SchemaError(ValueError):
+    """Payload nie pasuje do schematu tematu (tylko schematy STRICT)."""
+
+
+class Field(NamedTuple):
+    name: str
+    conv: Callable[[Any], Any]
+    default: Any = None
+    aliases: Tuple[str, ...] = ()
+    lo: Optional[float] = None
+    hi: Optional[float] = None
+
+
+# ── Konwersje (ValueError/TypeError = zła wartość) ───────────────────────────
+def as_float(v: Any) -> float:
+    if type(v) is float:
+        x = v
+    elif isinstance(v, bool):
+        raise TypeError("bool is not a number")
+    else:
+        x = float(v)
+    if not math.isfinite(x):
+        raise ValueError("not finite")
+    return x
+
+
+def as_int(v: Any) -> int:
+    if type(v) is int:
+        return v
+    return int(as_float(v))
+
+
+def as_bool(v: Any) -> bool:
+    if isinstance(v, str):
+        return v.strip().lower() not in ("", "0", "false", "off", "no")
+    return bool(v)
+
+
+def as_str(v: Any) -> str:
+    return v if type(v) is str else str(v)
+
+
+def as_lower(v: Any) -> str:
+    return as_str(v).strip().lower()
+
+
+def as_list(v: Any) -> list:
+    if isinstance(v, list):
+        return v
+    if isinstance(v, tuple):
+        return list(v)
+    raise TypeError("expected list")
+
+
+def as_dict(v: Any) -> dict:
+    if isinstance(v, dict):
+        return v
+    raise TypeError("expected object")
+
+
+def as_any(v: Any) -> Any:
+    return v
+
+
+def as_detections(v: Any) -> List[Dict[str, Any]]:
+    """Lista detekcji → [{"label": str (lower), "score": float, "bbox": ...}, ...]; śmieci pomijane."""
+    out = []
+    for d in as_list(v):
+        if not isinstance(d, dict):
+            continue
+        try:
+            sc = as_float(d.get("score", d.get("confidence", 0.0)))
+        except (TypeError, ValueError):
+            sc = 0.0
+        out.append({"label": as_lower(d.get("label") or d.get("class") or ""),
+                    "score": sc, "bbox": d.get("bbox")})
+    return out
+
+
+def as_segments(v: Any) -> List[Tuple[float, float, float, float]]:
+    """Segmenty trajektorii → [(dur, vx, vy, yaw), ...]; [t, vx, yaw(, vy)] albo {t|dur, vx, vy, yaw|az}."""
+    out = []
+    for s in as_list(v):
+        if isinstance(s, dict):
+            dur = as_float(s.get("dur", s.get("t")))
+            vx, vy = as_float(s.get("vx", 0.0)), as_float(s.get("vy", 0.0))
+            yaw = as_float(s.get("yaw", s.get("az", 0.0)))
+        else:
+            s = as_list(s)
+            if not 3 <= len(s) <= 4:
+                raise ValueError("segment must be [t, vx, yaw] or [t, vx, yaw, vy]")
+            dur, vx, yaw = (as_float(x) for x in s[:3])
+            vy = as_float(s[3]) if len(s) == 4 else 0.0
+        if dur <= 0.0:
+            raise ValueError("segment duration must be > 0")
+        out.append((dur, vx, vy, yaw))
+    return out
+
+
+# ── Klasa bazowa + kompilacja parsera ────────────────────────────────────────
+class Message:
+    __slots__ = ()
+    TOPIC: str = ""
+    FIELDS: Tuple[Field, ...] = ()
+    STRICT: bool = True
+
+    def __init__(self, **kw: Any):
+        for f in self.FIELDS:
+            setattr(self, f.name, kw.get(f.name, f.default))
+
+    @classmethod
+    def parse(cls, data: Any) -> "Message":
+        """Klasa bez register(): parser kompilowany przy pierwszym użyciu i zapamiętany w klasie."""
+        fn = _compile_parser(cls)
+        cls.parse = staticmethod(fn)  # type: ignore[assignment]
+        return fn(data)
+
+    def to_dict(self) -> Dict[str, Any]:
+        out = {}
+        for f in self.FIELDS:
+            v = getattr(self, f.name)
+            if v is not None:
+                out[f.name] = v
+        return out
+
+    def encode(self, codec: Optional[Codec] = None) -> List[bytes]:
+        return encode_frames(self.TOPIC, self.to_dict(), codec)
+
+    def __eq__(self, other: Any) -> bool:
+        return type(other) is type(self) and self.to_dict() == other.to_dict()
+
+    def __repr__(self) -> str:
+        body = ", ".join(f"{k}={v!r}" for k, v in self.to_dict().items())
+        return f"{type(self).__name__}({body})"
+
+
+def _slots(fields: Sequence[Field]) -> Tuple[str, ...]:
+    return tuple(f.name for f in fields)
+
+
+def _compile_parser(cls: Type[Message]) -> Callable[[Any], Message]:
+    """Generuje parse(d) bez pętli po polach: jeden przebieg po dict, zero refleksji."""
+    ns: Dict[str, Any] = {"_new": object.__new__, "_cls": cls, "SchemaError": SchemaError}
+    src = [
+        "def parse(d):",
+        "    if d is None: d = {}",
+        "    elif not isinstance(d, dict):",
+        f"        raise SchemaError('{cls.TOPIC}: payload must be an object')",
+        "    m = _new(_cls)",
+    ]
+    for i, f in enumerate(cls.FIELDS):
+        ns[f"_c{i}"] = f.conv
+        ns[f"_d{i}"] = f.default
+        src.append(f"    v = d.get({f.name!r})")
+        for a in f.aliases:
+            src.append(f"    if v is None: v = d.get({a!r})")
+        if f.conv is as_any:
+            src.append(f"    m.{f.name} = _d{i} if v is None else v")
+            continue
+        src.append(f"    if v is None: m.{f.name} = _d{i}")
+        src.append("    else:")
+        src.append("        try:")
+        if f.conv is as_float:
+            # szybka ścieżka inline: skończony float przechodzi bez wywołania (nan/inf: v - v != 0)
+            src.append(f"            if type(v) is not float or v - v != 0.0: v = _c{i}(v)")
+        else:
+            src.append(f"            v = _c{i}(v)")
+        if f.lo is not None:
+            src.append(f"            if v < {f.lo!r}: v = {f.lo!r}")
+        if f.hi is not None:
+            src.append(f"            if v > {f.hi!r}: v = {f.hi!r}")
+        src.append("        except (TypeError, ValueError) as e:")
+        if cls.STRICT:
+            src.append(f"            raise SchemaError('{cls.TOPIC}.{f.name}: ' + str(e)) from None")
+        else:
+            src.append(f"            v = _d{i}")
+        src.append(f"        m.{f.name} = v")
+    src.append("    return m")
+    exec(compile("\n".join(src), f"<schema {cls.TOPIC}>", "exec"), ns)
+    return ns["parse"]
+
+
+SCHEMAS: Dict[str, Type[Message]] = {}
+
+
+def register(cls: Type[Message]) -> Type[Message]:
+    """Dekorator: kompiluje parser klasy i przypisuje ją do tematu cls.TOPIC."""
+    cls.parse = staticmethod(_compile_parser(cls))  # type: ignore[assignment]
+    SCHEMAS[cls.TOPIC] = cls
+    return cls
+
+
+def schema_for(topic: str) -> Optional[Type[Message]]:
+    return SCHEMAS.get(topic)
+
+
+def parse(topic: str, data: Any) -> Optional[Message]:
+    """Wiadomość typowana dla tematu; None gdy temat nie ma schematu. SchemaError gdy STRICT i zły payload."""
+    cls = SCHEMAS.get(topic)
+    return cls.parse(data) if cls is not None else None
+
+
+def decode(frames: Sequence[bytes]) -> Tuple[str, Any]:
+    """Jak common.bus.decode_frames, ale dla znanych tematów zwraca Message."""
+    topic, data = decode_frames(frames)
+    cls = SCHEMAS.get(topic)
+    return topic, (cls.parse(data) if cls is not None else data)
+
+
+def encode(msg: Message, codec: Optional[Codec] = None) -> List[bytes]:
+    return msg.encode(codec)
+
+
+# ── Komendy ruchu ────────────────────────────────────────────────────────────
+_RPC_FIELDS = (
+    Field("rid", as_any),
+    Field("reply_to", as_str),
+    Field("ts", as_float),
+)
+
+
+@register
+class CmdMove(Message):
+    """cmd.move {vx, vy, yaw|az, duration, ts, rid}; konwencja skrętu jak w motion_bridge."""
+    TOPIC = "cmd.move"
+    FIELDS = (
+        Field("vx", as_float, 0.0),
+        Field("vy", as_float, 0.0),
+        Field("yaw", as_float, 0.0, aliases=("az",)),
+        Field("duration", as_float),
+    ) + _RPC_FIELDS
+    __slots__ = _slots(FIELDS)
+
+
+@register
+class CmdVelocity(Message):
+    """cmd.velocity {vx, vy, yaw|az, ts, rid} — strumień prędkości zadanej (apps.motion.setpoint)."""
+    TOPIC = "cmd.velocity"
+    FIELDS = (
+        Field("vx", as_float, 0.0),
+        Field("vy", as_float, 0.0),
+        Field("yaw", as_float, 0.0, aliases=("az",)),
+    ) + _RPC_FIELDS
+    __slots__ = _slots(FIELDS)
+
+
+@register
+class CmdTrajectory(Message):
+    """cmd.trajectory {segments: [[t, vx, yaw(, vy)] | {t, vx, vy, yaw}, ...], ts, rid} — wykonuje most."""
+    TOPIC = "cmd.trajectory"
+    FIELDS = (
+        Field("segments", as_segments),
+    ) + _RPC_FIELDS
+    __slots__ = _slots(FIELDS)
+
+
+@register
+class CmdStop(Message):
+    TOPIC = "cmd.stop"
+    FIELDS = _RPC_FIELDS
+    __slots__ = _slots(FIELDS)
+
+
+@register
+class MotionCmd(Message):
+    """motion.cmd (legacy dashboard) {dir, v, t, ts, rid}."""
+    TOPIC = "motion.cmd"
+    FIELDS = (
+        Field("dir", as_lower, ""),
+        Field("v", as_float, 0.0),
+        Field("t", as_float),
+    ) + _RPC_FIELDS
+    __slots__ = _slots(FIELDS)
+
+
+class CmdMotionLegacy(Message):
+    """cmd.motion.<kierunek> (legacy) {speed, runtime, ts, rid}; bez register() — jeden schemat na sześć tematów."""
+    TOPIC = "cmd.motion.*"
+    FIELDS = (
+        Field("speed", as_float, 10.0),
+        Field("runtime", as_float, 0.6),
+    ) + _RPC_FIELDS
+    __slots__ = _slots(FIELDS)
+
+
+# ── Telemetria ───────────────────────────────────────────────────────────────
+@register
+class DevicesXgo(Message):
+    """devices.xgo z motion_bridge; pola mogą przychodzić częściowo (None = brak)."""
+    TOPIC = "devices.xgo"
+    STRICT = False
+    FIELDS = (
+        Field("present", as_bool),
+        Field("imu_ok", as_bool),
+        Field("pose", as_any),
+        Field("battery_pct", as_float, aliases=("battery",)),
+        Field("roll", as_float),
+        Field("pitch", as_float),
+        Field("yaw_raw", as_float),
+        Field("yaw", as_float),
+        Field("yaw_rate_dps", as_float),
+        Field("yaw_src", as_str),
+        Field("fw", as_any),
+        Field("ts", as_float),
+    )
+    __slots__ = _slots(FIELDS)
+
+
+@register
+class VisionDetections(Message):
+    TOPIC = "vision.detections"
+    STRICT = False
+    FIELDS = (
+        Field("items", as_detections, (), aliases=("detections", "objects")),
+        Field("mode", as_str),
+        Field("ts", as_float),
+    )
+    __slots__ = _slots(FIELDS)
+
+
+@register
+class VisionState(Message):
+    TOPIC = "vision.state"
+    STRICT = False
+    FIELDS = (
+        Field("present", as_bool, False),
+        Field("confidence", as_float, 0.0, lo=0.0, hi=1.0),
+        Field("mode", as_str),
+        Field("ts", as_float),
+    )
+    __slots__ = _slots(FIELDS)
+
+
+@register
+class CameraHeartbeat(Message):
+    TOPIC = "camera.heartbeat"
+    STRICT = False
+    FIELDS = (
+        Field("ts", as_float),
+        Field("w", as_int, 0),
+        Field("h", as_int, 0),
+        Field("mode", as_str),
+        Field("fps", as_float),
+        Field("lcd", as_dict),
+    )
+    __slots__ = _slots(FIELDS)
+
+
+@register
+class CameraFrame(Message):
+    """camera.frame — powiadomienie o klatce w pierścieniu (common.frame_ring); bez pikseli."""
+    TOPIC = "camera.frame"
+    STRICT = False
+    FIELDS = (
+        Field("ring", as_str, "raw"),
+        Field("seq", as_int, 0),
+        Field("slot", as_int, 0),
+        Field("ts", as_float),
+        Field("w", as_int, 0),
+        Field("h", as_int, 0),
+        Field("c", as_int, 3),
+        Field("fmt", as_str, "bgr24"),
+    )
+    __slots__ = _slots(FIELDS)
@@ -0,0 +1,70 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+common/ticker.py — pętla o stałym okresie liczona od terminów (bez dryfu) + statystyki jittera.
+
+`time.sleep(LOOP_DT)` po pracy daje okres LOOP_DT + czas pracy, a opóźnienia się
+sumują. FixedRateTicker śpi do bezwzględnego terminu (t0 + k·period):
+
+  * spóźnienie jednego ticku nie przesuwa kolejnych,
+  * przy spóźnieniu > period (przeciążenie) nie nadrabia serią ticków — przestawia
+    terminy od „teraz” i liczy overrun,
+  * jitter (pobudka − termin) trafia do histogramu common.metrics (p50/p95/p99 z okna).
+
+    tick = FixedRateTicker(0.02)
+    while True:
+        dt = tick.wait()       # rzeczywisty czas od poprzedniego ticku
+        work(dt)
+    tick.stats()               # {"period_ms", "ticks", "overruns", "jitter_ms": {...}}
+"""
+from __future__ import annotations
+
+import time
+from typing import Any, Callable, Dict, Optional
+
+from common.metrics import Histogram
+
+JITTER_BUCKETS_MS = (0.1, 0.25, 0.5, 1.0, 2.0, 5.0, 10.0, 20.0, 50.0, 100.0)
+
+
+class FixedRateTicker:
+    def __init__(self, period_s: float, clock: Callable[[], float] = time.monotonic,
+                 sleep: Callable[[float], None] = time.sleep, window: int = 500):
+        self.period = max(1e-4, float(period_s))
+        self._clock = clock
+        self._sleep = sleep
+        self.next: Optional[float] = None
+        self.last: Optional[float] = None
+        self.ticks = 0
+        self.overruns = 0
+        self.jitter = Histogram(JITTER_BUCKETS_MS, window=window)
+
+    def wait(self) -> float:
+        """Czeka do kolejnego terminu; zwraca dt od poprzedniego ticku (pierwszy: period)."""
+        now = self._clock()
+        if self.next is None:
+            self.next = now  # pierwszy tick od razu
+        else:
+            delay = self.next - now
+            if delay > 0:
+                self._sleep(delay)
+                now = self._clock()
+            late = now - self.next
+            self.jitter.observe(late * 1000.0)
+            if late > self.period:
+                self.overruns += 1
+                self.next = now  # bez serii nadrabiającej
+        dt = self.period if self.last is None else now - self.last
+        self.last = now
+        self.next += self.period
+        self.ticks += 1
+        return dt
+
+    def stats(self) -> Dict[str, Any]:
+        j = self.jitter.snapshot()
+        return {
+            "period_ms": round(self.period * 1000.0, 3),
+            "ticks": self.ticks,
+            "overruns": self.overruns,
+            "jitter_ms": {k: j[k] for k in ("p50", "p95", "p99", "max", "window")},
+        }
@@ -6,6 +6,7 @@ ALLOW_UNITS=(
   rider-api.service
   rider-broker.service
   rider-motion-bridge.service
+  rider-xgo-uart.service
   rider-vision.service
   rider-web-bridge.service
   rider-cam-preview.service
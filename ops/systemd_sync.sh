@@ -17,6 +17,7 @@ ALLOW_UNITS=(
   "rider-api.service"
   "rider-vision.service"
   "rider-motion-bridge.service"
+  "rider-xgo-uart.service"       # jedyny właściciel UART XGO (motion-bridge/API: XGO_UART=1)
   "rider-boot-prepare.service"
   "rider-minimal.target"
   "rider-edge-preview.service"   # edge preview (Canny)
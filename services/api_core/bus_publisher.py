@@ -0,0 +1,149 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Procesowy publisher BUS dla API.
+
+Jedno długo żyjące gniazdo PUB, posiadane przez wątek nadawcy i karmione z kolejki.
+Wątki Flaska tylko wrzucają (topic, payload) do kolejki — bez socketu na żądanie
+(slow-joiner gubił pierwsze wiadomości, gniazda wyciekały pod obciążeniem).
+
+ENV:
+  API_PUB_QUEUE=1024        # pojemność kolejki (pełna → drop + licznik)
+  API_PUB_CONNECT_MS=1000   # czekanie na handshake z brokerem przy starcie
+"""
+from __future__ import annotations
+import os, time, queue, threading
+from typing import Any, Dict, Optional
+
+PUB_QUEUE_MAX  = int(os.getenv("API_PUB_QUEUE", "1024"))
+PUB_CONNECT_MS = int(os.getenv("API_PUB_CONNECT_MS", "1000"))
+
+_STOP = object()
+
+
+class BusPublisher:
+    """
+    publish() jest thread-safe i nieblokujące; wysyłka w wątku „api-bus-pub”.
+    stats(): enqueued/sent/dropped_full/errors, głębokość kolejki, połączenie.
+    """
+
+    def __init__(self, endpoint: Optional[str] = None, maxsize: int = PUB_QUEUE_MAX,
+                 connect_ms: int = PUB_CONNECT_MS, ctx=None):
+        self.endpoint = endpoint
+        self.connect_ms = int(connect_ms)
+        self._ctx = ctx
+        self._q: "queue.Queue" = queue.Queue(maxsize=max(1, int(maxsize)))
+        self._lock = threading.Lock()
+        self._thread: Optional[threading.Thread] = None
+        self.counters: Dict[str, int] = {"enqueued": 0, "sent": 0, "dropped_full": 0, "errors": 0}
+        self.max_depth = 0
+        self.connected = False
+        self.last_error: Optional[str] = None
+        self.last_sent_ts: Optional[float] = None
+
+    # ── API ──────────────────────────────────────────────────────────────────
+    def start(self) -> None:
+        with self._lock:
+            if self._thread is not None and self._thread.is_alive():
+                return
+            self._thread = threading.Thread(target=self._run, name="api-bus-pub", daemon=True)
+            self._thread.start()
+
+    def publish(self, topic: str, payload: Any) -> bool:
+        """Wrzuć do kolejki; False gdy pełna (licznik dropped_full)."""
+        if self._thread is None:
+            self.start()
+        try:
+            self._q.put_nowait((topic, payload))
+        except queue.Full:
+            with self._lock:
+                self.counters["dropped_full"] += 1
+            return False
+        with self._lock:
+            self.counters["enqueued"] += 1
+            depth = self._q.qsize()
+            if depth > self.max_depth:
+                self.max_depth = depth
+        return True
+
+    def flush(self, timeout: float = 1.0) -> bool:
+        """Poczekaj aż kolejka zostanie wysłana (testy/zamykanie)."""
+        deadline = time.time() + timeout
+        while time.time() < deadline:
+            if self._q.unfinished_tasks == 0:
+                return True
+            time.sleep(0.005)
+        return self._q.unfinished_tasks == 0
+
+    def close(self, timeout: float = 1.0) -> None:
+        if self._thread is None:
+            return
+        try:
+            self._q.put(_STOP, timeout=timeout)
+        except queue.Full:
+            pass
+        self._thread.join(timeout)
+        self._thread = None
+
+    def stats(self) -> Dict[str, Any]:
+        with self._lock:
+            out: Dict[str, Any] = dict(self.counters)
+            out["queue_depth"] = self._q.qsize()
+            out["queue_max"] = self._q.maxsize
+            out["max_depth"] = self.max_depth
+        out["connected"] = self.connected
+        out["endpoint"] = self.endpoint
+        out["last_error"] = self.last_error
+        out["last_sent_ts"] = self.last_sent_ts
+        return out
+
+    # ── wątek nadawcy ────────────────────────────────────────────────────────
+    def _run(self) -> None:
+        try:
+            import zmq  # late import by need
+            from common.bus import bus_endpoint, connect_and_wait, encode_frames, get_codec
+        except Exception as e:
+            self.last_error = f"import: {e}"
+            print(f"[api] bus publisher disabled: {e}", flush=True)
+            return
+
+        if self.endpoint is None:
+            self.endpoint = bus_endpoint("pub")
+        codec = get_codec()
+        sock = (self._ctx or zmq.Context.instance()).socket(zmq.PUB)
+        sock.setsockopt(zmq.LINGER, 0)
+        self.connected = connect_and_wait(sock, self.endpoint, self.connect_ms)
+        print(f"[api] bus publisher {self.endpoint} connected={self.connected}", flush=True)
+        try:
+            while True:
+                item = self._q.get()
+                try:
+                    if item is _STOP:
+                        return
+                    topic, payload = item
+                    sock.send_multipart(encode_frames(topic, payload, codec))
+                    with self._lock:
+                        self.counters["sent"] += 1
+                    self.last_sent_ts = time.time()
+                except Exception as e:
+                    with self._lock:
+                        self.counters["errors"] += 1
+                    self.last_error = repr(e)
+                finally:
+                    self._q.task_done()
+        finally:
+            sock.close(0)
+
+
+_PUBLISHER: Optional[BusPublisher] = None
+_PUBLISHER_LOCK = threading.Lock()
+
+
+def get_publisher() -> BusPublisher:
+    """Wspólny publisher procesu API (tworzony i startowany leniwie)."""
+    global _PUBLISHER
+    with _PUBLISHER_LOCK:
+        if _PUBLISHER is None:
+            _PUBLISHER = BusPublisher()
+            _PUBLISHER.start()
+        return _PUBLISHER
@@ -1,7 +1,8 @@
 #!/usr/bin/env python3
 # -*- coding: utf-8 -*-
 from __future__ import annotations
-import os, time, mimetypes
+import os, time, mimetypes, threading
+from typing import Dict, Optional
 from flask import Response, make_response, send_file, abort
 from . import compat as C
 
@@ -14,6 +15,7 @@ _MIME = {
     ".bmp": "image/bmp",
 }
 SNAP_MAX_AGE_S = int(os.getenv("SNAP_MAX_AGE_S", "20"))  # po ilu sekundach uznać klatkę za przeterminowaną
+CAMERA_FROM_RING = (os.getenv("CAMERA_FROM_RING", "1") == "1")  # raw/proc z pierścienia klatek, gdy żywy
 
 # Upewnij się, że porównujemy ścieżki absolutne
 _SNAP_DIR_ABS = os.path.abspath(C.SNAP_DIR)
@@ -37,17 +39,50 @@ def _fresh(path: str) -> bool:
     except Exception:
         return False
 
-def _nocache_file_response(path: str, mime: str | None = None):
-    """Zwróć plik z nagłówkami twardo wyłączającymi cache."""
-    resp = make_response(send_file(path, mimetype=mime, conditional=False))
+# --- pierścień klatek (common.frame_ring): JPEG kodowany dopiero na żądanie dashboardu ---
+_RINGS: Dict[str, object] = {}
+_RING_LOCK = threading.Lock()
+
+def _ring_jpeg(name: str) -> Optional[bytes]:
+    """Najnowsza klatka z pierścienia `name` jako JPEG; None gdy brak/przeterminowana/brak cv2."""
+    if not CAMERA_FROM_RING:
+        return None
+    try:
+        import cv2  # late import: API działa bez OpenCV (wtedy tylko pliki)
+        from common.frame_ring import FrameRingReader
+    except Exception:
+        return None
+    with _RING_LOCK:
+        r = _RINGS.get(name)
+        if r is None:
+            r = _RINGS[name] = FrameRingReader(name)
+        f = r.latest()
+        if f is None or (time.time() - f.ts) > SNAP_MAX_AGE_S or f.fmt not in ("bgr24", "gray8"):
+            return None
+        ok, buf = cv2.imencode(".jpg", f.array(), [int(cv2.IMWRITE_JPEG_QUALITY), 80])
+        if not ok or not f.valid():
+            return None
+    return buf.tobytes()
+
+def _nocache(resp):
     resp.headers["Cache-Control"] = "no-store, no-cache, must-revalidate, max-age=0"
     resp.headers["Pragma"] = "no-cache"
     resp.headers["Expires"] = "0"
     resp.headers["X-Content-Type-Options"] = "nosniff"
     return resp
 
+def _nocache_file_response(path: str, mime: str | None = None):
+    """Zwróć plik z nagłówkami twardo wyłączającymi cache."""
+    return _nocache(make_response(send_file(path, mimetype=mime, conditional=False)))
+
+def _nocache_jpeg_response(data: bytes):
+    return _nocache(Response(data, mimetype="image/jpeg"))
+
 # --- endpoints ---
 def camera_raw():
+    data = _ring_jpeg("raw")
+    if data is not None:
+        return _nocache_jpeg_response(data)
     r = _resolve_snap("raw")
     if not r:
         return Response('{"error":"no_raw"}', mimetype="application/json", status=404)
@@ -57,6 +92,9 @@ def camera_raw():
     return _nocache_file_response(full, mime)
 
 def camera_proc():
+    data = _ring_jpeg("proc")
+    if data is not None:
+        return _nocache_jpeg_response(data)
     r = _resolve_snap("proc")
     if not r:
         return Response('{"error":"no_proc"}', mimetype="application/json", status=404)
@@ -67,6 +105,9 @@ def camera_proc():
 
 def camera_last():
     # alias do RAW, z silniejszymi nagłówkami anti-cache
+    data = _ring_jpeg("raw")
+    if data is not None:
+        return _nocache_jpeg_response(data)
     r = _resolve_snap("raw")
     if not r:
         return Response('{"error":"no_raw"}', mimetype="application/json", status=404)
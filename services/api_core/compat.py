@@ -6,8 +6,8 @@ Rider-Pi – core kompatybilności:
 - konfiguracja/ścieżki
 - endpointy: /healthz, /health, /livez, /readyz, /state, /sysinfo, /metrics, /events
 - aliasy /api/*: /api/status, /api/metrics (JSON), /api/devices, /api/last_frame, /api/flags
-- /api/version, /api/bus/health
-- start_bus_sub(), start_xgo_ro()
+- /api/version, /api/bus/health, /api/bus/stats
+- start_bus_pub(), start_bus_sub(), start_xgo_ro(), api_reactor() (wspólny BusReactor)
 """
 
 from __future__ import annotations
@@ -72,6 +72,8 @@ LAST_CAMERA = {
 
 LAST_XGO = {"ts": None, "imu_ok": False, "pose": None, "battery": None, "roll": None, "pitch": None, "yaw": None}
 XGO_FW = None
+LAST_BUS_STATS = None  # ostatni snapshot "bus.stats" z brokera
+LAST_BRIDGE_METRICS = None  # ostatni snapshot "motion.bridge.metrics" (common.metrics)
 
 # Historia
 HIST_CPU = collections.deque(maxlen=HISTORY_LEN)
@@ -123,15 +125,20 @@ def _classify_pose(roll, pitch):
         return None
 
 # ── Bus publish (opcjonalny) ─────────────────────────────────────────────────
-def bus_pub(topic: str, payload: dict):
+def bus_pub(topic: str, payload: dict) -> bool:
+    """Publikacja przez wspólny publisher procesu (jeden socket, wątek nadawcy)."""
     try:
-        import zmq  # late import by need
-        ctx = zmq.Context.instance()
-        pub = ctx.socket(zmq.PUB)
-        pub.connect(f"tcp://127.0.0.1:{BUS_PUB_PORT}")
-        pub.send_string(f"{topic} {json.dumps(payload, ensure_ascii=False)}")
+        from .bus_publisher import get_publisher
+        return get_publisher().publish(topic, payload)
     except Exception:
-        pass
+        return False
+
+def bus_pub_stats():
+    try:
+        from .bus_publisher import get_publisher
+        return get_publisher().stats()
+    except Exception:
+        return None
 
 # ── System info (delegacja do modułu) ────────────────────────────────────────
 # Funkcje sysinfo/metrics delegowane są do services.api_core.system_info.
@@ -256,9 +263,23 @@ def api_bus_health():
         "last_msg_age_s": (round(last_msg_age, 3) if last_msg_age is not None else None),
         "last_heartbeat_age_s": (round(last_hb_age, 3) if last_hb_age is not None else None),
         "ready_hint": (last_msg_age is None) or (last_msg_age < 30.0),
+        "publisher": bus_pub_stats(),
     }
     return Response(json.dumps(payload), mimetype="application/json")
 
+def api_bus_stats():
+    """
+    /api/bus/stats — ostatni snapshot statystyk brokera (topic "bus.stats").
+    Zwraca: { ok, age_s, stats: {topics, totals, subs, ...} | null, publisher: {sent, dropped_full, ...} }
+    """
+    snap = LAST_BUS_STATS
+    age = None
+    if isinstance(snap, dict) and snap.get("ts"):
+        try: age = round(time.time() - float(snap["ts"]), 3)
+        except Exception: age = None
+    payload = {"ok": snap is not None, "age_s": age, "stats": snap, "publisher": bus_pub_stats()}
+    return Response(json.dumps(payload), mimetype="application/json")
+
 def readyz():
     """
     /readyz — gotowość do obsługi żądań.
@@ -473,15 +494,47 @@ def events():
     return Response(gen(), mimetype='text/event-stream')
 
 # ── Startery wątków ──────────────────────────────────────────────────────────
+_REACTOR = None
+_REACTOR_LOCK = threading.Lock()
+
+def api_reactor():
+    """
+    Wspólny reaktor API (common.reactor.BusReactor) — pętle BUS i timery rejestrują się
+    na nim zamiast startować własne wątki. Rejestracja przed run_api_reactor().
+    """
+    global _REACTOR
+    with _REACTOR_LOCK:
+        if _REACTOR is None:
+            from common.reactor import BusReactor
+            from . import devices  # local import to avoid circular
+            _REACTOR = BusReactor(decoder=devices._decode_body, name="api")
+        return _REACTOR
+
+def run_api_reactor():
+    """Uruchom reaktor API w jednym wątku „api-reactor” (idempotentnie)."""
+    if getattr(run_api_reactor, "_started", False):
+        return
+    threading.Thread(target=api_reactor().run, name="api-reactor", daemon=True).start()
+    run_api_reactor._started = True
+
 def start_bus_sub():
-    """Uruchom pętlę subskrypcji BUS (idempotentnie)."""
+    """Podepnij subskrypcję BUS pod reaktor API i go uruchom (idempotentnie)."""
     if getattr(start_bus_sub, "_started", False):
         return
     from . import devices  # local import to avoid circular
-    t = threading.Thread(target=devices.bus_sub_loop, daemon=True)
-    t.start()
+    r = api_reactor()
+    devices.register_bus(r)
+    run_api_reactor()
     start_bus_sub._started = True
-    print("[api] bus_sub_loop started", flush=True)
+    print(f"[api] bus_sub on reactor ({r.endpoint})", flush=True)
+
+def start_bus_pub():
+    """Uruchom wspólny publisher BUS zawczasu — handshake z brokerem przed 1. żądaniem."""
+    try:
+        from .bus_publisher import get_publisher
+        get_publisher()
+    except Exception as e:
+        print("[api] bus publisher unavailable — skipping", e, flush=True)
 
 def start_xgo_ro():
     """Uruchom odczyt XGO po UART (idempotentnie)."""
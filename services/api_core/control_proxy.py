@@ -3,7 +3,10 @@
 
 Zasady:
 - Router ma być cienki: walidacja → delegacja.
-- Sprzęt za mostkiem (8081); tutaj tylko HTTP forward.
+- Sprzęt za mostkiem; tutaj tylko forward:
+    CONTROL_TRANSPORT=http (domyślnie) → web_motion_bridge (8081) → cmd.move
+    CONTROL_TRANSPORT=bus              → RPC na magistrali wprost do motion_bridge
+                                         (odpowiedź z werdyktem accept/skip, 504 gdy brak)
 - Błędy walidacji zwracają 400 lokalnie (bez forwardu).
 - Kody z mostka propagujemy (nie zamieniamy 400→502).
 """
@@ -11,9 +14,10 @@ from __future__ import annotations
 
 import json
 import os
+import threading
 import urllib.parse
 import urllib.request
-from typing import Any, Dict, Tuple, Literal
+from typing import Any, Dict, Optional, Tuple, Literal
 
 from flask import Response, jsonify, make_response, request
 
@@ -24,6 +28,9 @@ MOTION_BRIDGE_URL = (
 )
 HTTP_TIMEOUT_S = float(os.getenv("WEB_BRIDGE_TIMEOUT", "0.8"))
 SAFE_MAX_T = float(os.getenv("SAFE_MAX_DURATION", "0.5"))  # s, miękki limit pojedynczego ruchu
+CONTROL_TRANSPORT = os.getenv("CONTROL_TRANSPORT", "http").strip().lower()
+RPC_TIMEOUT_S = float(os.getenv("CONTROL_RPC_TIMEOUT", "0.3"))
+W_DEFAULT = float(os.getenv("WEB_W_DEFAULT", "0.18"))  # yaw dla left/right (jak web_motion_bridge)
 
 AllowedDir = Literal["forward", "backward", "left", "right"]
 
@@ -89,6 +96,48 @@ def _proxy_post_json(path: str, payload: dict[str, Any]) -> tuple[dict[str, Any]
     return body, code
 
 
+# ───────────────────────────── bus RPC ───────────────────────────── #
+
+_RPC = None
+_RPC_LOCK = threading.Lock()
+
+
+def _rpc_client():
+    """Wspólny klient RPC procesu API; żądania idą przez wspólny publisher (bus_publisher)."""
+    global _RPC
+    with _RPC_LOCK:
+        if _RPC is None:
+            from common.bus import BusRpcClient
+            from services.api_core.bus_publisher import get_publisher
+            _RPC = BusRpcClient(name=f"api-{os.getpid()}", send=get_publisher().publish)
+        return _RPC
+
+
+def _move_payload(dir_: str, v: float, t: float, w: Any = None) -> Dict[str, Any]:
+    """dir/v/t(/w) → cmd.move — to samo mapowanie co web_motion_bridge /api/move."""
+    try:
+        w = min(1.0, max(0.0, float(w))) if w is not None else W_DEFAULT
+    except Exception:
+        w = W_DEFAULT
+    vx = {"forward": +v, "backward": -v}.get(dir_, 0.0)
+    yaw = {"left": +w, "right": -w}.get(dir_, 0.0)
+    return {"vx": vx, "vy": 0.0, "yaw": yaw, "duration": t}
+
+
+def _bus_request(topic: str, payload: Dict[str, Any], rid: Optional[str]) -> tuple[dict[str, Any], int]:
+    if rid:
+        payload["rid"] = str(rid)
+    try:
+        reply = _rpc_client().request(topic, payload, timeout=RPC_TIMEOUT_S)
+    except Exception as e:
+        return {"ok": False, "error": f"bus unavailable: {e}"}, 502
+    if reply is None:
+        return {"ok": False, "error": "bridge timeout", "rid": payload.get("rid")}, 504
+    body = {k: reply.get(k) for k in ("ok", "verdict", "reason", "event", "rid")}
+    body.update({k: payload[k] for k in ("vx", "yaw", "duration") if k in payload})
+    return body, 200
+
+
 # ───────────────────────────── validation ───────────────────────────── #
 
 class BadRequest(ValueError):
@@ -168,9 +217,18 @@ def control_proxy_core() -> tuple[dict[str, Any], int]:
     if not cmd and "dir" in data:
         cmd = "move"
 
+    # rid (korelacja end-to-end: API → web bridge → cmd.move → motion_bridge)
+    rid = data.get("rid")
+    rid_qs = {"rid": str(rid)} if rid else None
+
+    if CONTROL_TRANSPORT == "bus":
+        if cmd == "stop" or data.get("stop") is True:
+            return _bus_request("cmd.stop", {}, rid)
+        return _bus_request("cmd.move", _move_payload(dir_, v, t, data.get("w")), rid)
+
     if cmd == "stop" or data.get("stop") is True:
         try:
-            return _proxy_get("/api/stop", None)
+            return _proxy_get("/api/stop", rid_qs)
         except Exception as e:  # network errors
             return {"ok": False, "error": f"proxy_stop_failed: {e}"}, 502
 
@@ -178,6 +236,8 @@ def control_proxy_core() -> tuple[dict[str, Any], int]:
     qs = {"dir": dir_, "v": v, "t": t}
     if "w" in data:
         qs["w"] = data["w"]  # w nie walidujemy, zgodnie z kontraktem (backward-compat)
+    if rid_qs:
+        qs.update(rid_qs)
 
     try:
         return _proxy_get("/api/move", qs)
@@ -1,10 +1,14 @@
 #!/usr/bin/env python3
 # -*- coding: utf-8 -*-
 from __future__ import annotations
-import time, json
+import os, time, json
 from typing import Any
+from common.bus import decode_payload
+from common.schemas import DevicesXgo
 from . import compat as C
 
+XGO_RO_PORT = os.getenv("XGO_PORT", "/dev/ttyAMA0")  # np. /tmp/ttyXGO z tools/xgo_emulator.py
+
 def _json_or_raw(payload: str):
     try:
         return json.loads(payload) if payload not in (None, "") else None
@@ -30,180 +34,150 @@ def _json_or_raw(payload: str):
 
 def _update_xgo_from_dict(d: dict):
     if not isinstance(d, dict): return
-    ts = float(d.get("ts") or time.time())
-    C.LAST_XGO["ts"] = ts
+    m = DevicesXgo.parse(d)  # konwersje/aliasy raz, w schemacie (None = pola brak)
+    C.LAST_XGO["ts"] = m.ts or time.time()
 
-    if "imu_ok" in d: C.LAST_XGO["imu_ok"] = bool(d.get("imu_ok"))
-    if "pose" in d and d.get("pose") is not None:
-        C.LAST_XGO["pose"] = d.get("pose")
+    if m.imu_ok is not None: C.LAST_XGO["imu_ok"] = m.imu_ok
+    if m.pose is not None:
+        C.LAST_XGO["pose"] = m.pose
 
-    bat = d.get("battery_pct", d.get("battery"))
-    bat = C._sanitize_batt(bat) if bat is not None else None
+    bat = C._sanitize_batt(m.battery_pct) if m.battery_pct is not None else None
     if bat is not None: C.LAST_XGO["battery"] = bat
 
     for k in ("roll","pitch","yaw"):
-        if k in d and d.get(k) is not None:
-            try:
-                val = float(d.get(k))
-                if k == "yaw": val = C._norm_angle180(val)
-                prev = C.LAST_XGO.get(k)
-                if (val == 0.0) and (prev not in (None, 0.0)):
-                    pass
-                else:
-                    C.LAST_XGO[k] = val
-            except Exception:
-                C.LAST_XGO[k] = d.get(k)
+        val = getattr(m, k)
+        if val is None:
+            continue
+        if k == "yaw": val = C._norm_angle180(val)
+        prev = C.LAST_XGO.get(k)
+        if (val == 0.0) and (prev not in (None, 0.0)):
+            pass
+        else:
+            C.LAST_XGO[k] = val
 
-    fw = C._sanitize_fw(d.get("fw"))
+    fw = C._sanitize_fw(m.fw)
     if fw is not None:
         C.XGO_FW = fw
 
-def _decode_frames(frames):
-    if not frames: return "", ""
-    if len(frames) == 1:
-        s = frames[0]
-        return (s.split(" ", 1) + [""])[:2] if " " in s else (s, "")
-    topic = frames[0]
-    payload = frames[1] if len(frames) == 2 else " ".join(frames[1:])
-    return topic, payload
-
-def bus_sub_loop():
+def _decode_body(body: bytes):
+    """Payload JSON/binarny przez common.bus; wartości „gołe” (np. `87`, `1,2,3`) jak dawniej."""
     try:
-        import zmq
+        return decode_payload(body)
     except Exception:
-        print("[api] pyzmq not available – bus features disabled", flush=True)
+        return _json_or_raw(body.decode("utf-8", "ignore"))
+
+def _update_xgo_field(suffix: str, data):
+    C.LAST_XGO["ts"] = C.LAST_MSG_TS
+    if suffix == "pose":
+        if data not in (None, "", []): C.LAST_XGO["pose"] = data
+    elif suffix in ("battery","battery_pct"):
+        b = C._sanitize_batt(data) if data is not None else None
+        if b is not None: C.LAST_XGO["battery"] = b
+    elif suffix in ("roll","pitch","yaw"):
+        try:
+            v = float(data) if data is not None else None
+            if v is not None:
+                if suffix == "yaw": v = C._norm_angle180(v)
+                prev = C.LAST_XGO.get(suffix)
+                if (v == 0.0) and (prev not in (None, 0.0)):
+                    pass
+                else:
+                    C.LAST_XGO[suffix] = v
+        except Exception:
+            C.LAST_XGO[suffix] = data
+    elif suffix == "imu_ok":
+        C.LAST_XGO["imu_ok"] = bool(data)
+    elif suffix == "fw":
+        fw = C._sanitize_fw(data)
+        if fw is not None: C.XGO_FW = fw
+    elif isinstance(data, dict):
+        _update_xgo_from_dict(data)
+
+BUS_PREFIXES = ("vision.", "camera.", "motion.bridge.", "motion.", "cmd.", "devices.", "xgo.", "bus.stats")
+
+def on_bus_message(topic: str, data):
+    """Aktualizacja stanu API (LAST_XGO/LAST_STATE/...) z jednej wiadomości BUS."""
+    if topic == "bus.stats":
+        # statystyki brokera — nie zaśmiecamy nimi EVENTS/LAST_MSG_TS
+        if isinstance(data, dict): C.LAST_BUS_STATS = data
+        return
+    if topic == "camera.frame":
+        # powiadomienie co klatkę (common.frame_ring) — zalałoby EVENTS/SSE; stan kamery z camera.heartbeat
+        return
+    if topic == "motion.bridge.metrics":
+        # histogramy/liczniki mostu — trafiają do /metrics, nie do EVENTS
+        if isinstance(data, dict): C.LAST_BRIDGE_METRICS = data
         return
-    try:
-        ctx = zmq.Context.instance()
-        sub = ctx.socket(zmq.SUB)
-        sub.connect(f"tcp://127.0.0.1:{C.BUS_SUB_PORT}")
-        for t in ("vision.", "camera.", "motion.bridge.", "motion.", "cmd.", "devices.", "xgo."):
-            sub.setsockopt_string(zmq.SUBSCRIBE, t)
-        try: sub.setsockopt(zmq.RCVTIMEO, 1000)
-        except Exception: pass
-        print(f"[api] SUB connected tcp://127.0.0.1:{C.BUS_SUB_PORT}", flush=True)
 
-        while True:
-            try:
-                try:
-                    parts_bin = sub.recv_multipart(flags=0)
-                except zmq.Again:
-                    continue
-                frames = [p.decode("utf-8", "ignore") for p in parts_bin]
-                topic, payload = _decode_frames(frames)
+    C.LAST_MSG_TS = time.time()
+    C.EVENTS.append({"ts": C.LAST_MSG_TS, "topic": topic, "data": data})
 
-                C.LAST_MSG_TS = time.time()
-                C.EVENTS.append({"ts": C.LAST_MSG_TS, "topic": topic, "data": payload})
+    if topic == "vision.dispatcher.heartbeat":
+        C.LAST_HEARTBEAT_TS = C.LAST_MSG_TS
+        return
 
-                if topic == "vision.dispatcher.heartbeat":
-                    C.LAST_HEARTBEAT_TS = C.LAST_MSG_TS
-                    continue
+    if topic.startswith("devices.xgo"):
+        suffix = topic[len("devices.xgo"):].lstrip(".")
+        if suffix == "" and isinstance(data, dict):
+            _update_xgo_from_dict(data)
+        else:
+            _update_xgo_field(suffix, data)
+        return
 
-                if topic.startswith("devices.xgo"):
-                    suffix = topic[len("devices.xgo"):].lstrip(".")
-                    data = _json_or_raw(payload)
-                    if suffix == "" and isinstance(data, dict):
-                        _update_xgo_from_dict(data)
-                    else:
-                        C.LAST_XGO["ts"] = C.LAST_MSG_TS
-                        if suffix == "pose":
-                            if data not in (None, "", []): C.LAST_XGO["pose"] = data
-                        elif suffix in ("battery","battery_pct"):
-                            b = C._sanitize_batt(data) if data is not None else None
-                            if b is not None: C.LAST_XGO["battery"] = b
-                        elif suffix in ("roll","pitch","yaw"):
-                            try:
-                                v = float(data) if data is not None else None
-                                if v is not None:
-                                    if suffix == "yaw": v = C._norm_angle180(v)
-                                    prev = C.LAST_XGO.get(suffix)
-                                    if (v == 0.0) and (prev not in (None, 0.0)):
-                                        pass
-                                    else:
-                                        C.LAST_XGO[suffix] = v
-                            except Exception:
-                                C.LAST_XGO[suffix] = data
-                        elif suffix == "imu_ok":
-                            C.LAST_XGO["imu_ok"] = bool(data)
-                        elif suffix == "fw":
-                            fw = C._sanitize_fw(data)
-                            if fw is not None: C.XGO_FW = fw
-                        elif isinstance(data, dict):
-                            _update_xgo_from_dict(data)
-                    continue
+    if topic.startswith("xgo."):
+        _update_xgo_field(topic[len("xgo."):].lstrip("."), data)
+        return
 
-                if topic.startswith("xgo."):
-                    suffix = topic[len("xgo."):].lstrip(".")
-                    data = _json_or_raw(payload)
-                    C.LAST_XGO["ts"] = C.LAST_MSG_TS
-                    if suffix == "pose":
-                        if data not in (None, "", []): C.LAST_XGO["pose"] = data
-                    elif suffix in ("battery","battery_pct"):
-                        b = C._sanitize_batt(data) if data is not None else None
-                        if b is not None: C.LAST_XGO["battery"] = b
-                    elif suffix in ("roll","pitch","yaw"):
-                        try:
-                            v = float(data) if data is not None else None
-                            if v is not None:
-                                if suffix == "yaw": v = C._norm_angle180(v)
-                                prev = C.LAST_XGO.get(suffix)
-                                if (v == 0.0) and (prev not in (None, 0.0)):
-                                    pass
-                                else:
-                                    C.LAST_XGO[suffix] = v
-                        except Exception:
-                            C.LAST_XGO[suffix] = data
-                    elif suffix == "imu_ok":
-                        C.LAST_XGO["imu_ok"] = bool(data)
-                    elif suffix == "fw":
-                        fw = C._sanitize_fw(data)
-                        if fw is not None: C.XGO_FW = fw
-                    elif isinstance(data, dict):
-                        _update_xgo_from_dict(data)
-                    continue
+    if topic.startswith("motion.bridge.telemetry"):
+        if isinstance(data, dict):
+            _update_xgo_from_dict(data)
+        return
 
-                if topic.startswith("motion.bridge.telemetry"):
-                    try:
-                        d = json.loads(payload) if payload else {}
-                        _update_xgo_from_dict(d)
-                    except Exception:
-                        pass
-                    continue
+    if topic == "motion.bridge.battery_pct":
+        b = C._sanitize_batt(data)
+        if b is not None:
+            C.LAST_XGO["ts"] = C.LAST_MSG_TS
+            C.LAST_XGO["battery"] = b
+        return
 
-                if topic == "motion.bridge.battery_pct":
-                    b = C._sanitize_batt(_json_or_raw(payload))
-                    if b is not None:
-                        C.LAST_XGO["ts"] = C.LAST_MSG_TS
-                        C.LAST_XGO["battery"] = b
-                    continue
+    if topic == "vision.state":
+        try:
+            d = data if isinstance(data, dict) else {}
+            C.LAST_STATE["present"]    = bool(d.get("present", C.LAST_STATE["present"]))
+            C.LAST_STATE["confidence"] = float(d.get("confidence", C.LAST_STATE["confidence"]))
+            if "mode" in d: C.LAST_STATE["mode"] = d.get("mode")
+            C.LAST_STATE["ts"] = float(d.get("ts", C.LAST_MSG_TS))
+        except Exception:
+            pass
+        return
 
-                if topic == "vision.state":
-                    try:
-                        data = json.loads(payload) if payload else {}
-                        C.LAST_STATE["present"]    = bool(data.get("present", C.LAST_STATE["present"]))
-                        C.LAST_STATE["confidence"] = float(data.get("confidence", C.LAST_STATE["confidence"]))
-                        if "mode" in data: C.LAST_STATE["mode"] = data.get("mode")
-                        C.LAST_STATE["ts"] = float(data.get("ts", C.LAST_MSG_TS))
-                    except Exception:
-                        pass
-                    continue
+    if topic == "camera.heartbeat":
+        try:
+            d = data if isinstance(data, dict) else {}
+            C.LAST_CAMERA["ts"]   = C.LAST_MSG_TS
+            C.LAST_CAMERA["mode"] = d.get("mode")
+            C.LAST_CAMERA["fps"]  = d.get("fps")
+            lcd = d.get("lcd") or {}
+            C.LAST_CAMERA["lcd"].update({"enabled_env": (not C.ENV_DISABLE_LCD), "no_draw": C.ENV_NO_DRAW, "rot": C.ENV_ROT})
+            for k in ("enabled_env","no_draw","rot","active"):
+                if k in lcd: C.LAST_CAMERA["lcd"][k] = lcd[k]
+        except Exception:
+            pass
+        return
 
-                if topic == "camera.heartbeat":
-                    try:
-                        data = json.loads(payload) if payload else {}
-                        C.LAST_CAMERA["ts"]   = C.LAST_MSG_TS
-                        C.LAST_CAMERA["mode"] = data.get("mode")
-                        C.LAST_CAMERA["fps"]  = data.get("fps")
-                        lcd = data.get("lcd") or {}
-                        C.LAST_CAMERA["lcd"].update({"enabled_env": (not C.ENV_DISABLE_LCD), "no_draw": C.ENV_NO_DRAW, "rot": C.ENV_ROT})
-                        for k in ("enabled_env","no_draw","rot","active"):
-                            if k in lcd: C.LAST_CAMERA["lcd"][k] = lcd[k]
-                    except Exception:
-                        pass
-                    continue
+def register_bus(reactor):
+    """Podepnij on_bus_message pod reaktor (common.reactor.BusReactor)."""
+    for t in BUS_PREFIXES:
+        reactor.on(t, on_bus_message)
 
-            except Exception:
-                time.sleep(0.05)
+def bus_sub_loop():
+    """Samodzielna pętla (własny reaktor) — API używa wspólnego reaktora z compat.api_reactor()."""
+    try:
+        from common.reactor import BusReactor
+        reactor = BusReactor(decoder=_decode_body, name="api")
+        register_bus(reactor)
+        print(f"[api] SUB connected {reactor.endpoint}", flush=True)
+        reactor.run()
     except Exception as e:
         print(f"[api] bus_sub_loop error: {e}", flush=True)
 
@@ -211,7 +185,10 @@ def xgo_ro_loop():
     try:
         time.sleep(0.5)
         try:
-            from tools.xgo_client_ro import XGOClientRO  # type: ignore
+            if os.getenv("XGO_UART", "0") == "1":  # port trzyma services/xgo_uart.py
+                from apps.motion.xgo_uart_client import XgoUartClient as XGOClientRO
+            else:
+                from tools.xgo_client_ro import XGOClientRO  # type: ignore
         except Exception as e:
             print("[api] xgo_ro_loop import error:", e, flush=True)
             return
@@ -262,8 +239,8 @@ def xgo_ro_loop():
         while True:
             try:
                 if cli is None:
-                    cli = XGOClientRO(port="/dev/ttyAMA0")
-                    print("[api] XGO RO connected: /dev/ttyAMA0", flush=True)
+                    cli = XGOClientRO(port=XGO_RO_PORT)
+                    print(f"[api] XGO RO connected: {XGO_RO_PORT}", flush=True)
 
                 if C.XGO_FW is None:
                     fw = _try_fw(cli)
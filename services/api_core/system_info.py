@@ -10,6 +10,8 @@ import time
 
 from flask import Response
 
+from common.metrics import prometheus_lines
+
 
 def _cpu_pct_sample() -> tuple[float, float]:
     """Read CPU idle and total time from /proc/stat."""
@@ -224,4 +226,9 @@ def metrics() -> Response:
     m("rider_bus_last_heartbeat_age_seconds", round(last_hb_age, 3))
     m("rider_camera_last_hb_age_seconds", round(cam_age, 3))
     m("rider_camera_raw_age_seconds", round(raw_age, 3))
+    bridge = compat.LAST_BRIDGE_METRICS
+    if isinstance(bridge, dict):
+        bridge_age = (now - float(bridge["ts"])) if bridge.get("ts") else -1
+        m("rider_bridge_metrics_age_seconds", round(bridge_age, 3))
+        lines.extend(prometheus_lines(bridge, "rider_bridge"))
     return Response("\n".join(lines) + "\n", mimetype="text/plain")
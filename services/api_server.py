@@ -134,6 +134,7 @@ def _bus_health():
     return (jsonify({"ok": True}), 200, {"Access-Control-Allow-Origin": "*"})
 
 app.add_url_rule("/api/bus/health", view_func=_bus_health, methods=["GET", "OPTIONS"])
+app.add_url_rule("/api/bus/stats", view_func=compat.api_bus_stats, methods=["GET"])
 
 # Stub: /vision/obstacle (GET) – jeśli moduł nieaktywny
 def _vision_obstacle_stub():
@@ -142,6 +143,7 @@ app.add_url_rule("/vision/obstacle", view_func=_vision_obstacle_stub, methods=["
 
 # ── BOOTSTRAP ────────────────────────────────────────────────────────────────
 def main():
+    compat.start_bus_pub()
     compat.start_bus_sub()
     compat.start_xgo_ro()
     app.run(host="0.0.0.0", port=STATUS_API_PORT, debug=False, use_reloader=False)
@@ -1,34 +1,347 @@
 #!/usr/bin/env python3
+# -*- coding: utf-8 -*-
 """
 ZeroMQ broker XSUB↔XPUB
-- PUB-y (demo, tools/pub.py) łączą się do tcp://*:5555
-- SUB-y (apps/motion) łączą się do tcp://*:5556
+- PUB-y (demo, tools/pub.py) łączą się do tcp://*:5555  lub ipc://$BUS_IPC_DIR/xsub.sock
+- SUB-y (apps/motion) łączą się do tcp://*:5556          lub ipc://$BUS_IPC_DIR/xpub.sock
+- BROKER_IPC=1 (domyślnie): bind TCP (klienci zdalni) + IPC (lokalni, BUS_TRANSPORT=ipc)
+
+Last-value cache (LVC):
+- broker pamięta ostatnią wiadomość dla każdego tematu z prefiksów BROKER_LVC_TOPICS
+  (stan: devices.xgo, vision.state, camera.heartbeat, motion.state)
+- gdy XPUB zobaczy SUBSCRIBE pasujący do tematu w cache → natychmiast odtwarza ostatnią wartość
+  (spóźniony subskrybent nie czeka na kolejną cykliczną publikację)
+- uwaga: XPUB nie adresuje pojedynczego peera, więc odtworzenie trafia też do
+  dotychczasowych subskrybentów tego tematu — dla tematów stanu to nieszkodliwy duplikat
+- komend (cmd.*, motion.cmd) NIE wolno tu dopisywać
+
+Statystyki (BROKER_STATS=1):
+- liczniki wiadomości/bajtów/rate per prefiks tematu (BROKER_STATS_DEPTH segmentów, np. "devices.xgo")
+- dropy HWM: XPUB_NODROP + wysyłka NOBLOCK; EAGAIN = któryś SUB ma pełną kolejkę → licznik
+  `drops` dla tematu i ponowna wysyłka w trybie „lossy” (reszta SUB-ów dostaje wiadomość jak dawniej)
+- zdarzenia subskrypcji (subscribe/unsubscribe) i aktywne subskrypcje per prefiks
+- co BROKER_STATS_PERIOD_S broker sam publikuje snapshot na "bus.stats" (JSON)
+
+Konflacja „latest-only” (BROKER_CONFLATE_TOPICS):
+- dla prefiksów telemetrii (devices.xgo, motion.state ~50 Hz, camera.heartbeat) broker przepuszcza
+  najwyżej jedną wiadomość na temat co BROKER_CONFLATE_MS; w międzyczasie trzyma tylko najnowszą
+  (starsze są zastępowane, nie kolejkowane) i wysyła ją, gdy okno minie
+- wolny SUB (np. API) dostaje stan ze stałą, ograniczoną częstotliwością zamiast zaległości
+- kolejność w obrębie tematu zachowana; między tematami — nie (stan może „wyprzedzić” komendę i odwrotnie)
+- komendy (cmd., motion.cmd) są zawsze FIFO: prefiksy nachodzące na nie są odrzucane przy starcie
+- licznik `conflated` per prefiks w bus.stats
+
+BROKER_LVC_TOPICS="", BROKER_STATS=0 i BROKER_CONFLATE_TOPICS="" → czysty zmq.proxy jak dawniej
 """
 
 import os
+import sys
+import json
 import signal
 import logging
+import time
+from typing import Dict, List, Optional, Tuple
 
 import zmq
 
+# uruchamiany jako plik (services/broker.py) — dopnij root projektu dla "common"
+PROJ_ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+if PROJ_ROOT not in sys.path:
+    sys.path.insert(0, PROJ_ROOT)
+
+from common.bus import BUS_IPC_DIR, broker_endpoints
+
 logging.basicConfig(level=logging.INFO, format="%(asctime)s %(levelname)s %(message)s")
 LOG = logging.getLogger("broker")
 
-FRONT_ADDR = os.getenv("BROKER_FRONTEND_ADDR", "tcp://*:5555")  # XSUB (od publisherów)
-BACK_ADDR  = os.getenv("BROKER_BACKEND_ADDR",  "tcp://*:5556")  # XPUB (do subscriberów)
+BROKER_IPC = (os.getenv("BROKER_IPC", "1") == "1")
+# jawny adres z ENV zastępuje listę domyślną (TCP + IPC)
+FRONT_ADDRS = [os.getenv("BROKER_FRONTEND_ADDR")] if os.getenv("BROKER_FRONTEND_ADDR") else broker_endpoints("pub", BROKER_IPC)  # XSUB (od publisherów)
+BACK_ADDRS  = [os.getenv("BROKER_BACKEND_ADDR")]  if os.getenv("BROKER_BACKEND_ADDR")  else broker_endpoints("sub", BROKER_IPC)  # XPUB (do subscriberów)
+
+LVC_TOPICS = tuple(
+    t.strip().encode("utf-8")
+    for t in os.getenv("BROKER_LVC_TOPICS", "devices.xgo,vision.state,camera.heartbeat,motion.state").split(",")
+    if t.strip()
+)
+LVC_TTL_S = float(os.getenv("BROKER_LVC_TTL_S", "10"))  # starszych wartości nie odtwarzamy
+
+# komendy muszą przejść wszystkie i w kolejności — nigdy nie konflatujemy
+FIFO_PREFIXES = (b"cmd.", b"motion.cmd")
+CONFLATE_TOPICS = tuple(
+    t.strip().encode("utf-8")
+    for t in os.getenv("BROKER_CONFLATE_TOPICS", "devices.xgo,motion.state,camera.heartbeat").split(",")
+    if t.strip()
+)
+CONFLATE_MS = max(1.0, float(os.getenv("BROKER_CONFLATE_MS", "50")))  # min. odstęp per temat
+
+STATS_ENABLE   = (os.getenv("BROKER_STATS", "1") == "1")
+STATS_TOPIC    = os.getenv("BROKER_STATS_TOPIC", "bus.stats").encode("utf-8")
+STATS_DEPTH    = max(1, int(os.getenv("BROKER_STATS_DEPTH", "2")))
+STATS_PERIOD_S = max(0.1, float(os.getenv("BROKER_STATS_PERIOD_S", "1.0")))
+
+
+def _topic_key(frames: List[bytes]) -> bytes:
+    """Temat z ramek: multipart [topic, payload] albo single-frame "topic payload"."""
+    head = frames[0] if frames else b""
+    return head if len(frames) > 1 else head.split(b" ", 1)[0]
+
+
+class LastValueCache:
+    def __init__(self, prefixes: Tuple[bytes, ...], ttl_s: float):
+        self.prefixes = prefixes
+        self.ttl_s = ttl_s
+        self._last: Dict[bytes, Tuple[float, List[bytes]]] = {}
+
+    def store(self, frames: List[bytes]) -> None:
+        key = _topic_key(frames)
+        if key.startswith(self.prefixes):
+            self._last[key] = (time.monotonic(), frames)
+
+    def matching(self, sub_prefix: bytes) -> List[List[bytes]]:
+        """Ostatnie wartości pasujące do prefiksu subskrypcji (semantyka jak w ZMQ: prefiks 1. ramki)."""
+        now = time.monotonic()
+        out = []
+        for key, (ts, frames) in list(self._last.items()):
+            if self.ttl_s > 0 and (now - ts) > self.ttl_s:
+                del self._last[key]
+                continue
+            if frames[0].startswith(sub_prefix):
+                out.append(frames)
+        return out
+
+
+class BusStats:
+    """Liczniki per prefiks tematu + zdarzenia subskrypcji; snapshot() liczy rate od poprzedniego snapshotu."""
+
+    def __init__(self, depth: int):
+        self.depth = depth
+        self.started = time.time()
+        self._topics: Dict[bytes, List[int]] = {}  # prefiks -> [msgs, bytes, drops, conflated]
+        self._prev: Dict[bytes, Tuple[int, int]] = {}  # prefiks -> (msgs, bytes) z poprzedniego snapshotu
+        self._prev_ts = time.monotonic()
+        self._subs: Dict[bytes, int] = {}
+        self.sub_events = 0
+        self.unsub_events = 0
+
+    def _prefix(self, key: bytes) -> bytes:
+        return b".".join(key.split(b".", self.depth)[:self.depth])
+
+    def _row(self, key: bytes) -> List[int]:
+        p = self._prefix(key)
+        row = self._topics.get(p)
+        if row is None:
+            row = self._topics[p] = [0, 0, 0, 0]
+        return row
+
+    def on_message(self, key: bytes, nbytes: int) -> None:
+        row = self._row(key)
+        row[0] += 1
+        row[1] += nbytes
+
+    def on_drop(self, key: bytes) -> None:
+        self._row(key)[2] += 1
+
+    def on_conflate(self, key: bytes) -> None:
+        self._row(key)[3] += 1
+
+    def on_subscription(self, msg: bytes) -> None:
+        prefix = msg[1:]
+        if msg[:1] == b"\x01":
+            self.sub_events += 1
+            self._subs[prefix] = self._subs.get(prefix, 0) + 1
+        elif msg[:1] == b"\x00":
+            self.unsub_events += 1
+            n = self._subs.get(prefix, 0) - 1
+            if n > 0:
+                self._subs[prefix] = n
+            else:
+                self._subs.pop(prefix, None)
+
+    def snapshot(self) -> dict:
+        now = time.monotonic()
+        dt = max(1e-6, now - self._prev_ts)
+        self._prev_ts = now
+        topics = {}
+        tot_msgs = tot_bytes = tot_drops = tot_confl = 0
+        tot_rate = 0.0
+        for p, (msgs, nbytes, drops, conflated) in sorted(self._topics.items()):
+            pm, pb = self._prev.get(p, (0, 0))
+            self._prev[p] = (msgs, nbytes)
+            rate = (msgs - pm) / dt
+            topics[p.decode("utf-8", "replace")] = {
+                "msgs": msgs, "bytes": nbytes, "drops": drops, "conflated": conflated,
+                "rate_hz": round(rate, 2), "bytes_per_s": round((nbytes - pb) / dt, 1),
+            }
+            tot_msgs += msgs; tot_bytes += nbytes; tot_drops += drops; tot_confl += conflated; tot_rate += rate
+        return {
+            "ts": time.time(),
+            "uptime_s": round(time.time() - self.started, 1),
+            "period_s": round(dt, 3),
+            "topics": topics,
+            "totals": {"msgs": tot_msgs, "bytes": tot_bytes, "drops": tot_drops, "conflated": tot_confl,
+                       "rate_hz": round(tot_rate, 2)},
+            "subs": {
+                "subscribe": self.sub_events,
+                "unsubscribe": self.unsub_events,
+                "active": {k.decode("utf-8", "replace"): v for k, v in sorted(self._subs.items())},
+            },
+        }
+
+
+def conflate_prefixes(prefixes: Tuple[bytes, ...]) -> Tuple[bytes, ...]:
+    """Odrzuć prefiksy, które mogłyby objąć komendy (cmd., motion.cmd) — te zostają FIFO."""
+    ok = []
+    for p in prefixes:
+        if p.startswith(FIFO_PREFIXES) or any(f.startswith(p) for f in FIFO_PREFIXES):
+            LOG.warning(f"conflate: prefix {p.decode()!r} overlaps command topics — ignored")
+            continue
+        ok.append(p)
+    return tuple(ok)
+
+
+class Conflator:
+    """
+    Latest-only per temat: najwyżej jedna wiadomość na `interval_s`; nadmiar zastępuje
+    oczekującą (pending) wartość, która wychodzi po upływie okna (flush_due()).
+    """
+
+    def __init__(self, prefixes: Tuple[bytes, ...], interval_s: float):
+        self.prefixes = conflate_prefixes(prefixes)
+        self.interval_s = interval_s
+        self._next_ok: Dict[bytes, float] = {}            # temat -> najwcześniejsza kolejna wysyłka
+        self._pending: Dict[bytes, List[bytes]] = {}      # temat -> najnowsze ramki
+
+    def offer(self, key: bytes, frames: List[bytes], now: float) -> Tuple[Optional[List[bytes]], bool]:
+        """
+        Zwraca (ramki do wysłania teraz | None, czy coś zostało zastąpione).
+        Tematy spoza prefiksów przechodzą od razu.
+        """
+        if not self.prefixes or not key.startswith(self.prefixes):
+            return frames, False
+        if key not in self._pending and now >= self._next_ok.get(key, 0.0):
+            self._next_ok[key] = now + self.interval_s
+            return frames, False
+        replaced = key in self._pending
+        self._pending[key] = frames
+        return None, replaced
+
+    def flush_due(self, now: float) -> List[Tuple[bytes, List[bytes]]]:
+        out = []
+        for key in [k for k in self._pending if self._next_ok.get(k, 0.0) <= now]:
+            out.append((key, self._pending.pop(key)))
+            self._next_ok[key] = now + self.interval_s
+        return out
+
+    def next_deadline(self) -> Optional[float]:
+        if not self._pending:
+            return None
+        return min(self._next_ok.get(k, 0.0) for k in self._pending)
+
+
+def _forward(backend: zmq.Socket, frames: List[bytes], stats: Optional[BusStats], key: bytes) -> None:
+    if stats is None:
+        backend.send_multipart(frames)
+        return
+    try:
+        backend.send_multipart(frames, flags=zmq.NOBLOCK)
+    except zmq.Again:
+        # któryś SUB ma pełną kolejkę (HWM): licz drop, resztę obsłuż jak zwykły (lossy) XPUB.
+        # NODROP=1 tylko po to, żeby EAGAIN zdradził drop — przy EAGAIN libzmq nie wysłał
+        # ramki nikomu, więc jednorazowa ponowna próba z NODROP=0 dostarcza ją pozostałym SUB-om
+        # bez duplikatów. Przełączanie jest bezpieczne: gniazdo ma jeden wątek (ta pętla),
+        # opcja jest czytana przy każdym send, a obie wysyłki są NOBLOCK — nic nie czeka.
+        stats.on_drop(key)
+        backend.setsockopt(zmq.XPUB_NODROP, 0)
+        try:
+            backend.send_multipart(frames, flags=zmq.NOBLOCK)
+        except zmq.Again:
+            pass
+        finally:
+            backend.setsockopt(zmq.XPUB_NODROP, 1)
+
+
+def run_proxy(frontend: zmq.Socket, backend: zmq.Socket, lvc: Optional[LastValueCache],
+              stats: Optional[BusStats], stop: List[bool], conflate: Optional[Conflator] = None) -> None:
+    # własna subskrypcja tematów LVC: PUB-y filtrują u siebie, więc bez niej broker
+    # nie dostałby stanu, dopóki nie pojawi się pierwszy SUB
+    if lvc is not None:
+        for prefix in lvc.prefixes:
+            frontend.send(b"\x01" + prefix)
+    if stats is not None:
+        backend.setsockopt(zmq.XPUB_NODROP, 1)
+    poller = zmq.Poller()
+    poller.register(frontend, zmq.POLLIN)
+    poller.register(backend, zmq.POLLIN)
+    next_stats = time.monotonic() + STATS_PERIOD_S
+    while not stop[0]:
+        deadline = time.monotonic() + 0.5
+        if stats is not None:
+            deadline = min(deadline, next_stats)
+        if conflate is not None:
+            deadline = min(deadline, conflate.next_deadline() or deadline)
+        timeout_ms = max(0, int(round((deadline - time.monotonic()) * 1000)))
+        try:
+            events = dict(poller.poll(timeout_ms))
+        except zmq.ZMQError:
+            continue  # EINTR przy sygnale
+        if frontend in events:
+            frames = frontend.recv_multipart()
+            key = _topic_key(frames)
+            if stats is not None:
+                stats.on_message(key, sum(len(f) for f in frames))
+            if lvc is not None:
+                lvc.store(frames)
+            if conflate is not None:
+                frames, replaced = conflate.offer(key, frames, time.monotonic())
+                if replaced and stats is not None:
+                    stats.on_conflate(key)
+            if frames is not None:
+                _forward(backend, frames, stats, key)
+        if conflate is not None:
+            for key, frames in conflate.flush_due(time.monotonic()):
+                _forward(backend, frames, stats, key)
+        if backend in events:
+            # zdarzenia subskrypcji: b"\x01<prefix>" (SUBSCRIBE) / b"\x00<prefix>" (UNSUBSCRIBE)
+            ev = backend.recv_multipart()
+            frontend.send_multipart(ev)
+            msg = ev[0] if ev else b""
+            if stats is not None:
+                stats.on_subscription(msg)
+            if lvc is not None and msg[:1] == b"\x01":
+                for frames in lvc.matching(msg[1:]):
+                    _forward(backend, frames, stats, _topic_key(frames))
+        if stats is not None and time.monotonic() >= next_stats:
+            snap = stats.snapshot()
+            if lvc is not None:
+                snap["lvc"] = {"entries": len(lvc.matching(b""))}
+            # ta sama ścieżka NOBLOCK co ruch na BUS: wolny SUB na "bus.stats"/"" nie może zamrozić brokera
+            _forward(backend, [STATS_TOPIC, json.dumps(snap, separators=(",", ":")).encode("utf-8")], stats, STATS_TOPIC)
+            next_stats += STATS_PERIOD_S
+            if next_stats < time.monotonic():
+                next_stats = time.monotonic() + STATS_PERIOD_S
+
 
 def main():
     ctx = zmq.Context.instance()
     frontend = ctx.socket(zmq.XSUB)
     backend  = ctx.socket(zmq.XPUB)
 
-    # (opcjonalnie) pokaż SUBSCRIBE/UNSUB na XPUB:
-    # backend.setsockopt(zmq.XPUB_VERBOSE, 1)
+    # LVC potrzebuje każdego SUBSCRIBE (także powtórzonego) — XPUB_VERBOSE;
+    # statystyki dodatkowo każdego UNSUBSCRIBE — XPUB_VERBOSER (libzmq >= 4.3)
+    if STATS_ENABLE and hasattr(zmq, "XPUB_VERBOSER"):
+        backend.setsockopt(zmq.XPUB_VERBOSER, 1)
+    elif LVC_TOPICS or STATS_ENABLE:
+        backend.setsockopt(zmq.XPUB_VERBOSE, 1)
 
-    frontend.bind(FRONT_ADDR)
-    backend.bind(BACK_ADDR)
+    if any(a.startswith("ipc://") for a in FRONT_ADDRS + BACK_ADDRS):
+        os.makedirs(BUS_IPC_DIR, exist_ok=True)
+    for a in FRONT_ADDRS:
+        frontend.bind(a)
+    for a in BACK_ADDRS:
+        backend.bind(a)
 
-    LOG.info(f"Broker XSUB {FRONT_ADDR}  <->  XPUB {BACK_ADDR}")
+    LOG.info(f"Broker XSUB {', '.join(FRONT_ADDRS)}  <->  XPUB {', '.join(BACK_ADDRS)}")
 
     stop = [False]
     def _sig(_a,_b): stop[0] = True
@@ -36,7 +349,21 @@ def main():
     signal.signal(signal.SIGTERM, _sig)
 
     try:
-        zmq.proxy(frontend, backend)
+        conflate = Conflator(CONFLATE_TOPICS, CONFLATE_MS / 1000.0) if CONFLATE_TOPICS else None
+        if conflate is not None and not conflate.prefixes:
+            conflate = None
+        if LVC_TOPICS or STATS_ENABLE or conflate is not None:
+            lvc = LastValueCache(LVC_TOPICS, LVC_TTL_S) if LVC_TOPICS else None
+            stats = BusStats(STATS_DEPTH) if STATS_ENABLE else None
+            if lvc is not None:
+                LOG.info("LVC: " + ", ".join(t.decode() for t in LVC_TOPICS) + f" (ttl={LVC_TTL_S}s)")
+            if stats is not None:
+                LOG.info(f"Stats: {STATS_TOPIC.decode()} co {STATS_PERIOD_S}s (depth={STATS_DEPTH})")
+            if conflate is not None:
+                LOG.info("Conflate: " + ", ".join(t.decode() for t in conflate.prefixes) + f" (min {CONFLATE_MS:.0f} ms)")
+            run_proxy(frontend, backend, lvc, stats, stop, conflate)
+        else:
+            zmq.proxy(frontend, backend)
     except KeyboardInterrupt:
         pass
     finally:
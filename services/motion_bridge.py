@@ -7,39 +7,75 @@ Kluczowe punkty:
 - Konwencja skrętu utrzymana: yaw<0 => left, yaw>0 => right (spójne z web_motion_bridge).
 - Debounce i DROP_OLD_MS jak wcześniej; SAFE_MAX_DURATION zabezpiecza deadmana.
 - Drobne doprecyzowania komentarzy i defensywności.
+- Pętla zdarzeniowa (common.reactor): poll() śpi do najbliższego timera (telemetria, deadman),
+  komenda budzi od razu — bez 10 ms odpytywania i bez CPU w bezczynności.
+- Odczyty telemetrii XGO w osobnym wątku (apps.motion.xgo_telemetry) z własnym rytmem
+  na pole; pętla komend publikuje tylko snapshot i nie czeka na UART.
 
 Słucha:
   * NOWE:  cmd.move {vx,vy,yaw|az,duration,ts}, cmd.stop {}
+  * NOWE:  cmd.velocity {vx,vy,yaw|az,ts} — strumień prędkości zadanej (do ~20 Hz): rampa,
+           do XGO tylko zmiany po kwantyzacji, stop gdy strumień ucichnie (apps.motion.setpoint)
+  * NOWE:  cmd.trajectory {segments:[[t,vx,yaw(,vy)]|{t,vx,vy,yaw}, ...]} — cała ścieżka jedną
+           wiadomością, wykonywana zegarem mostu (apps.motion.trajectory); przerywa ją cmd.stop
+           i każda inna komenda ruchu
   * STARE: cmd.motion.forward/backward/left/right/turn_left/turn_right/stop {speed,runtime}
 Mapuje na wywołania XGO; skręt bezpośrednio na vendorowe turnleft/turnright(step).
 Publikuje:
   * motion.bridge.event {event, detail}
   * devices.xgo {...}
+  * motion.bridge.deadman {count, window, late_ms_min/p50/p95/p99/max, last_ms} — po każdym autostopie
+  * motion.bridge.cmd_stats {accept, deferred, merged, skip:{powód: n}} — przy zmianie, z telemetrią
+  * motion.trajectory {rid, state: started|segment|done|stop|preempted|timeout, idx, n, elapsed_s, late_ms}
+  * motion.bridge.metrics {hist, counters, ts} — co BRIDGE_METRICS_S (common.metrics; API → /metrics):
+    histogramy cmd_age_ms, rx_to_hw_ms, hw_call_ms, deadman_late_ms; liczniki accept/deferred/skip/dir
+  * odpowiedź RPC na "reply_to" z komendy (jeśli podany; common.bus.BusRpcClient):
+    {rid, ok, verdict: accept|defer|skip, reason, event}
 
 ENV (wycinek):
-- BUS_PUB_PORT=5555, BUS_SUB_PORT=5556
+- BUS_PUB_PORT=5555, BUS_SUB_PORT=5556, BUS_TRANSPORT=tcp|ipc (adresy: common.bus.bus_endpoint)
 - DRY_RUN=1, BRIDGE_READONLY=1
+- XGO_FAKE=1 (apps.motion.fake_xgo zamiast xgolib; ruch dozwolony także przy DRY_RUN — brak sprzętu)
+- XGO_UART=1 (port trzyma services/xgo_uart.py; most łączy się przez apps.motion.xgo_uart_client)
 - PREEMPT=1, DROP_OLD_MS=200, DEADMAN_MS=220
+- MIN_CMD_GAP=0.10 (okres żetonu), CMD_BURST=1 — ruch bez żetonu jest odkładany, nie odrzucany
+- BRIDGE_RATE_HZ=2 (publikacja devices.xgo), TELEM_IMU_HZ=10, TELEM_BATTERY_S=30, TELEM_FW_S=0
+- BRIDGE_METRICS_S=5 (okres motion.bridge.metrics; 0 = wyłączone)
+- SETPOINT_TIMEOUT_MS=300 (keepalive cmd.velocity), SETPOINT_ACCEL=4.0 (/s), SETPOINT_QUANT=0.05,
+  SETPOINT_RAMP_HZ=50, SETPOINT_VX_MAX/VY_MAX (domyślnie SPEED_LINEAR), SETPOINT_YAW_MAX (TURN_STEP_MAX)
+- TRAJ_MAX_SEGMENTS=1000, TRAJ_MAX_S=120 (limity cmd.trajectory)
 - BUS_RCVHWM=100, BUS_CONFLATE=0
+- BUS_CODEC=json|msgpack (format publikacji; odbiór rozpoznaje oba)
 """
 
-import os, time, json, signal, threading
-from threading import Timer
-from typing import Optional, Any, Callable, List, Tuple
+import os, time, signal, inspect, threading
+from typing import Optional, Any, Callable, Dict, List, Tuple
 import zmq  # type: ignore
 
+from common.bus import bus_endpoint, connect_and_wait, decode_frames, encode_frames, get_codec, rpc_reply
+from common.metrics import Metrics
+from common.reactor import BusReactor, RearmableTimer
+from apps.motion.cmd_pacing import MOVE, STOP, TokenBucket, coalesce
+from apps.motion.setpoint import HW_AXES as SP_HW_AXES, SetpointStream
+from apps.motion.trajectory import TrajectoryPlan, TrajectoryRunner
+from apps.motion.xgo_telemetry import XgoTelemetrySampler
+from common.schemas import CmdMotionLegacy, CmdMove, CmdTrajectory, CmdVelocity, MotionCmd, SchemaError
+
 # --- ENV / parametry ---
-BUS_PUB_PORT      = int(os.getenv("BUS_PUB_PORT", "5555"))
-BUS_SUB_PORT      = int(os.getenv("BUS_SUB_PORT", "5556"))
+BUS_PUB_ADDR      = bus_endpoint("pub")
+BUS_SUB_ADDR      = bus_endpoint("sub")
 DRY_RUN           = (os.getenv("DRY_RUN", "1") == "1")
 BRIDGE_READONLY   = (os.getenv("BRIDGE_READONLY", "1") == "1")
 XGO_LAZY_OPEN     = (os.getenv("XGO_LAZY_OPEN", "1") == "1")
 XGO_PORT          = os.getenv("XGO_PORT", "/dev/ttyAMA0")
+XGO_FAKE          = (os.getenv("XGO_FAKE", "0") == "1")
 BRIDGE_RATE_HZ    = max(0.1, min(20.0, float(os.getenv("BRIDGE_RATE_HZ", "2"))))
+BRIDGE_METRICS_S  = float(os.getenv("BRIDGE_METRICS_S", "5"))
 
 SPEED_LINEAR      = float(os.getenv("SPEED_LINEAR", "12"))
 SAFE_MAX_DURATION = float(os.getenv("SAFE_MAX_DURATION", "0.6"))
-MIN_CMD_GAP       = float(os.getenv("MIN_CMD_GAP", "0.10"))
+MIN_CMD_GAP       = float(os.getenv("MIN_CMD_GAP", "0.10"))  # okres żetonu (tempo ruchów); 0 = bez limitu
+CMD_BURST         = float(os.getenv("CMD_BURST", "1"))       # pojemność kubełka (komendy bez czekania)
 
 TURN_STEP_MIN     = int(os.getenv("TURN_STEP_MIN", "20"))
 TURN_STEP_MAX     = int(os.getenv("TURN_STEP_MAX", "70"))
@@ -54,11 +90,23 @@ YAW_IDLE_MAX_DPS       = float(os.getenv("YAW_IDLE_MAX_DPS", "8.0"))
 PREEMPT           = (os.getenv("PREEMPT", "1") == "1")
 DROP_OLD_MS       = float(os.getenv("DROP_OLD_MS", "200"))
 DEADMAN_MS        = float(os.getenv("DEADMAN_MS", "0"))  # 0 = użyj duration
+DEADMAN_STATS_N   = int(os.getenv("DEADMAN_STATS_N", "200"))  # okno statystyk spóźnienia autostopu
+
+# Tryb prędkości zadanej (cmd.velocity)
+SETPOINT_TIMEOUT_MS = float(os.getenv("SETPOINT_TIMEOUT_MS", "300"))
+SETPOINT_ACCEL      = float(os.getenv("SETPOINT_ACCEL", "4.0"))    # pełna skala na sekundę; 0 = bez rampy
+SETPOINT_QUANT      = float(os.getenv("SETPOINT_QUANT", "0.05"))
+SETPOINT_RAMP_HZ    = max(5.0, min(200.0, float(os.getenv("SETPOINT_RAMP_HZ", "50"))))
+SETPOINT_VX_MAX     = float(os.getenv("SETPOINT_VX_MAX", str(SPEED_LINEAR)))
+SETPOINT_VY_MAX     = float(os.getenv("SETPOINT_VY_MAX", str(SPEED_LINEAR)))
+SETPOINT_YAW_MAX    = float(os.getenv("SETPOINT_YAW_MAX", str(TURN_STEP_MAX)))
+TRAJ_MAX_SEGMENTS   = int(os.getenv("TRAJ_MAX_SEGMENTS", "1000"))
+TRAJ_MAX_S          = float(os.getenv("TRAJ_MAX_S", "120"))
 
 # Ile wiadomości SUB przetwarzać na jeden tick (FIFO), aby nie gubić sekwencji move→stop itp.
 MAX_MSGS_PER_TICK = int(os.getenv("MAX_MSGS_PER_TICK", "10"))
 
-MOVES_ALLOWED = (not DRY_RUN) and (not BRIDGE_READONLY)
+MOVES_ALLOWED = ((not DRY_RUN) or XGO_FAKE) and (not BRIDGE_READONLY)
 
 # --- helpery kątów ---
 def _norm360(deg: Optional[float]) -> Optional[float]:
@@ -117,12 +165,20 @@ def _stabilize_yaw(yaw_raw: Optional[float], ts: float, freeze: bool = False) ->
 # --- Opcjonalny sterownik XGO (leniwe otwieranie) ---
 _xgo_cls = None
 try:
-    from xgolib import XGO as _XGO  # type: ignore
+    if XGO_FAKE:
+        from apps.motion.fake_xgo import FakeXGO as _XGO
+    elif os.getenv("XGO_UART", "0") == "1":
+        from apps.motion.xgo_uart_client import XgoUartClient as _XGO
+    else:
+        from xgolib import XGO as _XGO  # type: ignore
     _xgo_cls = _XGO
 except Exception:
     _xgo_cls = None
 
 xgo = None
+# port XGO dzielą pętla komend i sampler telemetrii: blokada na pojedyncze wywołanie
+_hw_lock = threading.Lock()
+_open_lock = threading.Lock()
 
 def ensure_xgo_open() -> Optional[Any]:
     global xgo
@@ -130,12 +186,17 @@ def ensure_xgo_open() -> Optional[Any]:
         return xgo
     if _xgo_cls is None:
         return None
-    try:
-        xgo = _xgo_cls(port=XGO_PORT)
-        return xgo
-    except Exception as e:
-        print("[bridge] XGO open failed:", e, flush=True)
-        return None
+    with _open_lock:
+        if xgo is not None:
+            return xgo
+        try:
+            dev = _xgo_cls(port=XGO_PORT)
+            _hw_probe(dev)
+            xgo = dev
+            return xgo
+        except Exception as e:
+            print("[bridge] XGO open failed:", e, flush=True)
+            return None
 
 
 def _list_hw_methods() -> List[str]:
@@ -150,7 +211,7 @@ def _list_hw_methods() -> List[str]:
 # --- ZMQ ---
 ctx = zmq.Context.instance()
 pub = ctx.socket(zmq.PUB)
-pub.connect(f"tcp://127.0.0.1:{BUS_PUB_PORT}")
+connect_and_wait(pub, BUS_PUB_ADDR)
 
 sub = ctx.socket(zmq.SUB)
 # FIFO (bez "latest only"): wysoka HWM, bez conflation
@@ -161,20 +222,17 @@ try:
 except Exception:
     pass
 
-sub.connect(f"tcp://127.0.0.1:{BUS_SUB_PORT}")
-for t in [
-    "cmd.motion.forward","cmd.motion.backward","cmd.motion.left","cmd.motion.right",
-    "cmd.motion.turn_left","cmd.motion.turn_right","cmd.motion.stop","cmd.motion.demo",
-    "cmd.move","cmd.stop","motion.cmd"
-]:
-    sub.setsockopt_string(zmq.SUBSCRIBE, t)
+# anti slow-joiner: czekamy na handshake z brokerem zamiast stałego sleep
+connect_and_wait(sub, BUS_SUB_ADDR)
+
+_CODEC = get_codec()
 
-# anti slow-joiner
-time.sleep(0.3)
+# Jeden wątek: komendy (POLLIN na sub), telemetria i deadman jako timery reaktora
+reactor = BusReactor(endpoint=BUS_SUB_ADDR, name="bridge")
 
 def _pub_json(topic: str, payload: dict):
     try:
-        pub.send_string(f"{topic} {json.dumps(payload, ensure_ascii=False)}")
+        pub.send_multipart(encode_frames(topic, payload, _CODEC))
     except Exception:
         pass
 
@@ -183,91 +241,61 @@ def publish_event(name: str, detail: dict):
     _pub_json("motion.bridge.event", payload)
     print(f"[bridge] {name}: {detail}", flush=True)
 
-# --- Telemetria: devices.xgo ---
-def _get_val(names: List[str], post: Optional[Callable[[Any], Any]] = None) -> Any:
-    dev = xgo or ensure_xgo_open()
-    if not dev:
-        return None
-    for n in names:
-        fn = getattr(dev, n, None)
-        if callable(fn):
-            try:
-                v = fn()
-                return post(v) if post else v
-            except Exception:
-                continue
-    return None
+# Metryki mostu (common.metrics), publikowane co BRIDGE_METRICS_S:
+#   liczniki accept_total, deferred_total, skip_total{reason}, dir_total{dir}
+#   histogramy [ms]: cmd_age_ms (ts nadawcy → odbiór), rx_to_hw_ms (odbiór → wywołanie XGO),
+#   hw_call_ms (czas wywołania XGO), deadman_late_ms (spóźnienie autostopu)
+metrics = Metrics()
+_cur_rx: Optional[float] = None  # monotonic odbioru komendy w trakcie obsługi (rx_to_hw_ms)
+
+def _rpc_reply(data: dict, verdict: str, reason: Optional[str] = None, event: Optional[str] = None):
+    """Werdykt dla nadawcy komendy (tylko gdy żądanie przyszło przez RPC — ma reply_to)."""
+    if verdict == "accept":
+        metrics.inc("accept_total")
+        if event:
+            metrics.inc("dir_total", dir=event)
+    rpc_reply(_pub_json, data, {"ok": verdict in ("accept", "defer"), "verdict": verdict, "reason": reason, "event": event})
 
-
-def _read_attitude():
-    dev = xgo or ensure_xgo_open()
-    if dev:
-        for m in ("read_heading", "rider_read_heading", "heading", "read_yaw_deg360"):
-            fn = getattr(dev, m, None)
-            if callable(fn):
-                try:
-                    h = float(fn())
-                    return ( _get_val(["read_roll","rider_read_roll"], float),
-                             _get_val(["read_pitch","rider_read_pitch"], float),
-                             float(h), "heading_native" )
-                except Exception:
-                    pass
-    for trio in [
-        ("read_roll","read_pitch","read_yaw"),
-        ("rider_read_roll","rider_read_pitch","rider_read_yaw"),
-    ]:
-        dev = xgo or ensure_xgo_open()
-        if not dev:
-            return (None, None, None, "gyro_stabilized")
-        try:
-            r = getattr(dev, trio[0])()
-            p = getattr(dev, trio[1])()
-            y = getattr(dev, trio[2])()
-            return (float(r), float(p), float(y), "gyro_stabilized")
-        except Exception:
-            continue
-    v = _get_val(["read_imu", "read_imu_int16", "rider_read_imu_int16"])
-    if isinstance(v, (list, tuple)) and len(v) >= 3:
-        try:
-            return (float(v[0]), float(v[1]), float(v[2]), "gyro_stabilized")
-        except Exception:
-            return (None, None, None, "gyro_stabilized")
-    return (None, None, None, "gyro_stabilized")
+# --- Telemetria: devices.xgo ---
+# Odczyty UART robi sampler w tle (apps.motion.xgo_telemetry); tu tylko snapshot
+# + filtr yaw, więc tick telemetrii w reaktorze nie czeka na port.
+telemetry = XgoTelemetrySampler(open_dev=ensure_xgo_open, io_lock=_hw_lock)
+_yaw_out = {"att_ts": None, "yaw": None, "yaw_rate_dps": None}
 
 
 def read_xgo_telemetry() -> dict:
-    dev = xgo if xgo is not None else (ensure_xgo_open() if not XGO_LAZY_OPEN else xgo)
-    batt = _get_val(["rider_read_battery", "read_battery"])
-    fw   = _get_val(["rider_read_firmware", "read_firmware", "version"])
-    roll, pitch, yaw_raw, yaw_src = _read_attitude()
+    snap = telemetry.snapshot()
+    roll, pitch, yaw_raw, yaw_src = snap["roll"], snap["pitch"], snap["yaw_raw"], snap["yaw_src"]
+    att_ts = snap["att_ts"]
     ts = time.time()
 
-    if yaw_src == "heading_native":
-        yaw_norm = _norm360(yaw_raw); yaw_rate = None; yaw_out = yaw_norm; src_out = "heading_native"
-    else:
-        prev_ts, prev_raw = _yaw_state["ts"], _yaw_state["yaw_raw"]
-        if prev_ts is not None and prev_raw is not None and yaw_raw is not None:
-            dt_est = max(1e-6, ts - float(prev_ts))
-            yaw_rate_est = (float(yaw_raw) - float(prev_raw)) / dt_est
+    if att_ts is not None and att_ts != _yaw_out["att_ts"]:  # filtr tylko dla nowej próbki
+        if yaw_src == "heading_native":
+            yaw_out, yaw_rate = _norm360(yaw_raw), None
         else:
-            yaw_rate_est = 0.0
-        idle_for = ts - (_last_motion_cmd_ts or 0.0)
-        freeze = (idle_for >= YAW_FREEZE_WHEN_IDLE_S) and (abs(yaw_rate_est) < YAW_IDLE_MAX_DPS)
-        yaw_stable, yaw_rate, _ = _stabilize_yaw(yaw_raw, ts, freeze=freeze)
-        yaw_out, src_out = yaw_stable, "gyro_stabilized"
+            prev_ts, prev_raw = _yaw_state["ts"], _yaw_state["yaw_raw"]
+            if prev_ts is not None and prev_raw is not None and yaw_raw is not None:
+                dt_est = max(1e-6, att_ts - float(prev_ts))
+                yaw_rate_est = (float(yaw_raw) - float(prev_raw)) / dt_est
+            else:
+                yaw_rate_est = 0.0
+            idle_for = att_ts - (_last_motion_cmd_ts or 0.0)
+            freeze = (idle_for >= YAW_FREEZE_WHEN_IDLE_S) and (abs(yaw_rate_est) < YAW_IDLE_MAX_DPS)
+            yaw_out, yaw_rate, _ = _stabilize_yaw(yaw_raw, att_ts, freeze=freeze)
+        _yaw_out.update(att_ts=att_ts, yaw=yaw_out, yaw_rate_dps=yaw_rate)
 
     return {
         "present": bool(xgo is not None),
         "imu_ok": (roll is not None and pitch is not None and yaw_raw is not None),
         "pose": None,
-        "battery_pct": float(batt) if batt is not None else None,
+        "battery_pct": snap["battery"],
         "roll": roll,
         "pitch": pitch,
         "yaw_raw": yaw_raw,
-        "yaw": yaw_out,
-        "yaw_rate_dps": yaw_rate,
-        "yaw_src": src_out,
-        "fw": fw,
+        "yaw": _yaw_out["yaw"],
+        "yaw_rate_dps": _yaw_out["yaw_rate_dps"],
+        "yaw_src": yaw_src,
+        "fw": snap["fw"],
         "ts": ts,
     }
 
@@ -282,62 +310,160 @@ def publish_devices_xgo(payload: dict):
         print("[bridge] devices.xgo ->", payload, flush=True)
         _last_telem_print = now
 
-# --- Deadman (autostop po czasie) ---
-_deadman_lock = threading.Lock()
-_deadman_timer: Optional[Timer] = None
+# --- Deadman (autostop po czasie; jeden przestawiany timer reaktora) ---
+# Każda komenda ruchu tylko przesuwa termin (RearmableTimer.arm) — bez nowego timera
+# na komendę. Po autostopie publikujemy spóźnienie stopu względem terminu (late_ms)
+# i statystyki okna: to opóźnienie, które realnie decyduje o drodze hamowania.
+_deadman_arm = {"t0": 0.0, "d": 0.0, "rid": None}
+_deadman_late = metrics.hist("deadman_late_ms", window=DEADMAN_STATS_N)
+
+
+def _deadman_stats() -> dict:
+    """motion.bridge.deadman ze snapshotu histogramu deadman_late_ms (kwantyle z okna)."""
+    h = _deadman_late.snapshot()
+    out = {"count": h["count"], "window": h["window"], "ts": time.time()}
+    if h["window"]:
+        out.update({f"late_ms_{k}": h[k] for k in ("min", "p50", "p95", "p99", "max")})
+        out["last_ms"] = round(_deadman_late.window[-1], 3)
+    return out
+
+
+def _deadman_fire():
+    try:
+        hw_stop()
+        late_ms = ((time.monotonic() - _deadman_arm["t0"]) - _deadman_arm["d"]) * 1000.0
+        _deadman_late.observe(late_ms)
+        publish_event("auto_stop", {"after_s": _deadman_arm["d"], "rid": _deadman_arm["rid"],
+                                    "late_ms": round(late_ms, 3)})
+        _pub_json("motion.bridge.deadman", _deadman_stats())
+    except Exception as e:
+        print("[bridge] deadman error:", e, flush=True)
+
+
+_deadman = RearmableTimer(reactor, _deadman_fire)
+
 
 def _cancel_deadman():
-    global _deadman_timer
-    with _deadman_lock:
-        if _deadman_timer is not None:
-            try: _deadman_timer.cancel()
-            except Exception: pass
-        _deadman_timer = None
+    _deadman.cancel()
 
 
-def _schedule_deadman(duration_s: float):
-    global _deadman_timer
+def _schedule_deadman(duration_s: float, rid: Any = None):
     if DEADMAN_MS and DEADMAN_MS > 0:
         d = float(DEADMAN_MS) / 1000.0
     else:
         d = max(0.05, min(float(duration_s or 0.0), SAFE_MAX_DURATION))
-    _cancel_deadman()
-    def _fire():
-        try:
-            if ensure_xgo_open():
-                try:
-                    xgo.stop()  # type: ignore[attr-defined]
-                except Exception as e:
-                    print("[bridge] hw call error:", e, flush=True)
-            publish_event("auto_stop", {"after_s": d, "rid": rid})
-        except Exception:
-            pass
-    t = Timer(d, _fire); t.daemon = True
-    with _deadman_lock: _deadman_timer = t
-    t.start()
+    _deadman_arm["t0"] = time.monotonic()
+    _deadman_arm["d"] = d
+    _deadman_arm["rid"] = rid
+    _deadman.arm(d)
 
 # --- Helpery wywołań HW ---
-
-def _try_call(fn, *args) -> bool:
+# Metoda i sygnatura każdej akcji ustalane raz, przy otwarciu XGO (inspect — bez ruchu
+# robota i bez ramek na UART): "v" (prędkość/krok), "vt" (prędkość, czas), "" (bez
+# argumentów). Gdy sygnatury nie da się odczytać (np. metoda z C), pierwsze wywołanie
+# próbuje kształtów jak dawniej (v → t → vt) i zapamiętuje pierwszy bez TypeError.
+# Dalej każda komenda to jedno bezpośrednie wywołanie.
+_HW_ACTIONS = {
+    "forward":   ("forward",),
+    "backward":  ("back", "backward"),
+    "left":      ("left",),
+    "right":     ("right",),
+    "turnleft":  ("turnleft",),
+    "turnright": ("turnright",),
+    "stop":      ("stop",),
+    # prędkość ciągła (tryb cmd.velocity); wartość ze znakiem, 0 = oś stoi
+    "vel_x":     ("rider_move_x", "move_x"),
+    "vel_y":     ("move_y",),
+    "vel_yaw":   ("rider_turn", "turn"),
+}
+_HW_FALLBACK = {"forward": ("v", "t", "vt"), "backward": ("v", "t", "vt"), "stop": ("",)}
+_hw_caps: Dict[str, Tuple[Callable[..., Any], Optional[str]]] = {}  # akcja → (metoda, kształt|None)
+
+
+def _hw_shape(fn: Callable[..., Any], action: str) -> Optional[str]:
     try:
-        fn(*args); return True
-    except TypeError:
+        ps = list(inspect.signature(fn).parameters.values())
+    except (TypeError, ValueError):
+        return None
+    if any(p.kind == p.VAR_POSITIONAL for p in ps):
+        return None
+    pos = [p for p in ps if p.kind in (p.POSITIONAL_ONLY, p.POSITIONAL_OR_KEYWORD)]
+    req = sum(1 for p in pos if p.default is p.empty)
+    for shape in _HW_FALLBACK.get(action, ("v",)):
+        if shape != "t" and req <= len(shape) <= len(pos):
+            return shape
+    return None
+
+
+def _hw_probe(dev: Any) -> None:
+    """Jednorazowo przy otwarciu XGO: metoda + kształt wywołania dla każdej akcji."""
+    _hw_caps.clear()
+    for action, names in _HW_ACTIONS.items():
+        for n in names:
+            fn = getattr(dev, n, None)
+            if callable(fn):
+                _hw_caps[action] = (fn, _hw_shape(fn, action))
+                break
+    print("[bridge] hw caps:", {a: f"{fn.__name__}({sh if sh is not None else '?'})"
+                                for a, (fn, sh) in _hw_caps.items()}, flush=True)
+
+
+def _hw_args(shape: str, v: Any, t: Any) -> tuple:
+    return () if not shape else (v,) if shape == "v" else (t,) if shape == "t" else (v, t)
+
+
+def _hw(action: str, v: Any = None, t: Any = None) -> bool:
+    """Akcja XGO jednym bezpośrednim wywołaniem (pod _hw_lock); False = brak metody / błąd."""
+    if not ensure_xgo_open():
         return False
+    cap = _hw_caps.get(action)
+    if cap is None:
+        print(f"[bridge] hw call missing method: {action}", flush=True)
+        return False
+    fn, shape = cap
+    try:
+        if shape is not None:
+            with _hw_lock:
+                t0 = time.perf_counter()
+                fn(*_hw_args(shape, v, t))
+            metrics.observe("hw_call_ms", (time.perf_counter() - t0) * 1000.0)
+            return True
+        for sh in _HW_FALLBACK.get(action, ("v",)):
+            try:
+                with _hw_lock:
+                    t0 = time.perf_counter()
+                    fn(*_hw_args(sh, v, t))
+            except TypeError:
+                continue
+            metrics.observe("hw_call_ms", (time.perf_counter() - t0) * 1000.0)
+            _hw_caps[action] = (fn, sh)
+            return True
+        print(f"[bridge] hw call no matching signature: {action}", flush=True)
+        _hw_caps.pop(action, None)
     except Exception as e:
-        print("[bridge] hw call error:", e, flush=True)
-        return True
+        print(f"[bridge] hw call error ({action}):", e, flush=True)
+    return False
+
+
+def hw_stop() -> bool:
+    return _hw("stop")
 
 
-def _call_move(method_name: str, *args):
+def _mark_rx_to_hw():
+    """Pierwsze wywołanie XGO wynikające z bieżącej komendy → rx_to_hw_ms (raz na komendę)."""
+    global _cur_rx
+    if _cur_rx is not None:
+        metrics.observe("rx_to_hw_ms", (time.monotonic() - _cur_rx) * 1000.0)
+        _cur_rx = None
+
+
+def _call_move(action: str, *args):
     if not MOVES_ALLOWED:
         return
-    dev = ensure_xgo_open()
-    if not dev:
-        print("[bridge] hw unavailable for", method_name, flush=True); return
-    fn = getattr(dev, method_name, None)
-    if not callable(fn):
-        print(f"[bridge] hw call missing method: {method_name}", flush=True); return
-    _try_call(fn, *args)
+    if not ensure_xgo_open():
+        print("[bridge] hw unavailable for", action, flush=True); return
+    _mark_rx_to_hw()
+    _hw(action, *args)
 
 
 def _clamp01(v: float) -> float:
@@ -357,11 +483,7 @@ def do_forward(speed_norm, runtime):
         return
     spd = SPEED_LINEAR * _clamp01(abs(speed_norm))
     print(f"[bridge] forward v={spd:.2f} t={runtime:.2f}")
-    dev = ensure_xgo_open()
-    if dev and hasattr(dev, "forward"):
-        if not _try_call(getattr(dev,"forward"), spd):
-            if not _try_call(getattr(dev,"forward"), runtime):
-                _try_call(getattr(dev,"forward"), spd, runtime)
+    _call_move("forward", spd, runtime)
 
 
 def do_backward(speed_norm, runtime):
@@ -369,13 +491,7 @@ def do_backward(speed_norm, runtime):
         return
     spd = SPEED_LINEAR * _clamp01(abs(speed_norm))
     print(f"[bridge] backward v={spd:.2f} t={runtime:.2f}")
-    dev = ensure_xgo_open()
-    if dev:
-        meth = "back" if hasattr(dev, "back") else ("backward" if hasattr(dev, "backward") else None)
-        if meth:
-            if not _try_call(getattr(dev,meth), spd):
-                if not _try_call(getattr(dev,meth), runtime):
-                    _try_call(getattr(dev,meth), spd, runtime)
+    _call_move("backward", spd, runtime)
 
 
 def do_turn_left(yaw_abs_norm, runtime):
@@ -405,18 +521,14 @@ def do_strafe_right(speed_norm, runtime):
 def do_stop():
     print("[bridge] stop")
     _cancel_deadman()
-    if ensure_xgo_open():
-        try:
-            xgo.stop()  # type: ignore[attr-defined]
-        except Exception as e:
-            print("[bridge] hw call error:", e, flush=True)
+    trajectory.abort("stop")
+    setpoint.halt()
+    _mark_rx_to_hw()
+    hw_stop()
 
 # --- sygnały, start ---
-_running = True
-
 def _sigterm(*_):
-    global _running
-    _running = False
+    reactor.stop()
 
 signal.signal(signal.SIGINT, _sigterm)
 signal.signal(signal.SIGTERM, _sigterm)
@@ -426,9 +538,9 @@ if not XGO_LAZY_OPEN:
 
 print(
     "[bridge] START "
-    f"(PUB:{BUS_PUB_PORT} SUB:{BUS_SUB_PORT} "
+    f"(PUB:{BUS_PUB_ADDR} SUB:{BUS_SUB_ADDR} "
     f"DRY_RUN={bool(DRY_RUN)} READONLY={bool(BRIDGE_READONLY)} "
-    f"MOVES_ALLOWED={bool(MOVES_ALLOWED)} LAZY={bool(XGO_LAZY_OPEN)} "
+    f"MOVES_ALLOWED={bool(MOVES_ALLOWED)} LAZY={bool(XGO_LAZY_OPEN)} FAKE={bool(XGO_FAKE)} "
     f"RATE_HZ={BRIDGE_RATE_HZ} PORT={XGO_PORT} "
     f"SAFE_MAX={SAFE_MAX_DURATION}s MIN_GAP={MIN_CMD_GAP}s)",
     flush=True
@@ -436,191 +548,448 @@ print(
 print("[bridge] hw methods:", ", ".join(_list_hw_methods()), flush=True)
 publish_event("ready", {"ts": time.time()})
 
-_last_cmd_ts = 0.0
-_next_telem_ts = 0.0
+# --- Tempo i scalanie komend ruchu (apps.motion.cmd_pacing) ---
+_LEGACY_DIRS = {"forward": "forward", "fwd": "forward", "up": "forward",
+                "backward": "backward", "back": "backward", "down": "backward",
+                "left": "turn_left", "turn_left": "turn_left",
+                "right": "turn_right", "turn_right": "turn_right"}
+_bucket = TokenBucket(1.0 / MIN_CMD_GAP if MIN_CMD_GAP > 0 else 0.0, CMD_BURST)
+_deferred: Optional[Tuple[str, dict, Any, Optional[float]]] = None  # (topic, data, rid, rx) — odłożona najnowsza intencja
+_cmd_stats_sent: dict = {}
+
+
+def _skip(data: dict, rid: Any, reason: str, **extra):
+    metrics.inc("skip_total", reason=reason)
+    publish_event("skip_cmd.move", {"rid": rid, "reason": reason, **extra})
+    _rpc_reply(data, "skip", reason)
+
+
+def _drop_deferred(by_rid: Any):
+    """Odłożona intencja zastąpiona (nowszy ruch albo stop) → skip merged."""
+    global _deferred
+    if _deferred is not None:
+        _, d, rid, _ = _deferred
+        _deferred = None
+        _deferred_timer.cancel()
+        _skip(d, rid, "merged", by=by_rid)
+
+
+def _pace(topic: str, data: dict, rid: Any) -> bool:
+    """True = wykonaj teraz; False = odłożona do najbliższego żetonu."""
+    global _deferred
+    _drop_deferred(rid)
+    if _bucket.take():
+        return True
+    wait = _bucket.wait_s()
+    # nadawca RPC dostaje werdykt od razu (nie czeka na żeton); dalsze odpowiedzi już nie idą
+    _rpc_reply(data, "defer", "rate", event=None)
+    data = {k: v for k, v in data.items() if k != "reply_to"}
+    _deferred = (topic, data, rid, _cur_rx)
+    metrics.inc("deferred_total")
+    publish_event("defer_cmd.move", {"rid": rid, "wait_ms": round(wait * 1000.0, 1)})
+    _deferred_timer.arm(wait)
+    return False
+
+
+def _run_deferred():
+    global _deferred, _cur_rx
+    if _deferred is None:
+        return
+    if not _bucket.take():  # zaokrąglenia: żeton jeszcze niepełny
+        _deferred_timer.arm(_bucket.wait_s())
+        return
+    topic, data, _, _cur_rx = _deferred  # rx_to_hw_ms liczy też czas odłożenia
+    _deferred = None
+    try:
+        _dispatch(topic, data, paced=True)
+    finally:
+        _cur_rx = None
+
 
-# --- pętla główna ---
-tick_dt = 0.01
-while _running:
-    now = time.time()
+_deferred_timer = RearmableTimer(reactor, _run_deferred)
+
+
+def _cmd_kind(msg: Tuple[str, dict]) -> Optional[str]:
+    topic, data = msg
+    if topic == "cmd.move":
+        return MOVE
+    if topic in ("cmd.stop", "cmd.motion.stop"):
+        return STOP
+    if topic == "motion.cmd":
+        return STOP if str(data.get("dir") or "").strip().lower() in ("stop", "halt") else MOVE
+    return None
+
+
+def _publish_cmd_stats():
+    global _cmd_stats_sent
+    skips = metrics.by_label("skip_total", "reason")
+    cur = {"accept": metrics.value("accept_total"), "deferred": metrics.value("deferred_total"),
+           "merged": skips.get("merged", 0), "skip": skips}
+    if cur == _cmd_stats_sent:
+        return
+    _cmd_stats_sent = cur
+    _pub_json("motion.bridge.cmd_stats", {**cur, "ts": time.time()})
+
+
+def _publish_metrics():
+    _pub_json("motion.bridge.metrics", metrics.snapshot())
+
+
+# --- obsługa komend ---
+def _decode(parts: List[bytes]) -> Tuple[str, dict]:
+    topic, data = decode_frames(parts)
+    return topic, (data if isinstance(data, dict) else {})
+
+
+def _stream_yield(by: Any = None) -> bool:
+    """Komenda impulsowa przejmuje ruch: trajektoria/strumień cmd.velocity przerwane (True = były aktywne)."""
+    if not setpoint.active:
+        return False
+    trajectory.abort("preempted", by=by)
+    setpoint.halt()
+    return True
+
+
+def _preempt_stop():
+    # strumień prędkości zadanej zawsze ustępuje komendzie impulsowej (inaczej osie by się mieszały)
+    if _stream_yield() or PREEMPT:
+        _cancel_deadman()
+        hw_stop()
+
+
+# LEGACY: dashboard 8080 publikuje na "motion.cmd"
+def _on_motion_cmd(topic: str, data: dict, paced: bool = False):
+    # payload np.: {"dir":"forward","v":0.22,"t":0.25,"rid":"...","ts":...}
+    global _last_motion_cmd_ts
+    try:
+        m = MotionCmd.parse(data)
+    except SchemaError as e:
+        _skip(data, data.get("rid"), "bad_payload", error=str(e))
+        return
+    rid = m.rid
+    d = m.dir
+    vx = m.v
+    dur = max(0.05, min(m.t or SAFE_MAX_DURATION, SAFE_MAX_DURATION))
+    if not paced:
+        publish_event("rx_cmd.legacy", {"rid": rid, "topic": "motion.cmd", "dir": d, "v": vx, "t": dur})
+
+    now2 = time.time()
+    if m.ts and not paced:
+        age = (now2 - m.ts) * 1000.0
+        metrics.observe("cmd_age_ms", age)
+        if age > DROP_OLD_MS:
+            _skip(data, rid, "drop_old", age_ms=round(age, 1))
+            return
+
+    if d in ("stop","halt"):
+        _drop_deferred(rid)
+        do_stop(); publish_event("stop", {"rid": rid}); _last_motion_cmd_ts = time.time()
+        _rpc_reply(data, "accept", event="stop")
+        return
+    ev = _LEGACY_DIRS.get(d)
+    if ev is None:
+        _skip(data, rid, "bad_dir", dir=d)
+        return
+
+    if not paced and not _pace(topic, data, rid):
+        return
+
+    _preempt_stop()
+
+    if ev == "forward":
+        do_forward(abs(vx), dur);  publish_event("forward",  {"rid": rid, "v": abs(vx), "runtime": dur})
+    elif ev == "backward":
+        do_backward(abs(vx), dur); publish_event("backward", {"rid": rid, "v": abs(vx), "runtime": dur})
+    elif ev == "turn_left":
+        do_turn_left(abs(vx), dur);  publish_event("turn_left",  {"rid": rid, "step": _yaw_to_step(abs(vx)), "runtime": dur})
+    else:
+        do_turn_right(abs(vx), dur); publish_event("turn_right", {"rid": rid, "step": _yaw_to_step(abs(vx)), "runtime": dur})
+
+    _last_motion_cmd_ts = now2
+    _schedule_deadman(dur, rid)
+    _rpc_reply(data, "accept", event=ev)
+
+
+# NOWE: cmd.move / cmd.stop
+def _on_cmd_move(topic: str, data: dict, paced: bool = False):
+    global _last_motion_cmd_ts
+    try:
+        m = CmdMove.parse(data)
+    except SchemaError as e:
+        _skip(data, data.get("rid"), "bad_payload", error=str(e))
+        return
+    vx, vy, yaw = m.vx, m.vy, m.yaw
+
+    dur = max(0.05, min(m.duration or SAFE_MAX_DURATION, SAFE_MAX_DURATION))
+    if not paced:
+        publish_event("rx_cmd.move", {"rid": m.rid, "vx": vx, "vy": vy, "yaw": yaw, "duration": dur})
+
+    now2 = time.time()
+
+    # DROP_OLD_MS (przy odbiorze; odłożona intencja czeka najwyżej jeden okres żetonu)
+    if m.ts and not paced:
+        age = (now2 - m.ts) * 1000.0
+        metrics.observe("cmd_age_ms", age)
+        if age > DROP_OLD_MS:
+            _skip(data, m.rid, "drop_old", age_ms=round(age, 1))
+            return
+
+    # Tempo: brak żetonu → odłóż (najnowsza intencja wygrywa), nie odrzucaj
+    if not paced and not _pace(topic, data, m.rid):
+        return
+
+    _preempt_stop()
+
+    ax, ay, aw = abs(vx), abs(vy), abs(yaw)
+    moved = False
+    ev = None
+
+    if aw > 1e-4 and aw >= ax and aw >= ay:
+        moved = True
+        if yaw < 0:
+            ev = "turn_left"; do_turn_left(aw, dur);  publish_event("turn_left",  {"rid": m.rid, "step": _yaw_to_step(aw), "runtime": dur})
+        else:
+            ev = "turn_right"; do_turn_right(aw, dur); publish_event("turn_right", {"rid": m.rid, "step": _yaw_to_step(aw), "runtime": dur})
+
+    elif ax > 1e-4 and ax >= ay:
+        moved = True
+        if vx >= 0:
+            ev = "forward"; do_forward(ax, dur);  publish_event("forward",  {"rid": m.rid, "v": ax, "runtime": dur})
+        else:
+            ev = "backward"; do_backward(ax, dur); publish_event("backward", {"rid": m.rid, "v": ax, "runtime": dur})
+
+    elif ay > 1e-4:
+        moved = True
+        if vy >= 0:
+            ev = "right"; do_strafe_right(ay, dur); publish_event("right", {"rid": m.rid, "v": ay, "runtime": dur})
+        else:
+            ev = "left"; do_strafe_left(ay, dur);  publish_event("left",  {"rid": m.rid, "v": ay, "runtime": dur})
+
+    if moved:
+        _last_motion_cmd_ts = now2
+
+    _schedule_deadman(dur, m.rid)
+    _rpc_reply(data, "accept", event=ev)
+
+
+def _on_cmd_stop(topic: str, data: dict, paced: bool = False):
+    global _last_motion_cmd_ts
+    _drop_deferred(data.get("rid"))
+    do_stop(); publish_event("stop", {"rid": data.get("rid")})
+    _last_motion_cmd_ts = time.time()
+    _rpc_reply(data, "accept", event="stop")
+
+
+# NOWE: cmd.velocity — strumień prędkości zadanej (apps.motion.setpoint.SetpointStream).
+# Bez preempcji i bez deadmana per komenda: każda wiadomość tylko przesuwa cel i keepalive;
+# rampa co 1/SETPOINT_RAMP_HZ, do XGO idą wyłącznie osie zmienione po kwantyzacji.
+def _sp_hw_write(axis: str, v: float):
+    _call_move(SP_HW_AXES[axis][0], v)
+    metrics.inc("setpoint_hw_total", axis=axis)
 
-    # Telemetria
-    if now >= _next_telem_ts:
-        publish_devices_xgo(read_xgo_telemetry())
-        _next_telem_ts = now + (1.0 / BRIDGE_RATE_HZ)
 
-    # Odbiór komend – pobierz do N wiadomości i przetwarzaj KAŻDĄ (FIFO)
-    batch: List[str] = []
+def _sp_hw_stop():
+    _mark_rx_to_hw()
+    hw_stop()
+    metrics.inc("setpoint_hw_total", axis="stop")
+
+
+def _sp_expired(idle: bool, late_s: float):
+    trajectory.abort("timeout")  # tylko gdy zegar trajektorii stanął (keepalive sięga końca segmentu)
+    if idle:
+        publish_event("setpoint_end", {})
+        return
+    metrics.observe("setpoint_timeout_late_ms", late_s * 1000.0)
+    publish_event("setpoint_timeout", {"after_ms": SETPOINT_TIMEOUT_MS, "late_ms": round(late_s * 1000.0, 3)})
+
+
+setpoint = SetpointStream(reactor, _sp_hw_write, _sp_hw_stop, (SETPOINT_VX_MAX, SETPOINT_VY_MAX, SETPOINT_YAW_MAX),
+                          SETPOINT_ACCEL, SETPOINT_QUANT, SETPOINT_RAMP_HZ, on_expire=_sp_expired)
+
+
+def _sp_supported() -> bool:
+    return not (MOVES_ALLOWED and ensure_xgo_open()) or all(a in _hw_caps for a, _ in SP_HW_AXES.values())
+
+
+def _on_cmd_velocity(topic: str, data: dict, paced: bool = False):
+    global _last_motion_cmd_ts
+    try:
+        m = CmdVelocity.parse(data)
+    except SchemaError as e:
+        _skip(data, data.get("rid"), "bad_payload", error=str(e))
+        return
+    if m.ts:
+        age = (time.time() - m.ts) * 1000.0
+        metrics.observe("cmd_age_ms", age)
+        if age > DROP_OLD_MS:
+            _skip(data, m.rid, "drop_old", age_ms=round(age, 1))
+            return
+    if not _sp_supported():
+        _skip(data, m.rid, "no_velocity_api")
+        return
+
+    trajectory.abort("preempted", by=m.rid)  # ruch przejmuje strumień — płynnie, od bieżącej prędkości
+    if not setpoint.active:
+        # początek strumienia: przejmujemy ruch od trybu impulsowego
+        _drop_deferred(m.rid)
+        if _deadman.active:
+            _cancel_deadman()
+            hw_stop()
+        publish_event("setpoint_start", {"rid": m.rid})
+    metrics.inc("setpoint_total")
+    setpoint.set(m.vx, m.vy, m.yaw, SETPOINT_TIMEOUT_MS / 1000.0)
+    _last_motion_cmd_ts = time.time()
+    _rpc_reply(data, "accept")
+
+
+# NOWE: cmd.trajectory — segmenty (t, vx, vy, yaw) podawane na rampę trybu cmd.velocity
+# według zegara mostu (apps.motion.trajectory.TrajectoryRunner).
+_TRAJ_EVENTS = {"started": "trajectory_start"}
+
+
+def _traj_publish(msg: dict):
+    global _last_motion_cmd_ts
+    _pub_json("motion.trajectory", msg)
+    st = msg["state"]
+    if st == "segment":
+        metrics.observe("traj_late_ms", msg["late_ms"])
+        _last_motion_cmd_ts = time.time()
+        return
+    publish_event(_TRAJ_EVENTS.get(st, "trajectory_" + st),
+                  {k: msg[k] for k in ("rid", "idx", "n", "by", "total_s", "late_ms") if k in msg})
+
+
+trajectory = TrajectoryRunner(reactor, setpoint.set, _traj_publish, margin_s=SETPOINT_TIMEOUT_MS / 1000.0)
+
+
+def _on_cmd_trajectory(topic: str, data: dict, paced: bool = False):
+    try:
+        m = CmdTrajectory.parse(data)
+    except SchemaError as e:
+        _skip(data, data.get("rid"), "bad_payload", error=str(e))
+        return
+    plan = TrajectoryPlan(m.segments or ())
+    if not len(plan) or len(plan) > TRAJ_MAX_SEGMENTS or plan.total > TRAJ_MAX_S:
+        _skip(data, m.rid, "bad_trajectory", n=len(plan), total_s=round(plan.total, 3))
+        return
+    if m.ts:
+        age = (time.time() - m.ts) * 1000.0
+        metrics.observe("cmd_age_ms", age)
+        if age > DROP_OLD_MS:
+            _skip(data, m.rid, "drop_old", age_ms=round(age, 1))
+            return
+    if not _sp_supported():
+        _skip(data, m.rid, "no_velocity_api")
+        return
+
+    _drop_deferred(m.rid)
+    _cancel_deadman()
+    if not setpoint.active:
+        hw_stop()  # start od zera (ewentualny ruch impulsowy zatrzymany)
+    metrics.inc("trajectory_total")
+    _rpc_reply(data, "accept", event="trajectory")
+    trajectory.start(plan, m.rid)
+
+
+# STARE: zgodność wstecz — cmd.motion.<kierunek> {speed, runtime}
+def _legacy_motion(do: Callable[[float, float], None], ev: str, norm: Callable[[float], float], step: bool = False):
+    def handler(topic: str, data: dict, paced: bool = False):
+        global _last_motion_cmd_ts
+        try:
+            m = CmdMotionLegacy.parse(data)
+        except SchemaError as e:
+            _skip(data, data.get("rid"), "bad_payload", error=str(e))
+            return
+        if _stream_yield(m.rid):
+            hw_stop()
+        spd = m.speed
+        rt  = max(0.05, min(m.runtime, SAFE_MAX_DURATION))
+        x = norm(spd)
+        do(x, rt)
+        detail = {"rid": m.rid, "runtime": rt}
+        detail.update({"step": _yaw_to_step(x)} if step else {"v": spd})
+        publish_event(ev, detail)
+        metrics.inc("dir_total", dir=ev)
+        _schedule_deadman(rt, m.rid); _last_motion_cmd_ts = time.time()
+    return handler
+
+
+_norm_drive  = lambda spd: spd if spd <= 1 else spd / max(1.0, TURN_STEP_MAX)
+_norm_strafe = lambda spd: spd if spd <= 1 else min(1.0, spd / 100.0)
+_norm_turn   = lambda spd: abs(spd if spd <= 1 else min(1.0, spd / float(TURN_STEP_MAX)))
+
+# Tablica tematów → handler(topic, data, paced); z niej też lista subskrypcji
+_HANDLERS: Dict[str, Callable[..., None]] = {
+    "cmd.move":              _on_cmd_move,
+    "cmd.stop":              _on_cmd_stop,
+    "cmd.velocity":          _on_cmd_velocity,
+    "cmd.trajectory":        _on_cmd_trajectory,
+    "motion.cmd":            _on_motion_cmd,
+    "cmd.motion.stop":       _on_cmd_stop,
+    "cmd.motion.forward":    _legacy_motion(do_forward, "forward", _norm_drive),
+    "cmd.motion.backward":   _legacy_motion(do_backward, "backward", _norm_drive),
+    "cmd.motion.left":       _legacy_motion(do_strafe_left, "left", _norm_strafe),
+    "cmd.motion.right":      _legacy_motion(do_strafe_right, "right", _norm_strafe),
+    "cmd.motion.turn_left":  _legacy_motion(do_turn_left, "turn_left", _norm_turn, step=True),
+    "cmd.motion.turn_right": _legacy_motion(do_turn_right, "turn_right", _norm_turn, step=True),
+}
+
+
+def _dispatch(topic: str, data: dict, paced: bool = False):
+    """Jedna komenda; paced=True — odłożona intencja, żeton już pobrany."""
+    h = _HANDLERS.get(topic)
+    if h is not None:
+        h(topic, data, paced)
+
+
+def _on_sub_readable(sock):
+    # do N wiadomości na wybudzenie, reszta w kolejnym obrocie reaktora — timery (deadman,
+    # telemetria) nie czekają za długą paczką. W paczce ruchy zwijają się do najnowszego,
+    # stop zostaje na swoim miejscu (apps.motion.cmd_pacing.coalesce).
+    global _cur_rx
+    batch = []
     for _ in range(MAX_MSGS_PER_TICK):
         try:
-            batch.append(sub.recv_string(flags=zmq.NOBLOCK))
+            parts = sock.recv_multipart(flags=zmq.NOBLOCK)
         except zmq.Again:
             break
         except Exception as e:
             print("[bridge] recv error:", e, flush=True)
             break
+        try:
+            batch.append((time.monotonic(), _decode(parts)))
+        except Exception as e:
+            print("[bridge] decode error:", e, flush=True)
+    todo, merged = coalesce(batch, lambda it: _cmd_kind(it[1]))
+    for (_, (_, old)), (_, (_, new)) in merged:
+        _skip(old, old.get("rid"), "merged", by=new.get("rid"))
+    for rx, (topic, data) in todo:
+        _cur_rx = rx
+        try:
+            _dispatch(topic, data)
+        except Exception as e:
+            # błąd jednej komendy nie może zgubić reszty paczki (np. stopu za nią)
+            metrics.inc("handler_error_total", topic=topic)
+            print(f"[bridge] handler error {topic}: {e!r}", flush=True)
+        finally:
+            _cur_rx = None
 
-    if not batch:
-        time.sleep(tick_dt)
-        continue
 
-    for msg in batch:
-        try:
-            topic, payload = msg.split(" ", 1)
-        except ValueError:
-            topic, payload = msg, "{}"
+def _tick_telemetry():
+    publish_devices_xgo(read_xgo_telemetry())
+    _publish_cmd_stats()
 
-        try:
-            data = json.loads(payload) if payload else {}
-        except Exception:
-            data = {}
-
-        # LEGACY: dashboard 8080 publikuje na "motion.cmd"
-        if topic == "motion.cmd":
-            # payload np.: {"dir":"forward","v":0.22,"t":0.25,"rid":"...","ts":...}
-            rid = data.get("rid")
-            d = (data.get("dir") or "").lower()
-            vx = float(data.get("v", 0.0) or 0.0)
-            dur = max(0.05, min(float(data.get("t", SAFE_MAX_DURATION) or SAFE_MAX_DURATION), SAFE_MAX_DURATION))
-            publish_event("rx_cmd.legacy", {"rid": rid, "topic": "motion.cmd", "dir": d, "v": vx, "t": dur})
-
-            now2 = time.time()
-            ts_in = data.get("ts")
-            if ts_in:
-                try:
-                    age = (now2 - float(ts_in)) * 1000.0
-                    if age > DROP_OLD_MS:
-                        publish_event("skip_cmd.move", {"rid": rid, "reason": "drop_old", "age_ms": round(age, 1)})
-                        continue
-                except Exception:
-                    pass
-
-            if (now2 - _last_cmd_ts) < MIN_CMD_GAP:
-                publish_event("skip_cmd.move", {"rid": rid, "reason": "min_gap", "gap_s": round(now2 - _last_cmd_ts, 3)})
-                continue
-            _last_cmd_ts = now2
-
-            if PREEMPT:
-                _cancel_deadman()
-                if ensure_xgo_open():
-                    try:
-                        xgo.stop()  # type: ignore[attr-defined]
-                    except Exception as e:
-                        print("[bridge] hw call error (preempt stop):", e, flush=True)
-
-            moved = False
-            if d in ("forward","fwd","up"):
-                moved = True
-                do_forward(abs(vx), dur);  publish_event("forward",  {"rid": rid, "v": abs(vx), "runtime": dur})
-            elif d in ("backward","back","down"):
-                moved = True
-                do_backward(abs(vx), dur); publish_event("backward", {"rid": rid, "v": abs(vx), "runtime": dur})
-            elif d in ("left","turn_left"):
-                moved = True
-                do_turn_left(abs(vx), dur);  publish_event("turn_left",  {"rid": rid, "step": _yaw_to_step(abs(vx)), "runtime": dur})
-            elif d in ("right","turn_right"):
-                moved = True
-                do_turn_right(abs(vx), dur); publish_event("turn_right", {"rid": rid, "step": _yaw_to_step(abs(vx)), "runtime": dur})
-            elif d in ("stop","halt"):
-                do_stop(); publish_event("stop", {"rid": rid}); _last_motion_cmd_ts = time.time(); continue
-            else:
-                publish_event("skip_cmd.move", {"rid": rid, "reason": "bad_dir", "dir": d})
-                continue
 
-            if moved:
-                _last_motion_cmd_ts = now2
-                _schedule_deadman(dur)
-            continue
-
-        # NOWE: cmd.move / cmd.stop
-        if topic == "cmd.move":
-            vx  = float(data.get("vx", 0.0))
-            vy  = float(data.get("vy", 0.0))
-            yaw = float(data.get("yaw", data.get("az", 0.0)) or 0.0)
-
-            dur = max(0.05, min(float(data.get("duration", SAFE_MAX_DURATION) or SAFE_MAX_DURATION), SAFE_MAX_DURATION))
-            publish_event("rx_cmd.move", {"rid": data.get("rid"), "vx": vx, "vy": vy, "yaw": yaw, "duration": dur})
-
-            now2 = time.time()
-
-            # DROP_OLD_MS
-            ts_in = data.get("ts")
-            if ts_in:
-                try:
-                    age = (now2 - float(ts_in)) * 1000.0
-                    if age > DROP_OLD_MS:
-                        publish_event("skip_cmd.move", {"rid": data.get("rid"), "reason": "drop_old", "age_ms": round(age, 1)})
-                        continue
-                except Exception:
-                    pass
-
-            # Debounce
-            if (now2 - _last_cmd_ts) < MIN_CMD_GAP:
-                publish_event("skip_cmd.move", {"rid": data.get("rid"), "reason": "min_gap", "gap_s": round(now2 - _last_cmd_ts, 3)})
-                continue
-            _last_cmd_ts = now2
-
-            # PREEMPT
-            if PREEMPT:
-                _cancel_deadman()
-                if ensure_xgo_open():
-                    try:
-                        xgo.stop()  # type: ignore[attr-defined]
-                    except Exception as e:
-                        print("[bridge] hw call error (preempt stop):", e, flush=True)
-
-            ax, ay, aw = abs(vx), abs(vy), abs(yaw)
-            moved = False
-
-            if aw > 1e-4 and aw >= ax and aw >= ay:
-                moved = True
-                if yaw < 0:
-                    do_turn_left(aw, dur);  publish_event("turn_left",  {"step": _yaw_to_step(aw), "runtime": dur})
-                else:
-                    do_turn_right(aw, dur); publish_event("turn_right", {"rid": data.get("rid"), "step": _yaw_to_step(aw), "runtime": dur})
-
-            elif ax > 1e-4 and ax >= ay:
-                moved = True
-                if vx >= 0:
-                    do_forward(ax, dur);  publish_event("forward",  {"v": ax, "runtime": dur})
-                else:
-                    do_backward(ax, dur); publish_event("backward", {"rid": data.get("rid"), "v": ax, "runtime": dur})
-
-            elif ay > 1e-4:
-                moved = True
-                if vy >= 0:
-                    do_strafe_right(ay, dur); publish_event("right", {"rid": data.get("rid"), "v": ay, "runtime": dur})
-                else:
-                    do_strafe_left(ay, dur);  publish_event("left",  {"v": ay, "runtime": dur})
-
-            if moved:
-                _last_motion_cmd_ts = now2
-
-            _schedule_deadman(dur)
-            continue
-
-        if topic == "cmd.stop":
-            do_stop(); publish_event("stop", {"rid": data.get("rid")})
-            _last_motion_cmd_ts = time.time()
-            continue
-
-        # STARE: zgodność wstecz
-        spd = float(data.get("speed", 10.0))
-        rt  = max(0.05, min(float(data.get("runtime", 0.6)), SAFE_MAX_DURATION))
-
-        if   topic.endswith(".forward"):
-            do_forward(spd if spd<=1 else spd/max(1.0, TURN_STEP_MAX), rt); publish_event("forward", {"rid": data.get("rid"), "v": spd, "runtime": rt}); _schedule_deadman(rt, data.get("rid")); _last_motion_cmd_ts = time.time()
-        elif topic.endswith(".backward"):
-            do_backward(spd if spd<=1 else spd/max(1.0, TURN_STEP_MAX), rt); publish_event("backward", {"rid": data.get("rid"), "v": spd, "runtime": rt}); _schedule_deadman(rt, data.get("rid")); _last_motion_cmd_ts = time.time()
-        elif topic.endswith(".left"):
-            do_strafe_left(spd if spd<=1 else min(1.0, spd/100.0), rt);  publish_event("left", {"rid": data.get("rid"), "v": spd, "runtime": rt}); _schedule_deadman(rt, data.get("rid")); _last_motion_cmd_ts = time.time()
-        elif topic.endswith(".right"):
-            do_strafe_right(spd if spd<=1 else min(1.0, spd/100.0), rt); publish_event("right", {"rid": data.get("rid"), "v": spd, "runtime": rt}); _schedule_deadman(rt, data.get("rid")); _last_motion_cmd_ts = time.time()
-        elif topic.endswith(".turn_left"):
-            yawn = spd if spd<=1 else min(1.0, spd/float(TURN_STEP_MAX))
-            do_turn_left(abs(yawn), rt);  publish_event("turn_left", {"rid": data.get("rid"), "step": _yaw_to_step(abs(yawn)), "runtime": rt}); _schedule_deadman(rt, data.get("rid")); _last_motion_cmd_ts = time.time()
-        elif topic.endswith(".turn_right"):
-            yawn = spd if spd<=1 else min(1.0, spd/float(TURN_STEP_MAX))
-            do_turn_right(abs(yawn), rt); publish_event("turn_right", {"rid": data.get("rid"), "step": _yaw_to_step(abs(yawn)), "runtime": rt}); _schedule_deadman(rt, data.get("rid")); _last_motion_cmd_ts = time.time()
+# --- pętla główna: reaktor (poll do najbliższego timera, komenda budzi od razu) ---
+for t in _HANDLERS:
+    sub.setsockopt_string(zmq.SUBSCRIBE, t)
+reactor.add_socket(sub, _on_sub_readable)
+reactor.call_every(1.0 / BRIDGE_RATE_HZ, _tick_telemetry, now=True)
+if BRIDGE_METRICS_S > 0:
+    reactor.call_every(BRIDGE_METRICS_S, _publish_metrics)
+telemetry.start()
+reactor.run()
+telemetry.stop()
+reactor.close()
 
 print("[bridge] STOP", flush=True)
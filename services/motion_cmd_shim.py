@@ -1,17 +1,24 @@
 #!/usr/bin/env python3
+import os, sys
 import zmq, json, time
 
+PROJ_ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+if PROJ_ROOT not in sys.path:
+    sys.path.insert(0, PROJ_ROOT)
+
+from common.bus import bus_endpoint  # noqa: E402
+
 def main():
     ctx = zmq.Context.instance()
 
     # SUB: legacy od dashboardu (broker SUB:5556)
     sub = ctx.socket(zmq.SUB)
-    sub.connect("tcp://127.0.0.1:5556")
+    sub.connect(bus_endpoint("sub"))
     sub.setsockopt_string(zmq.SUBSCRIBE, "motion.cmd")
 
     # PUB: nowe komendy do bridge (broker PUB:5555)
     pub = ctx.socket(zmq.PUB)
-    pub.connect("tcp://127.0.0.1:5555")
+    pub.connect(bus_endpoint("pub"))
 
     print("[shim] START: motion.cmd → cmd.move", flush=True)
 
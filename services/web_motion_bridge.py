@@ -4,8 +4,8 @@
 HTTP → ZMQ bridge dla Rider-Pi (zgodny z motion_bridge.py) + kompatybilny /control.
 
 Endpointy:
-  GET  /api/move?dir=forward|backward|left|right[&v=0..1][&w=0..1][&t=sek]
-  GET  /api/stop
+  GET  /api/move?dir=forward|backward|left|right[&v=0..1][&w=0..1][&t=sek][&rid=...]
+  GET  /api/stop[?rid=...]
   GET  /api/balance?on=0|1
   GET  /api/height?h=INT
   GET  /healthz
@@ -16,7 +16,9 @@ import os, json, time
 from flask import Flask, request, jsonify
 import zmq
 
-BUS_ADDR   = os.getenv("BUS_PUB_ADDR", "tcp://127.0.0.1:5555")
+from common.bus import bus_endpoint
+
+BUS_ADDR   = bus_endpoint("pub")  # BUS_PUB_ADDR / BUS_TRANSPORT
 TOPIC_MOVE = os.getenv("TOPIC_MOVE", "cmd.move")
 TOPIC_STOP = os.getenv("TOPIC_STOP", "cmd.stop")
 V_DEF      = float(os.getenv("WEB_V_DEFAULT", "0.10"))  # domyślny vx (0..1)
@@ -66,22 +68,24 @@ def api_move():
     v = _clamp01(request.args.get("v", default=V_DEF, type=float))
     w = _clamp01(request.args.get("w", default=W_DEF, type=float))
     t = float(request.args.get("t", default=T_DEF))
+    extra = {"rid": request.args["rid"]} if request.args.get("rid") else {}
     if d == "forward":
-        _send(TOPIC_MOVE, {"vx": +v, "vy": 0.0, "yaw": 0.0, "duration": t})
+        _send(TOPIC_MOVE, {"vx": +v, "vy": 0.0, "yaw": 0.0, "duration": t, **extra})
     elif d == "backward":
-        _send(TOPIC_MOVE, {"vx": -v, "vy": 0.0, "yaw": 0.0, "duration": t})
+        _send(TOPIC_MOVE, {"vx": -v, "vy": 0.0, "yaw": 0.0, "duration": t, **extra})
     elif d == "left":
-        _send(TOPIC_MOVE, {"vx": 0.0, "vy": 0.0, "yaw": +w, "duration": t})
+        _send(TOPIC_MOVE, {"vx": 0.0, "vy": 0.0, "yaw": +w, "duration": t, **extra})
     elif d == "right":
-        _send(TOPIC_MOVE, {"vx": 0.0, "vy": 0.0, "yaw": -w, "duration": t})
+        _send(TOPIC_MOVE, {"vx": 0.0, "vy": 0.0, "yaw": -w, "duration": t, **extra})
     else:
         return jsonify({"ok": False, "err": "bad dir"}), 400
-    return jsonify({"ok": True, "dir": d, "v": v, "w": w, "t": t})
+    return jsonify({"ok": True, "dir": d, "v": v, "w": w, "t": t, **extra})
 
 @app.route("/api/stop", methods=["GET"])
 def api_stop():
-    _send(TOPIC_STOP, {})
-    return jsonify({"ok": True})
+    extra = {"rid": request.args["rid"]} if request.args.get("rid") else {}
+    _send(TOPIC_STOP, extra)
+    return jsonify({"ok": True, **extra})
 
 @app.route("/api/balance", methods=["GET"])
 def api_balance():
@@ -0,0 +1,449 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Rider-Pi – XGO UART mux: jedyny proces z otwartym portem XGO, reszta przez IPC.
+
+Port otwierały niezależnie motion_bridge (xgolib), XgoAdapter, xgo_ro_loop w API
+(XGOClientRO) i ops/check_xgo_sensors.py — ramki się przeplatały, a reset_input_buffer()
+jednego klienta kasował odpowiedź dla drugiego (retry, timeouty, zera w telemetrii).
+Tu port ma jeden wątek roboczy, a klienci (apps.motion.xgo_uart_client, XGO_UART=1)
+wysyłają żądania na gniazdo ZMQ ROUTER:
+
+  * kolejka priorytetowa: stop > ruch > odczyty telemetrii; stop unieważnia ruchy
+    z kolejki wysłane przed nim (nie wykonają się po stopie),
+  * odczyty w paczkach: wszystkie czekające odczyty naraz, ten sam rejestr raz,
+    do XGO_UART_PIPELINE ramek READ w locie (1 = ściśle po kolei); przed paczką
+    wyrzucamy zaległe bajty z wejścia (to nasz port — niczyjej odpowiedzi nie kasujemy),
+  * cache odczytów per rejestr z TTL (ttl_ms od klienta albo domyślny) — trafienie
+    odpowiada od razu, bez kolejki i bez UART,
+  * żądania walidowane przed kolejką (bad_request), błąd pojedynczego żądania wraca
+    do klienta; gdy mimo to padnie wątek portu lub IPC, proces kończy się kodem 1
+    (systemd: Restart=always).
+
+Ramki: apps.motion.xgo_proto (wspólne z emulatorem); test bez robota:
+  python3 tools/xgo_emulator.py --link /tmp/ttyXGO &
+  XGO_PORT=/tmp/ttyXGO python3 services/xgo_uart.py
+
+ENV:
+- XGO_PORT=/dev/ttyAMA0, XGO_BAUD=115200, XGO_UART_ADDR=ipc:///tmp/rider-xgo-uart
+- XGO_UART_PIPELINE=4, XGO_UART_BATCH_MAX=16, XGO_UART_READ_TIMEOUT_MS=300
+- XGO_UART_TTL_MS=20 (bateria 5 s, firmware 10 min), XGO_UART_STATS_S=30
+"""
+from __future__ import annotations
+
+import collections
+import heapq
+import itertools
+import json
+import os
+import select
+import signal
+import termios
+import threading
+import time
+import tty
+from typing import Any, Callable, Dict, List, Optional, Tuple
+
+import zmq  # type: ignore
+
+from apps.motion.xgo_proto import (REG_BATTERY, REG_FIRMWARE, REG_VX, REG_VY, REG_VYAW, TYPE_READ, TYPE_WRITE,
+                                   FrameParser, encode_frame, read_frame)
+from apps.motion.xgo_uart_client import PRIO, XGO_UART_ADDR
+
+XGO_PORT        = os.getenv("XGO_PORT", "/dev/ttyAMA0")
+XGO_BAUD        = int(os.getenv("XGO_BAUD", "115200"))
+PIPELINE        = max(1, int(os.getenv("XGO_UART_PIPELINE", "4")))
+BATCH_MAX       = max(1, int(os.getenv("XGO_UART_BATCH_MAX", "16")))
+READ_TIMEOUT_MS = float(os.getenv("XGO_UART_READ_TIMEOUT_MS", "300"))
+TTL_MS          = float(os.getenv("XGO_UART_TTL_MS", "20"))
+STATS_S         = float(os.getenv("XGO_UART_STATS_S", "30"))
+
+DEFAULT_TTL_MS = {REG_BATTERY: 5000.0, REG_FIRMWARE: 600000.0}
+
+Reply = Callable[[Dict[str, Any]], None]
+
+
+def _byte(v: Any, lo: int = 0) -> Optional[int]:
+    """int w lo..255 albo None (bool/float/str odrzucamy — klient wysyła gołe inty)."""
+    if isinstance(v, int) and not isinstance(v, bool) and lo <= v <= 0xFF:
+        return v
+    return None
+
+
+def _clean_request(req: Dict[str, Any]) -> Optional[Dict[str, Any]]:
+    """
+    Żądanie read/write/stop sprawdzone i znormalizowane dla UartMux; None → bad_request.
+    Do kolejki trafiają tylko poprawne typy — zły payload nie może wywrócić wątku portu.
+    """
+    op, prio = req.get("op"), req.get("prio")
+    if prio is not None and (not isinstance(prio, str) or prio not in PRIO):
+        return None
+    if op == "stop":
+        return {"op": "stop"}
+    addr = _byte(req.get("addr"))
+    if addr is None:
+        return None
+    if op == "read":
+        n = _byte(req.get("n", 1), lo=1)
+        ttl = req.get("ttl_ms")
+        if n is None or (ttl is not None and (isinstance(ttl, bool) or not isinstance(ttl, (int, float)))):
+            return None
+        out = {"op": "read", "addr": addr, "n": n, "prio": prio}
+        if ttl is not None:
+            out["ttl_ms"] = float(ttl)
+        return out
+    data = req.get("data") or []
+    if not isinstance(data, list) or any(_byte(x) is None for x in data):
+        return None
+    return {"op": "write", "addr": addr, "data": data, "prio": prio}
+
+
+def _fail_all(replies: List[Reply], error: str) -> None:
+    for reply in replies:
+        try:
+            reply({"ok": False, "error": error})
+        except Exception:
+            pass
+
+
+def open_port(path: str, baud: int = XGO_BAUD) -> int:
+    """Port szeregowy jako surowy fd (raw, 8N1, baud) — bez pyserial."""
+    fd = os.open(path, os.O_RDWR | os.O_NOCTTY)
+    tty.setraw(fd)
+    speed = getattr(termios, f"B{baud}", None)
+    if speed is not None:
+        attrs = termios.tcgetattr(fd)
+        attrs[4] = attrs[5] = speed
+        termios.tcsetattr(fd, termios.TCSANOW, attrs)
+    return fd
+
+
+class UartMux:
+    """Kolejka + wątek roboczy nad jednym fd; reply(dict) wołane z wątku roboczego."""
+
+    def __init__(self, fd: int, pipeline: int = PIPELINE, batch_max: int = BATCH_MAX,
+                 read_timeout_ms: float = READ_TIMEOUT_MS, ttl_ms: float = TTL_MS):
+        self.fd = fd
+        self.pipeline = max(1, pipeline)
+        self.batch_max = max(1, batch_max)
+        self.read_timeout_s = read_timeout_ms / 1000.0
+        self.ttl_ms = ttl_ms
+        self.stats: "collections.Counter[str]" = collections.Counter()
+        self._cache: Dict[int, Tuple[float, bytes]] = {}
+        self._heap: List[Tuple[int, int, Dict[str, Any], Reply]] = []
+        self._seq = itertools.count()
+        self._cv = threading.Condition()
+        self._stop = threading.Event()
+        self._parser = FrameParser()
+
+    # ── wejście (dowolny wątek) ──────────────────────────────────────────────
+    def cached(self, addr: int, n: int, ttl_ms: Optional[float] = None) -> Optional[bytes]:
+        ttl = DEFAULT_TTL_MS.get(addr, self.ttl_ms) if ttl_ms is None else float(ttl_ms)
+        hit = self._cache.get(addr)
+        if hit is None or ttl <= 0 or len(hit[1]) < n or (time.monotonic() - hit[0]) * 1000.0 > ttl:
+            return None
+        return hit[1][:n]
+
+    def submit(self, req: Dict[str, Any], reply: Reply) -> None:
+        op = req.get("op")
+        prio = PRIO["stop"] if op == "stop" else PRIO.get(req.get("prio") or ("telemetry" if op == "read" else "motion"), PRIO["motion"])
+        with self._cv:
+            if op == "stop":
+                # ruchy zakolejkowane przed stopem są nieaktualne — odpadają
+                keep = []
+                for it in self._heap:
+                    if it[2].get("op") == "write":
+                        it[3]({"ok": False, "error": "preempted_by_stop"})
+                        self.stats["preempted"] += 1
+                    else:
+                        keep.append(it)
+                if len(keep) != len(self._heap):
+                    heapq.heapify(keep)
+                    self._heap = keep
+            heapq.heappush(self._heap, (prio, next(self._seq), req, reply))
+            self.stats["queue_max"] = max(self.stats["queue_max"], len(self._heap))
+            self._cv.notify()
+
+    def depth(self) -> int:
+        with self._cv:
+            return len(self._heap)
+
+    # ── wątek roboczy ────────────────────────────────────────────────────────
+    def run(self) -> None:
+        while not self._stop.is_set():
+            with self._cv:
+                while not self._heap and not self._stop.is_set():
+                    self._cv.wait(0.5)
+                if self._stop.is_set():
+                    return
+                item = heapq.heappop(self._heap)
+                batch = [item]
+                if item[2].get("op") == "read":
+                    # wszystkie czekające odczyty jedną paczką (za nimi w kopcu są tylko odczyty)
+                    while self._heap and self._heap[0][2].get("op") == "read" and len(batch) < self.batch_max:
+                        batch.append(heapq.heappop(self._heap))
+            try:
+                if item[2].get("op") == "read":
+                    self._do_reads(batch)
+                else:
+                    self._do_write(item[2], item[3])
+            except OSError as e:
+                self.stats["io_errors"] += 1
+                _fail_all([it[3] for it in batch], str(e))
+            except Exception as e:
+                # błąd jednego żądania nie może zatrzymać wątku portu (stop musi dalej dochodzić)
+                self.stats["errors"] += 1
+                print(f"[xgo-uart] request error: {e!r}", flush=True)
+                _fail_all([it[3] for it in batch], "internal_error")
+
+    def stop(self) -> None:
+        self._stop.set()
+        with self._cv:
+            self._cv.notify_all()
+
+    def _write_frame(self, frame: bytes) -> None:
+        os.write(self.fd, frame)
+        self.stats["tx_frames"] += 1
+
+    def _do_write(self, req: Dict[str, Any], reply: Reply) -> None:
+        if req.get("op") == "stop":
+            for reg in (REG_VX, REG_VY, REG_VYAW):  # jak xgolib: każda oś na zero osobno
+                self._write_frame(encode_frame(TYPE_WRITE, reg, b"\x80"))
+            self.stats["stops"] += 1
+        else:
+            self._write_frame(encode_frame(TYPE_WRITE, int(req["addr"]) & 0xFF, bytes(req.get("data") or ())))
+            self.stats["writes"] += 1
+        reply({"ok": True})
+
+    def _higher_prio_waiting(self) -> bool:
+        with self._cv:
+            return bool(self._heap) and self._heap[0][0] < PRIO["telemetry"]
+
+    def _do_reads(self, batch: List[Tuple[int, int, Dict[str, Any], Reply]]) -> None:
+        want: Dict[int, List[Tuple[int, int, Dict[str, Any], Reply]]] = collections.OrderedDict()
+        for prio, seq, req, reply in batch:
+            addr, n = int(req["addr"]) & 0xFF, int(req.get("n") or 1)
+            data = self.cached(addr, n, req.get("ttl_ms"))
+            if data is not None:  # wypełnione przez poprzednią paczkę
+                self.stats["cache_hits"] += 1
+                reply({"ok": True, "data": data.hex(), "cached": True})
+                continue
+            want.setdefault(addr, []).append((prio, seq, req, reply))
+        self.stats["batches"] += 1
+        self.stats["batch_max"] = max(self.stats["batch_max"], len(batch))
+        self.stats["dedup"] += sum(len(v) - 1 for v in want.values())
+        addrs = list(want)
+        for i in range(0, len(addrs), self.pipeline):
+            if i and self._higher_prio_waiting():
+                # stop/ruch czeka — reszta odczytów wraca do kolejki (z tym samym seq)
+                with self._cv:
+                    for a in addrs[i:]:
+                        for it in want[a]:
+                            heapq.heappush(self._heap, it)
+                    self._cv.notify()
+                return
+            self._transact({a: want[a] for a in addrs[i:i + self.pipeline]})
+
+    def _discard_input(self) -> None:
+        while True:
+            r, _, _ = select.select([self.fd], [], [], 0)
+            if not r:
+                break
+            self.stats["stale_bytes"] += len(os.read(self.fd, 4096))
+        self._parser = FrameParser()
+
+    def _transact(self, group: Dict[int, List[Tuple[int, int, Dict[str, Any], Reply]]]) -> None:
+        self._discard_input()
+        nmax = {a: max(int(req.get("n") or 1) for _, _, req, _ in waiters) for a, waiters in group.items()}
+        for a in group:
+            self._write_frame(read_frame(a, nmax[a]))
+        self.stats["uart_reads"] += len(group)
+        pending = dict(group)
+        deadline = time.monotonic() + self.read_timeout_s
+        while pending:
+            left = deadline - time.monotonic()
+            if left <= 0:
+                break
+            r, _, _ = select.select([self.fd], [], [], left)
+            if not r:
+                break
+            for type_, addr, payload, ok in self._parser.feed(os.read(self.fd, 4096)):
+                if not ok:
+                    self.stats["bad_chk"] += 1
+                    continue
+                if type_ != TYPE_READ or addr not in pending or len(payload) < nmax[addr]:
+                    continue
+                self._cache[addr] = (time.monotonic(), payload)
+                for _, _, req, reply in pending.pop(addr):
+                    reply({"ok": True, "data": payload[:int(req.get("n") or 1)].hex(), "cached": False})
+        for addr, waiters in pending.items():
+            self.stats["timeouts"] += 1
+            for *_, reply in waiters:
+                reply({"ok": False, "error": "timeout"})
+
+
+class XgoUartServer:
+    """ROUTER na addr + UartMux na porcie; odpowiedzi z wątku roboczego wracają przez inproc."""
+
+    def __init__(self, port: str = XGO_PORT, addr: str = XGO_UART_ADDR, baud: int = XGO_BAUD, **mux_kw: Any):
+        self.port = port
+        self.addr = addr
+        self.baud = baud
+        self.mux_kw = mux_kw
+        self.mux: Optional[UartMux] = None
+        self.requests = 0
+        self._ctx = zmq.Context.instance()
+        self._inproc = f"inproc://xgo-uart-{id(self)}"
+        self._stop = threading.Event()
+        self._threads: List[threading.Thread] = []
+        self._fd: Optional[int] = None
+        self._tls = threading.local()
+        self._serve_th: Optional[threading.Thread] = None
+
+    def start(self) -> "XgoUartServer":
+        self._fd = open_port(self.port, self.baud)
+        self.mux = UartMux(self._fd, **self.mux_kw)
+        self._router = self._ctx.socket(zmq.ROUTER)
+        self._router.setsockopt(zmq.LINGER, 0)
+        if self.addr.startswith("ipc://"):
+            try: os.unlink(self.addr[len("ipc://"):])
+            except FileNotFoundError: pass
+        self._router.bind(self.addr)
+        self._pull = self._ctx.socket(zmq.PULL)
+        self._pull.bind(self._inproc)
+        self._serve_th = threading.Thread(target=self._serve, name="xgo-uart-ipc", daemon=True)
+        self._threads = [threading.Thread(target=self.mux.run, name="xgo-uart-io", daemon=True), self._serve_th]
+        for th in self._threads:
+            th.start()
+        return self
+
+    def stop(self) -> None:
+        self._stop.set()
+        if self.mux is not None:
+            self.mux.stop()
+        for th in self._threads:
+            th.join(2.0)
+        self._threads.clear()
+        if self._fd is not None:
+            try: os.close(self._fd)
+            except OSError: pass
+            self._fd = None
+        if self.addr.startswith("ipc://"):  # klienci od razu widzą, że demona nie ma
+            try: os.unlink(self.addr[len("ipc://"):])
+            except OSError: pass
+
+    def __enter__(self): return self.start()
+    def __exit__(self, *exc): self.stop()
+
+    def _push(self, ident: bytes, rep: Dict[str, Any]) -> None:
+        """Odpowiedź z dowolnego wątku → kolejka inproc → ROUTER (gniazdo PUSH per wątek)."""
+        s = getattr(self._tls, "push", None)
+        if s is None:
+            s = self._tls.push = self._ctx.socket(zmq.PUSH)
+            s.setsockopt(zmq.LINGER, 0)
+            s.connect(self._inproc)
+        s.send_multipart([ident, json.dumps(rep).encode("utf-8")])
+
+    def alive(self) -> bool:
+        """Oba wątki (port + IPC) żyją — inaczej main() kończy proces i systemd go podnosi."""
+        return bool(self._threads) and all(th.is_alive() for th in self._threads)
+
+    def stats(self) -> Dict[str, Any]:
+        st = dict(self.mux.stats) if self.mux else {}
+        st.update(requests=self.requests, queue=self.mux.depth() if self.mux else 0,
+                  cache=len(self.mux._cache) if self.mux else 0)
+        return st
+
+    def _handle(self, ident: bytes, req: Dict[str, Any]) -> None:
+        rid = req.get("id")
+        self.requests += 1
+
+        def reply(rep: Dict[str, Any]) -> None:
+            rep["id"] = rid
+            if threading.current_thread() is self._serve_th:
+                self._router.send_multipart([ident, json.dumps(rep).encode("utf-8")])
+            else:
+                self._push(ident, rep)
+
+        op = req.get("op")
+        if op == "stats":
+            reply({"ok": True, "stats": self.stats()})
+            return
+        if op not in ("read", "write", "stop"):
+            reply({"ok": False, "error": "unknown_op"})
+            return
+        req = _clean_request(req)
+        if req is None:
+            self.mux.stats["bad_requests"] += 1
+            reply({"ok": False, "error": "bad_request"})
+            return
+        if op == "read":
+            data = self.mux.cached(req["addr"], req["n"], req.get("ttl_ms"))
+            if data is not None:
+                self.mux.stats["cache_hits"] += 1
+                reply({"ok": True, "data": data.hex(), "cached": True})
+                return
+        self.mux.submit(req, reply)
+
+    def _serve(self) -> None:
+        poller = zmq.Poller()
+        poller.register(self._router, zmq.POLLIN)
+        poller.register(self._pull, zmq.POLLIN)
+        while not self._stop.is_set():
+            ev = dict(poller.poll(200))
+            if self._pull in ev:
+                while True:
+                    try:
+                        self._router.send_multipart(self._pull.recv_multipart(zmq.NOBLOCK))
+                    except zmq.Again:
+                        break
+            if self._router in ev:
+                while True:
+                    try:
+                        ident, payload = self._router.recv_multipart(zmq.NOBLOCK)[:2]
+                    except zmq.Again:
+                        break
+                    except ValueError:
+                        continue
+                    try:
+                        req = json.loads(payload)
+                    except ValueError:
+                        continue
+                    if not isinstance(req, dict):
+                        continue
+                    try:
+                        self._handle(ident, req)
+                    except Exception as e:
+                        # wątek IPC żyje dalej; klient dostaje błąd zamiast timeoutu
+                        print(f"[xgo-uart] handle error: {e!r}", flush=True)
+                        rep = {"ok": False, "error": "internal_error", "id": req.get("id")}
+                        try:
+                            self._router.send_multipart([ident, json.dumps(rep).encode("utf-8")])
+                        except zmq.ZMQError:
+                            pass
+        self._router.close(0)
+        self._pull.close(0)
+
+
+def main() -> int:
+    srv = XgoUartServer().start()
+    print(f"[xgo-uart] port={srv.port} baud={srv.baud} addr={srv.addr} pipeline={PIPELINE}", flush=True)
+    done = threading.Event()
+    signal.signal(signal.SIGTERM, lambda *_: done.set())
+    signal.signal(signal.SIGINT, lambda *_: done.set())
+    next_stats = time.monotonic() + STATS_S
+    while not done.wait(1.0):
+        if not srv.alive():
+            # bez tego proces żyłby dalej z martwym portem, a Restart=always nie zadziała
+            print("[xgo-uart] worker thread died — exiting for restart", flush=True)
+            srv.stop()
+            return 1
+        if STATS_S > 0 and time.monotonic() >= next_stats:
+            print("[xgo-uart] stats", srv.stats(), flush=True)
+            next_stats += STATS_S
+    srv.stop()
+    return 0
+
+
+if __name__ == "__main__":
+    raise SystemExit(main())
@@ -0,0 +1,15 @@
+# tests/test_api_devices.py
+from services.api_core import compat as C
+from services.api_core import devices
+
+
+def test_frame_notices_do_not_flood_events():
+    C.EVENTS.clear()
+    C.LAST_MSG_TS = None
+    for seq in range(500):
+        devices.on_bus_message("camera.frame", {"seq": seq, "slot": seq % 4})
+    assert len(C.EVENTS) == 0 and C.LAST_MSG_TS is None
+
+    devices.on_bus_message("camera.heartbeat", {"mode": "ring", "fps": 15})
+    assert [e["topic"] for e in C.EVENTS] == ["camera.heartbeat"]
+    assert C.LAST_CAMERA["fps"] == 15
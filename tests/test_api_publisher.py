@@ -0,0 +1,42 @@
+# tests/test_api_publisher.py
+import threading, time
+
+import zmq
+
+from common import bus
+from services.api_core.bus_publisher import BusPublisher
+
+
+def test_shared_publisher_from_many_threads():
+    ctx = zmq.Context.instance()
+    sub = ctx.socket(zmq.SUB)
+    sub.setsockopt(zmq.LINGER, 0)
+    sub.setsockopt(zmq.SUBSCRIBE, b"cmd.")
+    port = sub.bind_to_random_port("tcp://127.0.0.1")
+
+    p = BusPublisher(endpoint=f"tcp://127.0.0.1:{port}", connect_ms=1000, ctx=ctx)
+    p.start()
+    # slow joiner — jednorazowo, socket żyje dalej; poll() przetwarza attach po stronie SUB
+    sub.poll(200)
+    time.sleep(0.05)
+
+    def worker(n):
+        for i in range(50):
+            assert p.publish("cmd.move", {"w": n, "i": i})
+
+    threads = [threading.Thread(target=worker, args=(n,)) for n in range(4)]
+    for t in threads: t.start()
+    for t in threads: t.join()
+    assert p.flush(2.0)
+
+    got = 0
+    while sub.poll(200):
+        topic, msg = bus.decode_frames(sub.recv_multipart())
+        assert topic == "cmd.move" and set(msg) == {"w", "i"}
+        got += 1
+    st = p.stats()
+    assert got == 200
+    assert st["enqueued"] == st["sent"] == 200
+    assert st["dropped_full"] == 0 and st["errors"] == 0
+    p.close()
+    sub.close(0)
@@ -0,0 +1,60 @@
+# tests/test_broker_conflate.py
+import threading, time
+
+import zmq
+
+from services import broker
+
+
+def test_conflator_latest_wins_within_window():
+    c = broker.Conflator((b"motion.state",), interval_s=0.05)
+    assert c.offer(b"motion.state", [b"motion.state", b"1"], now=0.0) == ([b"motion.state", b"1"], False)
+    assert c.offer(b"motion.state", [b"motion.state", b"2"], now=0.01) == (None, False)
+    assert c.offer(b"motion.state", [b"motion.state", b"3"], now=0.02) == (None, True)
+    assert c.next_deadline() == 0.05
+    assert c.flush_due(0.04) == []
+    assert c.flush_due(0.05) == [(b"motion.state", [b"motion.state", b"3"])]
+    assert c.next_deadline() is None
+    # komendy i inne tematy przechodzą bez zmian
+    assert c.offer(b"cmd.move", [b"cmd.move", b"x"], now=0.06) == ([b"cmd.move", b"x"], False)
+
+
+def test_command_prefixes_are_never_conflated():
+    assert broker.conflate_prefixes((b"cmd.", b"cmd", b"motion.cmd", b"motion.", b"devices.xgo")) == (b"devices.xgo",)
+
+
+def test_proxy_conflates_state_but_keeps_commands_fifo():
+    ctx = zmq.Context.instance()
+    front, back = ctx.socket(zmq.XSUB), ctx.socket(zmq.XPUB)
+    front.bind("inproc://cf-front")
+    back.bind("inproc://cf-back")
+    stop = [False]
+    stats = broker.BusStats(depth=2)
+    conflate = broker.Conflator((b"motion.state",), interval_s=0.2)
+    th = threading.Thread(target=broker.run_proxy, args=(front, back, None, stats, stop, conflate), daemon=True)
+    th.start()
+    try:
+        sub = ctx.socket(zmq.SUB)
+        sub.connect("inproc://cf-back")
+        sub.setsockopt(zmq.SUBSCRIBE, b"motion.state")
+        sub.setsockopt(zmq.SUBSCRIBE, b"cmd.")
+        pub = ctx.socket(zmq.PUB)
+        pub.connect("inproc://cf-front")
+        time.sleep(0.2)
+        for i in range(20):
+            pub.send_multipart([b"motion.state", b"%d" % i])
+            pub.send_multipart([b"cmd.move", b"%d" % i])
+        got = []
+        while sub.poll(500):
+            got.append(sub.recv_multipart())
+        states = [f[1] for f in got if f[0] == b"motion.state"]
+        cmds = [f[1] for f in got if f[0] == b"cmd.move"]
+        assert cmds == [b"%d" % i for i in range(20)]
+        assert states == [b"0", b"19"]  # pierwsza od razu, potem tylko najnowsza
+        snap = stats.snapshot()
+        assert snap["topics"]["motion.state"]["conflated"] == 18  # zastąpione (nie wysłane)
+        pub.close(0); sub.close(0)
+    finally:
+        stop[0] = True
+        th.join(3)
+        front.close(0); back.close(0)
@@ -0,0 +1,55 @@
+# tests/test_broker_lvc.py
+import threading, time
+
+import zmq
+
+from services import broker
+
+
+def test_cache_keeps_latest_per_topic_and_only_state_prefixes():
+    lvc = broker.LastValueCache((b"devices.xgo", b"vision.state"), ttl_s=10)
+    lvc.store([b"devices.xgo", b'{"battery_pct": 80}'])
+    lvc.store([b"devices.xgo", b'{"battery_pct": 79}'])
+    lvc.store([b"cmd.move", b'{"vx": 1}'])
+    lvc.store([b'vision.state {"present": true}'])  # legacy single-frame
+    assert lvc.matching(b"devices.") == [[b"devices.xgo", b'{"battery_pct": 79}']]
+    assert lvc.matching(b"cmd.") == []
+    assert len(lvc.matching(b"")) == 2
+
+
+def test_cache_drops_expired_values():
+    lvc = broker.LastValueCache((b"camera.heartbeat",), ttl_s=0.01)
+    lvc.store([b"camera.heartbeat", b"{}"])
+    time.sleep(0.02)
+    assert lvc.matching(b"camera.") == []
+
+
+def test_late_subscriber_gets_last_value_on_subscribe():
+    ctx = zmq.Context.instance()
+    front, back = ctx.socket(zmq.XSUB), ctx.socket(zmq.XPUB)
+    back.setsockopt(zmq.XPUB_VERBOSE, 1)
+    front.bind("inproc://lvc-front")
+    back.bind("inproc://lvc-back")
+    stop = [False]
+    lvc = broker.LastValueCache((b"devices.xgo",), ttl_s=10)
+    th = threading.Thread(target=broker.run_proxy, args=(front, back, lvc, None, stop), daemon=True)
+    th.start()
+    try:
+        pub = ctx.socket(zmq.PUB)
+        pub.connect("inproc://lvc-front")
+        # broker musi dostać wiadomość, choć nie ma jeszcze żadnego SUB-a
+        front_seen = time.time() + 1.0
+        while not lvc.matching(b"devices.xgo") and time.time() < front_seen:
+            pub.send_multipart([b"devices.xgo", b'{"battery_pct": 77}'])
+            time.sleep(0.01)
+
+        sub = ctx.socket(zmq.SUB)
+        sub.connect("inproc://lvc-back")
+        sub.setsockopt(zmq.SUBSCRIBE, b"devices.")
+        assert sub.poll(1000)
+        assert sub.recv_multipart() == [b"devices.xgo", b'{"battery_pct": 77}']
+        pub.close(0); sub.close(0)
+    finally:
+        stop[0] = True
+        th.join(2)
+        front.close(0); back.close(0)
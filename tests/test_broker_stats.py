@@ -0,0 +1,107 @@
+# tests/test_broker_stats.py
+import json, threading, time
+
+import zmq
+
+from services import broker
+
+
+def test_stats_count_per_prefix_and_subscriptions():
+    st = broker.BusStats(depth=2)
+    st.on_message(b"devices.xgo", 100)
+    st.on_message(b"devices.xgo.battery", 10)
+    st.on_message(b"cmd.move", 50)
+    st.on_drop(b"cmd.move")
+    st.on_subscription(b"\x01cmd.move")
+    st.on_subscription(b"\x01cmd.move")
+    st.on_subscription(b"\x00cmd.move")
+    snap = st.snapshot()
+    assert snap["topics"]["devices.xgo"]["msgs"] == 2
+    assert snap["topics"]["devices.xgo"]["bytes"] == 110
+    assert snap["topics"]["cmd.move"]["drops"] == 1
+    assert snap["totals"]["msgs"] == 3
+    assert snap["subs"] == {"subscribe": 2, "unsubscribe": 1, "active": {"cmd.move": 1}}
+    # rate liczony od poprzedniego snapshotu
+    assert st.snapshot()["topics"]["cmd.move"]["rate_hz"] == 0.0
+
+
+def test_proxy_counts_hwm_drops_and_publishes_snapshot():
+    ctx = zmq.Context.instance()
+    front, back = ctx.socket(zmq.XSUB), ctx.socket(zmq.XPUB)
+    back.setsockopt(zmq.SNDHWM, 2)
+    back.setsockopt(zmq.XPUB_VERBOSER, 1)
+    front.bind("inproc://st-front")
+    back.bind("inproc://st-back")
+    stop = [False]
+    stats = broker.BusStats(depth=2)
+    th = threading.Thread(target=broker.run_proxy, args=(front, back, None, stats, stop), daemon=True)
+    th.start()
+    try:
+        slow = ctx.socket(zmq.SUB)
+        slow.setsockopt(zmq.RCVHWM, 2)
+        slow.connect("inproc://st-back")
+        slow.setsockopt(zmq.SUBSCRIBE, b"devices.")
+        mon = ctx.socket(zmq.SUB)
+        mon.connect("inproc://st-back")
+        mon.setsockopt(zmq.SUBSCRIBE, b"bus.stats")
+        pub = ctx.socket(zmq.PUB)
+        pub.connect("inproc://st-front")
+        time.sleep(0.2)
+        for i in range(50):
+            pub.send_multipart([b"devices.xgo", b"%d" % i])
+        deadline = time.time() + 3
+        snap = None
+        while time.time() < deadline:
+            if mon.poll(500):
+                snap = json.loads(mon.recv_multipart()[1])
+                if snap["topics"].get("devices.xgo", {}).get("msgs") == 50:
+                    break
+        assert snap is not None
+        row = snap["topics"]["devices.xgo"]
+        assert row["msgs"] == 50
+        assert row["drops"] > 0
+        assert snap["subs"]["active"].get("devices.") == 1
+        for s in (slow, mon, pub):
+            s.close(0)
+    finally:
+        stop[0] = True
+        th.join(3)
+        front.close(0); back.close(0)
+
+
+def test_stats_snapshot_does_not_block_on_slow_wildcard_sub(monkeypatch):
+    monkeypatch.setattr(broker, "STATS_PERIOD_S", 0.01)
+    ctx = zmq.Context.instance()
+    front, back = ctx.socket(zmq.XSUB), ctx.socket(zmq.XPUB)
+    back.setsockopt(zmq.SNDHWM, 2)
+    front.bind("inproc://st2-front")
+    back.bind("inproc://st2-back")
+    stop = [False]
+    stats = broker.BusStats(depth=2)
+    th = threading.Thread(target=broker.run_proxy, args=(front, back, None, stats, stop), daemon=True)
+    th.start()
+    try:
+        slow = ctx.socket(zmq.SUB)            # np. sub_dump na "" — nigdy nie czyta
+        slow.setsockopt(zmq.RCVHWM, 2)
+        slow.connect("inproc://st2-back")
+        slow.setsockopt(zmq.SUBSCRIBE, b"")
+        fast = ctx.socket(zmq.SUB)
+        fast.connect("inproc://st2-back")
+        fast.setsockopt(zmq.SUBSCRIBE, b"cmd.")
+        pub = ctx.socket(zmq.PUB)
+        pub.connect("inproc://st2-front")
+        time.sleep(0.2)                        # kilkanaście snapshotów w pełną kolejkę slow
+        got = 0
+        for i in range(20):
+            pub.send_multipart([b"cmd.move", b"%d" % i])
+            if fast.poll(1000):
+                fast.recv_multipart()
+                got += 1
+        assert got == 20
+        assert stats.snapshot()["topics"]["bus.stats"]["drops"] > 0
+        for s in (slow, fast, pub):
+            s.close(0)
+    finally:
+        stop[0] = True
+        th.join(3)
+        front.close(0); back.close(0)
@@ -0,0 +1,51 @@
+# tests/test_bus_async.py
+import asyncio
+
+import zmq
+import zmq.asyncio
+
+from common import bus
+
+
+async def _pair(addr):
+    ctx = zmq.asyncio.Context.instance()
+    raw = ctx.socket(zmq.PUB)
+    raw.setsockopt(zmq.LINGER, 0)
+    raw.bind(addr)
+    return raw
+
+
+def test_async_iter_timeout_and_handlers():
+    async def main():
+        raw = await _pair("inproc://bus-async-1")
+        sub = bus.AsyncBusSub("cmd.", timeout_ms=50, endpoint="inproc://bus-async-1")
+        got = []
+
+        @sub.on("vision.")
+        def on_vision(topic, msg):
+            got.append(("vision", topic, msg))
+
+        async def on_state(topic, msg):
+            got.append(("state", topic, msg))
+            sub.stop()
+
+        sub.on("vision.state", on_state)
+        await asyncio.sleep(0.05)  # slow joiner (inproc)
+
+        assert await sub.recv() == (None, None)
+
+        await raw.send_multipart(bus.encode_frames("cmd.move", {"vx": 0.2}))
+        async for topic, msg in sub:
+            assert (topic, msg) == ("cmd.move", {"vx": 0.2})
+            break
+
+        await raw.send_multipart(bus.encode_frames("vision.detections", {"n": 1}))
+        await raw.send_multipart(bus.encode_frames("vision.state", {"ok": True}))
+        idle = []
+        await asyncio.wait_for(sub.run(idle_timeout_ms=20, on_idle=lambda: idle.append(1)), 2.0)
+
+        assert got == [("vision", "vision.detections", {"n": 1}), ("state", "vision.state", {"ok": True})]
+        sub.close()
+        raw.close(0)
+
+    asyncio.run(main())
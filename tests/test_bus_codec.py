@@ -0,0 +1,39 @@
+# tests/test_bus_codec.py
+import pytest
+
+from common import bus
+
+SAMPLE = {"ts": 1700000000.25, "vx": 0.4, "yaw": -0.2, "rid": "abc", "items": [{"label": "person", "score": 0.9}]}
+
+
+def test_json_frames_are_untagged_and_roundtrip():
+    topic, body = bus.encode_frames("cmd.move", SAMPLE, bus.get_codec("json"))
+    assert topic == b"cmd.move"
+    assert body[:1] == b"{"
+    assert bus.decode_frames([topic, body]) == ("cmd.move", SAMPLE)
+
+
+def test_legacy_single_frame_is_decoded():
+    frame = b'devices.xgo {"battery_pct": 87}'
+    assert bus.decode_frames([frame]) == ("devices.xgo", {"battery_pct": 87})
+    assert bus.decode_frames([b"vision.state"]) == ("vision.state", None)
+
+
+def test_unknown_codec_falls_back_to_json():
+    assert bus.get_codec("nope").name == "json"
+
+
+def test_bad_payload_raises_or_returns_none():
+    with pytest.raises(ValueError):
+        bus.decode_payload(b"\xc1\x7fxx")
+    assert bus.decode_frames([b"t", b"not json"]) == ("t", None)
+
+
+def test_msgpack_frames_are_tagged_and_autodetected():
+    pytest.importorskip("msgpack")
+    codec = bus.get_codec("msgpack")
+    assert codec.name == "msgpack"
+    topic, body = bus.encode_frames("devices.xgo", SAMPLE, codec)
+    assert body[0] == bus.BIN_MAGIC and body[1] == codec.tag
+    assert len(body) < len(bus.encode_payload(SAMPLE, bus.get_codec("json")))
+    assert bus.decode_frames([topic, body]) == ("devices.xgo", SAMPLE)
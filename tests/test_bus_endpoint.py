@@ -0,0 +1,31 @@
+# tests/test_bus_endpoint.py
+import pytest
+
+from common import bus
+
+
+def test_default_and_explicit_transports(monkeypatch):
+    for k in ("BUS_XSUB", "BUS_XPUB", "BUS_PUB_ADDR", "BUS_SUB_ADDR"):
+        monkeypatch.delenv(k, raising=False)
+    assert bus.bus_endpoint("pub", "tcp") == f"tcp://{bus.BUS_HOST}:{bus.BUS_PUB_PORT}"
+    assert bus.bus_endpoint("sub", "ipc").startswith("ipc://")
+    assert bus.bus_endpoint("pub", "ipc") != bus.bus_endpoint("sub", "ipc")
+
+
+def test_env_address_overrides_transport(monkeypatch):
+    monkeypatch.setenv("BUS_PUB_ADDR", "tcp://10.0.0.2:5555")
+    assert bus.bus_endpoint("pub") == "tcp://10.0.0.2:5555"
+    # jawny transport (np. benchmark) pomija ENV
+    assert bus.bus_endpoint("pub", "ipc").startswith("ipc://")
+
+
+def test_broker_binds_tcp_and_ipc():
+    eps = bus.broker_endpoints("sub")
+    assert eps[0] == f"tcp://*:{bus.BUS_SUB_PORT}"
+    assert eps[1] == bus.bus_endpoint("sub", "ipc")
+    assert bus.broker_endpoints("sub", ipc=False) == eps[:1]
+
+
+def test_bad_role():
+    with pytest.raises(ValueError):
+        bus.bus_endpoint("xpub")
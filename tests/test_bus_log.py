@@ -0,0 +1,73 @@
+# tests/test_bus_log.py
+import os
+
+from common import bus
+from tools.bus_record import BusLogReader, BusLogWriter
+from tools.bus_replay import replay
+
+
+def _write(path, n=5):
+    with BusLogWriter(str(path)) as w:
+        for i in range(n):
+            w.append(bus.encode_frames("cmd.move" if i % 2 == 0 else "vision.state", {"i": i, "ts": 100.0 + i}),
+                     ts=100.0 + i * 0.1)
+        w.append([b'devices.xgo {"battery_pct": 80}'], ts=100.0 + n * 0.1)  # legacy single-frame
+
+
+def test_roundtrip_index_and_seek(tmp_path):
+    path = tmp_path / "run.buslog"
+    _write(path)
+    with BusLogReader(str(path)) as r:
+        assert len(r) == 6
+        t, frames = r.read_at(r.offsets[0])
+        assert t == 100.0 and bus.decode_frames(frames) == ("cmd.move", {"i": 0, "ts": 100.0})
+        assert r.index_at(100.25) == 3
+        assert [bus.decode_frames(f)[1]["i"] for _, f in r.records(100.15, 100.35)] == [2, 3]
+        assert r.read_at(r.offsets[-1])[1] == [b'devices.xgo {"battery_pct": 80}']
+
+
+def test_reader_rebuilds_missing_index_and_skips_torn_tail(tmp_path):
+    path = tmp_path / "run.buslog"
+    _write(path)
+    os.remove(str(path) + ".idx")
+    with open(path, "ab") as f:
+        f.write(b"\x40\x00\x00\x00partial")  # urwany rekord
+    with BusLogReader(str(path)) as r:
+        assert len(r) == 6
+
+
+def test_replay_schedule_speed_and_filter(tmp_path):
+    path = tmp_path / "run.buslog"
+    _write(path)
+    clock = [0.0]
+    sent = []
+
+    def fake_sleep(dt):
+        clock[0] += dt
+
+    with BusLogReader(str(path)) as r:
+        st = replay(r, lambda fr: sent.append((clock[0], fr)), speed=2.0, topics=["cmd."],
+                    clock=lambda: clock[0], sleep=fake_sleep)
+        assert st["sent"] == 3 and st["skipped"] == 3
+        # cmd.move co 0.2 s w nagraniu → co 0.1 s przy 2x
+        assert [round(t, 6) for t, _ in sent] == [0.0, 0.1, 0.2]
+
+        sent.clear()
+        st = replay(r, lambda fr: sent.append(fr), speed=0, retime=True)
+        assert st["sent"] == 6
+        assert bus.decode_frames(sent[0])[1]["ts"] > 1e9  # przesunięte na „teraz”
+
+
+def test_retime_keeps_codec_and_legacy_framing():
+    from tools.bus_replay import _retime
+
+    legacy = [b'cmd.move {"vx":0.1,"ts":100.0}']
+    out = _retime(legacy, 5.0)
+    assert len(out) == 1 and out[0].startswith(b"cmd.move {")
+    assert bus.decode_frames(out) == ("cmd.move", {"vx": 0.1, "ts": 105.0})
+
+    multi = bus.encode_frames("cmd.move", {"ts": 100.0}, bus.get_codec("json"))
+    assert _retime(multi, 1.0) == bus.encode_frames("cmd.move", {"ts": 101.0}, bus.get_codec("json"))
+
+    unknown = [b"cmd.move", bytes((bus.BIN_MAGIC, 0x7F)) + b"??"]
+    assert _retime(unknown, 1.0) is unknown                  # nieznany kodek → bez zmian
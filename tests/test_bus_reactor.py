@@ -0,0 +1,94 @@
+# tests/test_bus_reactor.py
+import time
+
+import zmq
+
+from common import bus
+from common.reactor import BusReactor, RearmableTimer
+
+
+def test_timers_order_periodic_and_cancel():
+    r = BusReactor(endpoint="inproc://unused", name="t")
+    fired = []
+    r.call_later(0.03, lambda: fired.append("b"))
+    r.call_later(0.01, lambda: fired.append("a"))
+    h = r.call_later(0.02, lambda: fired.append("x"))
+    h.cancel()
+    r.call_every(0.01, lambda: fired.append("p"))
+    r.call_later(0.055, r.stop)
+    t0 = time.monotonic()
+    r.run()
+    assert time.monotonic() - t0 < 0.5
+    assert "x" not in fired
+    assert fired.index("a") < fired.index("b")
+    assert 3 <= fired.count("p") <= 6
+
+
+def test_rearmable_timer_extends_without_heap_growth():
+    r = BusReactor(endpoint="inproc://unused", name="t")
+    fired = []
+    dm = RearmableTimer(r, lambda: fired.append(time.monotonic()))
+    t0 = time.monotonic()
+    for _ in range(50):                   # teleop: re-arm na każdą komendę
+        dm.arm(0.03)
+    assert len(r._timers) == 1
+    r.call_later(0.015, lambda: dm.arm(0.03))   # przedłużenie w trakcie
+    r.call_later(0.1, r.stop)
+    r.run()
+    assert len(fired) == 1 and fired[0] - t0 >= 0.045
+    assert not dm.active and dm.late_s < 0.02
+
+    dm.arm(0.01); dm.cancel()
+    r.call_later(0.03, r.stop)
+    r.run()
+    assert len(fired) == 1
+
+
+def test_prefix_dispatch_on_shared_sub():
+    ctx = zmq.Context.instance()
+    raw = ctx.socket(zmq.PUB)
+    raw.setsockopt(zmq.LINGER, 0)
+    raw.bind("inproc://reactor-test")
+    r = BusReactor(endpoint="inproc://reactor-test", ctx=ctx, name="t")
+    got = []
+    r.on("ui.button", lambda t, p: got.append(("btn", t, p)))
+    r.on("motion.", lambda t, p: got.append(("motion", t, p)))
+    r.on("motion.state", lambda t, p: got.append(("state", t, p)))
+    time.sleep(0.05)  # slow joiner
+
+    raw.send_multipart(bus.encode_frames("ui.button", {"id": "OK"}))
+    raw.send_multipart(bus.encode_frames("motion.state", {"battery": 0.5}))
+    raw.send_multipart(bus.encode_frames("motion.cmd", {"type": "stop"}))
+    raw.send_multipart(bus.encode_frames("vision.state", {}))  # brak subskrypcji
+    deadline = time.monotonic() + 1.0
+    while len(got) < 3 and time.monotonic() < deadline:
+        r.run_once(timeout_ms=50)
+
+    assert got == [("btn", "ui.button", {"id": "OK"}),
+                   ("state", "motion.state", {"battery": 0.5}),
+                   ("motion", "motion.cmd", {"type": "stop"})]
+    r.close()
+    raw.close(0)
+
+
+def test_sub_flood_is_capped_per_wakeup_so_timers_run():
+    ctx = zmq.Context.instance()
+    raw = ctx.socket(zmq.PUB)
+    raw.setsockopt(zmq.LINGER, 0)
+    raw.bind("inproc://reactor-flood")
+    r = BusReactor(endpoint="inproc://reactor-flood", ctx=ctx, name="t", max_msgs=10)
+    got, ticks = [], []
+    r.on("camera.frame", lambda t, p: got.append(p))
+    time.sleep(0.05)
+    for i in range(35):
+        raw.send_multipart(bus.encode_frames("camera.frame", {"i": i}))
+    time.sleep(0.05)
+    r.call_later(0.0, lambda: ticks.append(len(got)))
+    r.run_once(timeout_ms=50)
+    assert len(got) == 10 and ticks == [10]   # timer po pierwszej paczce, nie po całym zalewie
+    while len(got) < 35:
+        r.run_once(timeout_ms=50)
+    assert [p["i"] for p in got] == list(range(35))
+    assert bus.handlers_for_topic({"a": [1], "a.b": [2]}, "a.b.c") == [2]
+    r.close()
+    raw.close(0)
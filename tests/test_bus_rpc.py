@@ -0,0 +1,93 @@
+# tests/test_bus_rpc.py
+import threading
+
+import zmq
+
+from common import bus
+
+
+def _responder(ctx, stop):
+    """Mini-usługa: cmd.move → accept z echem vx; cmd.stop → brak odpowiedzi (timeout)."""
+    req = ctx.socket(zmq.SUB)
+    req.setsockopt(zmq.LINGER, 0)
+    req.setsockopt(zmq.SUBSCRIBE, b"cmd.")
+    req_port = req.bind_to_random_port("tcp://127.0.0.1")
+    rep = ctx.socket(zmq.PUB)
+    rep.setsockopt(zmq.LINGER, 0)
+    rep_port = rep.bind_to_random_port("tcp://127.0.0.1")
+    send = lambda topic, payload: rep.send_multipart(bus.encode_frames(topic, payload))
+
+    def loop():
+        while not stop.is_set():
+            if not req.poll(50):
+                continue
+            topic, data = bus.decode_frames(req.recv_multipart())
+            if topic == "cmd.move":
+                bus.rpc_reply(send, data, {"ok": True, "verdict": "accept", "vx": data.get("vx")})
+        req.close(0)
+        rep.close(0)
+
+    th = threading.Thread(target=loop, daemon=True)
+    th.start()
+    return th, f"tcp://127.0.0.1:{req_port}", f"tcp://127.0.0.1:{rep_port}"
+
+
+def test_rpc_correlates_by_rid_and_times_out():
+    ctx = zmq.Context.instance()
+    stop = threading.Event()
+    th, req_ep, rep_ep = _responder(ctx, stop)
+    cli = bus.BusRpcClient(name="test", sub_endpoint=rep_ep, pub_endpoint=req_ep, ctx=ctx)
+    try:
+        results = {}
+
+        def worker(n):
+            results[n] = cli.request("cmd.move", {"vx": n / 10.0}, timeout=1.0)
+
+        threads = [threading.Thread(target=worker, args=(n,)) for n in range(8)]
+        for t in threads: t.start()
+        for t in threads: t.join()
+        for n, r in results.items():
+            assert r is not None and r["verdict"] == "accept"
+            assert r["vx"] == n / 10.0  # każda odpowiedź trafia do swojego nadawcy
+
+        r = cli.request("cmd.move", {"vx": 0.5, "rid": "abc"}, timeout=1.0)
+        assert r["rid"] == "abc"
+
+        assert cli.request("cmd.stop", {}, timeout=0.1) is None
+        assert not cli._pending
+    finally:
+        stop.set()
+        th.join(1)
+        cli.close()
+
+
+def test_rpc_reply_ignores_plain_publish():
+    sent = []
+    assert not bus.rpc_reply(lambda t, p: sent.append((t, p)), {"rid": "x"}, {"ok": True})
+    assert bus.rpc_reply(lambda t, p: sent.append((t, p)), {"rid": "x", "reply_to": "rpc.reply.a"}, {"ok": True})
+    assert sent[0][0] == "rpc.reply.a" and sent[0][1]["rid"] == "x" and sent[0][1]["ok"] is True
+
+
+def test_rpc_duplicate_rids_each_get_own_reply():
+    ctx = zmq.Context.instance()
+    stop = threading.Event()
+    th, req_ep, rep_ep = _responder(ctx, stop)
+    cli = bus.BusRpcClient(name="dup", sub_endpoint=rep_ep, pub_endpoint=req_ep, ctx=ctx)
+    try:
+        results, start = {}, threading.Barrier(6)
+
+        def worker(n):
+            start.wait()
+            # rid z zapytania HTTP — ten sam u wszystkich
+            results[n] = cli.request("cmd.move", {"vx": n / 10.0, "rid": "same"}, timeout=1.0)
+
+        threads = [threading.Thread(target=worker, args=(n,)) for n in range(6)]
+        for t in threads: t.start()
+        for t in threads: t.join()
+        for n, r in results.items():
+            assert r is not None and r["rid"] == "same" and r["vx"] == n / 10.0
+        assert not cli._pending
+    finally:
+        stop.set()
+        th.join(1)
+        cli.close()
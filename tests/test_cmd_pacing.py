@@ -0,0 +1,29 @@
+# tests/test_cmd_pacing.py
+from apps.motion.cmd_pacing import MOVE, STOP, TokenBucket, coalesce
+
+
+def _kind(m):
+    return {"m": MOVE, "s": STOP}.get(m[0])
+
+
+def test_moves_collapse_to_newest_and_stop_keeps_order():
+    batch = ["m1", "m2", "x1", "m3", "m4", "s1", "m5", "s2", "m6", "m7"]
+    out, merged = coalesce(batch, _kind)
+    assert out == ["m2", "x1", "s1", "s2", "m7"]
+    assert merged == [("m1", "m2"), ("m3", "m4"), ("m4", "s1"), ("m5", "s2"), ("m6", "m7")]
+    assert coalesce([], _kind) == ([], [])
+
+
+def test_token_bucket_defers_instead_of_dropping():
+    b = TokenBucket(rate_hz=10, burst=1, now=0.0)
+    assert b.take(now=0.0)
+    assert not b.take(now=0.03)
+    assert abs(b.wait_s(now=0.03) - 0.07) < 1e-9
+    assert b.take(now=0.1) and not b.take(now=0.1)
+    assert TokenBucket(rate_hz=0).take() and TokenBucket(rate_hz=0).wait_s() == 0.0
+
+
+def test_token_bucket_burst():
+    b = TokenBucket(rate_hz=5, burst=3, now=0.0)
+    assert [b.take(now=0.0) for _ in range(4)] == [True, True, True, False]
+    assert b.take(now=0.2) and not b.take(now=0.2)
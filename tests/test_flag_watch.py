@@ -0,0 +1,42 @@
+# tests/test_flag_watch.py
+import threading
+
+import pytest
+
+from apps.safety.flag_watch import FlagWatcher
+
+
+def _wait(ev, timeout=2.0):
+    assert ev.wait(timeout), "no change callback"
+    ev.clear()
+
+
+@pytest.mark.parametrize("inotify", [True, False])
+def test_cached_state_and_immediate_callback(tmp_path, inotify):
+    (tmp_path / "motion.enable").touch()
+    w = FlagWatcher(tmp_path, ("motion.enable", "estop.on"), poll_s=0.02, use_inotify=inotify)
+    seen, ev = [], threading.Event()
+    w.on_change(lambda name, on: (seen.append((name, on)), ev.set()))
+    w.start()
+    try:
+        if inotify and w.mode != "inotify":
+            pytest.skip("inotify unavailable")
+        assert w.mode == ("inotify" if inotify else "poll")
+        assert w.get("motion.enable") and not w.get("estop.on")
+        (tmp_path / "estop.on").touch()
+        _wait(ev)
+        assert seen == [("estop.on", True)] and w.get("estop.on")
+        (tmp_path / "estop.on").unlink()
+        _wait(ev)
+        assert seen[-1] == ("estop.on", False) and not w.get("estop.on")
+    finally:
+        w.stop()
+
+
+def test_unstarted_watcher_throttles_stat(tmp_path):
+    w = FlagWatcher(tmp_path, ("estop.on",), poll_s=60)
+    assert not w.get("estop.on")
+    (tmp_path / "estop.on").touch()
+    assert not w.get("estop.on")   # w oknie poll_s — z pamięci
+    w.rescan()
+    assert w.get("estop.on")
@@ -0,0 +1,48 @@
+# tests/test_frame_ring.py
+from common.frame_ring import FrameRingReader, FrameRingWriter
+from common.schemas import CameraFrame
+
+
+def _frame(i, n=4 * 3 * 3):
+    return bytes((i + k) % 256 for k in range(n))
+
+
+def test_write_read_latest_and_notice(tmp_path):
+    w = FrameRingWriter("t", slot_bytes=64, slots=3, base_dir=str(tmp_path))
+    r = FrameRingReader("t", base_dir=str(tmp_path))
+    assert r.latest() is None
+
+    seq = w.write(_frame(1), 4, 3, 3, "bgr24", ts=12.5)
+    f = r.latest()
+    assert (f.seq, f.w, f.h, f.c, f.fmt, f.ts) == (seq, 4, 3, 3, "bgr24", 12.5)
+    assert bytes(f.data) == _frame(1) and f.valid()
+
+    note = CameraFrame.parse(w.notice())
+    assert (note.ring, note.seq, note.w, note.h) == ("t", seq, 4, 3)
+    assert r.get(note.seq).copy() == _frame(1)
+    w.close(unlink=True)
+
+
+def test_overwritten_slot_is_detected(tmp_path):
+    w = FrameRingWriter("t", slot_bytes=64, slots=3, base_dir=str(tmp_path))
+    r = FrameRingReader("t", base_dir=str(tmp_path))
+    w.write(_frame(1), 4, 3)
+    f = r.latest()
+    for i in range(2, 5):          # pełne okrążenie → slot klatki 1 nadpisany
+        w.write(_frame(i), 4, 3)
+    assert not f.valid() and f.copy() is None
+    assert r.get(1) is None
+    assert r.head() == 4 and bytes(r.latest().data) == _frame(4)
+
+
+def test_reader_follows_restarted_writer(tmp_path):
+    w = FrameRingWriter("t", slot_bytes=64, slots=3, base_dir=str(tmp_path))
+    r = FrameRingReader("t", base_dir=str(tmp_path))
+    for i in range(5):
+        w.write(_frame(i), 4, 3)
+    assert r.head() == 5
+    w.close()
+    w2 = FrameRingWriter("t", slot_bytes=64, slots=3, base_dir=str(tmp_path))
+    assert r.head() == 0
+    w2.write(_frame(9), 4, 3)
+    assert bytes(r.latest().data) == _frame(9)
@@ -0,0 +1,38 @@
+# tests/test_metrics.py
+from common.metrics import Histogram, Metrics, prometheus_lines
+
+
+def test_histogram_buckets_and_window_quantiles():
+    h = Histogram(buckets=(1.0, 5.0, 10.0), window=4)
+    for v in (0.5, 1.0, 3.0, 7.0, 20.0):
+        h.observe(v)
+    s = h.snapshot()
+    assert s["cum"] == [2, 3, 4, 5]            # le=1 (włącznie), 5, 10, +Inf
+    assert s["count"] == 5 and s["sum"] == 31.5
+    assert s["min"] == 0.5 and s["max"] == 20.0
+    assert s["window"] == 4 and s["p50"] == 7.0 and s["p99"] == 20.0   # okno: 1, 3, 7, 20
+    assert Histogram().snapshot()["p95"] is None
+
+
+def test_counters_with_labels():
+    m = Metrics()
+    m.inc("accept_total")
+    m.inc("skip_total", reason="merged")
+    m.inc("skip_total", 2, reason="merged")
+    m.inc("skip_total", reason="drop_old")
+    assert m.value("accept_total") == 1 and m.value("skip_total", reason="merged") == 3
+    assert m.value("deferred_total") == 0
+    assert m.by_label("skip_total", "reason") == {"merged": 3, "drop_old": 1}
+
+
+def test_prometheus_lines_from_snapshot():
+    m = Metrics(buckets=(1.0, 10.0))
+    m.observe("hw_call_ms", 2.0)
+    m.inc("dir_total", dir="forward")
+    lines = prometheus_lines(m.snapshot(), "rider_bridge")
+    assert 'rider_bridge_hw_call_ms_bucket{le="1.0"} 0' in lines
+    assert 'rider_bridge_hw_call_ms_bucket{le="+Inf"} 1' in lines
+    assert "rider_bridge_hw_call_ms_count 1" in lines
+    assert 'rider_bridge_hw_call_ms_window{quantile="0.95"} 2.0' in lines
+    assert 'rider_bridge_dir_total{dir="forward"} 1' in lines
+    assert prometheus_lines(None, "x") == [] and prometheus_lines({"hist": {"bad": {}}}, "x") == []
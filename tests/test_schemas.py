@@ -0,0 +1,71 @@
+# tests/test_schemas.py
+import pytest
+
+from common import bus, schemas
+from common.schemas import CmdMove, DevicesXgo, MotionCmd, SchemaError, VisionDetections
+
+
+def test_cmd_move_aliases_defaults_and_roundtrip():
+    m = schemas.parse("cmd.move", {"vx": "0.3", "az": -0.2, "rid": "r1", "ts": 10})
+    assert isinstance(m, CmdMove)
+    assert (m.vx, m.vy, m.yaw, m.duration, m.rid, m.ts) == (0.3, 0.0, -0.2, None, "r1", 10.0)
+    assert not hasattr(m, "__dict__")
+
+    topic, back = schemas.decode(m.encode(bus.get_codec("json")))
+    assert topic == "cmd.move" and back == m
+    assert "duration" not in m.to_dict()
+
+
+@pytest.mark.parametrize("payload", [{"vx": "abc"}, {"vx": float("nan")}, {"yaw": True}, ["x"]])
+def test_strict_schema_rejects_bad_values(payload):
+    with pytest.raises(SchemaError):
+        CmdMove.parse(payload)
+
+
+def test_legacy_motion_cmd_normalizes_dir():
+    m = MotionCmd.parse({"dir": " Forward ", "v": 0.22, "t": 0.25})
+    assert (m.dir, m.v, m.t) == ("forward", 0.22, 0.25)
+    assert schemas.parse("motion.cmd", None).dir == ""
+
+
+def test_telemetry_is_lenient():
+    m = DevicesXgo.parse({"battery": "87", "roll": "bad", "imu_ok": "0"})
+    assert m.battery_pct == 87.0 and m.roll is None and m.imu_ok is False
+    assert schemas.parse("vision.state", {"confidence": 3}).confidence == 1.0
+
+
+def test_detections_items_normalized():
+    m = VisionDetections.parse({"objects": [{"class": "Person", "confidence": "0.8"}, "junk"]})
+    assert m.items == [{"label": "person", "score": 0.8, "bbox": None}]
+    assert schemas.parse("vision.unknown", {}) is None
+
+
+def test_cmd_velocity_setpoint():
+    m = schemas.parse("cmd.velocity", {"vx": 0.4, "az": "-0.1"})
+    assert (m.vx, m.vy, m.yaw, m.ts) == (0.4, 0.0, -0.1, None)
+
+
+def test_cmd_trajectory_segments():
+    m = schemas.parse("cmd.trajectory", {"segments": [[1, 0.2, 0.0], (0.5, 0, -0.3, 0.1), {"t": 2, "az": 0.4}]})
+    assert m.segments == [(1.0, 0.2, 0.0, 0.0), (0.5, 0.0, 0.1, -0.3), (2.0, 0.0, 0.0, 0.4)]
+    for bad in ([[0, 0.2, 0.0]], [[1, 0.2]], [{"vx": 0.2}], "x"):
+        with pytest.raises(SchemaError):
+            schemas.parse("cmd.trajectory", {"segments": bad})
+
+
+def test_unregistered_message_compiles_parser_on_first_use():
+    class Probe(schemas.Message):
+        TOPIC = "test.probe"
+        FIELDS = (schemas.Field("x", schemas.as_float, 0.0),)
+        __slots__ = schemas._slots(FIELDS)
+
+    assert Probe.parse({"x": "2.5"}).x == 2.5
+    assert "parse" in vars(Probe) and Probe.parse({}).x == 0.0
+    assert schemas.schema_for("test.probe") is None
+
+
+def test_legacy_cmd_motion_payload():
+    m = schemas.CmdMotionLegacy.parse({"speed": "20", "rid": "r"})
+    assert (m.speed, m.runtime, m.rid) == (20.0, 0.6, "r")
+    with pytest.raises(SchemaError):
+        schemas.CmdMotionLegacy.parse({"speed": "x"})
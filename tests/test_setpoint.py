@@ -0,0 +1,72 @@
+# tests/test_setpoint.py
+from apps.motion.setpoint import SetpointRamp, SetpointStream, quantize
+from common.reactor import BusReactor
+
+
+def test_quantize():
+    assert quantize(0.123, 0.05) == 0.1 and quantize(-0.126, 0.05) == -0.15
+    assert quantize(0.123, 0.0) == 0.123
+
+
+def test_ramp_limits_acceleration_and_sends_only_changes():
+    r = SetpointRamp(accel=2.0, quant=0.1)
+    r.set_target(vx=0.5, yaw=-3.0)              # yaw przycięty do -1
+    assert r.step(0.1) is True
+    assert r.changes() == {"vx": 0.2, "yaw": -0.2}
+    assert r.step(0.01) is True and r.changes() == {}   # 0.22 → nadal 0.2 po kwantyzacji
+    while r.step(0.1):
+        r.changes()
+    assert r.changes() == {"yaw": -1.0} and r.current["vx"] == 0.5
+    r.set_target(vx=0.5, yaw=-1.0)              # keepalive z tym samym celem → nic do wysłania
+    assert r.step(0.1) is False and r.changes() == {}
+
+
+def test_ramp_down_to_idle_and_reset():
+    r = SetpointRamp(accel=0.0, quant=0.05)     # bez rampy: skok do celu
+    r.set_target(vy=0.3)
+    assert r.step(0.02) is False and r.changes() == {"vy": 0.3} and not r.idle
+    r.set_target()
+    r.step(0.02)
+    assert r.changes() == {"vy": 0.0} and r.idle
+    r.set_target(vx=1.0); r.step(1.0); r.changes()
+    r.reset()
+    assert r.idle and r.current["vx"] == 0.0
+
+
+def _stream(**kw):
+    r = BusReactor(endpoint="inproc://unused", name="t")
+    log = []
+    s = SetpointStream(r, lambda axis, v: log.append((axis, v)), lambda: log.append("stop"),
+                       limits=(0.5, 0.5, 20.0), on_expire=lambda idle, late: log.append(("expire", idle)), **kw)
+    return r, s, log
+
+
+def test_stream_ramps_on_reactor_and_maps_axes_to_hw():
+    r, s, log = _stream(accel=0.0, quant=0.1)
+    s.set(0.5, 0.4, -1.0, keepalive_s=0.05)
+    assert log == [("vx", 0.25), ("vy", -0.2), ("yaw", 20.0)]   # vy/yaw: znak jak move_y/turn
+    assert s.active
+    r.call_later(0.1, r.stop)
+    r.run()
+    assert log[-2:] == ["stop", ("expire", False)] and not s.active
+
+
+def test_stream_all_zero_is_single_stop_and_idle_expiry():
+    r, s, log = _stream(accel=0.0, quant=0.1)
+    s.set(0.5, 0.0, 0.0, keepalive_s=0.03)
+    s.set(0.0, 0.0, 0.0, keepalive_s=0.03)
+    assert log == [("vx", 0.25), "stop"]
+    r.call_later(0.06, r.stop)
+    r.run()
+    assert log[-1] == ("expire", True) and log.count("stop") == 1
+
+
+def test_stream_ramp_timer_reaches_target():
+    r, s, log = _stream(accel=10.0, quant=0.05, ramp_hz=100.0)
+    s.set(1.0, 0.0, 0.0, keepalive_s=1.0)
+    r.call_later(0.2, r.stop)
+    r.run()
+    xs = [v for a, v in (e for e in log if isinstance(e, tuple)) if a == "vx"]
+    assert len(xs) > 3 and xs == sorted(xs) and xs[-1] == 0.5
+    s.halt()
+    assert not s.active and s.ramp.idle
@@ -0,0 +1,39 @@
+# tests/test_ticker.py
+from common.ticker import FixedRateTicker
+
+
+class _Clock:
+    def __init__(self):
+        self.t = 100.0
+        self.oversleep = 0.0
+
+    def __call__(self):
+        return self.t
+
+    def sleep(self, s):
+        self.t += s + self.oversleep
+
+
+def test_deadlines_do_not_drift_with_work_time():
+    c = _Clock()
+    tk = FixedRateTicker(0.02, clock=c, sleep=c.sleep)
+    assert tk.wait() == 0.02                 # pierwszy tick od razu
+    for _ in range(50):
+        c.t += 0.015                         # praca w ticku
+        tk.wait()
+    assert abs(c.t - (100.0 + 50 * 0.02)) < 1e-9   # sleep(LOOP_DT) dałby 50 * 0.035
+    assert tk.ticks == 51 and tk.overruns == 0 and tk.stats()["jitter_ms"]["max"] == 0.0
+
+
+def test_jitter_and_overrun_resync():
+    c = _Clock()
+    c.oversleep = 0.001
+    tk = FixedRateTicker(0.02, clock=c, sleep=c.sleep)
+    tk.wait(); tk.wait()
+    assert tk.stats()["jitter_ms"]["p50"] == 1.0
+    c.t += 0.1                               # przeciążenie: 5 okresów
+    dt = tk.wait()
+    assert abs(dt - 0.1) < 1e-9 and tk.overruns == 1
+    t_before = c.t
+    tk.wait()                                # bez serii nadrabiającej: kolejny termin = teraz + period
+    assert abs(c.t - t_before - 0.021) < 1e-9
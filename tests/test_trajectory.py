@@ -0,0 +1,41 @@
+# tests/test_trajectory.py
+from apps.motion.trajectory import TrajectoryPlan, TrajectoryRunner
+from common.reactor import BusReactor
+
+
+def test_plan_deadlines_are_absolute():
+    plan = TrajectoryPlan([(1.0, 0.2, 0.0, 0.0), (0.5, 0.0, 0.0, 0.3), (2.0, -0.2, 0.0, 0.0)])
+    assert len(plan) == 3 and plan.total == 3.5 and plan.starts == [0.0, 1.0, 1.5]
+    assert [plan.index_at(t) for t in (0.0, 0.99, 1.0, 1.49, 1.5, 3.49, 3.5, 10.0)] == [0, 0, 1, 1, 2, 2, 3, 3]
+    assert plan.end_of(0) == 1.0 and plan.end_of(2) == 3.5 and plan.end_of(3) == 3.5
+
+
+def test_late_wakeup_skips_to_current_segment():
+    plan = TrajectoryPlan([(0.1, 0.1, 0.0, 0.0)] * 10)
+    assert plan.index_at(0.55) == 5   # obudzeni po 0.55 s → od razu segment 5, nie 1
+    assert TrajectoryPlan([]).index_at(0.0) == 0 == len(TrajectoryPlan([]))
+
+
+def test_runner_switches_segments_on_reactor_clock():
+    r = BusReactor(endpoint="inproc://unused", name="t")
+    sets, msgs = [], []
+    run = TrajectoryRunner(r, lambda *a: sets.append(a), msgs.append, margin_s=0.1)
+    run.start(TrajectoryPlan([(0.03, 0.2, 0.0, 0.0), (0.03, 0.0, 0.1, -0.3)]), rid="T")
+    r.call_later(0.12, r.stop)
+    r.run()
+    assert [m["state"] for m in msgs] == ["started", "segment", "segment", "done"]
+    assert [s[:3] for s in sets] == [(0.2, 0.0, 0.0), (0.0, 0.1, -0.3), (0.0, 0.0, 0.0)]
+    assert sets[0][3] > 0.1 and sets[-1][3] == 0.1   # keepalive do końca segmentu + margines
+    assert not run.active and msgs[-1]["late_ms"] < 50.0
+
+
+def test_runner_abort_and_preempt():
+    r = BusReactor(endpoint="inproc://unused", name="t")
+    msgs = []
+    run = TrajectoryRunner(r, lambda *a: None, msgs.append)
+    plan = TrajectoryPlan([(1.0, 0.2, 0.0, 0.0)])
+    run.start(plan, rid="A")
+    run.start(plan, rid="B")
+    assert msgs[2] == {**msgs[2], "rid": "A", "state": "preempted", "by": "B"}
+    assert run.abort("stop") is True and run.abort("stop") is False
+    assert [m["state"] for m in msgs] == ["started", "segment", "preempted", "started", "segment", "stop"]
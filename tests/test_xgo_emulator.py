@@ -0,0 +1,48 @@
+# tests/test_xgo_emulator.py
+import os
+import struct
+import time
+
+from tools.xgo_emulator import (REG_BATTERY, REG_FIRMWARE, REG_VYAW, REG_YAW, TYPE_WRITE, FrameParser,
+                                XgoEmulator, encode_frame, open_client, request)
+
+
+def _yaw(payload):
+    return struct.unpack("!f", payload[::-1])[0]  # jak XGOClientRO._byte2float_le_as_net_order
+
+
+def test_parser_resyncs_after_garbage_and_split_input():
+    f = encode_frame(0x02, REG_BATTERY, b"\x57")
+    p = FrameParser()
+    assert p.feed(b"\x13\x55\x37" + f[:4]) == []
+    assert p.feed(f[4:]) == [(0x02, REG_BATTERY, b"\x57", True)]
+    bad = bytearray(f); bad[-3] ^= 1
+    assert p.feed(bytes(bad)) == [(0x02, REG_BATTERY, b"\x57", False)]
+
+
+def test_reads_and_yaw_follows_turn_command():
+    with XgoEmulator(latency_ms=0, baud=0, battery=64) as emu:
+        fd = open_client(emu.path)
+        try:
+            assert request(fd, REG_BATTERY, 1) == b"\x40"
+            assert request(fd, REG_FIRMWARE, 10).rstrip(b"\x00") == b"EMU-1.0"
+            y0 = _yaw(request(fd, REG_YAW, 4))
+            os.write(fd, encode_frame(TYPE_WRITE, REG_VYAW, bytes([255])))   # turnleft(max)
+            time.sleep(0.1)
+            y1 = _yaw(request(fd, REG_YAW, 4))
+            assert 4.0 < y1 - y0 < 20.0    # 90°/s * ~0.1 s
+            os.write(fd, encode_frame(TYPE_WRITE, REG_VYAW, bytes([128])))   # stop
+            assert request(fd, REG_BATTERY, 1)   # ramki obsługiwane po kolei → zapis już przyjęty
+            assert emu.stats["writes"] == 2 and emu.state.vyaw == 0.0
+        finally:
+            os.close(fd)
+
+
+def test_error_injection():
+    with XgoEmulator(latency_ms=0, baud=0, drop=1.0) as emu:
+        fd = open_client(emu.path)
+        try:
+            assert request(fd, REG_BATTERY, 1, timeout=0.1) is None
+            assert emu.stats["dropped"] == 1
+        finally:
+            os.close(fd)
@@ -0,0 +1,64 @@
+# tests/test_xgo_telemetry.py
+import collections
+import threading
+import time
+
+from apps.motion.fake_xgo import FakeXGO
+from apps.motion.xgo_telemetry import CachedGetter, XgoTelemetrySampler
+
+
+class _CountingXGO:
+    """Same odczyty w stylu xgolib (bez natywnego headingu) + licznik wywołań."""
+
+    def __init__(self):
+        self.reads = collections.Counter()
+
+    def _r(self, name, value):
+        self.reads[name] += 1
+        return value
+
+    def read_battery(self): return self._r("battery", 87)
+    def read_firmware(self): return self._r("fw", "FAKE-1.0")
+    def read_roll(self): return self._r("roll", 0.0)
+    def read_pitch(self): return self._r("pitch", 0.0)
+    def read_yaw(self): return self._r("yaw", 0.0)
+
+
+def test_getter_probes_once_and_caches_method():
+    class Dev:
+        def read_battery(self): return 55
+    dev = Dev()
+    g = CachedGetter(("rider_read_battery", "read_battery"))
+    assert g.read(dev) == 55 and g.name == "read_battery"
+    dev.read_battery = lambda: 60   # zapamiętana metoda — nie szukamy ponownie po nazwie
+    assert g.read(dev) == 55
+    assert CachedGetter(("nope",)).read(dev) is None
+
+
+def test_sampler_rates_and_snapshot():
+    dev = _CountingXGO()
+    s = XgoTelemetrySampler(open_dev=lambda: dev, imu_hz=100, battery_s=60)
+    s.sample_once(now=0.0)
+    snap = s.snapshot()
+    assert snap["present"] and snap["battery"] == 87.0 and snap["fw"] == "FAKE-1.0"
+    assert snap["yaw_src"] == "gyro_stabilized" and snap["yaw_raw"] == 0.0
+    for k in range(1, 20):
+        s.sample_once(now=k * 0.015)
+    assert dev.reads["yaw"] == 20
+    assert dev.reads["battery"] == 1 and dev.reads["fw"] == 1
+    assert snap is not s.snapshot() and snap["reads"] == 1  # stary snapshot niezmieniony
+
+
+def test_command_waits_at_most_one_read():
+    dev = FakeXGO(read_ms=20)
+    lock = threading.Lock()
+    s = XgoTelemetrySampler(open_dev=lambda: dev, io_lock=lock, imu_hz=100).start()
+    try:
+        time.sleep(0.15)
+        t0 = time.monotonic()
+        with lock:
+            dev.stop()
+        assert time.monotonic() - t0 < 0.045   # cały przebieg (5 odczytów) to ~100 ms
+        assert s.snapshot()["reads"] >= 1
+    finally:
+        s.stop()
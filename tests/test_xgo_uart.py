@@ -0,0 +1,111 @@
+# tests/test_xgo_uart.py
+import threading
+import time
+
+import pytest
+
+from apps.motion.xgo_uart_client import REG_BATTERY, REG_YAW, XgoUartClient
+from services.xgo_uart import XgoUartServer
+from tools.xgo_emulator import XgoEmulator
+
+
+@pytest.fixture
+def rig(tmp_path):
+    with XgoEmulator(latency_ms=2, baud=0, battery=64) as emu:
+        with XgoUartServer(port=emu.path, addr=f"ipc://{tmp_path}/uart", baud=115200) as srv:
+            cli = XgoUartClient(addr=srv.addr, timeout_ms=2000)
+            try:
+                yield emu, srv, cli
+            finally:
+                cli.close()
+
+
+def test_reads_and_ttl_cache(rig):
+    emu, srv, cli = rig
+    assert cli.read_battery() == 64
+    assert cli.read_battery() == 64          # TTL baterii 5 s → bez UART
+    assert cli.read_firmware() == "EMU-1.0"
+    assert emu.stats["reads"] == 2
+    st = cli.stats()
+    assert st["cache_hits"] == 1 and st["uart_reads"] == 2
+    assert cli.read(REG_YAW, 4, ttl_ms=0) and cli.read(REG_YAW, 4, ttl_ms=0)
+    assert emu.stats["reads"] == 4           # ttl_ms=0 → zawsze świeży odczyt
+
+
+def test_motion_and_stop_reach_controller(rig):
+    emu, srv, cli = rig
+    cli.turn(100)
+    cli.read(REG_BATTERY, 1, ttl_ms=0)       # ramki po kolei → zapis już przyjęty
+    assert emu.state.vyaw > 0.9
+    assert cli.stop()
+    cli.read(REG_BATTERY, 1, ttl_ms=0)
+    assert emu.state.vyaw == 0.0 and emu.state.vx == 0.0
+    assert emu.stats["writes"] == 4 and cli.stats()["stops"] == 1
+
+
+def test_concurrent_reads_are_batched_and_deduped(rig):
+    emu, srv, cli = rig
+    out, start = [], threading.Barrier(8)
+
+    def worker():
+        start.wait()
+        for _ in range(5):
+            out.append(cli.read(REG_YAW, 4, ttl_ms=0))
+
+    ths = [threading.Thread(target=worker) for _ in range(8)]
+    for t in ths: t.start()
+    for t in ths: t.join()
+    assert len(out) == 40 and all(p and len(p) == 4 for p in out)
+    st = cli.stats()
+    assert st["dedup"] > 0 and st["batch_max"] > 1
+    assert emu.stats["reads"] < 40 and st.get("timeouts", 0) == 0
+
+
+def test_stop_preempts_queued_motion(rig):
+    emu, srv, cli = rig
+    mux = srv.mux
+    replies = []
+    with mux._cv:                              # wątek roboczy czeka na zamku — kolejka bez ruchu
+        mux.submit({"op": "read", "addr": REG_BATTERY, "n": 1}, replies.append)
+        mux.submit({"op": "write", "addr": 0x30, "data": [255]}, replies.append)
+        mux.submit({"op": "stop"}, replies.append)
+        assert [it[2]["op"] for it in sorted(mux._heap)] == ["stop", "read"]
+    deadline = time.monotonic() + 2.0
+    while len(replies) < 3 and time.monotonic() < deadline:
+        time.sleep(0.01)
+    assert replies[0] == {"ok": False, "error": "preempted_by_stop"}
+    assert replies[1] == {"ok": True} and replies[2]["ok"]
+    assert emu.state.vx == 0.0
+
+
+def test_client_fails_fast_without_daemon(tmp_path):
+    with pytest.raises(ConnectionError):
+        XgoUartClient(addr=f"ipc://{tmp_path}/missing")
+    stale = tmp_path / "stale"
+    stale.touch()                          # plik po padniętym demonie — ping bez odpowiedzi
+    t0 = time.monotonic()
+    with pytest.raises(ConnectionError):
+        XgoUartClient(addr=f"ipc://{stale}")
+    assert time.monotonic() - t0 < 0.5
+
+
+def test_malformed_requests_keep_daemon_alive(rig):
+    emu, srv, cli = rig
+    for bad in ({"op": "read", "addr": REG_BATTERY, "ttl_ms": "x"},
+                {"op": "read", "addr": 300},
+                {"op": "read", "addr": REG_YAW, "n": 0},
+                {"op": "write", "addr": 0x30, "data": "zz"},
+                {"op": "write", "addr": 0x30, "data": [256]},
+                {"op": "write", "data": [1]},
+                {"op": "write", "addr": 0x30, "data": [1], "prio": ["x"]}):
+        rep = cli.call(bad)
+        assert rep is not None and rep["error"] == "bad_request", bad
+    replies = []
+    srv.mux.submit({"op": "write", "addr": 0x30, "data": "zz"}, replies.append)   # z pominięciem walidacji
+    deadline = time.monotonic() + 2.0
+    while not replies and time.monotonic() < deadline:   # zanim stop zdąży go wywłaszczyć
+        time.sleep(0.01)
+    assert replies == [{"ok": False, "error": "internal_error"}]
+    assert cli.stop()                              # wątek portu przeżył TypeError
+    assert srv.alive() and cli.read(REG_YAW, 4, ttl_ms=0)
+    assert cli.stats()["bad_requests"] >= 7
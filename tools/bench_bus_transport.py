@@ -0,0 +1,121 @@
+#!/usr/bin/env python3
+"""
+Benchmark transportu magistrali: tcp vs ipc.
+
+Dla każdego transportu startuje własny broker + motion_bridge (DRY_RUN, osobne porty
+i katalog IPC — nie koliduje z działającym systemem) i mierzy:
+  * bus    — PUB → broker → SUB (czysty koszt transportu, cmd.move do samego siebie)
+  * bridge — cmd.move → motion.bridge.event(rx_cmd.move) z tym samym rid (pełna ścieżka)
+
+Użycie:
+  python3 tools/bench_bus_transport.py                  # tcp + ipc, 300 próbek
+  python3 tools/bench_bus_transport.py -n 1000 --transports ipc
+ENV: BENCH_PUB_PORT=15555 BENCH_SUB_PORT=15556
+"""
+import os, sys, time, argparse, shutil, subprocess, tempfile, statistics
+
+PROJ_ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+if PROJ_ROOT not in sys.path:
+    sys.path.insert(0, PROJ_ROOT)
+
+PUB_PORT = int(os.getenv("BENCH_PUB_PORT", "15555"))
+SUB_PORT = int(os.getenv("BENCH_SUB_PORT", "15556"))
+IPC_DIR  = tempfile.mkdtemp(prefix="rider-bench-")
+
+# resolver common.bus czyta ENV przy imporcie — ustaw go przed importem
+os.environ.update({"BUS_IPC_DIR": IPC_DIR, "BUS_PUB_PORT": str(PUB_PORT), "BUS_SUB_PORT": str(SUB_PORT)})
+
+import zmq
+from common.bus import bus_endpoint, connect_and_wait, decode_frames, encode_frames
+
+
+def _pct(xs, p):
+    xs = sorted(xs)
+    if not xs: return float("nan")
+    k = min(len(xs) - 1, max(0, int(round(p / 100.0 * (len(xs) - 1)))))
+    return xs[k]
+
+
+def _env(transport):
+    env = dict(os.environ)
+    env.update({
+        "PYTHONPATH": PROJ_ROOT, "BUS_TRANSPORT": transport,
+        "DRY_RUN": "1", "BRIDGE_READONLY": "1", "MIN_CMD_GAP": "0", "DROP_OLD_MS": "60000",
+        "BROKER_STATS": "0",
+    })
+    for k in ("BUS_XSUB", "BUS_XPUB", "BUS_PUB_ADDR", "BUS_SUB_ADDR"):
+        env.pop(k, None)
+    return env
+
+
+def _measure(pub, sub, n, match, gap_s):
+    lat = []
+    lost = 0
+    for i in range(n):
+        rid = f"b{i}"
+        t0 = time.perf_counter()
+        pub.send_multipart(encode_frames("cmd.move", {"vx": 0.1, "duration": 0.05, "rid": rid, "ts": time.time()}))
+        deadline = t0 + 1.0
+        while True:
+            left = int((deadline - time.perf_counter()) * 1000)
+            if left <= 0 or not sub.poll(left):
+                lost += 1
+                break
+            t, d = decode_frames(sub.recv_multipart())
+            if match(t, d, rid):
+                lat.append((time.perf_counter() - t0) * 1000.0)
+                break
+        time.sleep(gap_s)
+    return lat, lost
+
+
+def run(transport, n, gap_s):
+    env = _env(transport)
+    procs = [subprocess.Popen([sys.executable, "services/broker.py"], cwd=PROJ_ROOT, env=env,
+                              stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL)]
+    time.sleep(0.5)
+    procs.append(subprocess.Popen([sys.executable, "-m", "services.motion_bridge"], cwd=PROJ_ROOT, env=env,
+                                  stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL))
+    try:
+        ctx = zmq.Context.instance()
+        pub_addr, sub_addr = bus_endpoint("pub", transport), bus_endpoint("sub", transport)
+        pub = ctx.socket(zmq.PUB); connect_and_wait(pub, pub_addr, 2000)
+        sub = ctx.socket(zmq.SUB); connect_and_wait(sub, sub_addr, 2000)
+        sub.setsockopt(zmq.SUBSCRIBE, b"cmd.move")
+        sub.setsockopt(zmq.SUBSCRIBE, b"motion.bridge.event")
+        time.sleep(1.0)  # bridge: połączenie + subskrypcje
+
+        res = {}
+        res["bus"] = _measure(pub, sub, n, lambda t, d, rid: t == "cmd.move" and (d or {}).get("rid") == rid, gap_s)
+        res["bridge"] = _measure(
+            pub, sub, n,
+            lambda t, d, rid: t == "motion.bridge.event" and (d or {}).get("event") == "rx_cmd.move"
+            and (d.get("detail") or {}).get("rid") == rid, gap_s)
+        pub.close(0); sub.close(0)
+        return pub_addr, res
+    finally:
+        for p in reversed(procs):
+            p.terminate()
+            try: p.wait(3)
+            except Exception: p.kill()
+
+
+def main():
+    ap = argparse.ArgumentParser()
+    ap.add_argument("-n", type=int, default=300, help="liczba próbek na ścieżkę")
+    ap.add_argument("--gap-ms", type=float, default=5.0, help="odstęp między komendami")
+    ap.add_argument("--transports", default="tcp,ipc")
+    args = ap.parse_args()
+
+    print(f"{'transport':<9} {'path':<7} {'n':>5} {'lost':>5} {'p50ms':>8} {'p95ms':>8} {'p99ms':>8} {'mean':>8}")
+    for tr in [t.strip() for t in args.transports.split(",") if t.strip()]:
+        addr, res = run(tr, args.n, args.gap_ms / 1000.0)
+        for path, (lat, lost) in res.items():
+            mean = statistics.fmean(lat) if lat else float("nan")
+            print(f"{tr:<9} {path:<7} {len(lat):>5} {lost:>5} {_pct(lat,50):>8.3f} {_pct(lat,95):>8.3f} {_pct(lat,99):>8.3f} {mean:>8.3f}")
+        print(f"          ({addr})")
+    shutil.rmtree(IPC_DIR, ignore_errors=True)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,241 @@
+#!/usr/bin/env python3
+"""
+Benchmark end-to-end ścieżki ruchu (klik w dashboardzie → wywołanie silnika):
+
+  POST /api/control (api_server) → control_proxy HTTP → web_motion_bridge /api/move
+    → ZMQ cmd.move → motion_bridge → do_forward() → motion.bridge.event "forward"
+
+Startuje własny komplet procesów (broker, motion_bridge z DRY_RUN=1 + XGO_FAKE=1,
+web_motion_bridge, api_server) na osobnych portach / katalogu IPC, wstrzykuje rid
+w każdą komendę i stempluje hopy po stronie obserwatora (SUB na cmd.move + motion.bridge.event):
+
+  http   — klik → odpowiedź HTTP z /api/control
+  to_bus — klik → cmd.move na magistrali (API + proxy + web bridge + ZMQ)
+  rx     — cmd.move → rx_cmd.move (odbiór w motion_bridge)
+  motor  — rx_cmd.move → forward (walidacja + wywołanie XGO)
+  total  — klik → forward
+
+Wzorce:
+  steady — komendy co --gap-ms (domyślnie 150 ms, powyżej MIN_CMD_GAP)
+  burst  — paczki po --burst komend co --burst-gap-ms (jak przytrzymany klawisz) → defer + merged (najnowsza intencja)
+
+Użycie:
+  python3 tools/bench_motion_path.py                       # steady + burst, 200 komend
+  python3 tools/bench_motion_path.py -n 500 --patterns burst --burst 5 --burst-gap-ms 20
+  python3 tools/bench_motion_path.py --entry web           # z pominięciem api_server
+  python3 tools/bench_motion_path.py --entry bus           # /api/control → RPC po magistrali (bez web bridge)
+ENV przekazywane do mostka: MIN_CMD_GAP, DROP_OLD_MS, XGO_FAKE_LATENCY_MS, BUS_TRANSPORT
+"""
+import os, sys, json, time, argparse, shutil, tempfile, threading, subprocess, collections
+import urllib.request
+
+PROJ_ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+if PROJ_ROOT not in sys.path:
+    sys.path.insert(0, PROJ_ROOT)
+
+PUB_PORT = int(os.getenv("BENCH_PUB_PORT", "15565"))
+SUB_PORT = int(os.getenv("BENCH_SUB_PORT", "15566"))
+WEB_PORT = int(os.getenv("BENCH_WEB_PORT", "18081"))
+API_PORT = int(os.getenv("BENCH_API_PORT", "18080"))
+IPC_DIR  = tempfile.mkdtemp(prefix="rider-bench-")
+
+os.environ.update({"BUS_IPC_DIR": IPC_DIR, "BUS_PUB_PORT": str(PUB_PORT), "BUS_SUB_PORT": str(SUB_PORT)})
+
+import zmq
+from common.bus import bus_endpoint, connect_and_wait, decode_frames
+
+MOTOR_EVENTS = ("forward", "backward", "turn_left", "turn_right", "left", "right")
+HOPS = ("http", "to_bus", "rx", "motor", "total")
+
+
+def _pct(xs, p):
+    xs = sorted(xs)
+    if not xs: return float("nan")
+    k = min(len(xs) - 1, max(0, int(round(p / 100.0 * (len(xs) - 1)))))
+    return xs[k]
+
+
+def _env():
+    env = dict(os.environ)
+    env.update({
+        "PYTHONPATH": PROJ_ROOT, "DRY_RUN": "1", "XGO_FAKE": "1", "BRIDGE_READONLY": "0",
+        "BROKER_STATS": "0", "ENABLE_XGO_RO": "0",
+        "WEB_HOST": "127.0.0.1", "WEB_PORT": str(WEB_PORT),
+        "STATUS_API_PORT": str(API_PORT), "MOTION_BRIDGE_URL": f"http://127.0.0.1:{WEB_PORT}",
+    })
+    for k in ("BUS_XSUB", "BUS_XPUB", "BUS_PUB_ADDR", "BUS_SUB_ADDR"):
+        env.pop(k, None)
+    return env
+
+
+def _wait_http(url, timeout_s=15.0):
+    deadline = time.time() + timeout_s
+    while time.time() < deadline:
+        try:
+            with urllib.request.urlopen(url, timeout=0.5):
+                return True
+        except Exception:
+            time.sleep(0.1)
+    return False
+
+
+class Observer:
+    """SUB na cmd.move + motion.bridge.event; czasy (perf_counter) per rid i hop."""
+
+    def __init__(self):
+        self.marks = collections.defaultdict(dict)   # rid -> {hop_mark: t}
+        self.skips = collections.defaultdict(str)    # rid -> reason
+        self._lock = threading.Lock()
+        self._stop = False
+        ctx = zmq.Context.instance()
+        self.sub = ctx.socket(zmq.SUB)
+        connect_and_wait(self.sub, bus_endpoint("sub"), 2000)
+        for t in (b"cmd.move", b"motion.bridge.event"):
+            self.sub.setsockopt(zmq.SUBSCRIBE, t)
+        self.th = threading.Thread(target=self._run, daemon=True)
+        self.th.start()
+
+    def _run(self):
+        while not self._stop:
+            if not self.sub.poll(100):
+                continue
+            topic, d = decode_frames(self.sub.recv_multipart())
+            t = time.perf_counter()
+            if not isinstance(d, dict):
+                continue
+            if topic == "cmd.move":
+                rid, mark = d.get("rid"), "bus"
+            else:
+                ev, det = d.get("event"), (d.get("detail") or {})
+                rid = det.get("rid")
+                if ev == "rx_cmd.move":
+                    mark = "rx"
+                elif ev in MOTOR_EVENTS:
+                    mark = "motor"
+                elif ev == "skip_cmd.move":
+                    with self._lock:
+                        self.skips[rid] = det.get("reason") or "?"
+                    continue
+                else:
+                    continue
+            if rid:
+                with self._lock:
+                    self.marks[rid].setdefault(mark, t)
+
+    def close(self):
+        self._stop = True
+        self.th.join(1)
+        self.sub.close(0)
+
+
+def _click(url, rid):
+    body = json.dumps({"dir": "forward", "v": 0.3, "t": 0.2, "rid": rid}).encode("utf-8")
+    req = urllib.request.Request(url, data=body, method="POST", headers={"Content-Type": "application/json"})
+    with urllib.request.urlopen(req, timeout=2.0) as r:
+        r.read()
+        return r.status
+
+
+def _web_click(url, rid):
+    with urllib.request.urlopen(f"{url}?dir=forward&v=0.3&t=0.2&rid={rid}", timeout=2.0) as r:
+        r.read()
+        return r.status
+
+
+def run_pattern(obs, name, n, entry, gap_s, burst, burst_gap_s):
+    if entry in ("api", "bus"):
+        url, fn = f"http://127.0.0.1:{API_PORT}/api/control", _click
+    else:
+        url, fn = f"http://127.0.0.1:{WEB_PORT}/api/move", _web_click
+    sent = {}
+    http_err = 0
+    for i in range(n):
+        rid = f"{name[0]}{i:05d}"
+        t0 = time.perf_counter()
+        try:
+            code = fn(url, rid)
+            if code != 200: http_err += 1
+        except Exception:
+            http_err += 1
+        sent[rid] = (t0, time.perf_counter())
+        if name == "burst":
+            time.sleep(burst_gap_s if (i + 1) % burst else gap_s)
+        else:
+            time.sleep(gap_s)
+    time.sleep(1.0)  # ogon zdarzeń
+
+    lat = {h: [] for h in HOPS}
+    cnt = collections.Counter(sent=len(sent), http_err=http_err)
+    with obs._lock:
+        marks = {rid: dict(obs.marks.get(rid, {})) for rid in sent}
+        skips = {rid: obs.skips.get(rid) for rid in sent}
+    for rid, (t0, t_resp) in sent.items():
+        m = marks[rid]
+        lat["http"].append((t_resp - t0) * 1000.0)
+        if "bus" in m: lat["to_bus"].append((m["bus"] - t0) * 1000.0)
+        if "bus" in m and "rx" in m: lat["rx"].append((m["rx"] - m["bus"]) * 1000.0)
+        if "rx" in m and "motor" in m: lat["motor"].append((m["motor"] - m["rx"]) * 1000.0)
+        if "motor" in m:
+            lat["total"].append((m["motor"] - t0) * 1000.0)
+            cnt["motor"] += 1
+        elif skips[rid]:
+            cnt[f"skip_{skips[rid]}"] += 1
+        elif "rx" not in m:
+            cnt["lost"] += 1
+    return lat, cnt
+
+
+def main():
+    ap = argparse.ArgumentParser()
+    ap.add_argument("-n", type=int, default=200, help="komend na wzorzec")
+    ap.add_argument("--patterns", default="steady,burst")
+    ap.add_argument("--entry", choices=("api", "web", "bus"), default="api",
+                    help="wejście: /api/control (HTTP do web bridge), web bridge, /api/control (RPC po magistrali)")
+    ap.add_argument("--gap-ms", type=float, default=150.0, help="odstęp steady / przerwa między paczkami")
+    ap.add_argument("--burst", type=int, default=4, help="komend w paczce")
+    ap.add_argument("--burst-gap-ms", type=float, default=30.0, help="odstęp w paczce")
+    args = ap.parse_args()
+
+    env = _env()
+    env["CONTROL_TRANSPORT"] = "bus" if args.entry == "bus" else "http"
+    procs = []
+    def spawn(*cmd):
+        procs.append(subprocess.Popen([sys.executable, *cmd], cwd=PROJ_ROOT, env=env,
+                                      stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL))
+    try:
+        spawn("services/broker.py"); time.sleep(0.5)
+        spawn("-m", "services.motion_bridge")
+        if args.entry != "bus":
+            spawn("-m", "services.web_motion_bridge")
+        if args.entry in ("api", "bus"):
+            spawn("-m", "services.api_server")
+        ok = args.entry == "bus" or _wait_http(f"http://127.0.0.1:{WEB_PORT}/healthz")
+        if args.entry in ("api", "bus"):
+            ok = ok and _wait_http(f"http://127.0.0.1:{API_PORT}/healthz")
+        if not ok:
+            print("[bench] services did not come up", file=sys.stderr); return 1
+        obs = Observer()
+        time.sleep(1.0)  # mostek: subskrypcje
+
+        print(f"entry={args.entry} transport={env.get('BUS_TRANSPORT', 'tcp')} "
+              f"MIN_CMD_GAP={env.get('MIN_CMD_GAP', '0.10')} DROP_OLD_MS={env.get('DROP_OLD_MS', '200')}")
+        print(f"{'pattern':<7} {'hop':<7} {'n':>5} {'p50ms':>8} {'p95ms':>8} {'p99ms':>8}")
+        for pat in [p.strip() for p in args.patterns.split(",") if p.strip()]:
+            lat, cnt = run_pattern(obs, pat, args.n, args.entry, args.gap_ms / 1000.0,
+                                   max(1, args.burst), args.burst_gap_ms / 1000.0)
+            for h in HOPS:
+                xs = lat[h]
+                print(f"{pat:<7} {h:<7} {len(xs):>5} {_pct(xs,50):>8.2f} {_pct(xs,95):>8.2f} {_pct(xs,99):>8.2f}")
+            print(f"{pat:<7} counts  " + " ".join(f"{k}={v}" for k, v in sorted(cnt.items())))
+        obs.close()
+    finally:
+        for p in reversed(procs):
+            p.terminate()
+            try: p.wait(3)
+            except Exception: p.kill()
+        shutil.rmtree(IPC_DIR, ignore_errors=True)
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
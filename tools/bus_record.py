@@ -0,0 +1,235 @@
+#!/usr/bin/env python3
+"""
+Nagrywanie ruchu magistrali do logu (append-only) + indeks czasu.
+
+Format <plik>.buslog:
+  nagłówek  b"RBUSLOG1"
+  rekord    <I len> <d ts> <H nframes> ( <I flen> <frame bytes> ) * nframes
+            len = długość rekordu bez pola len; ramki zapisane surowo (bez dekodowania),
+            więc replay odtwarza dokładnie ten sam kształt (multipart / single-frame, json / msgpack)
+Indeks <plik>.buslog.idx: <d ts> <Q offset> na każdy rekord (bisect po czasie).
+Odczyt przez mmap (BusLogReader) — bez kopiowania całego pliku.
+
+Użycie:
+  python3 tools/bus_record.py data/bus/run1.buslog                   # wszystkie tematy
+  python3 tools/bus_record.py run1.buslog -t cmd. -t motion. -d 60   # filtr, 60 s
+  python3 tools/bus_record.py run1.buslog --info                     # podsumowanie nagrania
+"""
+import os, sys, time, mmap, struct, bisect, argparse, collections
+from typing import Iterator, List, Optional, Sequence, Tuple
+
+PROJ_ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+if PROJ_ROOT not in sys.path:
+    sys.path.insert(0, PROJ_ROOT)
+
+MAGIC = b"RBUSLOG1"
+_REC = struct.Struct("<IdH")    # len, ts, nframes
+_FRM = struct.Struct("<I")      # frame len
+_IDX = struct.Struct("<dQ")     # ts, offset
+
+Record = Tuple[float, List[bytes]]
+
+
+class BusLogWriter:
+    """Dopisuje rekordy do logu + indeksu; flush co `flush_every` rekordów."""
+
+    def __init__(self, path: str, flush_every: int = 64):
+        self.path = path
+        d = os.path.dirname(os.path.abspath(path))
+        os.makedirs(d, exist_ok=True)
+        new = not os.path.exists(path) or os.path.getsize(path) == 0
+        if not new:
+            with open(path, "rb") as f:
+                if f.read(len(MAGIC)) != MAGIC:
+                    raise ValueError(f"{path}: not a bus log")
+        self.f = open(path, "ab")
+        self.fi = open(path + ".idx", "ab")
+        if new:
+            self.f.write(MAGIC)
+        self.flush_every = max(1, int(flush_every))
+        self.count = 0
+
+    def append(self, frames: Sequence[bytes], ts: Optional[float] = None) -> int:
+        ts = time.time() if ts is None else float(ts)
+        body = b"".join(_FRM.pack(len(fr)) + bytes(fr) for fr in frames)
+        off = self.f.tell()
+        self.f.write(_REC.pack(_REC.size - 4 + len(body), ts, len(frames)))
+        self.f.write(body)
+        self.fi.write(_IDX.pack(ts, off))
+        self.count += 1
+        if self.count % self.flush_every == 0:
+            self.flush()
+        return off
+
+    def flush(self) -> None:
+        self.f.flush()
+        self.fi.flush()
+
+    def close(self) -> None:
+        self.flush()
+        self.f.close()
+        self.fi.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+
+class BusLogReader:
+    """
+    Odczyt przez mmap. Indeks (.idx) jest opcjonalny — gdy brak lub niepełny,
+    odbudowywany w pamięci jednym przebiegiem po logu. Urwany ostatni rekord
+    (np. kill w trakcie zapisu) jest pomijany.
+    """
+
+    def __init__(self, path: str):
+        self.path = path
+        self._f = open(path, "rb")
+        size = os.fstat(self._f.fileno()).st_size
+        if size < len(MAGIC):
+            raise ValueError(f"{path}: not a bus log")
+        self.mm = mmap.mmap(self._f.fileno(), 0, access=mmap.ACCESS_READ)
+        if self.mm[:len(MAGIC)] != MAGIC:
+            self.close()
+            raise ValueError(f"{path}: not a bus log")
+        self.ts, self.offsets = self._load_index()
+
+    def _load_index(self) -> Tuple[List[float], List[int]]:
+        ts: List[float] = []
+        offs: List[int] = []
+        ipath = self.path + ".idx"
+        if os.path.exists(ipath):
+            with open(ipath, "rb") as fi:
+                raw = fi.read()
+            for i in range(len(raw) // _IDX.size):
+                t, off = _IDX.unpack_from(raw, i * _IDX.size)
+                if off + _REC.size > len(self.mm):
+                    break
+                ts.append(t); offs.append(off)
+        # dopełnij skanem od ostatniego znanego rekordu (brak/niepełny indeks)
+        pos = len(MAGIC) if not offs else offs[-1]
+        if offs:
+            pos += 4 + _REC.unpack_from(self.mm, pos)[0]
+        while pos + _REC.size <= len(self.mm):
+            ln, t, _ = _REC.unpack_from(self.mm, pos)
+            if pos + 4 + ln > len(self.mm):
+                break
+            ts.append(t); offs.append(pos)
+            pos += 4 + ln
+        # ostatni rekord z indeksu może być urwany
+        while offs and offs[-1] + 4 + _REC.unpack_from(self.mm, offs[-1])[0] > len(self.mm):
+            ts.pop(); offs.pop()
+        return ts, offs
+
+    def __len__(self) -> int:
+        return len(self.offsets)
+
+    def read_at(self, off: int) -> Record:
+        _, t, n = _REC.unpack_from(self.mm, off)
+        pos = off + _REC.size
+        frames = []
+        for _ in range(n):
+            (fl,) = _FRM.unpack_from(self.mm, pos)
+            pos += _FRM.size
+            frames.append(self.mm[pos:pos + fl])
+            pos += fl
+        return t, frames
+
+    def index_at(self, ts: float) -> int:
+        """Indeks pierwszego rekordu z ts >= podany (bisect po indeksie)."""
+        return bisect.bisect_left(self.ts, ts)
+
+    def records(self, t_from: Optional[float] = None, t_to: Optional[float] = None) -> Iterator[Record]:
+        i = self.index_at(t_from) if t_from is not None else 0
+        while i < len(self.offsets):
+            if t_to is not None and self.ts[i] > t_to:
+                return
+            yield self.read_at(self.offsets[i])
+            i += 1
+
+    def close(self) -> None:
+        try: self.mm.close()
+        except Exception: pass
+        try: self._f.close()
+        except Exception: pass
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+
+def _topic_of(frames: Sequence[bytes]) -> str:
+    from common.bus import split_frames
+    return split_frames(frames)[0]
+
+
+def info(path: str) -> None:
+    with BusLogReader(path) as r:
+        if not len(r):
+            print(f"{path}: empty"); return
+        per = collections.Counter()
+        nbytes = collections.Counter()
+        for _, frames in r.records():
+            t = _topic_of(frames)
+            per[t] += 1
+            nbytes[t] += sum(len(f) for f in frames)
+        span = r.ts[-1] - r.ts[0]
+        print(f"{path}: {len(r)} msgs, {span:.2f} s, "
+              f"{time.strftime('%Y-%m-%d %H:%M:%S', time.localtime(r.ts[0]))}")
+        for t, n in per.most_common():
+            print(f"  {t:<36} {n:>7}  {n / span if span > 0 else 0:>8.1f}/s  {nbytes[t]:>10} B")
+
+
+def record(path: str, topics: Sequence[str], duration: Optional[float], max_msgs: Optional[int]) -> int:
+    import zmq
+    from common.bus import bus_endpoint, connect_and_wait
+
+    ctx = zmq.Context.instance()
+    sub = ctx.socket(zmq.SUB)
+    sub.setsockopt(zmq.LINGER, 0)
+    addr = bus_endpoint("sub")
+    connect_and_wait(sub, addr, 1000)
+    for t in (topics or [""]):
+        sub.setsockopt(zmq.SUBSCRIBE, t.encode("utf-8"))
+    print(f"[record] {addr} topics={list(topics) or ['*']} → {path}", flush=True)
+
+    n = 0
+    t_end = (time.time() + duration) if duration else None
+    with BusLogWriter(path) as w:
+        try:
+            while True:
+                if t_end is not None and time.time() >= t_end:
+                    break
+                if max_msgs is not None and n >= max_msgs:
+                    break
+                if not sub.poll(200):
+                    continue
+                w.append(sub.recv_multipart())
+                n += 1
+        except KeyboardInterrupt:
+            pass
+    sub.close(0)
+    print(f"[record] {n} msgs", flush=True)
+    return n
+
+
+def main():
+    ap = argparse.ArgumentParser(description="Nagrywanie magistrali do .buslog")
+    ap.add_argument("path")
+    ap.add_argument("-t", "--topic", action="append", default=[], help="prefiks tematu (wielokrotnie); brak = wszystko")
+    ap.add_argument("-d", "--duration", type=float, default=None, help="czas nagrania [s]")
+    ap.add_argument("-n", "--max", type=int, default=None, help="maks. liczba wiadomości")
+    ap.add_argument("--info", action="store_true", help="tylko podsumuj istniejące nagranie")
+    args = ap.parse_args()
+    if args.info:
+        info(args.path)
+    else:
+        record(args.path, args.topic, args.duration, args.max)
+
+
+if __name__ == "__main__":
+    main()
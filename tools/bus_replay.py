@@ -0,0 +1,128 @@
+#!/usr/bin/env python3
+"""
+Odtwarzanie nagrania .buslog (tools/bus_record.py) na magistralę.
+
+Harmonogram liczony od startu (bez dryfu): wiadomość i idzie w chwili
+  t0 + (ts_i - ts_0) / speed
+więc bridge / dispatcher / bus_sub_loop API dostają identyczny, powtarzalny ruch.
+
+Użycie:
+  python3 tools/bus_replay.py run1.buslog                 # 1x
+  python3 tools/bus_replay.py run1.buslog --speed 4       # 4x
+  python3 tools/bus_replay.py run1.buslog --speed 0       # max (bez czekania)
+  python3 tools/bus_replay.py run1.buslog -t cmd. --retime --loop 3
+Opcje:
+  --retime   przesuwa pole "ts" w payloadach dict na „teraz” (inaczej bridge odrzuci
+             stare komendy przez DROP_OLD_MS); wymaga dekodowania → wolniej przy --speed 0
+  --from/--to  sekundy od początku nagrania
+"""
+import os, sys, time, argparse
+from typing import Callable, Dict, List, Optional, Sequence
+
+PROJ_ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+if PROJ_ROOT not in sys.path:
+    sys.path.insert(0, PROJ_ROOT)
+
+from tools.bus_record import BusLogReader
+
+
+def _retime(frames: List[bytes], shift: float) -> List[bytes]:
+    """Przesuń payload["ts"] o shift, zachowując kodek i układ ramek nagrania."""
+    from common.bus import split_frames, payload_codec, encode_frames
+    topic, body = split_frames(frames)
+    try:
+        codec = payload_codec(body)
+        data = codec.decode(body[2:] if codec.tag is not None else body)
+    except Exception:
+        return frames
+    if not isinstance(data, dict) or not isinstance(data.get("ts"), (int, float)):
+        return frames
+    data = dict(data)
+    data["ts"] = float(data["ts"]) + shift
+    out = encode_frames(topic, data, codec)
+    if len(frames) == 1:
+        # legacy single-frame "topic payload" zostaje pojedynczą ramką
+        return [out[0] + b" " + out[1]]
+    return out
+
+
+def replay(reader: BusLogReader, send: Callable[[List[bytes]], None], speed: float = 1.0,
+           topics: Sequence[str] = (), t_from: Optional[float] = None, t_to: Optional[float] = None,
+           retime: bool = False, clock: Callable[[], float] = time.perf_counter,
+           sleep: Callable[[float], None] = time.sleep) -> Dict[str, float]:
+    """
+    Wyślij rekordy przez send(frames). speed<=0 → bez czekania.
+    Zwraca statystyki: sent, skipped, elapsed_s, lag_p50_ms/lag_max_ms (spóźnienie względem planu).
+    """
+    if not len(reader):
+        return {"sent": 0, "skipped": 0, "elapsed_s": 0.0, "lag_p50_ms": 0.0, "lag_max_ms": 0.0}
+    base = reader.ts[0]
+    lo = base + t_from if t_from is not None else None
+    hi = base + t_to if t_to is not None else None
+    prefixes = tuple(t.encode("utf-8") for t in topics)
+
+    sent = skipped = 0
+    lags: List[float] = []
+    t0 = clock()
+    rec0: Optional[float] = None
+    for ts, frames in reader.records(lo, hi):
+        if prefixes and not frames[0].startswith(prefixes):
+            skipped += 1
+            continue
+        if rec0 is None:
+            rec0 = ts
+        if speed > 0:
+            due = t0 + (ts - rec0) / speed
+            left = due - clock()
+            if left > 0:
+                sleep(left)
+            lags.append(max(0.0, clock() - due) * 1000.0)
+        if retime:
+            # wiek payloadu względem chwili nagrania zostaje zachowany
+            frames = _retime(frames, time.time() - ts)
+        send(frames)
+        sent += 1
+    lags.sort()
+    return {
+        "sent": sent, "skipped": skipped, "elapsed_s": round(clock() - t0, 4),
+        "lag_p50_ms": round(lags[len(lags) // 2], 3) if lags else 0.0,
+        "lag_max_ms": round(lags[-1], 3) if lags else 0.0,
+    }
+
+
+def main():
+    ap = argparse.ArgumentParser(description="Odtwarzanie .buslog na magistralę")
+    ap.add_argument("path")
+    ap.add_argument("--speed", type=float, default=1.0, help="1=czas rzeczywisty, N=N-krotnie, 0=max")
+    ap.add_argument("-t", "--topic", action="append", default=[], help="prefiks tematu (wielokrotnie)")
+    ap.add_argument("--from", dest="t_from", type=float, default=None, help="start [s od początku]")
+    ap.add_argument("--to", dest="t_to", type=float, default=None, help="koniec [s od początku]")
+    ap.add_argument("--retime", action="store_true", help="przesuń payload['ts'] na bieżący czas")
+    ap.add_argument("--loop", type=int, default=1, help="ile razy powtórzyć")
+    args = ap.parse_args()
+
+    import zmq
+    from common.bus import bus_endpoint, connect_and_wait
+
+    ctx = zmq.Context.instance()
+    pub = ctx.socket(zmq.PUB)
+    pub.setsockopt(zmq.LINGER, 1000)
+    pub.setsockopt(zmq.SNDHWM, 0)  # replay nie gubi po stronie nadawcy
+    addr = bus_endpoint("pub")
+    connect_and_wait(pub, addr, 1000)
+    time.sleep(0.2)  # subskrypcje z brokera
+
+    with BusLogReader(args.path) as r:
+        print(f"[replay] {args.path}: {len(r)} msgs → {addr} speed={args.speed or 'max'}", flush=True)
+        for i in range(max(1, args.loop)):
+            st = replay(r, pub.send_multipart, speed=args.speed, topics=args.topic,
+                        t_from=args.t_from, t_to=args.t_to, retime=args.retime)
+            rate = st["sent"] / st["elapsed_s"] if st["elapsed_s"] > 0 else float("inf")
+            print(f"[replay] pass {i + 1}: sent={st['sent']} skipped={st['skipped']} "
+                  f"elapsed={st['elapsed_s']:.3f}s ({rate:.0f} msg/s) "
+                  f"lag p50={st['lag_p50_ms']}ms max={st['lag_max_ms']}ms", flush=True)
+    pub.close()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,299 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+xgo_emulator — udawany kontroler XGO na pseudo-terminalu (pty), do testów i benchmarków bez robota.
+
+Mówi protokołem ramek z xgolib / tools/xgo_client_ro.py (kodek: apps/motion/xgo_proto.py):
+  0x55 0x00 LEN TYPE ADDR <payload: LEN-8 B> CHK 0x00 0xAA,  CHK = 255 - (LEN+TYPE+ADDR+Σpayload) % 256
+  TYPE 0x02 (READ)  : payload = [read_len] → odpowiedź z read_len bajtami rejestru ADDR
+  TYPE 0x01 (WRITE) : payload = wartości od rejestru ADDR (bez odpowiedzi, jak w xgolib)
+
+Rejestry odczytu: bateria 0x01, firmware 0x07, roll/pitch/yaw 0x62–0x64 (float),
+IMU 0x65 (6×int16 + 3×float), roll/pitch/yaw int16 0x66–0x68.
+Zapis ruchu: VX 0x30, VY 0x31, VYAW 0x32 (u8, 128 = zero) — z nich liczony jest
+kurs (yaw całkowany w czasie) i lekkie przechyły; 0x3E (ACTION) i reszta są przyjmowane bez efektu.
+
+Opóźnienie odpowiedzi (--latency-ms, --jitter-ms), czas linii dla --baud (10 bitów/bajt
+w obie strony), szum IMU (--noise-deg) i błędy: brak odpowiedzi (--drop), zła suma
+kontrolna (--corrupt), śmieci przed ramką (--garbage) — prawdopodobieństwa 0..1.
+
+Użycie:
+  python3 tools/xgo_emulator.py --link /tmp/ttyXGO --latency-ms 3
+  XGO_PORT=/tmp/ttyXGO python3 services/motion_bridge.py          # z xgolib (bez XGO_FAKE)
+  python3 tools/xgo_client_ro.py --port /tmp/ttyXGO --loop        # XGOClientRO
+  XGO_PORT=/tmp/ttyXGO ... services/api_server.py                 # xgo_ro_loop w API
+  XGO_PORT=/tmp/ttyXGO python3 services/xgo_uart.py              # demon-właściciel portu (klienci: XGO_UART=1)
+  python3 tools/xgo_emulator.py --bench 500 --latency-ms 2        # własny klient: round-trip p50/p95
+"""
+import os, sys, time, math, struct, random, select, threading, tty, argparse
+from typing import Dict, Optional, Tuple
+
+PROJ_ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+if PROJ_ROOT not in sys.path:
+    sys.path.insert(0, PROJ_ROOT)
+
+# ramki i rejestry wspólne z demonem portu (services/xgo_uart.py)
+from apps.motion.xgo_proto import (REG_BATTERY, REG_FIRMWARE, REG_IMU_FLOATS, REG_PITCH,  # noqa: E402,F401
+                                   REG_PITCH_I16, REG_ROLL, REG_ROLL_I16, REG_VX, REG_VY, REG_VYAW,
+                                   REG_YAW, REG_YAW_I16, TYPE_READ, TYPE_WRITE, FrameParser, checksum,
+                                   encode_frame, read_frame)
+
+
+def _u8_to_norm(v: int) -> float:
+    return max(-1.0, min(1.0, (int(v) - 128) / 127.0))
+
+
+def _wrap180(deg: float) -> float:
+    return (deg + 180.0) % 360.0 - 180.0
+
+
+class XgoState:
+    """Stan robota: prędkości z zapisów VX/VY/VYAW, kurs całkowany przy każdym odczycie."""
+
+    def __init__(self, yaw_rate_dps: float = 90.0, battery: int = 87, firmware: str = "EMU-1.0",
+                 drain_pct_min: float = 0.0, noise_deg: float = 0.0, rng: Optional[random.Random] = None):
+        self.yaw_rate_dps = float(yaw_rate_dps)
+        self.battery = float(battery)
+        self.firmware = firmware
+        self.drain_pct_min = float(drain_pct_min)
+        self.noise_deg = float(noise_deg)
+        self.rng = rng or random.Random()
+        self.vx = self.vy = self.vyaw = 0.0
+        self.yaw = 0.0
+        self.ts = time.monotonic()
+
+    def step(self, now: Optional[float] = None) -> None:
+        now = time.monotonic() if now is None else now
+        dt = max(0.0, now - self.ts)
+        self.ts = now
+        self.yaw = _wrap180(self.yaw + self.vyaw * self.yaw_rate_dps * dt)
+        self.battery = max(0.0, self.battery - self.drain_pct_min * dt / 60.0)
+
+    def write(self, addr: int, values: bytes) -> None:
+        self.step()
+        regs = {REG_VX: "vx", REG_VY: "vy", REG_VYAW: "vyaw"}
+        for k, v in enumerate(values):
+            name = regs.get(addr + k)
+            if name:
+                setattr(self, name, _u8_to_norm(v))
+
+    def _noise(self) -> float:
+        return self.rng.gauss(0.0, self.noise_deg) if self.noise_deg > 0 else 0.0
+
+    def attitude(self) -> Tuple[float, float, float]:
+        self.step()
+        roll = 2.0 * self.vy + self._noise()
+        pitch = -3.0 * self.vx + self._noise()
+        return roll, pitch, _wrap180(self.yaw + self._noise())
+
+    def register(self, addr: int, n: int) -> Optional[bytes]:
+        """Zawartość rejestru w kodowaniu XGOClientRO (None = nieznany adres)."""
+        if addr == REG_BATTERY:
+            self.step()
+            data = bytes([int(round(self.battery)) & 0xFF])
+        elif addr == REG_FIRMWARE:
+            data = self.firmware.encode("ascii")[:10].ljust(10, b"\x00")
+        elif addr in (REG_ROLL, REG_PITCH, REG_YAW):
+            v = self.attitude()[addr - REG_ROLL]
+            data = struct.pack("<f", v)  # klient odwraca bajty i czyta "!f"
+        elif addr in (REG_ROLL_I16, REG_PITCH_I16, REG_YAW_I16):
+            v = self.attitude()[addr - REG_ROLL_I16]
+            data = struct.pack(">h", int(round(v)))
+        elif addr == REG_IMU_FLOATS:
+            roll, pitch, yaw = self.attitude()
+            acc = (0, 0, 16384)  # 1 g w osi z
+            gyro = (0, 0, int(self.vyaw * self.yaw_rate_dps * 16.4))
+            data = struct.pack("<6h", *acc, *gyro) + struct.pack(">3f", *(math.radians(x) for x in (roll, pitch, yaw)))
+        else:
+            return None
+        return data[:n].ljust(n, b"\x00")
+
+
+class XgoEmulator:
+    """pty + wątek obsługi ramek. port = ścieżka urządzenia dla klienta (lub link)."""
+
+    def __init__(self, latency_ms: float = 2.0, jitter_ms: float = 0.0, baud: int = 0,
+                 noise_deg: float = 0.0, drop: float = 0.0, corrupt: float = 0.0, garbage: float = 0.0,
+                 yaw_rate_dps: float = 90.0, battery: int = 87, firmware: str = "EMU-1.0",
+                 drain_pct_min: float = 0.0, link: Optional[str] = None, seed: Optional[int] = None):
+        self.latency_s = max(0.0, latency_ms) / 1000.0
+        self.jitter_s = max(0.0, jitter_ms) / 1000.0
+        self.byte_s = 10.0 / baud if baud > 0 else 0.0
+        self.drop, self.corrupt, self.garbage = drop, corrupt, garbage
+        self.rng = random.Random(seed)
+        self.state = XgoState(yaw_rate_dps, battery, firmware, drain_pct_min, noise_deg, self.rng)
+        self.stats: Dict[str, int] = {"rx_frames": 0, "tx_frames": 0, "writes": 0, "reads": 0,
+                                      "bad_chk_in": 0, "unknown_reg": 0, "dropped": 0,
+                                      "corrupted": 0, "garbage": 0}
+        self._master, self._slave = os.openpty()
+        tty.setraw(self._slave)
+        self.port = os.ttyname(self._slave)
+        self.link = link
+        if link:
+            try: os.unlink(link)
+            except FileNotFoundError: pass
+            os.symlink(self.port, link)
+        self._parser = FrameParser()
+        self._stop = threading.Event()
+        self._th: Optional[threading.Thread] = None
+
+    @property
+    def path(self) -> str:
+        return self.link or self.port
+
+    def start(self) -> "XgoEmulator":
+        if self._th is None:
+            self._th = threading.Thread(target=self._run, name="xgo-emulator", daemon=True)
+            self._th.start()
+        return self
+
+    def stop(self) -> None:
+        self._stop.set()
+        if self._th is not None:
+            self._th.join(1.0)
+            self._th = None
+        for fd in (self._master, self._slave):
+            try: os.close(fd)
+            except OSError: pass
+        if self.link:
+            try: os.unlink(self.link)
+            except OSError: pass
+
+    def __enter__(self): return self.start()
+    def __exit__(self, *exc): self.stop()
+
+    # ── obsługa ─────────────────────────────────────────────────────────────
+    def _send(self, data: bytes) -> None:
+        if self.byte_s:
+            time.sleep(len(data) * self.byte_s)
+        os.write(self._master, data)
+
+    def _handle(self, type_: int, addr: int, payload: bytes, ok: bool, rx_bytes: int) -> None:
+        self.stats["rx_frames"] += 1
+        if not ok:
+            self.stats["bad_chk_in"] += 1
+            return
+        if type_ == TYPE_WRITE:
+            self.stats["writes"] += 1
+            self.state.write(addr, payload)
+            return
+        if type_ != TYPE_READ or not payload:
+            return
+        self.stats["reads"] += 1
+        data = self.state.register(addr, payload[0])
+        if data is None:
+            self.stats["unknown_reg"] += 1
+            return
+        delay = self.latency_s + (self.rng.uniform(0.0, self.jitter_s) if self.jitter_s else 0.0)
+        delay += rx_bytes * self.byte_s  # czas nadania zapytania po linii
+        if delay:
+            time.sleep(delay)
+        if self.drop and self.rng.random() < self.drop:
+            self.stats["dropped"] += 1
+            return
+        out = bytearray(encode_frame(TYPE_READ, addr, data))
+        if self.corrupt and self.rng.random() < self.corrupt:
+            out[-3] ^= 0xFF
+            self.stats["corrupted"] += 1
+        if self.garbage and self.rng.random() < self.garbage:
+            out[:0] = bytes(self.rng.randrange(256) for _ in range(self.rng.randint(1, 8)))
+            self.stats["garbage"] += 1
+        self._send(bytes(out))
+        self.stats["tx_frames"] += 1
+
+    def _run(self) -> None:
+        while not self._stop.is_set():
+            try:
+                r, _, _ = select.select([self._master], [], [], 0.2)
+                if not r:
+                    continue
+                chunk = os.read(self._master, 4096)
+            except OSError:
+                return
+            for type_, addr, payload, ok in self._parser.feed(chunk):
+                self._handle(type_, addr, payload, ok, len(payload) + 9)
+
+
+# ── prosty klient (bez pyserial) do benchmarku samego emulatora ────────────────
+def request(fd: int, addr: int, n: int, timeout: float = 1.0) -> Optional[bytes]:
+    os.write(fd, read_frame(addr, n))
+    parser = FrameParser()
+    deadline = time.monotonic() + timeout
+    while True:
+        left = deadline - time.monotonic()
+        if left <= 0:
+            return None
+        r, _, _ = select.select([fd], [], [], left)
+        if not r:
+            return None
+        for type_, a, payload, ok in parser.feed(os.read(fd, 4096)):
+            if ok and a == addr:
+                return payload
+            if not ok:
+                return None
+
+
+def open_client(path: str) -> int:
+    fd = os.open(path, os.O_RDWR | os.O_NOCTTY)
+    tty.setraw(fd)
+    return fd
+
+
+def _bench(emu: XgoEmulator, n: int) -> None:
+    fd = open_client(emu.path)
+    regs = [(REG_BATTERY, 1), (REG_ROLL, 4), (REG_PITCH, 4), (REG_YAW, 4), (REG_IMU_FLOATS, 24)]
+    lat, fail = [], 0
+    try:
+        for i in range(n):
+            addr, ln = regs[i % len(regs)]
+            t0 = time.perf_counter()
+            if request(fd, addr, ln, timeout=0.5) is None:
+                fail += 1
+            else:
+                lat.append((time.perf_counter() - t0) * 1000.0)
+    finally:
+        os.close(fd)
+    lat.sort()
+    pick = lambda p: lat[min(len(lat) - 1, int(p * len(lat)))] if lat else float("nan")
+    print(f"reads={n} ok={len(lat)} fail={fail} p50={pick(0.5):.2f}ms p95={pick(0.95):.2f}ms "
+          f"p99={pick(0.99):.2f}ms stats={emu.stats}")
+
+
+def main() -> int:
+    ap = argparse.ArgumentParser(description="XGO serial emulator (pty)")
+    ap.add_argument("--link", default=os.getenv("XGO_EMU_LINK"), help="symlink do pty, np. /tmp/ttyXGO")
+    ap.add_argument("--latency-ms", type=float, default=2.0)
+    ap.add_argument("--jitter-ms", type=float, default=0.0)
+    ap.add_argument("--baud", type=int, default=115200, help="0 = bez emulacji czasu linii")
+    ap.add_argument("--noise-deg", type=float, default=0.0)
+    ap.add_argument("--drop", type=float, default=0.0)
+    ap.add_argument("--corrupt", type=float, default=0.0)
+    ap.add_argument("--garbage", type=float, default=0.0)
+    ap.add_argument("--yaw-rate-dps", type=float, default=90.0, help="kurs przy VYAW=max")
+    ap.add_argument("--battery", type=int, default=87)
+    ap.add_argument("--drain-pct-min", type=float, default=0.0)
+    ap.add_argument("--seed", type=int, default=None)
+    ap.add_argument("--bench", type=int, default=0, help="N odczytów własnym klientem i koniec")
+    ap.add_argument("--stats-s", type=float, default=10.0)
+    args = ap.parse_args()
+
+    emu = XgoEmulator(args.latency_ms, args.jitter_ms, args.baud, args.noise_deg, args.drop,
+                      args.corrupt, args.garbage, args.yaw_rate_dps, args.battery,
+                      drain_pct_min=args.drain_pct_min, link=args.link, seed=args.seed).start()
+    try:
+        if args.bench:
+            _bench(emu, args.bench)
+            return 0
+        print(f"[xgo-emu] port={emu.port}" + (f" link={emu.link}" if emu.link else ""), flush=True)
+        while True:
+            time.sleep(args.stats_s)
+            st = emu.state
+            print(f"[xgo-emu] {emu.stats} yaw={st.yaw:.1f} v=({st.vx:.2f},{st.vy:.2f},{st.vyaw:.2f})", flush=True)
+    except KeyboardInterrupt:
+        return 0
+    finally:
+        emu.stop()
+
+
+if __name__ == "__main__":
+    sys.exit(main())